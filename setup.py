@@ -17,6 +17,7 @@ setup(
     url="https://github.com/darwinjhm/Franquicias",
     packages=find_packages(where="src"),
     package_dir={"": "src"},
+    package_data={"api_franquicias": ["migrations/script.py.mako", "migrations/versions/*.py"]},
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -42,6 +43,9 @@ setup(
             "isort>=5.12.0",
             "mypy>=1.7.1",
         ],
+        "arrow": [
+            "pyarrow>=14.0.0",
+        ],
         "docs": [
             "mkdocs>=1.5.3",
             "mkdocs-material>=9.4.8",
@@ -1,8 +1,12 @@
 """
-Punto de entrada para ejecutar la aplicación como módulo Python
+Punto de entrada para ejecutar la aplicación como módulo Python.
+
+Sin argumentos inicia el servidor; ver ``cli.py`` para el resto de comandos.
 """
 
-from .main import main
+import sys
+
+from .cli import main
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""
+Línea de comandos del sistema de franquicias.
+
+Uso::
+
+    python -m api_franquicias                      # inicia el servidor
+    python -m api_franquicias import inventario.csv [--format csv|ndjson]
+                                                   [--sucursal-id N] [--batch-size N]
+    python -m api_franquicias export inventario.parquet [--format parquet|arrow|csv|ndjson]
+                                                        [--franquicia-id N] [--batch-size N]
+
+Los comandos aplican las migraciones pendientes y usan la misma
+configuración de base de datos que la aplicación (variables de entorno o
+``.env``).
+
+``import`` escribe el avance y las filas rechazadas en la salida de error;
+el código de salida es 1 si alguna fila fue rechazada. ``export`` escribe
+el inventario por lotes, sin cargarlo en memoria: ``parquet`` y ``arrow``
+con cada producto unido a su sucursal y franquicia, ``csv`` y ``ndjson``
+con las columnas de ``/api/productos/export``.
+
+Autor: Darwin Hurtado
+Fecha: 2024
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from typing import AsyncIterator, BinaryIO, List, Optional, TextIO, Tuple, Union
+from . import database
+from .config import settings
+from .database import DbSession
+from .schemas import FormatoColumnar, FormatoInventario
+from .services.exportacion import exportar_productos
+from .services.exportacion_columnar import exportar_inventario, requerir_pyarrow
+from .services.importacion import TareaImportacion, ejecutar_importacion
+
+# Extensiones de archivo reconocidas como NDJSON; el resto se lee como CSV
+EXTENSIONES_NDJSON = (".ndjson", ".jsonl")
+
+# Formatos de exportación por extensión de archivo
+FORMATOS_EXPORTACION = {
+    ".parquet": FormatoColumnar.PARQUET,
+    ".arrow": FormatoColumnar.ARROW,
+    ".arrows": FormatoColumnar.ARROW,
+    ".csv": FormatoInventario.CSV,
+    ".ndjson": FormatoInventario.NDJSON,
+    ".jsonl": FormatoInventario.NDJSON,
+}
+
+FormatoExportacion = Union[FormatoColumnar, FormatoInventario]
+
+
+def formato_por_extension(ruta: str) -> FormatoInventario:
+    """Formato de un archivo de inventario según su extensión"""
+    if ruta.lower().endswith(EXTENSIONES_NDJSON):
+        return FormatoInventario.NDJSON
+    return FormatoInventario.CSV
+
+
+def formato_exportacion(nombre: str) -> FormatoExportacion:
+    """Formato de exportación por su nombre (parquet, arrow, csv o ndjson)"""
+    for formato in (*FormatoColumnar, *FormatoInventario):
+        if formato.value == nombre:
+            return formato
+    raise ValueError(f"Formato de exportación no soportado: '{nombre}'")
+
+
+async def abrir_sesion() -> DbSession:
+    """Aplica las migraciones pendientes y abre una sesión (síncrona o asíncrona)"""
+    if settings.database_async:
+        await database.migrate_async()
+        return database.AsyncSessionLocal()
+    database.migrate()
+    return database.SessionLocal()
+
+
+async def importar(ruta: str, formato: FormatoInventario, tamano_lote: int,
+                   sucursal_id: Optional[int] = None, salida: Optional[TextIO] = None) -> TareaImportacion:
+    """
+    Importa un archivo de inventario mostrando el avance en ``salida``.
+
+    Args:
+        ruta (str): Ruta del archivo, o ``-`` para la entrada estándar
+        formato (FormatoInventario): csv o ndjson
+        tamano_lote (int): Filas importadas por transacción
+        sucursal_id (Optional[int]): Sucursal de las filas que no la indican
+        salida (Optional[TextIO]): Destino del avance y de las filas
+            rechazadas (por defecto, la salida de error)
+
+    Returns:
+        TareaImportacion: Tarea terminada, con el resumen de la importación
+    """
+    salida = salida or sys.stderr
+    db = await abrir_sesion()
+
+    archivo = sys.stdin.buffer if ruta == "-" else open(ruta, "rb")
+    bytes_total = 0 if ruta == "-" else os.fstat(archivo.fileno()).st_size
+    tarea = TareaImportacion(formato, tamano_lote, bytes_total)
+
+    def al_avanzar(tarea: TareaImportacion, rechazadas: List[Tuple[int, str]]) -> None:
+        for linea, error in rechazadas:
+            print(f"línea {linea}: {error}", file=salida)
+        print(
+            f"{tarea.progreso:6.2f}%  filas: {tarea.filas_procesadas}  "
+            f"importados: {tarea.importados}  errores: {tarea.errores}",
+            file=salida
+        )
+
+    try:
+        await ejecutar_importacion(tarea, archivo, db, sucursal_id, al_avanzar)
+    finally:
+        await database.dispose_async_engines()
+    return tarea
+
+
+async def exportar(ruta: str, formato: FormatoExportacion, tamano_lote: int,
+                   franquicia_id: Optional[int] = None) -> int:
+    """
+    Exporta el inventario a un archivo, por lotes.
+
+    Args:
+        ruta (str): Ruta del archivo, o ``-`` para la salida estándar
+        formato (FormatoExportacion): parquet, arrow, csv o ndjson
+        tamano_lote (int): Filas leídas y escritas por lote
+        franquicia_id (Optional[int]): Restringe la exportación a una franquicia
+
+    Returns:
+        int: Bytes escritos
+
+    Raises:
+        RuntimeError: Si el formato es columnar y pyarrow no está instalado
+    """
+    if isinstance(formato, FormatoColumnar):
+        requerir_pyarrow()
+    db = await abrir_sesion()
+    if isinstance(formato, FormatoColumnar):
+        partes: AsyncIterator[bytes] = exportar_inventario(db, formato, tamano_lote, franquicia_id)
+    else:
+        partes = exportar_productos(db, formato, tamano_lote, franquicia_id)
+
+    archivo: BinaryIO = sys.stdout.buffer if ruta == "-" else open(ruta, "wb")
+    escritos = 0
+    try:
+        async for parte in partes:
+            archivo.write(parte)
+            escritos += len(parte)
+    finally:
+        if archivo is not sys.stdout.buffer:
+            archivo.close()
+        await database.dispose_async_engines()
+    return escritos
+
+
+def crear_parser() -> argparse.ArgumentParser:
+    """Parser de los argumentos de la línea de comandos"""
+    parser = argparse.ArgumentParser(
+        prog="python -m api_franquicias", description=settings.app_description
+    )
+    comandos = parser.add_subparsers(dest="comando")
+    comandos.add_parser("serve", help="Inicia el servidor (comando por defecto)")
+
+    importacion = comandos.add_parser("import", help="Importa un inventario CSV o NDJSON")
+    importacion.add_argument("archivo", help="Ruta del archivo, o - para la entrada estándar")
+    importacion.add_argument(
+        "--format", dest="formato", choices=[formato.value for formato in FormatoInventario],
+        help="Formato del archivo (por defecto según la extensión: .ndjson/.jsonl o csv)"
+    )
+    importacion.add_argument(
+        "--sucursal-id", type=int, help="Sucursal de las filas que no indican sucursal_id"
+    )
+    importacion.add_argument(
+        "--batch-size", dest="tamano_lote", type=int, default=settings.import_batch_size,
+        help="Filas importadas por transacción"
+    )
+
+    exportacion = comandos.add_parser("export", help="Exporta el inventario (Parquet, Arrow, CSV o NDJSON)")
+    exportacion.add_argument("archivo", help="Ruta del archivo, o - para la salida estándar")
+    exportacion.add_argument(
+        "--format", dest="formato",
+        choices=[formato.value for formato in (*FormatoColumnar, *FormatoInventario)],
+        help="Formato del archivo (por defecto según la extensión; parquet si no se reconoce)"
+    )
+    exportacion.add_argument("--franquicia-id", type=int, help="Exporta sólo esta franquicia")
+    exportacion.add_argument(
+        "--batch-size", dest="tamano_lote", type=int, default=settings.export_batch_size,
+        help="Filas leídas y escritas por lote"
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Ejecuta la línea de comandos.
+
+    Returns:
+        int: Código de salida
+    """
+    parser = crear_parser()
+    args = parser.parse_args(argv)
+
+    if args.comando in (None, "serve"):
+        from .main import main as iniciar_servidor
+        iniciar_servidor()
+        return 0
+
+    if args.tamano_lote < 1:
+        parser.error("--batch-size debe ser mayor que 0")
+    if args.comando == "export":
+        return _main_exportar(parser, args)
+    return _main_importar(parser, args)
+
+
+def _main_importar(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    """Ejecuta el comando ``import``"""
+    if args.sucursal_id is not None and args.sucursal_id < 1:
+        parser.error("--sucursal-id debe ser mayor que 0")
+    formato = FormatoInventario(args.formato) if args.formato else formato_por_extension(args.archivo)
+
+    tarea = asyncio.run(importar(args.archivo, formato, args.tamano_lote, args.sucursal_id))
+    if tarea.estado == TareaImportacion.ERROR:
+        print(f"Error: {tarea.error}", file=sys.stderr)
+        return 1
+    print(
+        f"Importación completada: {tarea.filas_procesadas} filas, "
+        f"{tarea.importados} importadas, {tarea.errores} rechazadas",
+        file=sys.stderr
+    )
+    return 1 if tarea.errores else 0
+
+
+def _main_exportar(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    """Ejecuta el comando ``export``"""
+    if args.franquicia_id is not None and args.franquicia_id < 1:
+        parser.error("--franquicia-id debe ser mayor que 0")
+    if args.formato:
+        formato = formato_exportacion(args.formato)
+    else:
+        extension = os.path.splitext(args.archivo)[1].lower()
+        formato = FORMATOS_EXPORTACION.get(extension, FormatoColumnar.PARQUET)
+
+    try:
+        escritos = asyncio.run(exportar(args.archivo, formato, args.tamano_lote, args.franquicia_id))
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Exportación completada: {escritos} bytes ({formato.value})", file=sys.stderr)
+    return 0
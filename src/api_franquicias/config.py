@@ -3,7 +3,7 @@ Configuración de la aplicación
 """
 
 import os
-from typing import List
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 
 
@@ -22,6 +22,71 @@ class Settings(BaseSettings):
     
     # Configuración de la base de datos
     database_url: str = "sqlite:///./franquicias.db"
+    # Motor asíncrono (aiosqlite para SQLite, asyncpg para PostgreSQL)
+    database_async: bool = False
+    # URL explícita para el motor asíncrono; si no se define se deriva de database_url
+    async_database_url: Optional[str] = None
+
+    # Réplicas de lectura: las peticiones GET se atienden en ellas y las
+    # escrituras en la base principal. Con database_sqlite_readers las lecturas
+    # usan conexiones de sólo lectura sobre el mismo archivo SQLite (modo WAL)
+    database_read_urls: List[str] = []
+    database_sqlite_readers: bool = False
+    # Segundos tras una escritura durante los que un cliente que envía el
+    # token X-Read-Your-Writes lee de la base principal (retraso de réplica)
+    db_read_your_writes_window: float = 5.0
+
+    # Sharding por franquicia: bases adicionales a database_url, que es el
+    # shard 0. Cada franquicia (con sus sucursales y productos) vive en un
+    # único shard; vacío desactiva el particionado
+    database_shard_urls: List[str] = []
+
+    # Configuración del pool de conexiones
+    # db_pool_class: auto | queue | singleton | static | null
+    #   auto usa StaticPool para SQLite en memoria y QueuePool en otro caso
+    db_pool_class: str = "auto"
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # Segundos que SQLite espera un bloqueo antes de fallar con "database is locked"
+    db_sqlite_busy_timeout: float = 30.0
+    
+    # Paginación de listados (cursor por ID)
+    pagination_default_limit: int = 100
+    pagination_max_limit: int = 1000
+    
+    # Operaciones en lote (número máximo de elementos por petición)
+    bulk_max_items: int = 5000
+    # Filas eliminadas por transacción al eliminar una franquicia por lotes
+    delete_batch_size: int = 1000
+    # Importación de inventario: filas por transacción, filas rechazadas que se
+    # conservan en el detalle de la tarea y bytes del archivo recibido que se
+    # mantienen en memoria antes de pasarlo a disco
+    import_batch_size: int = 1000
+    import_max_errors: int = 1000
+    import_spool_max_size: int = 1024 * 1024
+    # Exportación de inventario: filas leídas del cursor (y enviadas) por lote
+    export_batch_size: int = 1000
+    # Búsqueda de productos por nombre aproximado (trigramas): similitud
+    # mínima por defecto (como pg_trgm), similitud a partir de la cual un
+    # producto nuevo se considera un posible duplicado, segundos tras los
+    # que se reconstruye en segundo plano el índice en memoria de una
+    # franquicia para recoger los cambios de otros procesos (0: no se
+    # reconstruye) y si los índices se construyen al arrancar
+    similar_threshold: float = 0.3
+    similar_duplicate_threshold: float = 0.6
+    similar_index_ttl: float = 300.0
+    similar_index_warmup: bool = True
+    # Caché de lectura de get_by_id (franquicias y sucursales sin expand,
+    # productos): presupuesto de memoria en bytes y segundos de vida de las
+    # entradas por entidad (0: no se guardan en caché)
+    cache_enabled: bool = False
+    cache_max_bytes: int = 16 * 1024 * 1024
+    cache_ttl_franquicia: float = 300.0
+    cache_ttl_sucursal: float = 300.0
+    cache_ttl_producto: float = 30.0
     
     # Configuración de logging
     log_level: str = "INFO"
@@ -2,26 +2,47 @@
 Controlador REST para Franquicia
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from ..database import get_db
-from ..services.franquicia_service import FranquiciaService
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from typing import List, Optional, Union
+from ..config import settings
+from ..database import DbSession, close_session, get_read_db, get_write_db, new_session_like
+from ..services.async_franquicia_service import AsyncFranquiciaService
+from ..services.async_producto_service import AsyncProductoService
+from ..services.eliminacion_por_lotes import ejecutar_eliminacion, registro_tareas
 from ..schemas import (
     FranquiciaCreate, 
     FranquiciaUpdate, 
     FranquiciaResponse, 
+    FranquiciaResumenResponse,
+    FranquiciaSucursalesResponse,
+    FranquiciaExpand,
+    PaginaResponse,
     ReporteStockResponse,
-    ErrorResponse
+    ReporteAlcance,
+    ReporteEmpates,
+    EstadisticasFranquiciaResponse,
+    EliminacionResponse,
+    ErrorResponse,
+    ProductoResponse,
+    ProductoSimilarResponse, ProductoBajoStockResponse
 )
 
 router = APIRouter(prefix="/api/franquicias", tags=["franquicias"])
 
+# Esquema de respuesta según el nivel de expansión solicitado
+ESQUEMAS_POR_EXPANSION = {
+    FranquiciaExpand.NONE: FranquiciaResumenResponse,
+    FranquiciaExpand.SUCURSALES: FranquiciaSucursalesResponse,
+    FranquiciaExpand.SUCURSALES_PRODUCTOS: FranquiciaResponse,
+}
+
 
 @router.post("/", response_model=FranquiciaResponse, status_code=status.HTTP_201_CREATED)
 async def crear_franquicia(
     franquicia_data: FranquiciaCreate,
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_write_db)
 ):
     """
     Crea una nueva franquicia.
@@ -29,8 +50,8 @@ async def crear_franquicia(
     - **nombre**: Nombre de la franquicia (requerido)
     """
     try:
-        service = FranquiciaService(db)
-        franquicia = service.crear_franquicia(franquicia_data.nombre)
+        service = AsyncFranquiciaService(db)
+        franquicia = await service.crear_franquicia(franquicia_data.nombre)
         return FranquiciaResponse.model_validate(franquicia)
     except ValueError as e:
         raise HTTPException(
@@ -44,18 +65,27 @@ async def crear_franquicia(
         )
 
 
-@router.get("/{franquicia_id}", response_model=FranquiciaResponse)
+@router.get(
+    "/{franquicia_id}",
+    response_model=Union[FranquiciaResponse, FranquiciaSucursalesResponse, FranquiciaResumenResponse]
+)
 async def obtener_franquicia(
     franquicia_id: int,
-    db: Session = Depends(get_db)
+    expand: FranquiciaExpand = Query(
+        FranquiciaExpand.SUCURSALES_PRODUCTOS,
+        description="Relaciones a incluir: none, sucursales o sucursales.productos"
+    ),
+    db: DbSession = Depends(get_read_db)
 ):
     """
     Obtiene una franquicia por ID.
     
     - **franquicia_id**: ID de la franquicia
+    - **expand**: `none` (sólo la franquicia), `sucursales` (sin productos)
+      o `sucursales.productos` (árbol completo, por defecto)
     """
-    service = FranquiciaService(db)
-    franquicia = service.obtener_franquicia(franquicia_id)
+    service = AsyncFranquiciaService(db)
+    franquicia = await service.obtener_franquicia(franquicia_id, expand.value)
     
     if not franquicia:
         raise HTTPException(
@@ -63,24 +93,37 @@ async def obtener_franquicia(
             detail=f"Franquicia con ID {franquicia_id} no encontrada"
         )
     
-    return FranquiciaResponse.model_validate(franquicia)
+    return ESQUEMAS_POR_EXPANSION[expand].model_validate(franquicia)
 
 
-@router.get("/", response_model=List[FranquiciaResponse])
-async def obtener_todas_franquicias(db: Session = Depends(get_db)):
+@router.get("/", response_model=PaginaResponse[FranquiciaResponse])
+async def obtener_todas_franquicias(
+    limit: int = Query(
+        settings.pagination_default_limit, ge=1, le=settings.pagination_max_limit,
+        description="Número máximo de elementos por página"
+    ),
+    after: Optional[int] = Query(None, ge=0, description="Cursor: next_cursor de la página anterior"),
+    db: DbSession = Depends(get_read_db)
+):
     """
-    Obtiene todas las franquicias.
+    Obtiene las franquicias paginadas por cursor.
+    
+    - **limit**: Número máximo de franquicias por página
+    - **after**: Cursor (`next_cursor` de la página anterior)
     """
-    service = FranquiciaService(db)
-    franquicias = service.obtener_todas_franquicias()
-    return [FranquiciaResponse.model_validate(f) for f in franquicias]
+    service = AsyncFranquiciaService(db)
+    pagina = await service.listar_franquicias(limit, after)
+    return PaginaResponse[FranquiciaResponse](
+        items=[FranquiciaResponse.model_validate(f) for f in pagina.items],
+        next_cursor=pagina.next_cursor
+    )
 
 
 @router.patch("/{franquicia_id}", response_model=FranquiciaResponse)
 async def actualizar_franquicia(
     franquicia_id: int,
     franquicia_data: FranquiciaUpdate,
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_write_db)
 ):
     """
     Actualiza el nombre de una franquicia.
@@ -89,8 +132,8 @@ async def actualizar_franquicia(
     - **nombre**: Nuevo nombre de la franquicia
     """
     try:
-        service = FranquiciaService(db)
-        franquicia = service.actualizar_franquicia(franquicia_id, franquicia_data.nombre)
+        service = AsyncFranquiciaService(db)
+        franquicia = await service.actualizar_franquicia(franquicia_id, franquicia_data.nombre)
         
         if not franquicia:
             raise HTTPException(
@@ -111,39 +154,99 @@ async def actualizar_franquicia(
         )
 
 
-@router.delete("/{franquicia_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete(
+    "/{franquicia_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={status.HTTP_202_ACCEPTED: {"model": EliminacionResponse}}
+)
 async def eliminar_franquicia(
     franquicia_id: int,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks,
+    por_lotes: bool = Query(False, description="Eliminar en segundo plano por lotes"),
+    tamano_lote: int = Query(
+        settings.delete_batch_size, ge=1, le=100000,
+        description="Filas eliminadas por transacción (sólo con por_lotes)"
+    ),
+    db: DbSession = Depends(get_write_db)
 ):
     """
-    Elimina una franquicia.
+    Elimina una franquicia junto con sus sucursales y productos.
     
     - **franquicia_id**: ID de la franquicia
+    - **por_lotes**: Si es `true` la eliminación se hace en segundo plano, en
+      transacciones de `tamano_lote` filas; responde 202 con la tarea, cuyo
+      avance se consulta en `/api/franquicias/eliminaciones/{tarea_id}`
     """
-    service = FranquiciaService(db)
-    eliminada = service.eliminar_franquicia(franquicia_id)
-    
-    if not eliminada:
+    service = AsyncFranquiciaService(db)
+
+    if not por_lotes:
+        eliminada = await service.eliminar_franquicia(franquicia_id)
+        if not eliminada:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Franquicia con ID {franquicia_id} no encontrada"
+            )
+        return
+
+    if not await service.franquicia_existe(franquicia_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Franquicia con ID {franquicia_id} no encontrada"
         )
 
+    total_productos = await service.contar_productos(franquicia_id)
+    tarea = registro_tareas.crear(franquicia_id, tamano_lote, total_productos)
+    # La sesión de la petición se cierra después de las tareas en segundo plano;
+    # su transacción de lectura bloquearía las escrituras de la tarea en SQLite
+    await close_session(db)
+    background_tasks.add_task(ejecutar_eliminacion, tarea, new_session_like(db))
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=jsonable_encoder(EliminacionResponse(**tarea.to_dict())),
+        headers={"Location": f"/api/franquicias/eliminaciones/{tarea.id}"}
+    )
+
+
+@router.get("/eliminaciones/{tarea_id}", response_model=EliminacionResponse)
+async def obtener_eliminacion(tarea_id: str):
+    """
+    Obtiene el avance de una eliminación por lotes.
+    
+    - **tarea_id**: ID de la tarea retornado al solicitar la eliminación
+    """
+    tarea = registro_tareas.obtener(tarea_id)
+    if not tarea:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Eliminación con ID {tarea_id} no encontrada"
+        )
+    return EliminacionResponse(**tarea.to_dict())
+
 
 @router.get("/{franquicia_id}/reporte-stock", response_model=List[ReporteStockResponse])
 async def obtener_reporte_stock(
     franquicia_id: int,
-    db: Session = Depends(get_db)
+    top: int = Query(1, ge=1, le=settings.pagination_max_limit, description="Productos por grupo"),
+    scope: ReporteAlcance = Query(
+        ReporteAlcance.SUCURSAL, description="sucursal (top por sucursal) o franquicia (top global)"
+    ),
+    ties: ReporteEmpates = Query(
+        ReporteEmpates.ALL, description="all (incluye empates en el límite) o first (exactamente top)"
+    ),
+    db: DbSession = Depends(get_read_db)
 ):
     """
-    Obtiene el producto con más stock de cada sucursal de una franquicia.
+    Obtiene los productos con más stock de una franquicia.
     
     - **franquicia_id**: ID de la franquicia
+    - **top**: Número de productos por sucursal (o de la franquicia); por defecto 1
+    - **scope**: `sucursal` (por defecto) o `franquicia`
+    - **ties**: `all` (por defecto) incluye los productos empatados en el límite;
+      `first` retorna exactamente `top` productos desempatando por ID
     """
     try:
-        service = FranquiciaService(db)
-        reporte = service.obtener_reporte_stock(franquicia_id)
+        service = AsyncFranquiciaService(db)
+        reporte = await service.obtener_reporte_stock(franquicia_id, top, scope.value, ties.value)
         return [ReporteStockResponse.model_validate(item) for item in reporte]
     except ValueError as e:
         raise HTTPException(
@@ -155,3 +258,107 @@ async def obtener_reporte_stock(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error interno del servidor: {str(e)}"
         )
+
+
+@router.get("/{franquicia_id}/estadisticas", response_model=EstadisticasFranquiciaResponse)
+async def obtener_estadisticas(
+    franquicia_id: int,
+    por_sucursal: bool = Query(False, description="Incluir el desglose por sucursal"),
+    db: DbSession = Depends(get_read_db)
+):
+    """
+    Obtiene indicadores de inventario de una franquicia calculados en la base de datos.
+    
+    - **franquicia_id**: ID de la franquicia
+    - **por_sucursal**: Si es `true` incluye las estadísticas de cada sucursal
+    """
+    try:
+        service = AsyncFranquiciaService(db)
+        estadisticas = await service.obtener_estadisticas(franquicia_id, por_sucursal)
+        return EstadisticasFranquiciaResponse.model_validate(estadisticas)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error interno del servidor: {str(e)}"
+        )
+
+
+@router.get("/{franquicia_id}/productos/bajo-stock", response_model=List[ProductoBajoStockResponse])
+async def obtener_productos_bajo_stock(
+    franquicia_id: int,
+    umbral: Optional[int] = Query(
+        None, ge=0, description="Umbral de los productos sin stock_minimo propio"
+    ),
+    db: DbSession = Depends(get_read_db)
+):
+    """
+    Obtiene los productos de una franquicia que necesitan reposición.
+    
+    - **franquicia_id**: ID de la franquicia
+    - **umbral**: Un producto sin `stock_minimo` aparece si su stock es menor o
+      igual que este valor; los que tienen `stock_minimo` usan el suyo. Sin
+      umbral sólo se consideran los productos con `stock_minimo`
+    
+    Se ordenan por sucursal y stock. La consulta lee un índice parcial con los
+    productos bajo su umbral, por lo que su costo depende de cuántos productos
+    necesitan reposición y no del tamaño del catálogo.
+    """
+    if not await AsyncFranquiciaService(db).franquicia_existe(franquicia_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Franquicia con ID {franquicia_id} no encontrada"
+        )
+    productos = await AsyncProductoService(db).listar_bajo_stock(franquicia_id, umbral)
+    return [
+        ProductoBajoStockResponse(**ProductoResponse.model_validate(producto).model_dump(), umbral=valor)
+        for producto, valor in productos
+    ]
+
+
+@router.get("/{franquicia_id}/productos/similares", response_model=List[ProductoSimilarResponse])
+async def buscar_productos_similares(
+    franquicia_id: int,
+    nombre: str = Query(..., min_length=1, max_length=255, description="Nombre a comparar"),
+    sucursal_id: Optional[int] = Query(None, ge=1, description="Busca sólo en esta sucursal"),
+    umbral: Optional[float] = Query(
+        None, ge=0.1, le=1, description="Similitud mínima (por defecto SIMILAR_THRESHOLD)"
+    ),
+    limit: int = Query(10, ge=1, le=100, description="Número máximo de productos"),
+    db: DbSession = Depends(get_read_db)
+):
+    """
+    Busca los productos de una franquicia con nombre parecido, aunque tenga
+    errores de escritura ("hamburgesa clasica" encuentra "Hamburguesa Clásica").
+    
+    - **franquicia_id**: ID de la franquicia
+    - **nombre**: Nombre a comparar
+    - **sucursal_id**: Restringe la búsqueda a una sucursal
+    - **umbral**: Similitud mínima entre 0.1 y 1 (proporción de trigramas compartidos)
+    - **limit**: Número máximo de productos, del más al menos similar
+    
+    Usa `pg_trgm` en PostgreSQL y un índice de trigramas en memoria en los
+    demás motores.
+    """
+    if not await AsyncFranquiciaService(db).franquicia_existe(franquicia_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Franquicia con ID {franquicia_id} no encontrada"
+        )
+    try:
+        similares = await AsyncProductoService(db).buscar_similares(
+            franquicia_id, nombre, limit, umbral, sucursal_id
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return [
+        ProductoSimilarResponse(**ProductoResponse.model_validate(producto).model_dump(), similitud=valor)
+        for producto, valor in similares
+    ]
@@ -2,12 +2,12 @@
 Controlador REST para operaciones de Sucursales en Franquicias
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from ..database import get_db
-from ..services.sucursal_service import SucursalService
-from ..schemas import SucursalCreate, SucursalResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Optional
+from ..config import settings
+from ..database import DbSession, get_read_db, get_write_db
+from ..services.async_sucursal_service import AsyncSucursalService
+from ..schemas import SucursalCreate, SucursalResponse, PaginaResponse
 
 router = APIRouter(prefix="/api/franquicias", tags=["franquicias-sucursales"])
 
@@ -16,7 +16,7 @@ router = APIRouter(prefix="/api/franquicias", tags=["franquicias-sucursales"])
 async def agregar_sucursal(
     franquicia_id: int,
     sucursal_data: SucursalCreate,
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_write_db)
 ):
     """
     Agrega una sucursal a una franquicia.
@@ -25,8 +25,8 @@ async def agregar_sucursal(
     - **nombre**: Nombre de la sucursal
     """
     try:
-        service = SucursalService(db)
-        sucursal = service.crear_sucursal(sucursal_data.nombre, franquicia_id)
+        service = AsyncSucursalService(db)
+        sucursal = await service.crear_sucursal(sucursal_data.nombre, franquicia_id)
         return SucursalResponse.from_orm(sucursal)
     except ValueError as e:
         raise HTTPException(
@@ -40,20 +40,30 @@ async def agregar_sucursal(
         )
 
 
-@router.get("/{franquicia_id}/sucursales", response_model=List[SucursalResponse])
+@router.get("/{franquicia_id}/sucursales", response_model=PaginaResponse[SucursalResponse])
 async def obtener_sucursales_por_franquicia(
     franquicia_id: int,
-    db: Session = Depends(get_db)
+    limit: int = Query(
+        settings.pagination_default_limit, ge=1, le=settings.pagination_max_limit,
+        description="Número máximo de elementos por página"
+    ),
+    after: Optional[int] = Query(None, ge=0, description="Cursor: next_cursor de la página anterior"),
+    db: DbSession = Depends(get_read_db)
 ):
     """
-    Obtiene todas las sucursales de una franquicia.
+    Obtiene las sucursales de una franquicia paginadas por cursor.
     
     - **franquicia_id**: ID de la franquicia
+    - **limit**: Número máximo de sucursales por página
+    - **after**: Cursor (`next_cursor` de la página anterior)
     """
     try:
-        service = SucursalService(db)
-        sucursales = service.obtener_sucursales_por_franquicia(franquicia_id)
-        return [SucursalResponse.from_orm(s) for s in sucursales]
+        service = AsyncSucursalService(db)
+        pagina = await service.listar_sucursales_por_franquicia(franquicia_id, limit, after)
+        return PaginaResponse[SucursalResponse](
+            items=[SucursalResponse.from_orm(s) for s in pagina.items],
+            next_cursor=pagina.next_cursor
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -2,26 +2,247 @@
 Controlador REST para Producto
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from ..database import get_db
-from ..services.producto_service import ProductoService
+import tempfile
+from datetime import datetime
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from typing import Optional
+from ..config import settings
+from ..database import DbSession, close_session, get_read_db, get_write_db, new_session_like
+from ..repositories.filtros import FiltroProductos, ListadoInvalidoError
+from ..services.async_franquicia_service import AsyncFranquiciaService
+from ..services.async_producto_service import AsyncProductoService
+from ..services.exportacion import TIPOS_CONTENIDO, exportar_productos
+from ..services import exportacion_columnar
+from ..services.importacion import TareaImportacion, ejecutar_importacion, registro_importaciones
 from ..schemas import (
     ProductoCreate, 
     ProductoUpdate, 
     StockUpdate, 
-    ProductoResponse
+    ProductoResponse,
+    PaginaResponse,
+    StockBulkUpdate,
+    StockBulkResponse,
+    StockAjuste,
+    StockMinimoUpdate,
+    FormatoInventario,
+    FormatoColumnar,
+    ImportacionResponse,
+    OrdenProductos
 )
 
 router = APIRouter(prefix="/api/productos", tags=["productos"])
 
 
+def filtro_productos(
+    stock_min: Optional[int] = Query(None, ge=0, description="Stock mínimo (inclusive)"),
+    stock_max: Optional[int] = Query(None, ge=0, description="Stock máximo (inclusive)"),
+    nombre_prefix: Optional[str] = Query(
+        None, min_length=1, max_length=255, description="Prefijo del nombre (distingue mayúsculas)"
+    ),
+    updated_since: Optional[datetime] = Query(
+        None, description="Sólo productos creados o modificados desde esta fecha (ISO 8601)"
+    ),
+    sort: Optional[OrdenProductos] = Query(
+        None, description="Columna de orden; con '-' delante, descendente. Por defecto, la columna filtrada o el ID"
+    )
+) -> FiltroProductos:
+    """Filtros y orden de los listados de productos (dependencia compartida)"""
+    return FiltroProductos(
+        stock_min=stock_min, stock_max=stock_max, nombre_prefix=nombre_prefix,
+        updated_since=updated_since, orden=sort.value if sort else None
+    )
+
+
+# Declarada antes de POST /{producto_id}, que también coincidiría con /import
+@router.post("/import", status_code=status.HTTP_202_ACCEPTED, response_model=ImportacionResponse)
+async def importar_productos(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    formato: FormatoInventario = Query(
+        FormatoInventario.CSV, alias="format", description="Formato del cuerpo: csv o ndjson"
+    ),
+    sucursal_id: Optional[int] = Query(
+        None, ge=1, description="Sucursal de las filas que no indican sucursal_id"
+    ),
+    tamano_lote: int = Query(
+        settings.import_batch_size, ge=1, le=settings.bulk_max_items,
+        description="Filas importadas por transacción"
+    ),
+    db: DbSession = Depends(get_write_db)
+):
+    """
+    Importa un inventario (CSV o NDJSON) creando o actualizando productos.
+    
+    - **cuerpo**: Archivo con las columnas `sucursal_id`, `nombre` y `cantidad_stock`
+      (CSV con encabezado o un objeto JSON por línea)
+    - **format**: `csv` o `ndjson`
+    - **sucursal_id**: Sucursal por defecto de las filas que no la indican
+    
+    El cuerpo se recibe por partes sin cargarlo en memoria y se importa en
+    segundo plano, en transacciones de `tamano_lote` filas. Los productos
+    existentes toman el stock del archivo. Responde 202 con la tarea, cuyo
+    avance y filas rechazadas (con su línea) se consultan en
+    `/api/productos/importaciones/{tarea_id}`.
+    """
+    # Los bytes que superan import_spool_max_size se escriben en disco
+    archivo = tempfile.SpooledTemporaryFile(max_size=settings.import_spool_max_size)
+    async for bloque in request.stream():
+        archivo.write(bloque)
+    bytes_total = archivo.tell()
+    archivo.seek(0)
+
+    tarea = registro_importaciones.registrar(TareaImportacion(formato, tamano_lote, bytes_total))
+    # Como en la eliminación por lotes: la tarea escribe con su propia sesión
+    await close_session(db)
+    background_tasks.add_task(ejecutar_importacion, tarea, archivo, new_session_like(db), sucursal_id)
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=jsonable_encoder(ImportacionResponse(**tarea.to_dict())),
+        headers={"Location": f"/api/productos/importaciones/{tarea.id}"}
+    )
+
+
+@router.get("/importaciones/{tarea_id}", response_model=ImportacionResponse)
+async def obtener_importacion(tarea_id: str):
+    """
+    Obtiene el avance y las filas rechazadas de una importación.
+    
+    - **tarea_id**: ID de la tarea retornado al solicitar la importación
+    """
+    tarea = registro_importaciones.obtener(tarea_id)
+    if not tarea:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Importación con ID {tarea_id} no encontrada"
+        )
+    return ImportacionResponse(**tarea.to_dict())
+
+
+# Declarada antes de GET /{producto_id}, que también coincidiría con /buscar
+@router.get("/buscar", response_model=PaginaResponse[ProductoResponse])
+async def buscar_productos(
+    q: str = Query(..., min_length=1, max_length=255, description="Texto a buscar en el nombre"),
+    franquicia_id: Optional[int] = Query(None, ge=1, description="Busca sólo en esta franquicia"),
+    sucursal_id: Optional[int] = Query(None, ge=1, description="Busca sólo en esta sucursal"),
+    limit: int = Query(
+        settings.pagination_default_limit, ge=1, le=settings.pagination_max_limit,
+        description="Número máximo de elementos por página"
+    ),
+    after: Optional[int] = Query(None, ge=0, description="Cursor: next_cursor de la página anterior"),
+    db: DbSession = Depends(get_read_db)
+):
+    """
+    Busca productos por nombre, del más al menos relevante.
+    
+    - **q**: Palabras a buscar; cada una coincide con las palabras del nombre
+      que empiezan por ella (`ham cla` encuentra "Hamburguesa Clásica"), sin
+      distinguir mayúsculas ni acentos
+    - **franquicia_id** / **sucursal_id**: Restringen la búsqueda
+    - **limit** / **after**: Paginación; el cursor es la posición del
+      siguiente resultado
+    
+    Usa el índice de texto completo (FTS5 en SQLite, GIN en PostgreSQL).
+    """
+    try:
+        service = AsyncProductoService(db)
+        pagina = await service.buscar_productos(q, limit, after, franquicia_id, sucursal_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return PaginaResponse[ProductoResponse](
+        items=[ProductoResponse.model_validate(p) for p in pagina.items],
+        next_cursor=pagina.next_cursor
+    )
+
+
+# Declarada antes de GET /{producto_id}, que también coincidiría con /export
+@router.get("/export", response_class=StreamingResponse)
+async def exportar_inventario(
+    formato: FormatoInventario = Query(
+        FormatoInventario.NDJSON, alias="format", description="Formato del archivo: ndjson o csv"
+    ),
+    franquicia_id: Optional[int] = Query(None, ge=1, description="Exporta sólo esta franquicia"),
+    db: DbSession = Depends(get_read_db)
+):
+    """
+    Exporta todos los productos (o los de una franquicia) ordenados por ID.
+    
+    - **format**: `ndjson` (un objeto JSON por línea) o `csv` (con encabezado)
+    - **franquicia_id**: Franquicia a exportar (opcional)
+    
+    Las filas se leen con un cursor del servidor y se envían por partes de
+    `EXPORT_BATCH_SIZE` filas, con memoria constante sea cual sea el tamaño
+    de la tabla. La exportación es una única consulta: refleja un snapshot
+    consistente aunque haya escrituras durante la descarga.
+    """
+    if franquicia_id is not None and not await AsyncFranquiciaService(db).franquicia_existe(franquicia_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Franquicia con ID {franquicia_id} no encontrada"
+        )
+
+    # La respuesta se envía después de retornar: la exportación lee con su propia sesión
+    await close_session(db)
+    extension = "csv" if formato == FormatoInventario.CSV else "ndjson"
+    return StreamingResponse(
+        exportar_productos(new_session_like(db), formato, settings.export_batch_size, franquicia_id),
+        media_type=TIPOS_CONTENIDO[formato],
+        headers={"Content-Disposition": f'attachment; filename="productos.{extension}"'}
+    )
+
+
+@router.get("/export/inventario", response_class=StreamingResponse)
+async def exportar_inventario_columnar(
+    formato: FormatoColumnar = Query(
+        FormatoColumnar.PARQUET, alias="format", description="Formato del archivo: parquet o arrow"
+    ),
+    franquicia_id: Optional[int] = Query(None, ge=1, description="Exporta sólo esta franquicia"),
+    db: DbSession = Depends(get_read_db)
+):
+    """
+    Exporta el inventario completo en formato columnar.
+    
+    - **format**: `parquet` o `arrow` (formato de flujo de Arrow IPC)
+    - **franquicia_id**: Franquicia a exportar (opcional)
+    
+    Cada fila es un producto con su stock, su sucursal, su franquicia y sus
+    fechas. Como en `/export`, las filas se leen con un cursor del servidor
+    y cada lote de `EXPORT_BATCH_SIZE` filas se escribe y se envía como un
+    lote de Arrow o un row group de Parquet. Requiere `pyarrow` (501 si no
+    está instalado).
+    """
+    try:
+        exportacion_columnar.requerir_pyarrow()
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(e))
+    if franquicia_id is not None and not await AsyncFranquiciaService(db).franquicia_existe(franquicia_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Franquicia con ID {franquicia_id} no encontrada"
+        )
+
+    await close_session(db)
+    return StreamingResponse(
+        exportacion_columnar.exportar_inventario(
+            new_session_like(db), formato, settings.export_batch_size, franquicia_id
+        ),
+        media_type=exportacion_columnar.TIPOS_CONTENIDO[formato],
+        headers={
+            "Content-Disposition":
+                f'attachment; filename="inventario.{exportacion_columnar.EXTENSIONES[formato]}"'
+        }
+    )
+
+
 @router.post("/{producto_id}", response_model=ProductoResponse, status_code=status.HTTP_201_CREATED)
 async def actualizar_producto(
     producto_id: int,
     producto_data: ProductoUpdate,
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_write_db)
 ):
     """
     Actualiza el nombre de un producto.
@@ -30,8 +251,8 @@ async def actualizar_producto(
     - **nombre**: Nuevo nombre del producto
     """
     try:
-        service = ProductoService(db)
-        producto = service.actualizar_producto(producto_id, producto_data.nombre)
+        service = AsyncProductoService(db)
+        producto = await service.actualizar_producto(producto_id, producto_data.nombre)
         
         if not producto:
             raise HTTPException(
@@ -52,11 +273,44 @@ async def actualizar_producto(
         )
 
 
+@router.patch("/stock", response_model=StockBulkResponse)
+async def actualizar_stock_en_lote(
+    stock_data: StockBulkUpdate,
+    db: DbSession = Depends(get_write_db)
+):
+    """
+    Modifica el stock de varios productos en una sola transacción.
+    
+    - **productos**: Lista de `{producto_id, stock}`
+    
+    Los productos inexistentes no se modifican y se reportan en `no_encontrados`.
+    """
+    try:
+        service = AsyncProductoService(db)
+        resultado = await service.actualizar_stocks(
+            [(item.producto_id, item.stock) for item in stock_data.productos]
+        )
+        return StockBulkResponse(
+            actualizados=resultado.actualizados,
+            no_encontrados=resultado.no_encontrados
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error interno del servidor: {str(e)}"
+        )
+
+
 @router.patch("/{producto_id}/stock", response_model=ProductoResponse)
 async def actualizar_stock(
     producto_id: int,
     stock_data: StockUpdate,
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_write_db)
 ):
     """
     Modifica el stock de un producto.
@@ -65,8 +319,8 @@ async def actualizar_stock(
     - **stock**: Nueva cantidad en stock
     """
     try:
-        service = ProductoService(db)
-        producto = service.actualizar_stock(producto_id, stock_data.stock)
+        service = AsyncProductoService(db)
+        producto = await service.actualizar_stock(producto_id, stock_data.stock)
         
         if not producto:
             raise HTTPException(
@@ -87,18 +341,85 @@ async def actualizar_stock(
         )
 
 
+@router.patch("/{producto_id}/stock-minimo", response_model=ProductoResponse)
+async def actualizar_stock_minimo(
+    producto_id: int,
+    datos: StockMinimoUpdate,
+    db: DbSession = Depends(get_write_db)
+):
+    """
+    Fija el umbral de reposición de un producto.
+    
+    - **producto_id**: ID del producto
+    - **stock_minimo**: El producto aparece en `GET /api/franquicias/{id}/productos/bajo-stock`
+      cuando su stock es menor o igual que este valor; `null` usa el umbral de la consulta
+    """
+    try:
+        producto = await AsyncProductoService(db).actualizar_stock_minimo(producto_id, datos.stock_minimo)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    if not producto:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Producto con ID {producto_id} no encontrado"
+        )
+    return ProductoResponse.model_validate(producto)
+
+
+@router.post("/{producto_id}/stock/ajuste", response_model=ProductoResponse)
+async def ajustar_stock(
+    producto_id: int,
+    ajuste: StockAjuste,
+    db: DbSession = Depends(get_write_db)
+):
+    """
+    Incrementa o descuenta el stock de un producto de forma atómica.
+    
+    - **producto_id**: ID del producto
+    - **delta**: Unidades a sumar (positivo) o descontar (negativo)
+    
+    Retorna 409 si el stock es insuficiente para el descuento.
+    """
+    try:
+        service = AsyncProductoService(db)
+        producto = await service.ajustar_stock(producto_id, ajuste.delta)
+        
+        if not producto:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Producto con ID {producto_id} no encontrado"
+            )
+        
+        return ProductoResponse.model_validate(producto)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error interno del servidor: {str(e)}"
+        )
+
+
 @router.get("/{producto_id}", response_model=ProductoResponse)
 async def obtener_producto(
     producto_id: int,
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_read_db)
 ):
     """
     Obtiene un producto por ID.
     
     - **producto_id**: ID del producto
     """
-    service = ProductoService(db)
-    producto = service.obtener_producto(producto_id)
+    service = AsyncProductoService(db)
+    producto = await service.obtener_producto(producto_id)
     
     if not producto:
         raise HTTPException(
@@ -109,28 +430,55 @@ async def obtener_producto(
     return ProductoResponse.model_validate(producto)
 
 
-@router.get("/", response_model=List[ProductoResponse])
-async def obtener_todos_productos(db: Session = Depends(get_db)):
+@router.get("/", response_model=PaginaResponse[ProductoResponse])
+async def obtener_todos_productos(
+    limit: int = Query(
+        settings.pagination_default_limit, ge=1, le=settings.pagination_max_limit,
+        description="Número máximo de elementos por página"
+    ),
+    after: Optional[str] = Query(None, description="Cursor: next_cursor de la página anterior"),
+    filtro: FiltroProductos = Depends(filtro_productos),
+    db: DbSession = Depends(get_read_db)
+):
     """
-    Obtiene todos los productos.
+    Obtiene los productos paginados por cursor.
+    
+    - **limit**: Número máximo de productos por página
+    - **after**: Cursor (`next_cursor` de la página anterior)
+    - **stock_min** / **stock_max**: Rango de stock
+    - **nombre_prefix**: Prefijo del nombre
+    - **updated_since**: Fecha de actualización mínima
+    - **sort**: `stock`, `nombre` o `fecha_actualizacion`, con `-` para orden descendente
+    
+    Sólo se puede filtrar por una columna a la vez y ordenar por ella; las
+    demás combinaciones recorrerían toda la tabla y se rechazan con 400.
     """
-    service = ProductoService(db)
-    productos = service.obtener_todos_productos()
-    return [ProductoResponse.model_validate(p) for p in productos]
+    try:
+        service = AsyncProductoService(db)
+        pagina = await service.listar_productos(limit, after, filtro)
+    except ListadoInvalidoError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return PaginaResponse[ProductoResponse](
+        items=[ProductoResponse.model_validate(p) for p in pagina.items],
+        next_cursor=pagina.next_cursor
+    )
 
 
 @router.delete("/{producto_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def eliminar_producto(
     producto_id: int,
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_write_db)
 ):
     """
     Elimina un producto.
     
     - **producto_id**: ID del producto
     """
-    service = ProductoService(db)
-    eliminado = service.eliminar_producto(producto_id)
+    service = AsyncProductoService(db)
+    eliminado = await service.eliminar_producto(producto_id)
     
     if not eliminado:
         raise HTTPException(
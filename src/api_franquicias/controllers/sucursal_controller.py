@@ -2,21 +2,34 @@
 Controlador REST para Sucursal
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from ..database import get_db
-from ..services.sucursal_service import SucursalService
-from ..schemas import SucursalCreate, SucursalUpdate, SucursalResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Optional, Union
+from ..config import settings
+from ..database import DbSession, get_read_db, get_write_db
+from ..services.async_sucursal_service import AsyncSucursalService
+from ..schemas import (
+    SucursalCreate,
+    SucursalUpdate,
+    SucursalResponse,
+    SucursalResumenResponse,
+    SucursalExpand,
+    PaginaResponse
+)
 
 router = APIRouter(prefix="/api/sucursales", tags=["sucursales"])
 
+# Esquema de respuesta según el nivel de expansión solicitado
+ESQUEMAS_POR_EXPANSION = {
+    SucursalExpand.NONE: SucursalResumenResponse,
+    SucursalExpand.PRODUCTOS: SucursalResponse,
+}
+
 
 @router.post("/{sucursal_id}", response_model=SucursalResponse, status_code=status.HTTP_201_CREATED)
 async def actualizar_sucursal(
     sucursal_id: int,
     sucursal_data: SucursalUpdate,
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_write_db)
 ):
     """
     Actualiza el nombre de una sucursal.
@@ -25,8 +38,8 @@ async def actualizar_sucursal(
     - **nombre**: Nuevo nombre de la sucursal
     """
     try:
-        service = SucursalService(db)
-        sucursal = service.actualizar_sucursal(sucursal_id, sucursal_data.nombre)
+        service = AsyncSucursalService(db)
+        sucursal = await service.actualizar_sucursal(sucursal_id, sucursal_data.nombre)
         
         if not sucursal:
             raise HTTPException(
@@ -47,18 +60,23 @@ async def actualizar_sucursal(
         )
 
 
-@router.get("/{sucursal_id}", response_model=SucursalResponse)
+@router.get("/{sucursal_id}", response_model=Union[SucursalResponse, SucursalResumenResponse])
 async def obtener_sucursal(
     sucursal_id: int,
-    db: Session = Depends(get_db)
+    expand: SucursalExpand = Query(
+        SucursalExpand.PRODUCTOS,
+        description="Relaciones a incluir: none o productos"
+    ),
+    db: DbSession = Depends(get_read_db)
 ):
     """
     Obtiene una sucursal por ID.
     
     - **sucursal_id**: ID de la sucursal
+    - **expand**: `none` (sólo la sucursal) o `productos` (por defecto)
     """
-    service = SucursalService(db)
-    sucursal = service.obtener_sucursal(sucursal_id)
+    service = AsyncSucursalService(db)
+    sucursal = await service.obtener_sucursal(sucursal_id, expand.value)
     
     if not sucursal:
         raise HTTPException(
@@ -66,31 +84,44 @@ async def obtener_sucursal(
             detail=f"Sucursal con ID {sucursal_id} no encontrada"
         )
     
-    return SucursalResponse.model_validate(sucursal)
+    return ESQUEMAS_POR_EXPANSION[expand].model_validate(sucursal)
 
 
-@router.get("/", response_model=List[SucursalResponse])
-async def obtener_todas_sucursales(db: Session = Depends(get_db)):
+@router.get("/", response_model=PaginaResponse[SucursalResponse])
+async def obtener_todas_sucursales(
+    limit: int = Query(
+        settings.pagination_default_limit, ge=1, le=settings.pagination_max_limit,
+        description="Número máximo de elementos por página"
+    ),
+    after: Optional[int] = Query(None, ge=0, description="Cursor: next_cursor de la página anterior"),
+    db: DbSession = Depends(get_read_db)
+):
     """
-    Obtiene todas las sucursales.
+    Obtiene las sucursales paginadas por cursor.
+    
+    - **limit**: Número máximo de sucursales por página
+    - **after**: Cursor (`next_cursor` de la página anterior)
     """
-    service = SucursalService(db)
-    sucursales = service.obtener_todas_sucursales()
-    return [SucursalResponse.model_validate(s) for s in sucursales]
+    service = AsyncSucursalService(db)
+    pagina = await service.listar_sucursales(limit, after)
+    return PaginaResponse[SucursalResponse](
+        items=[SucursalResponse.model_validate(s) for s in pagina.items],
+        next_cursor=pagina.next_cursor
+    )
 
 
 @router.delete("/{sucursal_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def eliminar_sucursal(
     sucursal_id: int,
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_write_db)
 ):
     """
     Elimina una sucursal.
     
     - **sucursal_id**: ID de la sucursal
     """
-    service = SucursalService(db)
-    eliminada = service.eliminar_sucursal(sucursal_id)
+    service = AsyncSucursalService(db)
+    eliminada = await service.eliminar_sucursal(sucursal_id)
     
     if not eliminada:
         raise HTTPException(
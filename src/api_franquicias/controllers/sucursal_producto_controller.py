@@ -2,12 +2,19 @@
 Controlador REST para operaciones de Productos en Sucursales
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from ..database import get_db
-from ..services.producto_service import ProductoService
-from ..schemas import ProductoCreate, ProductoResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from typing import Optional
+from ..config import settings
+from ..database import DbSession, get_read_db, get_write_db
+from ..repositories.filtros import FiltroProductos, ListadoInvalidoError
+from ..services.async_producto_service import AsyncProductoService
+from ..services.producto_service import ProductosSimilaresError
+from .producto_controller import filtro_productos
+from ..schemas import (
+    ProductoCreate, ProductoResponse, PaginaResponse, ProductoBulkCreate,
+    ProductoBulkResponse, ResultadoCreacionResponse, ProductoSimilarResponse
+)
 
 router = APIRouter(prefix="/api/sucursales", tags=["sucursales-productos"])
 
@@ -16,7 +23,10 @@ router = APIRouter(prefix="/api/sucursales", tags=["sucursales-productos"])
 async def agregar_producto(
     sucursal_id: int,
     producto_data: ProductoCreate,
-    db: Session = Depends(get_db)
+    check_similar: bool = Query(
+        False, description="No crear el producto si hay otros con nombre parecido en la sucursal"
+    ),
+    db: DbSession = Depends(get_write_db)
 ):
     """
     Agrega un producto a una sucursal.
@@ -24,15 +34,79 @@ async def agregar_producto(
     - **sucursal_id**: ID de la sucursal
     - **nombre**: Nombre del producto
     - **cantidad_stock**: Cantidad en stock
+    - **check_similar**: Si es `true` y la sucursal tiene productos con nombre
+      parecido (posibles duplicados por errores de escritura), no se crea y
+      se responde 409 con esos productos en `similares`; para crearlo igualmente
+      se repite la petición sin el parámetro
     """
     try:
-        service = ProductoService(db)
-        producto = service.crear_producto(
+        service = AsyncProductoService(db)
+        producto = await service.crear_producto(
             producto_data.nombre, 
             producto_data.cantidad_stock, 
-            sucursal_id
+            sucursal_id,
+            check_similar
         )
         return ProductoResponse.from_orm(producto)
+    except ProductosSimilaresError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "mensaje": str(e),
+                "similares": [
+                    jsonable_encoder(ProductoSimilarResponse(
+                        **ProductoResponse.model_validate(similar).model_dump(), similitud=valor
+                    ))
+                    for similar, valor in e.similares
+                ],
+            }
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error interno del servidor: {str(e)}"
+        )
+
+
+@router.post("/{sucursal_id}/productos/bulk", response_model=ProductoBulkResponse)
+async def agregar_productos_en_lote(
+    sucursal_id: int,
+    lote: ProductoBulkCreate,
+    db: DbSession = Depends(get_write_db)
+):
+    """
+    Agrega un lote de productos a una sucursal en una sola transacción.
+    
+    - **sucursal_id**: ID de la sucursal
+    - **productos**: Lista de productos (`nombre`, `cantidad_stock`)
+    
+    Retorna el resultado de cada elemento: los nombres vacíos o duplicados
+    (en la sucursal o dentro del lote) y el stock negativo se reportan sin
+    impedir crear el resto.
+    """
+    try:
+        service = AsyncProductoService(db)
+        resultados = await service.crear_productos(
+            sucursal_id,
+            [(p.nombre, p.cantidad_stock) for p in lote.productos]
+        )
+        respuesta = [
+            ResultadoCreacionResponse(
+                indice=r.indice,
+                nombre=r.nombre,
+                creado=r.producto is not None,
+                producto=ProductoResponse.model_validate(r.producto) if r.producto else None,
+                error=r.error
+            )
+            for r in resultados
+        ]
+        creados = sum(1 for r in respuesta if r.creado)
+        return ProductoBulkResponse(creados=creados, errores=len(respuesta) - creados, resultados=respuesta)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -45,20 +119,38 @@ async def agregar_producto(
         )
 
 
-@router.get("/{sucursal_id}/productos", response_model=List[ProductoResponse])
+@router.get("/{sucursal_id}/productos", response_model=PaginaResponse[ProductoResponse])
 async def obtener_productos_por_sucursal(
     sucursal_id: int,
-    db: Session = Depends(get_db)
+    limit: int = Query(
+        settings.pagination_default_limit, ge=1, le=settings.pagination_max_limit,
+        description="Número máximo de elementos por página"
+    ),
+    after: Optional[str] = Query(None, description="Cursor: next_cursor de la página anterior"),
+    filtro: FiltroProductos = Depends(filtro_productos),
+    db: DbSession = Depends(get_read_db)
 ):
     """
-    Obtiene todos los productos de una sucursal.
+    Obtiene los productos de una sucursal paginados por cursor.
     
     - **sucursal_id**: ID de la sucursal
+    - **limit**: Número máximo de productos por página
+    - **after**: Cursor (`next_cursor` de la página anterior)
+    - **stock_min** / **stock_max**, **nombre_prefix**, **updated_since**, **sort**:
+      filtros y orden, como en `GET /api/productos/`
     """
     try:
-        service = ProductoService(db)
-        productos = service.obtener_productos_por_sucursal(sucursal_id)
-        return [ProductoResponse.from_orm(p) for p in productos]
+        service = AsyncProductoService(db)
+        pagina = await service.listar_productos_por_sucursal(sucursal_id, limit, after, filtro)
+        return PaginaResponse[ProductoResponse](
+            items=[ProductoResponse.from_orm(p) for p in pagina.items],
+            next_cursor=pagina.next_cursor
+        )
+    except ListadoInvalidoError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -2,39 +2,606 @@
 Configuración de la base de datos para el sistema de franquicias
 """
 
-import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+import threading
+import time
+import weakref
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Union
+from fastapi import Depends, Request, Response
+from sqlalchemy import create_engine, event, exc, make_url
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import (
+    AsyncAdaptedQueuePool,
+    NullPool,
+    Pool,
+    QueuePool,
+    SingletonThreadPool,
+    StaticPool,
+)
+from .config import Settings, settings
 from .models.base import Base
 from .models import Franquicia, Sucursal, Producto
+from .migrations import run_migrations
+from .sharding import ShardRouter, prepare_shard_ids, router_de_sesion
 
 # Configuración de la base de datos
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./franquicias.db")
-
-# Configuración especial para SQLite
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
+DATABASE_URL = settings.database_url
+
+# Drivers asíncronos por dialecto
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """
+    Convierte una URL síncrona en su equivalente con driver asíncrono.
+
+    Args:
+        url (str): URL de conexión (por ejemplo ``sqlite:///./franquicias.db``)
+
+    Returns:
+        str: URL con el driver asíncrono (``sqlite+aiosqlite://``, ``postgresql+asyncpg://``)
+
+    Raises:
+        ValueError: Si el dialecto no tiene un driver asíncrono soportado
+    """
+    scheme, separador, resto = url.partition("://")
+    dialecto = scheme.split("+", 1)[0]
+    if dialecto == "postgres":
+        dialecto = "postgresql"
+    if dialecto not in ASYNC_DRIVERS:
+        raise ValueError(f"No hay driver asíncrono soportado para '{dialecto}'")
+    return f"{ASYNC_DRIVERS[dialecto]}{separador}{resto}"
+
+
+class PoolStatistics:
+    """
+    Contadores de uso de un pool de conexiones.
+
+    Registra cuántas conexiones se entregan y devuelven, cuánto esperan los
+    checkouts y cuántos agotan ``pool_timeout``, para dimensionar el pool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Reinicia todos los contadores"""
+        with self._lock:
+            self.checkouts = 0
+            self.checkins = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+
+    def record_checkout(self, espera: float):
+        """Registra un checkout y el tiempo que tardó en obtener la conexión"""
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += espera
+            self.max_wait = max(self.max_wait, espera)
+
+    def record_checkin(self):
+        """Registra la devolución de una conexión al pool"""
+        with self._lock:
+            self.checkins += 1
+
+    def record_timeout(self):
+        """Registra un checkout que superó ``pool_timeout``"""
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self, pool: Pool) -> Dict[str, Any]:
+        """
+        Retorna los contadores junto con el estado actual del pool.
+
+        Args:
+            pool (Pool): Pool de conexiones a describir
+
+        Returns:
+            Dict[str, Any]: Estadísticas acumuladas y ocupación actual
+        """
+        with self._lock:
+            datos = {
+                "pool_class": type(pool).__name__,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "timeouts": self.timeouts,
+                "wait_total_ms": round(self.total_wait * 1000, 3),
+                "wait_max_ms": round(self.max_wait * 1000, 3),
+                "wait_avg_ms": round(self.total_wait * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+            }
+        if isinstance(pool, QueuePool):
+            datos.update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+            })
+        return datos
+
+
+def instrumented_pool_class(base: type, statistics: PoolStatistics) -> type:
+    """
+    Crea una subclase de ``base`` que registra sus checkouts en ``statistics``.
+
+    Args:
+        base (type): Clase de pool de SQLAlchemy (QueuePool, NullPool, ...)
+        statistics (PoolStatistics): Contadores donde registrar el uso
+
+    Returns:
+        type: Clase de pool instrumentada
+    """
+
+    class InstrumentedPool(base):
+        def connect(self):
+            inicio = time.perf_counter()
+            try:
+                conexion = super().connect()
+            except exc.TimeoutError:
+                statistics.record_timeout()
+                raise
+            statistics.record_checkout(time.perf_counter() - inicio)
+            return conexion
+
+        def _do_return_conn(self, record):
+            statistics.record_checkin()
+            super()._do_return_conn(record)
+
+    InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+    return InstrumentedPool
+
+
+def build_engine_options(url: str, config: Settings, is_async: bool = False) -> Dict[str, Any]:
+    """
+    Construye los argumentos de ``create_engine`` para el pool configurado.
+
+    Args:
+        url (str): URL de conexión
+        config (Settings): Configuración con los parámetros ``db_pool_*``
+        is_async (bool): True si el motor es asíncrono
+
+    Returns:
+        Dict[str, Any]: Argumentos con nombre para ``create_engine``/``create_async_engine``
+
+    Raises:
+        ValueError: Si ``db_pool_class`` no es válido o no aplica al motor
+    """
+    url_parseada = make_url(url)
+    es_sqlite = url_parseada.get_backend_name() == "sqlite"
+    en_memoria = es_sqlite and url_parseada.database in (None, "", ":memory:")
+
+    pool_class = config.db_pool_class.lower()
+    if pool_class == "auto":
+        pool_class = "static" if en_memoria else "queue"
+
+    if pool_class == "queue":
+        clase = AsyncAdaptedQueuePool if is_async else QueuePool
+    elif pool_class == "singleton" and not is_async:
+        clase = SingletonThreadPool
+    elif pool_class == "static":
+        clase = StaticPool
+    elif pool_class == "null":
+        clase = NullPool
+    else:
+        raise ValueError(f"Pool de conexiones no soportado: '{config.db_pool_class}'")
+
+    opciones: Dict[str, Any] = {
+        "poolclass": clase,
+        "pool_pre_ping": config.db_pool_pre_ping,
+        "pool_recycle": config.db_pool_recycle,
+    }
+    if clase in (QueuePool, AsyncAdaptedQueuePool):
+        opciones.update({
+            "pool_size": config.db_pool_size,
+            "max_overflow": config.db_max_overflow,
+            "pool_timeout": config.db_pool_timeout,
+        })
+    elif clase is SingletonThreadPool:
+        opciones["pool_size"] = config.db_pool_size
+
+    if es_sqlite:
+        connect_args: Dict[str, Any] = {"timeout": config.db_sqlite_busy_timeout}
+        if not is_async:
+            # Las conexiones del pool se usan desde distintos hilos (uno a la vez)
+            connect_args["check_same_thread"] = False
+        opciones["connect_args"] = connect_args
+    return opciones
+
+
+def enable_sqlite_savepoints(sync_engine: Engine) -> None:
+    """
+    Delega el control de transacciones de SQLite en SQLAlchemy.
+
+    El driver ``sqlite3`` (y ``aiosqlite``) retrasa el BEGIN hasta la primera
+    escritura, lo que rompe los SAVEPOINT de ``Session.begin_nested``. Se
+    desactiva ese comportamiento y se emite el BEGIN al iniciar la transacción.
+
+    Args:
+        sync_engine (Engine): Motor síncrono (``AsyncEngine.sync_engine`` para el asíncrono)
+    """
+    @event.listens_for(sync_engine, "connect")
+    def _sin_begin_implicito(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(sync_engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+
+def enable_sqlite_foreign_keys(sync_engine: Engine) -> None:
+    """
+    Activa las claves foráneas en cada conexión SQLite.
+
+    SQLite las ignora por defecto; sin ellas ``ON DELETE CASCADE`` no elimina
+    las sucursales y productos de una franquicia.
+
+    Args:
+        sync_engine (Engine): Motor síncrono (``AsyncEngine.sync_engine`` para el asíncrono)
+    """
+    @event.listens_for(sync_engine, "connect")
+    def _claves_foraneas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+def enable_sqlite_wal(sync_engine: Engine) -> None:
+    """
+    Activa el modo WAL de SQLite en cada conexión.
+
+    En modo WAL los lectores no esperan a los escritores (ni al revés), lo que
+    permite atender las lecturas con conexiones de sólo lectura sobre el mismo
+    archivo mientras la base principal escribe.
+
+    Args:
+        sync_engine (Engine): Motor síncrono (``AsyncEngine.sync_engine`` para el asíncrono)
+    """
+    @event.listens_for(sync_engine, "connect")
+    def _wal(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
+
+def get_read_database_urls(url: str, config: Settings) -> List[str]:
+    """
+    Obtiene las URLs de los motores de lectura.
+
+    Usa las réplicas de ``database_read_urls``; si no hay y
+    ``database_sqlite_readers`` está activo, abre el mismo archivo SQLite en
+    modo de sólo lectura. Sin réplicas las lecturas usan la base principal.
+
+    Args:
+        url (str): URL de la base de datos principal
+        config (Settings): Configuración de la aplicación
+
+    Returns:
+        List[str]: URLs síncronas de los motores de lectura (vacía si no hay)
+    """
+    if config.database_read_urls:
+        return list(config.database_read_urls)
+    if config.database_sqlite_readers:
+        parsed = make_url(url)
+        if parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:"):
+            return [f"sqlite:///file:{parsed.database}?mode=ro&uri=true"]
+    return []
+
+
+def _create_instrumented_engine(url: str, statistics: PoolStatistics, is_async: bool = False):
+    """Crea un motor cuyo pool registra sus estadísticas en ``statistics``"""
+    opciones = build_engine_options(url, settings, is_async)
+    opciones["poolclass"] = instrumented_pool_class(opciones["poolclass"], statistics)
+    if is_async:
+        motor = create_async_engine(url, **opciones)
+        sync_engine = motor.sync_engine
+    else:
+        motor = sync_engine = create_engine(url, **opciones)
+    if sync_engine.dialect.name == "sqlite":
+        enable_sqlite_foreign_keys(sync_engine)
+        enable_sqlite_savepoints(sync_engine)
+    return motor
+
+
+# Motor síncrono y estadísticas de su pool
+pool_statistics = PoolStatistics()
+engine = _create_instrumented_engine(DATABASE_URL, pool_statistics)
+
+# Crear sesión de base de datos. Las sesiones viven lo que dura una petición:
+# tras el commit de la unidad de trabajo los objetos siguen vigentes y se
+# serializan sin volver a consultarlos (expire_on_commit=False)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Motor asíncrono opcional, habilitado con DATABASE_ASYNC=true
+async_engine = None
+AsyncSessionLocal = None
+async_pool_statistics = PoolStatistics()
+
+if settings.database_async:
+    ASYNC_DATABASE_URL = settings.async_database_url or get_async_database_url(DATABASE_URL)
+    async_engine = _create_instrumented_engine(ASYNC_DATABASE_URL, async_pool_statistics, is_async=True)
+    # expire_on_commit=False: tras el commit los objetos se serializan fuera
+    # del contexto greenlet, donde no es posible recargar atributos expirados
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False,
     )
-else:
-    engine = create_engine(DATABASE_URL)
 
-# Crear sesión de base de datos
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+if settings.database_sqlite_readers:
+    # Los lectores de sólo lectura sólo evitan esperar a los escritores en modo WAL
+    motor_principal = async_engine.sync_engine if async_engine is not None else engine
+    if motor_principal.dialect.name == "sqlite":
+        enable_sqlite_wal(motor_principal)
+
+# Motores de lectura (réplicas o SQLite de sólo lectura) y estadísticas de sus pools
+read_engines: List[Union[Engine, AsyncEngine]] = []
+read_pool_statistics: List[PoolStatistics] = []
+_read_session_factories: List[Callable[[], Any]] = []
+
+for _url_lectura in get_read_database_urls(DATABASE_URL, settings):
+    _estadisticas_lectura = PoolStatistics()
+    if settings.database_async:
+        _motor_lectura = _create_instrumented_engine(
+            get_async_database_url(_url_lectura), _estadisticas_lectura, is_async=True
+        )
+        _read_session_factories.append(
+            async_sessionmaker(bind=_motor_lectura, autoflush=False, expire_on_commit=False)
+        )
+    else:
+        _motor_lectura = _create_instrumented_engine(_url_lectura, _estadisticas_lectura)
+        _read_session_factories.append(
+            sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=_motor_lectura)
+        )
+    read_engines.append(_motor_lectura)
+    read_pool_statistics.append(_estadisticas_lectura)
+
+
+# Shards adicionales (sharding por franquicia); el shard 0 es la base principal
+shard_engines: List[Union[Engine, AsyncEngine]] = []
+shard_pool_statistics: List[PoolStatistics] = []
+shard_router: Optional[ShardRouter] = None
+
+if settings.database_shard_urls:
+    if read_engines:
+        # Los motores de lectura replican sólo la base principal (shard 0)
+        raise ValueError("Las réplicas de lectura no se pueden combinar con el sharding")
+    for _url_shard in settings.database_shard_urls:
+        _estadisticas_shard = PoolStatistics()
+        if settings.database_async:
+            _motor_shard = _create_instrumented_engine(
+                get_async_database_url(_url_shard), _estadisticas_shard, is_async=True
+            )
+        else:
+            _motor_shard = _create_instrumented_engine(_url_shard, _estadisticas_shard)
+        shard_engines.append(_motor_shard)
+        shard_pool_statistics.append(_estadisticas_shard)
+
+    if settings.database_async:
+        shard_router = ShardRouter(
+            [async_engine.sync_engine] + [motor.sync_engine for motor in shard_engines], is_async=True
+        )
+        AsyncSessionLocal = shard_router.session
+    else:
+        shard_router = ShardRouter([engine] + shard_engines)
+        SessionLocal = shard_router.session
+
+
+def get_shard_engines() -> List[Union[Engine, AsyncEngine]]:
+    """Motores de todos los shards en orden de índice (sólo la base principal sin sharding)"""
+    principal = async_engine if settings.database_async else engine
+    return [principal] + shard_engines
+
+
+def get_pool_statistics() -> Dict[str, Any]:
+    """
+    Obtiene las estadísticas de los pools de conexiones activos.
+
+    Returns:
+        Dict[str, Any]: Estadísticas del pool síncrono y, si existen, del
+        asíncrono, de los motores de lectura y de los shards adicionales
+    """
+    estadisticas = {"sync": pool_statistics.snapshot(engine.pool)}
+    if async_engine is not None:
+        estadisticas["async"] = async_pool_statistics.snapshot(async_engine.pool)
+    if read_engines:
+        estadisticas["read"] = [
+            estadisticas_lectura.snapshot(motor.pool)
+            for motor, estadisticas_lectura in zip(read_engines, read_pool_statistics)
+        ]
+    if shard_engines:
+        estadisticas["shards"] = [
+            estadisticas_shard.snapshot(motor.pool)
+            for motor, estadisticas_shard in zip(shard_engines, shard_pool_statistics)
+        ]
+    return estadisticas
+
+
+async def dispose_async_engines() -> None:
+    """Cierra las conexiones de los motores asíncronos (principal, de lectura y shards)"""
+    for motor in [async_engine, *read_engines, *shard_engines]:
+        if isinstance(motor, AsyncEngine):
+            await motor.dispose()
+
+
+# Tipo de sesión que reciben servicios y repositorios asíncronos
+DbSession = Union[Session, AsyncSession]
+
+
+def get_sync_session(db: DbSession) -> Session:
+    """
+    Obtiene la ``Session`` síncrona asociada a la sesión recibida.
+
+    Para una ``AsyncSession`` retorna su ``sync_session`` interna, que sólo
+    debe usarse dentro de :func:`run_in_session`.
+    """
+    return db.sync_session if isinstance(db, AsyncSession) else db
+
+
+async def run_in_session(db: DbSession, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Ejecuta código ORM síncrono sobre una sesión síncrona o asíncrona.
+
+    Con una ``AsyncSession`` la función se ejecuta mediante ``run_sync``, de
+    modo que cada consulta usa el driver asíncrono y no bloquea el event loop.
+    Con una ``Session`` tradicional se ejecuta directamente.
+
+    Args:
+        db: Sesión de base de datos (``Session`` o ``AsyncSession``)
+        fn: Función a ejecutar
+        *args: Argumentos posicionales para ``fn``
+        **kwargs: Argumentos con nombre para ``fn``
+
+    Returns:
+        Any: El valor retornado por ``fn``
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(lambda _session: fn(*args, **kwargs))
+    return fn(*args, **kwargs)
+
+
+async def iterate_in_session(db: DbSession, iterador: Iterator[Any]) -> AsyncIterator[Any]:
+    """
+    Recorre un generador ORM síncrono sobre una sesión síncrona o asíncrona.
+
+    Cada elemento se obtiene con :func:`run_in_session`, de modo que un
+    cursor abierto por el generador (por ejemplo, con ``yield_per``) se lee
+    por partes sin bloquear el event loop con una ``AsyncSession``.
+
+    Args:
+        db: Sesión de base de datos (``Session`` o ``AsyncSession``)
+        iterador: Generador que usa la sesión síncrona de ``db``
+
+    Yields:
+        Any: Los elementos de ``iterador``
+    """
+    fin = object()
+    try:
+        while True:
+            elemento = await run_in_session(db, next, iterador, fin)
+            if elemento is fin:
+                return
+            yield elemento
+    finally:
+        # Cierra el cursor si el consumidor abandona el recorrido
+        await run_in_session(db, iterador.close)
+
+
+def new_session_like(db: DbSession) -> DbSession:
+    """
+    Crea una sesión independiente del mismo tipo y motor que ``db``.
+
+    Las tareas en segundo plano no pueden reutilizar la sesión de la petición,
+    que se cierra al terminar ésta.
+
+    Args:
+        db: Sesión de referencia (``Session`` o ``AsyncSession``)
+
+    Returns:
+        DbSession: Nueva sesión configurada como las de la aplicación
+    """
+    router = router_de_sesion(db)
+    if router is not None:
+        return router.session()
+    if isinstance(db, AsyncSession):
+        return AsyncSession(bind=db.bind, autoflush=False, expire_on_commit=False)
+    return Session(bind=db.get_bind(), autoflush=False, expire_on_commit=False)
+
+
+# Motores síncronos y enrutadores equivalentes a los asíncronos, para los hilos de fondo
+_motores_para_hilos: "weakref.WeakKeyDictionary[Engine, Engine]" = weakref.WeakKeyDictionary()
+_routers_para_hilos: "weakref.WeakKeyDictionary[ShardRouter, ShardRouter]" = weakref.WeakKeyDictionary()
+_lock_para_hilos = threading.Lock()
+
+
+def _motor_para_hilos(motor: Engine) -> Engine:
+    """
+    Motor síncrono sobre la misma base que ``motor``.
+
+    El ``sync_engine`` de un ``AsyncEngine`` sólo funciona dentro del event
+    loop; para los hilos se crea un motor con el driver síncrono del dialecto
+    y sin pool (las conexiones de fondo son esporádicas).
+    """
+    if not motor.dialect.is_async:
+        return motor
+    with _lock_para_hilos:
+        sincrono = _motores_para_hilos.get(motor)
+        if sincrono is None:
+            url = motor.url.set(drivername=motor.url.get_backend_name())
+            sincrono = _motores_para_hilos[motor] = create_engine(url, poolclass=NullPool)
+        return sincrono
+
+
+def thread_session_factory(db: DbSession) -> Callable[[], Session]:
+    """
+    Fábrica de sesiones síncronas sobre las mismas bases de datos que ``db``.
+
+    Los trabajos que corren en hilos de fondo (fuera del event loop y de la
+    petición) no pueden usar ``db`` ni, si es asíncrona, sus motores.
+
+    Args:
+        db: Sesión de referencia (``Session``, ``AsyncSession`` o la
+            ``Session`` síncrona de una ``AsyncSession``)
+
+    Returns:
+        Callable[[], Session]: Crea sesiones síncronas (particionadas si ``db`` lo es)
+    """
+    router = router_de_sesion(db)
+    if router is not None:
+        if not router.is_async:
+            return router.session
+        with _lock_para_hilos:
+            sincrono = _routers_para_hilos.get(router)
+        if sincrono is None:
+            sincrono = ShardRouter([_motor_para_hilos(motor) for motor in router.engines.values()])
+            with _lock_para_hilos:
+                sincrono = _routers_para_hilos.setdefault(router, sincrono)
+        return sincrono.session
+    sync = db.sync_session if isinstance(db, AsyncSession) else db
+    return sessionmaker(bind=_motor_para_hilos(sync.get_bind()), autoflush=False, expire_on_commit=False)
+
+
+def background_session_factory() -> Callable[[], Session]:
+    """Fábrica de sesiones síncronas de la aplicación para los hilos de fondo"""
+    if settings.database_async:
+        return thread_session_factory(AsyncSessionLocal())
+    return SessionLocal
+
+
+async def close_session(db: DbSession) -> None:
+    """Cierra una sesión síncrona o asíncrona"""
+    if isinstance(db, AsyncSession):
+        await db.close()
+    else:
+        db.close()
 
 
 def create_tables():
-    """Crea todas las tablas en la base de datos"""
+    """Crea todas las tablas en la base de datos sin pasar por las migraciones"""
     Base.metadata.create_all(bind=engine)
 
 
-def get_db():
+def _migrate_shard(conn, indice: int) -> None:
+    """Migra un shard y ajusta sus IDs a su rango"""
+    run_migrations(conn)
+    prepare_shard_ids(conn, indice)
+
+
+def migrate():
+    """Aplica las migraciones de Alembic pendientes en la base principal y en cada shard"""
+    for indice, motor in enumerate(get_shard_engines()):
+        with motor.connect() as conn:
+            _migrate_shard(conn, indice)
+
+
+def get_sync_db():
     """
-    Dependency que proporciona una sesión de base de datos.
-    Se usa como dependency en FastAPI.
+    Dependency que proporciona una sesión síncrona de base de datos.
     """
     db = SessionLocal()
     try:
@@ -43,41 +610,166 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    Dependency que proporciona una ``AsyncSession`` de base de datos.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Dependency que proporciona la sesión de base de datos a los controladores.
+# Es asíncrona (AsyncSession) o síncrona (Session) según DATABASE_ASYNC.
+get_db = get_async_db if settings.database_async else get_sync_db
+
+# Cabecera con el token que permite leer las escrituras propias
+READ_YOUR_WRITES_HEADER = "X-Read-Your-Writes"
+
+
+class ReadRouter:
+    """
+    Reparte las sesiones de lectura entre los motores de lectura.
+
+    Cada sesión se crea en el siguiente motor, en turno rotativo. Sin motores
+    de lectura el enrutador está deshabilitado y las lecturas usan la base
+    principal.
+    """
+
+    def __init__(self, session_factories: Sequence[Callable[[], DbSession]] = ()):
+        self._lock = threading.Lock()
+        self._session_factories = list(session_factories)
+        self._siguiente = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Si hay motores de lectura configurados"""
+        return bool(self._session_factories)
+
+    def session(self) -> DbSession:
+        """Crea una sesión en el siguiente motor de lectura"""
+        with self._lock:
+            factory = self._session_factories[self._siguiente % len(self._session_factories)]
+            self._siguiente += 1
+        return factory()
+
+
+read_router = ReadRouter(_read_session_factories)
+
+
+def issue_read_your_writes_token() -> str:
+    """Genera el token que se devuelve al cliente tras una escritura"""
+    return f"{time.time():.3f}"
+
+
+def requires_primary(token: Optional[str], window: float) -> bool:
+    """
+    Indica si una lectura con ``token`` debe ir a la base principal.
+
+    El token es el instante de la escritura; mientras no pase ``window``
+    (el retraso tolerado de las réplicas) la lectura se hace en la principal.
+    Un token ausente o inválido no fuerza la principal.
+    """
+    if not token:
+        return False
+    try:
+        emitido = float(token)
+    except ValueError:
+        return False
+    return time.time() - emitido < window
+
+
+async def get_read_db(request: Request, db: DbSession = Depends(get_db)):
+    """
+    Dependency que proporciona una sesión para las peticiones de lectura.
+
+    Con motores de lectura configurados la sesión se abre en una réplica, salvo
+    que la petición envíe un token ``X-Read-Your-Writes`` reciente, en cuyo
+    caso se usa la base principal para ver las escrituras propias. La sesión
+    principal que recibe no abre conexión si no se usa.
+    """
+    token = request.headers.get(READ_YOUR_WRITES_HEADER)
+    if not read_router.enabled or requires_primary(token, settings.db_read_your_writes_window):
+        yield db
+        return
+
+    lectura = read_router.session()
+    try:
+        yield lectura
+    finally:
+        await close_session(lectura)
+
+
+def get_write_db(response: Response, db: DbSession = Depends(get_db)) -> DbSession:
+    """
+    Dependency que proporciona la sesión de la base principal para escrituras.
+
+    Con motores de lectura configurados agrega a la respuesta el token
+    ``X-Read-Your-Writes`` que el cliente puede reenviar en sus lecturas.
+    """
+    if read_router.enabled:
+        response.headers[READ_YOUR_WRITES_HEADER] = issue_read_your_writes_token()
+    return db
+
+
+def _seed_example_data(db: Session):
+    """Agrega datos de ejemplo si la base de datos está vacía"""
+    from .repositories.producto_repository import ProductoRepository
+
+    # Verificar si ya hay datos
+    if db.query(Franquicia).first() is None:
+        # Crear franquicia de ejemplo
+        franquicia_ejemplo = Franquicia(nombre="Franquicia de Ejemplo")
+        db.add(franquicia_ejemplo)
+        db.commit()
+        db.refresh(franquicia_ejemplo)
+
+        # Crear sucursal de ejemplo
+        sucursal_ejemplo = Sucursal(
+            nombre="Sucursal Centro",
+            franquicia_id=franquicia_ejemplo.id
+        )
+        db.add(sucursal_ejemplo)
+        db.commit()
+        db.refresh(sucursal_ejemplo)
+
+        # Crear productos de ejemplo
+        productos_ejemplo = [
+            Producto(nombre="Hamburguesa Clásica", cantidad_stock=50, sucursal_id=sucursal_ejemplo.id),
+            Producto(nombre="Papas Fritas", cantidad_stock=100, sucursal_id=sucursal_ejemplo.id),
+            Producto(nombre="Refresco", cantidad_stock=75, sucursal_id=sucursal_ejemplo.id),
+        ]
+
+        for producto in productos_ejemplo:
+            db.add(producto)
+        db.flush()
+
+        ProductoRepository(db).refresh_max_stock([sucursal_ejemplo.id])
+        db.commit()
+        print("Base de datos inicializada con datos de ejemplo")
+
+
 def init_db():
     """Inicializa la base de datos con datos de ejemplo"""
-    create_tables()
-    
+    migrate()
+
     # Solo agregar datos de ejemplo si no existen
     db = SessionLocal()
     try:
-        # Verificar si ya hay datos
-        if db.query(Franquicia).first() is None:
-            # Crear franquicia de ejemplo
-            franquicia_ejemplo = Franquicia(nombre="Franquicia de Ejemplo")
-            db.add(franquicia_ejemplo)
-            db.commit()
-            db.refresh(franquicia_ejemplo)
-            
-            # Crear sucursal de ejemplo
-            sucursal_ejemplo = Sucursal(
-                nombre="Sucursal Centro",
-                franquicia_id=franquicia_ejemplo.id
-            )
-            db.add(sucursal_ejemplo)
-            db.commit()
-            db.refresh(sucursal_ejemplo)
-            
-            # Crear productos de ejemplo
-            productos_ejemplo = [
-                Producto(nombre="Hamburguesa Clásica", cantidad_stock=50, sucursal_id=sucursal_ejemplo.id),
-                Producto(nombre="Papas Fritas", cantidad_stock=100, sucursal_id=sucursal_ejemplo.id),
-                Producto(nombre="Refresco", cantidad_stock=75, sucursal_id=sucursal_ejemplo.id),
-            ]
-            
-            for producto in productos_ejemplo:
-                db.add(producto)
-            
-            db.commit()
-            print("Base de datos inicializada con datos de ejemplo")
+        _seed_example_data(db)
     finally:
         db.close()
+
+
+async def migrate_async():
+    """Aplica las migraciones pendientes usando los motores asíncronos"""
+    for indice, motor in enumerate(get_shard_engines()):
+        async with motor.connect() as conn:
+            await conn.run_sync(_migrate_shard, indice)
+
+
+async def init_async_db():
+    """Inicializa la base de datos usando el motor asíncrono"""
+    await migrate_async()
+
+    async with AsyncSessionLocal() as db:
+        await db.run_sync(_seed_example_data)
@@ -10,7 +10,10 @@ import uvicorn
 import os
 
 from .config import settings
-from .database import init_db
+from . import database
+from .database import init_db, init_async_db
+from .repositories.cache import cache_entidades
+from .repositories.trigramas import indices_trigramas
 from .controllers.franquicia_controller import router as franquicia_router
 from .controllers.sucursal_controller import router as sucursal_router
 from .controllers.producto_controller import router as producto_router
@@ -25,8 +28,17 @@ async def lifespan(app: FastAPI):
     Inicializa la base de datos al arrancar la aplicación.
     """
     # Inicializar base de datos
-    init_db()
+    if settings.database_async:
+        await init_async_db()
+    else:
+        init_db()
+    # Índices de trigramas de las franquicias, en segundo plano
+    if settings.similar_index_warmup:
+        indices_trigramas.precargar(database.background_session_factory())
     yield
+    indices_trigramas.detener()
+    # Cerrar las conexiones de los motores asíncronos
+    await database.dispose_async_engines()
 
 
 # Crear aplicación FastAPI
@@ -47,6 +59,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=settings.cors_methods,
     allow_headers=settings.cors_headers,
+    expose_headers=[database.READ_YOUR_WRITES_HEADER],
 )
 
 
@@ -84,6 +97,22 @@ async def health_check():
     }
 
 
+@app.get("/health/pool", tags=["health"])
+async def pool_status():
+    """
+    Estadísticas del pool de conexiones (checkouts, esperas y ocupación).
+    """
+    return database.get_pool_statistics()
+
+
+@app.get("/health/cache", tags=["health"])
+async def cache_status():
+    """
+    Estadísticas de la caché de entidades (aciertos, fallos, desalojos y ocupación).
+    """
+    return cache_entidades.estadisticas()
+
+
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
     """
@@ -0,0 +1,87 @@
+"""
+Migraciones de esquema (Alembic) para el sistema de franquicias.
+
+Las migraciones se pueden ejecutar desde la línea de comandos
+(``alembic upgrade head`` en la raíz del proyecto) o desde la aplicación
+con :func:`run_migrations`, que es lo que hace ``init_db`` al arrancar.
+
+Autor: Darwin Hurtado
+Fecha: 2024
+"""
+
+import os
+from typing import Any, Dict, Optional
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+from ..models.base import Base
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Revisión equivalente al esquema que creaba ``Base.metadata.create_all``
+# antes de existir las migraciones
+REVISION_ESQUEMA_INICIAL = "0001"
+
+# Objetos de búsqueda creados por las migraciones 0007 y 0008 que no están
+# en los modelos (tabla virtual FTS5 con sus tablas internas e índices GIN)
+PREFIJO_TABLAS_BUSQUEDA = "productos_fts"
+INDICES_FUERA_DEL_MODELO = {"ix_productos_nombre_busqueda", "ix_productos_nombre_trigramas"}
+
+
+def incluir_nombre(nombre: Optional[str], tipo: str, padres: Dict[str, Any]) -> bool:
+    """
+    Filtro ``include_name`` de Alembic: excluye de la comparación con los
+    modelos los objetos de búsqueda que sólo crean las migraciones.
+    """
+    if tipo == "table" and nombre and nombre.startswith(PREFIJO_TABLAS_BUSQUEDA):
+        return False
+    if tipo == "index" and nombre in INDICES_FUERA_DEL_MODELO:
+        return False
+    return True
+
+
+def get_alembic_config(connection: Optional[Connection] = None) -> Config:
+    """
+    Construye la configuración de Alembic sin depender de ``alembic.ini``.
+
+    Args:
+        connection (Optional[Connection]): Conexión sobre la que ejecutar las
+            migraciones; si es None, ``env.py`` usa ``DATABASE_URL``
+
+    Returns:
+        Config: Configuración lista para ``alembic.command``
+    """
+    config = Config()
+    config.set_main_option("script_location", MIGRATIONS_DIR)
+    config.attributes["connection"] = connection
+    config.attributes["target_metadata"] = Base.metadata
+    config.attributes["include_name"] = incluir_nombre
+    return config
+
+
+def run_migrations(connection: Connection, revision: str = "head") -> None:
+    """
+    Aplica las migraciones pendientes sobre una conexión síncrona.
+
+    Las bases de datos creadas con ``create_all`` antes de las migraciones
+    no tienen tabla ``alembic_version``; se marcan con la revisión inicial
+    para que sólo se apliquen las migraciones posteriores.
+
+    Args:
+        connection (Connection): Conexión síncrona (``AsyncConnection.run_sync``
+            también la proporciona)
+        revision (str): Revisión destino
+    """
+    config = get_alembic_config(connection)
+
+    actual = MigrationContext.configure(connection).get_current_revision()
+    if actual is None and inspect(connection).has_table("franquicias"):
+        command.stamp(config, REVISION_ESQUEMA_INICIAL)
+    # Alembic gestiona sus propias transacciones (y los bloques autocommit de
+    # PostgreSQL), por lo que la conexión no debe tener una abierta
+    connection.commit()
+
+    command.upgrade(config, revision)
+    connection.commit()
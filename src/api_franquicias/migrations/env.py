@@ -0,0 +1,100 @@
+"""
+Entorno de ejecución de Alembic para el sistema de franquicias
+"""
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+config = context.config
+
+target_metadata = config.attributes.get("target_metadata")
+include_name = config.attributes.get("include_name")
+if target_metadata is None:
+    # Ejecución desde la línea de comandos (alembic.ini agrega src al path)
+    from api_franquicias.models.base import Base
+    from api_franquicias.migrations import incluir_nombre
+    target_metadata = Base.metadata
+    include_name = incluir_nombre
+
+
+def get_url() -> str:
+    """Obtiene la URL de la base de datos desde la configuración de la aplicación"""
+    url = config.get_main_option("sqlalchemy.url")
+    if url:
+        return url
+    from api_franquicias.config import settings
+    return settings.database_url
+
+
+def configure(connection=None, **kwargs) -> None:
+    """Configura el contexto de migración común a ambos modos"""
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # Objetos de búsqueda (FTS5, índice GIN) que no están en los modelos
+        include_name=include_name,
+        # Cada migración en su propia transacción: las que crean índices de
+        # forma concurrente en PostgreSQL necesitan salir a modo autocommit
+        transaction_per_migration=True,
+        # SQLite no soporta ALTER TABLE para restricciones; se recrea la tabla
+        render_as_batch=connection is not None and connection.dialect.name == "sqlite",
+        **kwargs
+    )
+
+
+def run_migrations_offline() -> None:
+    """Genera el SQL de las migraciones sin conectarse a la base de datos"""
+    configure(url=get_url(), literal_binds=True, dialect_opts={"paramstyle": "named"})
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def set_sqlite_foreign_keys(connection, activas: bool) -> bool:
+    """
+    Activa o desactiva las claves foráneas de SQLite fuera de toda transacción.
+
+    Las migraciones batch recrean tablas (copia, DROP y RENAME); con las claves
+    foráneas activas el DROP de la tabla original dispararía ON DELETE CASCADE
+    sobre las tablas que la referencian.
+
+    Returns:
+        bool: Si las claves foráneas estaban activas antes del cambio
+    """
+    if connection.dialect.name != "sqlite":
+        return False
+    cursor = connection.connection.cursor()
+    cursor.execute("PRAGMA foreign_keys")
+    anteriores = bool(cursor.fetchone()[0])
+    cursor.execute(f"PRAGMA foreign_keys={'ON' if activas else 'OFF'}")
+    cursor.close()
+    return anteriores
+
+
+def run_on_connection(connection) -> None:
+    """Ejecuta las migraciones pendientes sobre una conexión"""
+    claves_foraneas = set_sqlite_foreign_keys(connection, False)
+    try:
+        configure(connection)
+        with context.begin_transaction():
+            context.run_migrations()
+    finally:
+        set_sqlite_foreign_keys(connection, claves_foraneas)
+
+
+def run_migrations_online() -> None:
+    """Ejecuta las migraciones sobre una conexión a la base de datos"""
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run_on_connection(connection)
+        return
+
+    engine = create_engine(get_url(), poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        run_on_connection(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,66 @@
+"""Esquema inicial: franquicias, sucursales y productos
+
+Revision ID: 0001
+Revises:
+Create Date: 2024-01-15 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "franquicias",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nombre", sa.String(length=255), nullable=False),
+        sa.Column("fecha_creacion", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("fecha_actualizacion", sa.DateTime(timezone=True)),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_franquicias_id", "franquicias", ["id"])
+    op.create_index("ix_franquicias_nombre", "franquicias", ["nombre"])
+
+    op.create_table(
+        "sucursales",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nombre", sa.String(length=255), nullable=False),
+        sa.Column("franquicia_id", sa.Integer(), nullable=False),
+        sa.Column("fecha_creacion", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("fecha_actualizacion", sa.DateTime(timezone=True)),
+        sa.ForeignKeyConstraint(["franquicia_id"], ["franquicias.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_sucursales_id", "sucursales", ["id"])
+    op.create_index("ix_sucursales_nombre", "sucursales", ["nombre"])
+    op.create_index("ix_sucursales_franquicia_id", "sucursales", ["franquicia_id"])
+
+    op.create_table(
+        "productos",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nombre", sa.String(length=255), nullable=False),
+        sa.Column("cantidad_stock", sa.Integer(), nullable=False),
+        sa.Column("sucursal_id", sa.Integer(), nullable=False),
+        sa.Column("fecha_creacion", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("fecha_actualizacion", sa.DateTime(timezone=True)),
+        sa.ForeignKeyConstraint(["sucursal_id"], ["sucursales.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_productos_id", "productos", ["id"])
+    op.create_index("ix_productos_nombre", "productos", ["nombre"])
+    op.create_index("ix_productos_sucursal_id", "productos", ["sucursal_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("productos")
+    op.drop_table("sucursales")
+    op.drop_table("franquicias")
@@ -0,0 +1,80 @@
+"""Índices compuestos y restricciones de unicidad
+
+Agrega los índices que cubren los predicados más frecuentes:
+
+- ``(sucursal_id, cantidad_stock)`` para el reporte de stock máximo por sucursal.
+- ``(franquicia_id, nombre)`` y ``(sucursal_id, nombre)`` para la validación de
+  nombres duplicados, respaldados por restricciones UNIQUE (al igual que
+  ``franquicias.nombre``).
+
+En PostgreSQL los índices se crean con ``CREATE INDEX CONCURRENTLY`` fuera de
+la transacción y las restricciones se adjuntan después con
+``ADD CONSTRAINT ... UNIQUE USING INDEX``, por lo que la migración no bloquea
+las escrituras mientras se construyen los índices.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-01-20 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDICE_STOCK = ("ix_productos_sucursal_stock", "productos", ["sucursal_id", "cantidad_stock"])
+
+RESTRICCIONES_UNICAS = [
+    ("uq_franquicias_nombre", "franquicias", ["nombre"]),
+    ("uq_sucursales_franquicia_nombre", "sucursales", ["franquicia_id", "nombre"]),
+    ("uq_productos_sucursal_nombre", "productos", ["sucursal_id", "nombre"]),
+]
+
+
+def _es_postgresql() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def upgrade() -> None:
+    nombre, tabla, columnas = INDICE_STOCK
+
+    if _es_postgresql():
+        with op.get_context().autocommit_block():
+            op.create_index(nombre, tabla, columnas, postgresql_concurrently=True, if_not_exists=True)
+            for restriccion, tabla_unica, columnas_unicas in RESTRICCIONES_UNICAS:
+                op.create_index(
+                    restriccion, tabla_unica, columnas_unicas, unique=True,
+                    postgresql_concurrently=True, if_not_exists=True
+                )
+        # Sólo toma un bloqueo breve: el índice ya está construido
+        for restriccion, tabla_unica, _ in RESTRICCIONES_UNICAS:
+            op.execute(
+                f"ALTER TABLE {tabla_unica} ADD CONSTRAINT {restriccion} "
+                f"UNIQUE USING INDEX {restriccion}"
+            )
+        return
+
+    op.create_index(nombre, tabla, columnas)
+    for restriccion, tabla_unica, columnas_unicas in RESTRICCIONES_UNICAS:
+        with op.batch_alter_table(tabla_unica) as batch_op:
+            batch_op.create_unique_constraint(restriccion, columnas_unicas)
+
+
+def downgrade() -> None:
+    nombre, tabla, _ = INDICE_STOCK
+
+    for restriccion, tabla_unica, _ in reversed(RESTRICCIONES_UNICAS):
+        with op.batch_alter_table(tabla_unica) as batch_op:
+            batch_op.drop_constraint(restriccion, type_="unique")
+
+    if _es_postgresql():
+        with op.get_context().autocommit_block():
+            op.drop_index(nombre, table_name=tabla, postgresql_concurrently=True, if_exists=True)
+    else:
+        op.drop_index(nombre, table_name=tabla)
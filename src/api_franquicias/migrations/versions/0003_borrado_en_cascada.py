@@ -0,0 +1,65 @@
+"""Claves foráneas con ON DELETE CASCADE
+
+Eliminar una franquicia o una sucursal borra sus filas dependientes en la
+propia base de datos, sin que el ORM cargue y elimine cada fila.
+
+Las claves foráneas del esquema inicial no tenían nombre; se recrean con el
+nombre que PostgreSQL les asigna por defecto (``<tabla>_<columna>_fkey``). En
+PostgreSQL se agregan como ``NOT VALID`` y se validan después, lo que evita
+bloquear las escrituras mientras se recorre la tabla.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-01-25 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (tabla, columna, tabla referenciada)
+CLAVES_FORANEAS = [
+    ("sucursales", "franquicia_id", "franquicias"),
+    ("productos", "sucursal_id", "sucursales"),
+]
+
+# Nombres que SQLite asigna en modo batch a las claves foráneas sin nombre
+CONVENCION_SQLITE = {"fk": "%(table_name)s_%(column_0_name)s_fkey"}
+
+
+def _recrear_claves_foraneas(ondelete: Union[str, None]) -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # Cada sentencia en su propia transacción: el bloqueo del ALTER se libera
+        # antes de validar las filas existentes
+        with op.get_context().autocommit_block():
+            for tabla, columna, referida in CLAVES_FORANEAS:
+                nombre = f"{tabla}_{columna}_fkey"
+                accion = f" ON DELETE {ondelete}" if ondelete else ""
+                op.execute(
+                    f"ALTER TABLE {tabla} DROP CONSTRAINT {nombre}, "
+                    f"ADD CONSTRAINT {nombre} FOREIGN KEY ({columna}) "
+                    f"REFERENCES {referida} (id){accion} NOT VALID"
+                )
+                op.execute(f"ALTER TABLE {tabla} VALIDATE CONSTRAINT {nombre}")
+        return
+
+    for tabla, columna, referida in CLAVES_FORANEAS:
+        nombre = f"{tabla}_{columna}_fkey"
+        with op.batch_alter_table(tabla, naming_convention=CONVENCION_SQLITE) as batch_op:
+            batch_op.drop_constraint(nombre, type_="foreignkey")
+            batch_op.create_foreign_key(nombre, referida, [columna], ["id"], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    _recrear_claves_foraneas("CASCADE")
+
+
+def downgrade() -> None:
+    _recrear_claves_foraneas(None)
@@ -0,0 +1,44 @@
+"""Stock máximo materializado por sucursal
+
+Crea ``stock_maximo_sucursal``, con el mayor stock de cada sucursal, y la
+llena a partir de los productos existentes. La aplicación la mantiene en cada
+alta, cambio de stock y eliminación de productos; el reporte de stock la lee
+en lugar de agrupar todos los productos de la franquicia.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-01-28 00:00:00
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stock_maximo_sucursal",
+        sa.Column("sucursal_id", sa.Integer(), nullable=False),
+        sa.Column("cantidad_stock", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["sucursal_id"], ["sucursales.id"],
+            name="stock_maximo_sucursal_sucursal_id_fkey", ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("sucursal_id"),
+    )
+    op.execute(
+        "INSERT INTO stock_maximo_sucursal (sucursal_id, cantidad_stock) "
+        "SELECT sucursal_id, MAX(cantidad_stock) FROM productos GROUP BY sucursal_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("stock_maximo_sucursal")
@@ -0,0 +1,43 @@
+"""IDs con AUTOINCREMENT en SQLite
+
+Con ``AUTOINCREMENT`` SQLite toma el siguiente ID de ``sqlite_sequence`` en
+lugar de ``MAX(id) + 1``. Así cada base de un despliegue particionado
+(sharding) puede empezar sus IDs en su propio rango aunque esté vacía, y los
+IDs de filas eliminadas no se reutilizan. PostgreSQL ya usa secuencias, por lo
+que la migración no tiene efecto en ese dialecto.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2024-02-01 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLAS = ("franquicias", "sucursales", "productos")
+
+
+def _recrear_tablas(autoincremento: bool) -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for tabla in TABLAS:
+        with op.batch_alter_table(
+            tabla, recreate="always", table_kwargs={"sqlite_autoincrement": autoincremento}
+        ):
+            pass
+
+
+def upgrade() -> None:
+    _recrear_tablas(True)
+
+
+def downgrade() -> None:
+    _recrear_tablas(False)
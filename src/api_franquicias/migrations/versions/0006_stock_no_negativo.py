@@ -0,0 +1,44 @@
+"""Restricción CHECK sobre el stock de los productos
+
+Agrega ``ck_productos_cantidad_stock`` (``cantidad_stock >= 0``). Las
+escrituras de productos confían en las restricciones de la base de datos en
+lugar de validar con consultas previas. En PostgreSQL la restricción se agrega
+como ``NOT VALID`` y se valida después, sin bloquear las escrituras.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2024-02-05 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# SQLite recrea la tabla en modo batch; se conserva el AUTOINCREMENT de 0005
+TABLA_SQLITE = {"sqlite_autoincrement": True}
+
+NOMBRE = "ck_productos_cantidad_stock"
+CONDICION = "cantidad_stock >= 0"
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute(f"ALTER TABLE productos ADD CONSTRAINT {NOMBRE} CHECK ({CONDICION}) NOT VALID")
+            op.execute(f"ALTER TABLE productos VALIDATE CONSTRAINT {NOMBRE}")
+        return
+
+    with op.batch_alter_table("productos", table_kwargs=TABLA_SQLITE) as batch_op:
+        batch_op.create_check_constraint(NOMBRE, CONDICION)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("productos", table_kwargs=TABLA_SQLITE) as batch_op:
+        batch_op.drop_constraint(NOMBRE, type_="check")
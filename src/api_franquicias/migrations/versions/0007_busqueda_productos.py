@@ -0,0 +1,71 @@
+"""Índice de texto completo sobre el nombre de los productos
+
+Agrega la búsqueda de productos por nombre:
+
+- SQLite: tabla virtual FTS5 ``productos_fts`` con contenido externo, los
+  triggers que la sincronizan con ``productos`` y la carga inicial
+  (``'rebuild'``) de los productos existentes.
+- PostgreSQL: índice GIN sobre ``to_tsvector('simple', nombre)``, creado con
+  ``CREATE INDEX CONCURRENTLY`` para no bloquear las escrituras.
+
+Las migraciones posteriores que recreen ``productos`` en modo batch (SQLite)
+deben volver a crear los triggers.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2024-02-12 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLA_FTS = "productos_fts"
+INDICE_TSVECTOR = "ix_productos_nombre_busqueda"
+TRIGGERS = ("productos_fts_ai", "productos_fts_ad", "productos_fts_au")
+
+SQLITE = [
+    f"CREATE VIRTUAL TABLE {TABLA_FTS} USING fts5("
+    "nombre, content='productos', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER productos_fts_ai AFTER INSERT ON productos BEGIN "
+    f"INSERT INTO {TABLA_FTS} (rowid, nombre) VALUES (new.id, new.nombre); END",
+    f"CREATE TRIGGER productos_fts_ad AFTER DELETE ON productos BEGIN "
+    f"INSERT INTO {TABLA_FTS} ({TABLA_FTS}, rowid, nombre) VALUES ('delete', old.id, old.nombre); END",
+    f"CREATE TRIGGER productos_fts_au AFTER UPDATE OF nombre ON productos BEGIN "
+    f"INSERT INTO {TABLA_FTS} ({TABLA_FTS}, rowid, nombre) VALUES ('delete', old.id, old.nombre); "
+    f"INSERT INTO {TABLA_FTS} (rowid, nombre) VALUES (new.id, new.nombre); END",
+    # Indexa los productos existentes
+    f"INSERT INTO {TABLA_FTS} ({TABLA_FTS}) VALUES ('rebuild')",
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDICE_TSVECTOR} ON productos "
+                f"USING gin (to_tsvector('simple'::regconfig, nombre))"
+            )
+        return
+
+    for sentencia in SQLITE:
+        op.execute(sentencia)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {INDICE_TSVECTOR}")
+        return
+
+    for trigger in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute(f"DROP TABLE IF EXISTS {TABLA_FTS}")
@@ -0,0 +1,50 @@
+"""Índice de trigramas sobre el nombre de los productos
+
+Agrega la búsqueda de productos por nombre aproximado (tolerante a errores
+de escritura):
+
+- PostgreSQL: extensión ``pg_trgm`` e índice GIN ``gin_trgm_ops`` sobre
+  ``nombre``, que usa el operador ``%``. El índice se crea con
+  ``CREATE INDEX CONCURRENTLY`` para no bloquear las escrituras.
+- SQLite: sin cambios de esquema; la búsqueda usa un índice de trigramas en
+  memoria que se construye al consultar cada franquicia.
+
+La extensión no se elimina al revertir: otros objetos pueden usarla.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2024-02-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDICE_TRIGRAMAS = "ix_productos_nombre_trigramas"
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDICE_TRIGRAMAS} ON productos "
+            f"USING gin (nombre gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {INDICE_TRIGRAMAS}")
@@ -0,0 +1,68 @@
+"""Índices para filtrar y ordenar los listados de productos
+
+Agrega los índices que usan los filtros y el orden de los listados de
+productos (``stock_min``/``stock_max``, ``updated_since`` y ``sort``):
+
+- ``(cantidad_stock)`` y ``(fecha_actualizacion)`` para el listado global.
+- ``(sucursal_id, fecha_actualizacion)`` para el listado de una sucursal
+  (el stock y el nombre ya tienen ``(sucursal_id, cantidad_stock)`` y
+  ``(sucursal_id, nombre)``).
+
+La aplicación asigna ``fecha_actualizacion`` también al crear los productos;
+los productos existentes que nunca se modificaron toman su fecha de creación.
+
+En PostgreSQL los índices se crean con ``CREATE INDEX CONCURRENTLY`` para no
+bloquear las escrituras.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2024-02-26 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDICES = [
+    ("ix_productos_cantidad_stock", "productos", ["cantidad_stock"]),
+    ("ix_productos_fecha_actualizacion", "productos", ["fecha_actualizacion"]),
+    ("ix_productos_sucursal_actualizacion", "productos", ["sucursal_id", "fecha_actualizacion"]),
+]
+
+
+def _es_postgresql() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def upgrade() -> None:
+    op.execute(
+        "UPDATE productos SET fecha_actualizacion = fecha_creacion "
+        "WHERE fecha_actualizacion IS NULL"
+    )
+
+    if _es_postgresql():
+        with op.get_context().autocommit_block():
+            for nombre, tabla, columnas in INDICES:
+                op.create_index(nombre, tabla, columnas, postgresql_concurrently=True, if_not_exists=True)
+        return
+
+    for nombre, tabla, columnas in INDICES:
+        op.create_index(nombre, tabla, columnas)
+
+
+def downgrade() -> None:
+    if _es_postgresql():
+        with op.get_context().autocommit_block():
+            for nombre, tabla, _ in reversed(INDICES):
+                op.drop_index(nombre, table_name=tabla, postgresql_concurrently=True, if_exists=True)
+        return
+
+    for nombre, tabla, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla)
@@ -0,0 +1,68 @@
+"""Umbral de reposición por producto
+
+Agrega ``productos.stock_minimo`` (opcional, ``>= 0``) y el índice parcial
+``ix_productos_bajo_stock`` sobre ``(sucursal_id, stock_minimo)`` con
+``WHERE cantidad_stock <= stock_minimo``: sólo contiene los productos que
+necesitan reposición, de modo que la consulta de bajo stock de una franquicia
+lee esos productos y no el catálogo completo.
+
+La columna se agrega con ``ALTER TABLE ... ADD COLUMN`` en ambos motores (sin
+recrear la tabla en SQLite, que eliminaría los triggers de búsqueda de 0007).
+En PostgreSQL la restricción se agrega como ``NOT VALID`` y se valida después,
+y el índice se crea con ``CREATE INDEX CONCURRENTLY``.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2024-03-04 00:00:00
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RESTRICCION = "ck_productos_stock_minimo"
+CONDICION = "stock_minimo >= 0"
+
+INDICE = "ix_productos_bajo_stock"
+COLUMNAS_INDICE = ["sucursal_id", "stock_minimo"]
+CONDICION_INDICE = "cantidad_stock <= stock_minimo"
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.add_column("productos", sa.Column("stock_minimo", sa.Integer(), nullable=True))
+        with op.get_context().autocommit_block():
+            op.execute(f"ALTER TABLE productos ADD CONSTRAINT {RESTRICCION} CHECK ({CONDICION}) NOT VALID")
+            op.execute(f"ALTER TABLE productos VALIDATE CONSTRAINT {RESTRICCION}")
+            op.create_index(
+                INDICE, "productos", COLUMNAS_INDICE, postgresql_where=sa.text(CONDICION_INDICE),
+                postgresql_concurrently=True, if_not_exists=True
+            )
+        return
+
+    # SQLite admite la restricción CHECK en la definición de la columna agregada
+    op.execute(
+        f"ALTER TABLE productos ADD COLUMN stock_minimo INTEGER "
+        f"CONSTRAINT {RESTRICCION} CHECK ({CONDICION})"
+    )
+    op.create_index(INDICE, "productos", COLUMNAS_INDICE, sqlite_where=sa.text(CONDICION_INDICE))
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.drop_index(INDICE, table_name="productos", postgresql_concurrently=True, if_exists=True)
+        op.drop_column("productos", "stock_minimo")
+        return
+
+    op.drop_index(INDICE, table_name="productos")
+    # DROP COLUMN (SQLite 3.35+) también elimina la restricción de la columna
+    op.execute("ALTER TABLE productos DROP COLUMN stock_minimo")
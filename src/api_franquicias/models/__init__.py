@@ -6,5 +6,7 @@ from .base import Base
 from .franquicia import Franquicia
 from .sucursal import Sucursal
 from .producto import Producto
+from .stock_maximo import StockMaximoSucursal
+from .busqueda import productos_fts
 
-__all__ = ["Base", "Franquicia", "Sucursal", "Producto"]
+__all__ = ["Base", "Franquicia", "Sucursal", "Producto", "StockMaximoSucursal", "productos_fts"]
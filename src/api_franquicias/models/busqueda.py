@@ -0,0 +1,65 @@
+"""
+Índices de búsqueda de texto completo sobre el nombre de los productos.
+
+- SQLite: tabla virtual FTS5 ``productos_fts`` con contenido externo
+  (``content='productos'``), sin duplicar los nombres. Los triggers sobre
+  ``productos`` la mantienen sincronizada en cada INSERT, DELETE (también
+  los de ON DELETE CASCADE) y UPDATE del nombre. El tokenizador ignora
+  mayúsculas y acentos, y los índices de prefijos de 2 y 3 caracteres
+  aceleran las búsquedas mientras se escribe.
+- PostgreSQL: índice GIN sobre ``to_tsvector('simple', nombre)`` y, para la
+  búsqueda por nombre aproximado, índice GIN ``gin_trgm_ops`` de la
+  extensión ``pg_trgm``. En SQLite esa búsqueda usa el índice de trigramas
+  en memoria (``repositories.trigramas``).
+
+Los objetos se crean con ``create_all`` (eventos DDL de la tabla
+``productos``) y, en las bases existentes, con las migraciones 0007 y 0008. No forman
+parte de los modelos: ``migrations.incluir_nombre`` los excluye de la
+comparación con el esquema.
+
+Autor: Darwin Hurtado
+Fecha: 2024
+"""
+
+from sqlalchemy import DDL, column, event, table
+from .producto import Producto
+
+TABLA_FTS = "productos_fts"
+INDICE_TSVECTOR = "ix_productos_nombre_busqueda"
+INDICE_TRIGRAMAS = "ix_productos_nombre_trigramas"
+
+# Configuración de texto de PostgreSQL: sin stemming, como el tokenizador de SQLite
+CONFIGURACION_TSVECTOR = "'simple'::regconfig"
+
+# Tabla FTS5 para las consultas (``rowid`` es el ID del producto)
+productos_fts = table(TABLA_FTS, column("rowid"), column("nombre"), column("rank"))
+
+DDL_SQLITE = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_FTS} USING fts5("
+    "nombre, content='productos', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ai AFTER INSERT ON productos BEGIN "
+    f"INSERT INTO {TABLA_FTS} (rowid, nombre) VALUES (new.id, new.nombre); END",
+    f"CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ad AFTER DELETE ON productos BEGIN "
+    f"INSERT INTO {TABLA_FTS} ({TABLA_FTS}, rowid, nombre) VALUES ('delete', old.id, old.nombre); END",
+    f"CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_au AFTER UPDATE OF nombre ON productos BEGIN "
+    f"INSERT INTO {TABLA_FTS} ({TABLA_FTS}, rowid, nombre) VALUES ('delete', old.id, old.nombre); "
+    f"INSERT INTO {TABLA_FTS} (rowid, nombre) VALUES (new.id, new.nombre); END",
+]
+
+DDL_POSTGRESQL = [
+    f"CREATE INDEX IF NOT EXISTS {INDICE_TSVECTOR} ON productos "
+    f"USING gin (to_tsvector({CONFIGURACION_TSVECTOR}, nombre))",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS {INDICE_TRIGRAMAS} ON productos USING gin (nombre gin_trgm_ops)",
+]
+
+for _sentencia in DDL_SQLITE:
+    event.listen(Producto.__table__, "after_create", DDL(_sentencia).execute_if(dialect="sqlite"))
+for _sentencia in DDL_POSTGRESQL:
+    event.listen(Producto.__table__, "after_create", DDL(_sentencia).execute_if(dialect="postgresql"))
+# Los triggers y el índice se eliminan con la tabla; la tabla virtual no
+event.listen(
+    Producto.__table__, "after_drop",
+    DDL(f"DROP TABLE IF EXISTS {TABLA_FTS}").execute_if(dialect="sqlite")
+)
@@ -2,7 +2,7 @@
 Modelo de Franquicia para el sistema de gestión de franquicias
 """
 
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .base import Base
@@ -15,14 +15,28 @@ class Franquicia(Base):
     Una franquicia puede tener múltiples sucursales.
     """
     __tablename__ = "franquicias"
+    __table_args__ = (
+        UniqueConstraint("nombre", name="uq_franquicias_nombre"),
+        # IDs desde sqlite_sequence: cada shard empieza en su propio rango
+        {"sqlite_autoincrement": True},
+    )
+    # Las fechas generadas por la BD se obtienen con RETURNING en el mismo
+    # INSERT/UPDATE, sin un SELECT posterior (refresh)
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     nombre = Column(String(255), nullable=False, index=True)
     fecha_creacion = Column(DateTime(timezone=True), server_default=func.now())
     fecha_actualizacion = Column(DateTime(timezone=True), onupdate=func.now())
 
-    # Relación con sucursales
-    sucursales = relationship("Sucursal", back_populates="franquicia", cascade="all, delete-orphan")
+    # Relación con sucursales (selectin: carga en una consulta adicional, sin
+    # lazy loads implícitos que una AsyncSession no puede ejecutar). Al eliminar
+    # una franquicia la base de datos borra sus sucursales (ON DELETE CASCADE)
+    # sin que el ORM tenga que cargarlas (passive_deletes)
+    sucursales = relationship(
+        "Sucursal", back_populates="franquicia", cascade="all, delete-orphan",
+        lazy="selectin", passive_deletes=True
+    )
 
     def __repr__(self):
         return f"<Franquicia(id={self.id}, nombre='{self.nombre}')>"
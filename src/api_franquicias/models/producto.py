@@ -2,7 +2,7 @@
 Modelo de Producto para el sistema de gestión de franquicias
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import CheckConstraint, Column, Integer, String, DateTime, ForeignKey, Index, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .base import Base
@@ -15,13 +15,44 @@ class Producto(Base):
     Un producto pertenece a una sucursal y tiene un stock específico.
     """
     __tablename__ = "productos"
+    __table_args__ = (
+        # Nombres únicos por sucursal (ON CONFLICT al crear productos)
+        UniqueConstraint("sucursal_id", "nombre", name="uq_productos_sucursal_nombre"),
+        # El stock nunca es negativo, aunque una escritura omita la validación
+        CheckConstraint("cantidad_stock >= 0", name="ck_productos_cantidad_stock"),
+        CheckConstraint("stock_minimo >= 0", name="ck_productos_stock_minimo"),
+        # Reporte de stock: producto con más stock por sucursal
+        Index("ix_productos_sucursal_stock", "sucursal_id", "cantidad_stock"),
+        # Listados filtrados y ordenados por stock o fecha de actualización
+        Index("ix_productos_cantidad_stock", "cantidad_stock"),
+        Index("ix_productos_fecha_actualizacion", "fecha_actualizacion"),
+        Index("ix_productos_sucursal_actualizacion", "sucursal_id", "fecha_actualizacion"),
+        # Productos bajo su umbral de reposición: el índice parcial sólo
+        # contiene esos productos, por lo que su tamaño no depende del catálogo
+        Index(
+            "ix_productos_bajo_stock", "sucursal_id", "stock_minimo",
+            sqlite_where=text("cantidad_stock <= stock_minimo"),
+            postgresql_where=text("cantidad_stock <= stock_minimo"),
+        ),
+        # AUTOINCREMENT, como en franquicias (rangos de IDs por shard)
+        {"sqlite_autoincrement": True},
+    )
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     nombre = Column(String(255), nullable=False, index=True)
     cantidad_stock = Column(Integer, nullable=False, default=0)
-    sucursal_id = Column(Integer, ForeignKey("sucursales.id"), nullable=False, index=True)
+    # Umbral de reposición propio; None usa el umbral de la consulta de bajo stock
+    stock_minimo = Column(Integer, nullable=True)
+    sucursal_id = Column(
+        Integer,
+        ForeignKey("sucursales.id", ondelete="CASCADE", name="productos_sucursal_id_fkey"),
+        nullable=False,
+        index=True
+    )
     fecha_creacion = Column(DateTime(timezone=True), server_default=func.now())
-    fecha_actualizacion = Column(DateTime(timezone=True), onupdate=func.now())
+    # Se asigna también al crear el producto, para filtrar y ordenar por ella
+    fecha_actualizacion = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now())
 
     # Relaciones
     sucursal = relationship("Sucursal", back_populates="productos")
@@ -35,6 +66,7 @@ class Producto(Base):
             "id": self.id,
             "nombre": self.nombre,
             "cantidad_stock": self.cantidad_stock,
+            "stock_minimo": self.stock_minimo,
             "sucursal_id": self.sucursal_id,
             "fecha_creacion": self.fecha_creacion.isoformat() if self.fecha_creacion else None,
             "fecha_actualizacion": self.fecha_actualizacion.isoformat() if self.fecha_actualizacion else None
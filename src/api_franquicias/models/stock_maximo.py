@@ -0,0 +1,28 @@
+"""
+Modelo del stock máximo por sucursal para el sistema de gestión de franquicias
+"""
+
+from sqlalchemy import Column, Integer, ForeignKey
+from .base import Base
+
+
+class StockMaximoSucursal(Base):
+    """
+    Mayor stock entre los productos de cada sucursal.
+    
+    Tabla materializada que mantiene ProductoRepository en cada alta,
+    cambio de stock y eliminación de productos. El reporte de stock la lee
+    en lugar de agrupar todos los productos de la franquicia.
+    """
+    __tablename__ = "stock_maximo_sucursal"
+
+    sucursal_id = Column(
+        Integer,
+        ForeignKey("sucursales.id", ondelete="CASCADE", name="stock_maximo_sucursal_sucursal_id_fkey"),
+        primary_key=True
+    )
+    # NULL cuando la sucursal no tiene productos
+    cantidad_stock = Column(Integer, nullable=True)
+
+    def __repr__(self):
+        return f"<StockMaximoSucursal(sucursal_id={self.sucursal_id}, stock={self.cantidad_stock})>"
@@ -2,7 +2,7 @@
 Modelo de Sucursal para el sistema de gestión de franquicias
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .base import Base
@@ -15,16 +15,31 @@ class Sucursal(Base):
     Una sucursal pertenece a una franquicia y puede tener múltiples productos.
     """
     __tablename__ = "sucursales"
+    __table_args__ = (
+        # Respalda la validación de nombres duplicados dentro de una franquicia
+        UniqueConstraint("franquicia_id", "nombre", name="uq_sucursales_franquicia_nombre"),
+        # AUTOINCREMENT, como en franquicias (rangos de IDs por shard)
+        {"sqlite_autoincrement": True},
+    )
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     nombre = Column(String(255), nullable=False, index=True)
-    franquicia_id = Column(Integer, ForeignKey("franquicias.id"), nullable=False, index=True)
+    franquicia_id = Column(
+        Integer,
+        ForeignKey("franquicias.id", ondelete="CASCADE", name="sucursales_franquicia_id_fkey"),
+        nullable=False,
+        index=True
+    )
     fecha_creacion = Column(DateTime(timezone=True), server_default=func.now())
     fecha_actualizacion = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relaciones
     franquicia = relationship("Franquicia", back_populates="sucursales")
-    productos = relationship("Producto", back_populates="sucursal", cascade="all, delete-orphan")
+    productos = relationship(
+        "Producto", back_populates="sucursal", cascade="all, delete-orphan",
+        lazy="selectin", passive_deletes=True
+    )
 
     def __repr__(self):
         return f"<Sucursal(id={self.id}, nombre='{self.nombre}', franquicia_id={self.franquicia_id})>"
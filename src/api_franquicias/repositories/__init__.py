@@ -5,5 +5,20 @@ Repositorios para acceso a datos
 from .franquicia_repository import FranquiciaRepository
 from .sucursal_repository import SucursalRepository
 from .producto_repository import ProductoRepository
+from .async_franquicia_repository import AsyncFranquiciaRepository
+from .async_sucursal_repository import AsyncSucursalRepository
+from .async_producto_repository import AsyncProductoRepository
+from .filtros import FiltroProductos, ListadoInvalidoError
+from .pagination import Pagina
 
-__all__ = ["FranquiciaRepository", "SucursalRepository", "ProductoRepository"]
+__all__ = [
+    "FranquiciaRepository",
+    "SucursalRepository",
+    "ProductoRepository",
+    "AsyncFranquiciaRepository",
+    "AsyncSucursalRepository",
+    "AsyncProductoRepository",
+    "FiltroProductos",
+    "ListadoInvalidoError",
+    "Pagina",
+]
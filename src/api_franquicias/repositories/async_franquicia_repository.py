@@ -0,0 +1,72 @@
+"""
+Repositorio asíncrono para operaciones de base de datos de Franquicia.
+
+Este módulo expone la misma interfaz que FranquiciaRepository sobre una
+AsyncSession. Las consultas se ejecutan con el driver asíncrono
+(aiosqlite/asyncpg) mediante ``run_sync``, de modo que la lógica SQL vive
+en un único lugar y el event loop nunca se bloquea esperando a la base de datos.
+
+Autor: Darwin Hurtado
+Fecha: 2024
+"""
+
+from typing import List, Optional
+from ..database import DbSession, get_sync_session, run_in_session
+from ..models.franquicia import Franquicia
+from .franquicia_repository import FranquiciaRepository
+from .pagination import Pagina
+
+
+class AsyncFranquiciaRepository:
+    """
+    Repositorio asíncrono para operaciones CRUD de Franquicia.
+
+    Attributes:
+        db (AsyncSession): Sesión asíncrona de SQLAlchemy
+    """
+
+    def __init__(self, db: DbSession):
+        """
+        Inicializa el repositorio con una sesión de base de datos.
+
+        Args:
+            db (AsyncSession): Sesión asíncrona activa para operaciones de BD
+        """
+        self.db = db
+        self._repo = FranquiciaRepository(get_sync_session(db))
+
+    async def create(self, nombre: str) -> Optional[Franquicia]:
+        """Crea una nueva franquicia (None si el nombre ya existe)"""
+        return await run_in_session(self.db, self._repo.create, nombre)
+
+    async def get_by_id(self, franquicia_id: int, expand: str = "sucursales.productos") -> Optional[Franquicia]:
+        """Obtiene una franquicia por su identificador único"""
+        return await run_in_session(self.db, self._repo.get_by_id, franquicia_id, expand)
+
+    async def get_by_name(self, nombre: str) -> Optional[Franquicia]:
+        """Busca una franquicia por su nombre"""
+        return await run_in_session(self.db, self._repo.get_by_name, nombre)
+
+    async def get_all(self) -> List[Franquicia]:
+        """Obtiene todas las franquicias del sistema"""
+        return await run_in_session(self.db, self._repo.get_all)
+
+    async def get_page(self, limit: int, after: Optional[int] = None) -> Pagina:
+        """Obtiene una página de franquicias ordenadas por ID"""
+        return await run_in_session(self.db, self._repo.get_page, limit, after)
+
+    async def update(self, franquicia_id: int, nombre: str) -> Optional[Franquicia]:
+        """Actualiza el nombre de una franquicia existente"""
+        return await run_in_session(self.db, self._repo.update, franquicia_id, nombre)
+
+    async def nombre_en_otro_shard(self, nombre: str, franquicia_id: int) -> bool:
+        """Verifica si otra franquicia usa el nombre en un shard distinto"""
+        return await run_in_session(self.db, self._repo.nombre_en_otro_shard, nombre, franquicia_id)
+
+    async def delete(self, franquicia_id: int) -> bool:
+        """Elimina una franquicia de la base de datos"""
+        return await run_in_session(self.db, self._repo.delete, franquicia_id)
+
+    async def exists(self, franquicia_id: int) -> bool:
+        """Verifica si una franquicia existe en la base de datos"""
+        return await run_in_session(self.db, self._repo.exists, franquicia_id)
@@ -0,0 +1,141 @@
+"""
+Repositorio asíncrono para operaciones de base de datos de Producto.
+
+Este módulo expone la misma interfaz que ProductoRepository sobre una
+AsyncSession, delegando las consultas en el repositorio síncrono
+mediante ``run_sync``.
+
+Autor: Darwin Hurtado
+Fecha: 2024
+"""
+
+from typing import List, Optional, Dict, Any, Iterable, Set, Tuple, Union
+from ..database import DbSession, get_sync_session, run_in_session
+from ..models.producto import Producto
+from .producto_repository import ProductoRepository
+from .filtros import FiltroProductos
+from .pagination import Pagina
+
+
+class AsyncProductoRepository:
+    """
+    Repositorio asíncrono para operaciones CRUD de Producto.
+
+    Attributes:
+        db (AsyncSession): Sesión asíncrona de SQLAlchemy
+    """
+
+    def __init__(self, db: DbSession):
+        """
+        Inicializa el repositorio con una sesión de base de datos.
+
+        Args:
+            db (AsyncSession): Sesión asíncrona activa para operaciones de BD
+        """
+        self.db = db
+        self._repo = ProductoRepository(get_sync_session(db))
+
+    async def create(self, nombre: str, cantidad_stock: int, sucursal_id: int) -> Optional[Producto]:
+        """Crea un nuevo producto (None si el nombre ya existe en la sucursal)"""
+        return await run_in_session(self.db, self._repo.create, nombre, cantidad_stock, sucursal_id)
+
+    async def create_many(self, sucursal_id: int, items: List[Tuple[str, int]]) -> Dict[str, Producto]:
+        """Crea varios productos en una sucursal con INSERT multi-fila, omitiendo los existentes"""
+        return await run_in_session(self.db, self._repo.create_many, sucursal_id, items)
+
+    async def upsert_many(self, sucursal_id: int, items: List[Tuple[str, int]]) -> int:
+        """Crea o actualiza el stock de varios productos de una sucursal"""
+        return await run_in_session(self.db, self._repo.upsert_many, sucursal_id, items)
+
+    async def get_by_id(self, producto_id: int) -> Optional[Producto]:
+        """Obtiene un producto por su identificador único"""
+        return await run_in_session(self.db, self._repo.get_by_id, producto_id)
+
+    async def get_by_sucursal_id(self, sucursal_id: int) -> List[Producto]:
+        """Obtiene todos los productos de una sucursal"""
+        return await run_in_session(self.db, self._repo.get_by_sucursal_id, sucursal_id)
+
+    async def get_by_name_and_sucursal(self, nombre: str, sucursal_id: int) -> Optional[Producto]:
+        """Busca un producto por nombre dentro de una sucursal"""
+        return await run_in_session(self.db, self._repo.get_by_name_and_sucursal, nombre, sucursal_id)
+
+    async def get_existing_names(self, sucursal_id: int, nombres: Iterable[str]) -> Set[str]:
+        """Obtiene cuáles de los nombres dados ya existen en una sucursal"""
+        return await run_in_session(self.db, self._repo.get_existing_names, sucursal_id, nombres)
+
+    async def get_all(self) -> List[Producto]:
+        """Obtiene todos los productos del sistema"""
+        return await run_in_session(self.db, self._repo.get_all)
+
+    async def get_page(self, limit: int, after: Optional[Union[int, str]] = None,
+                       sucursal_id: Optional[int] = None,
+                       filtro: Optional[FiltroProductos] = None) -> Pagina:
+        """Obtiene una página de productos, por ID o por la columna del filtro"""
+        return await run_in_session(self.db, self._repo.get_page, limit, after, sucursal_id, filtro)
+
+    async def update(self, producto_id: int, nombre: str) -> Optional[Producto]:
+        """Actualiza el nombre de un producto existente"""
+        return await run_in_session(self.db, self._repo.update, producto_id, nombre)
+
+    async def update_stock(self, producto_id: int, cantidad_stock: int) -> Optional[Producto]:
+        """Actualiza el stock de un producto existente"""
+        return await run_in_session(self.db, self._repo.update_stock, producto_id, cantidad_stock)
+
+    async def update_stock_minimo(self, producto_id: int, stock_minimo: Optional[int]) -> Optional[Producto]:
+        """Fija el umbral de reposición de un producto"""
+        return await run_in_session(self.db, self._repo.update_stock_minimo, producto_id, stock_minimo)
+
+    async def adjust_stock(self, producto_id: int, delta: int) -> Optional[Producto]:
+        """Suma ``delta`` al stock de un producto de forma atómica"""
+        return await run_in_session(self.db, self._repo.adjust_stock, producto_id, delta)
+
+    async def update_stock_many(self, stocks: Dict[int, int]) -> int:
+        """Actualiza el stock de varios productos con un UPDATE por lotes"""
+        return await run_in_session(self.db, self._repo.update_stock_many, stocks)
+
+    async def delete(self, producto_id: int) -> bool:
+        """Elimina un producto de la base de datos"""
+        return await run_in_session(self.db, self._repo.delete, producto_id)
+
+    async def delete_batch_by_franquicia(self, franquicia_id: int, limit: int) -> int:
+        """Elimina hasta ``limit`` productos de las sucursales de una franquicia"""
+        return await run_in_session(self.db, self._repo.delete_batch_by_franquicia, franquicia_id, limit)
+
+    async def count_by_franquicia(self, franquicia_id: int) -> int:
+        """Cuenta los productos de todas las sucursales de una franquicia"""
+        return await run_in_session(self.db, self._repo.count_by_franquicia, franquicia_id)
+
+    async def exists(self, producto_id: int) -> bool:
+        """Verifica si un producto existe en la base de datos"""
+        return await run_in_session(self.db, self._repo.exists, producto_id)
+
+    async def get_existing_ids(self, producto_ids: Iterable[int]) -> Set[int]:
+        """Obtiene cuáles de los IDs dados corresponden a productos existentes"""
+        return await run_in_session(self.db, self._repo.get_existing_ids, producto_ids)
+
+    async def belongs_to_sucursal(self, producto_id: int, sucursal_id: int) -> bool:
+        """Verifica si un producto pertenece a una sucursal específica"""
+        return await run_in_session(self.db, self._repo.belongs_to_sucursal, producto_id, sucursal_id)
+
+    async def get_max_stock_by_sucursal(self, franquicia_id: int) -> List[Dict[str, Any]]:
+        """Obtiene el producto con más stock de cada sucursal de una franquicia"""
+        return await run_in_session(self.db, self._repo.get_max_stock_by_sucursal, franquicia_id)
+
+    async def get_top_stock(self, franquicia_id: int, top: int, por_sucursal: bool = True,
+                            con_empates: bool = True) -> List[Dict[str, Any]]:
+        """Obtiene los ``top`` productos con más stock de una franquicia"""
+        return await run_in_session(
+            self.db, self._repo.get_top_stock, franquicia_id, top, por_sucursal, con_empates
+        )
+
+    async def get_low_stock(self, franquicia_id: int, umbral: Optional[int] = None) -> List[Tuple[Producto, int]]:
+        """Obtiene los productos de una franquicia que necesitan reposición y su umbral"""
+        return await run_in_session(self.db, self._repo.get_low_stock, franquicia_id, umbral)
+
+    async def get_stock_statistics(self, franquicia_id: int, por_sucursal: bool = False) -> List[Dict[str, Any]]:
+        """Calcula estadísticas de stock de una franquicia con agregados en la BD"""
+        return await run_in_session(self.db, self._repo.get_stock_statistics, franquicia_id, por_sucursal)
+
+    async def get_stock_percentiles(self, franquicia_id: int, percentiles: Iterable[int]) -> Dict[int, Optional[int]]:
+        """Calcula percentiles del stock de los productos de una franquicia"""
+        return await run_in_session(self.db, self._repo.get_stock_percentiles, franquicia_id, percentiles)
@@ -0,0 +1,84 @@
+"""
+Repositorio asíncrono para operaciones de base de datos de Sucursal.
+
+Este módulo expone la misma interfaz que SucursalRepository sobre una
+AsyncSession, delegando las consultas en el repositorio síncrono
+mediante ``run_sync``.
+
+Autor: Darwin Hurtado
+Fecha: 2024
+"""
+
+from typing import Iterable, List, Optional, Set
+from ..database import DbSession, get_sync_session, run_in_session
+from ..models.sucursal import Sucursal
+from .sucursal_repository import SucursalRepository
+from .pagination import Pagina
+
+
+class AsyncSucursalRepository:
+    """
+    Repositorio asíncrono para operaciones CRUD de Sucursal.
+
+    Attributes:
+        db (AsyncSession): Sesión asíncrona de SQLAlchemy
+    """
+
+    def __init__(self, db: DbSession):
+        """
+        Inicializa el repositorio con una sesión de base de datos.
+
+        Args:
+            db (AsyncSession): Sesión asíncrona activa para operaciones de BD
+        """
+        self.db = db
+        self._repo = SucursalRepository(get_sync_session(db))
+
+    async def create(self, nombre: str, franquicia_id: int) -> Optional[Sucursal]:
+        """Crea una nueva sucursal (None si el nombre ya existe en la franquicia)"""
+        return await run_in_session(self.db, self._repo.create, nombre, franquicia_id)
+
+    async def get_by_id(self, sucursal_id: int, expand: str = "productos") -> Optional[Sucursal]:
+        """Obtiene una sucursal por su identificador único"""
+        return await run_in_session(self.db, self._repo.get_by_id, sucursal_id, expand)
+
+    async def get_by_franquicia_id(self, franquicia_id: int) -> List[Sucursal]:
+        """Obtiene todas las sucursales de una franquicia"""
+        return await run_in_session(self.db, self._repo.get_by_franquicia_id, franquicia_id)
+
+    async def get_by_name_and_franquicia(self, nombre: str, franquicia_id: int) -> Optional[Sucursal]:
+        """Busca una sucursal por nombre dentro de una franquicia"""
+        return await run_in_session(self.db, self._repo.get_by_name_and_franquicia, nombre, franquicia_id)
+
+    async def get_all(self) -> List[Sucursal]:
+        """Obtiene todas las sucursales del sistema"""
+        return await run_in_session(self.db, self._repo.get_all)
+
+    async def get_page(self, limit: int, after: Optional[int] = None,
+                       franquicia_id: Optional[int] = None) -> Pagina:
+        """Obtiene una página de sucursales ordenadas por ID"""
+        return await run_in_session(self.db, self._repo.get_page, limit, after, franquicia_id)
+
+    async def update(self, sucursal_id: int, nombre: str) -> Optional[Sucursal]:
+        """Actualiza el nombre de una sucursal existente"""
+        return await run_in_session(self.db, self._repo.update, sucursal_id, nombre)
+
+    async def delete(self, sucursal_id: int) -> bool:
+        """Elimina una sucursal de la base de datos"""
+        return await run_in_session(self.db, self._repo.delete, sucursal_id)
+
+    async def delete_batch_by_franquicia(self, franquicia_id: int, limit: int) -> int:
+        """Elimina hasta ``limit`` sucursales de una franquicia"""
+        return await run_in_session(self.db, self._repo.delete_batch_by_franquicia, franquicia_id, limit)
+
+    async def exists(self, sucursal_id: int) -> bool:
+        """Verifica si una sucursal existe en la base de datos"""
+        return await run_in_session(self.db, self._repo.exists, sucursal_id)
+
+    async def get_existing_ids(self, sucursal_ids: Iterable[int]) -> Set[int]:
+        """Obtiene cuáles de los IDs dados corresponden a sucursales existentes"""
+        return await run_in_session(self.db, self._repo.get_existing_ids, sucursal_ids)
+
+    async def belongs_to_franquicia(self, sucursal_id: int, franquicia_id: int) -> bool:
+        """Verifica si una sucursal pertenece a una franquicia específica"""
+        return await run_in_session(self.db, self._repo.belongs_to_franquicia, sucursal_id, franquicia_id)
@@ -0,0 +1,246 @@
+"""
+Caché de lectura (read-through) de entidades por ID.
+
+``get_by_id`` de los repositorios consulta primero esta caché: si la entidad
+está, se incorpora a la sesión con ``Session.merge(load=False)``, sin
+consultar la base de datos; si no, se lee de la base y se guarda una copia de
+sus columnas. La caché es del proceso y la comparten todas las sesiones.
+
+- Desalojo LRU con un presupuesto de memoria (``cache_max_bytes``); el
+  tamaño de cada entrada es una estimación con ``sys.getsizeof``.
+- Tiempo de vida por entidad (``cache_ttl_franquicia``, ``cache_ttl_sucursal``
+  y ``cache_ttl_producto``), que acota cuánto puede tardar en verse un cambio
+  hecho por otro proceso o leído de una réplica con retraso.
+- Los métodos que modifican entidades (``update``, ``update_stock``,
+  ``delete``...) las invalidan en la sesión: se eliminan de la caché en ese
+  momento y otra vez al confirmarse la transacción, de modo que una lectura
+  hecha por otra sesión antes de confirmar no deja el valor anterior. Hasta
+  entonces la propia sesión lee esas entidades de la base de datos. Las
+  lecturas en curso durante una invalidación no se guardan.
+- Contadores de aciertos, fallos, desalojos y expiraciones.
+
+Sólo se guardan las columnas de la entidad: las lecturas que cargan
+relaciones (``expand``) no usan la caché. Está desactivada por defecto
+(``cache_enabled``).
+
+Autor: Darwin Hurtado
+Fecha: 2024
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from ..config import settings
+
+# Clave de ``Session.info`` con las entidades invalidadas en la transacción
+_INVALIDADAS = "cache_invalidadas"
+
+# Bytes estimados de la entrada, su clave y su posición en el LRU
+_TAMANO_BASE_ENTRADA = 200
+
+# Marca de una invalidación de todas las entidades de un modelo
+_TODAS = None
+
+
+class _Entrada(NamedTuple):
+    """Copia de las columnas de una entidad"""
+    valores: Dict[str, Any]
+    identidad: Tuple[Any, ...]
+    expira: float
+    tamano: int
+
+
+class CacheEntidades:
+    """
+    Caché LRU de entidades por modelo e ID, compartida por las sesiones del proceso.
+
+    Attributes:
+        activa (bool): Si ``obtener`` usa la caché
+        max_bytes (int): Presupuesto de memoria de las entradas
+        ttls (Dict[str, float]): Segundos de vida de las entradas por tabla
+    """
+
+    def __init__(self, activa: bool = False, max_bytes: int = 0, ttls: Optional[Dict[str, float]] = None):
+        self.activa = activa
+        self.max_bytes = max_bytes
+        self.ttls = dict(ttls or {})
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[Tuple[str, Any], _Entrada]" = OrderedDict()
+        self._bytes = 0
+        # Lecturas en curso por clave; una invalidación las marca para no guardarlas
+        self._cargas: Dict[Tuple[str, Any], List[List[bool]]] = {}
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.expiraciones = 0
+
+    def obtener(self, db: Session, modelo: Any, entidad_id: Any,
+                cargar: Callable[[], Optional[Any]]) -> Optional[Any]:
+        """
+        Retorna la entidad desde la caché o, si no está, con ``cargar``.
+
+        Args:
+            db (Session): Sesión donde se incorpora la entidad
+            modelo: Clase del modelo
+            entidad_id: Clave primaria
+            cargar: Lee la entidad de la base de datos (en ``db``)
+
+        Returns:
+            Optional[Any]: La entidad, persistente en ``db``, o None si no existe
+        """
+        tabla = modelo.__tablename__
+        ttl = self.ttls.get(tabla, 0)
+        if not self.activa or ttl <= 0 or self._invalidada_en_sesion(db, tabla, entidad_id):
+            return cargar()
+
+        clave = (tabla, entidad_id)
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada.expira <= time.monotonic():
+                self._quitar(clave)
+                self.expiraciones += 1
+                entrada = None
+            if entrada is not None:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+            else:
+                self.fallos += 1
+                marca = [False]
+                self._cargas.setdefault(clave, []).append(marca)
+
+        if entrada is not None:
+            return self._incorporar(db, modelo, entrada)
+
+        try:
+            entidad = cargar()
+        finally:
+            with self._lock:
+                marcas = self._cargas[clave]
+                marcas.remove(marca)
+                if not marcas:
+                    del self._cargas[clave]
+        if entidad is None or marca[0]:
+            return entidad
+
+        estado = inspect(entidad)
+        if any(atributo.key not in estado.dict for atributo in estado.mapper.column_attrs):
+            # Columnas diferidas o expiradas: no hay una copia completa que guardar
+            return entidad
+        valores = {atributo.key: estado.dict[atributo.key] for atributo in estado.mapper.column_attrs}
+        tamano = _TAMANO_BASE_ENTRADA + sys.getsizeof(valores) + sum(sys.getsizeof(v) for v in valores.values())
+        with self._lock:
+            if tamano <= self.max_bytes:
+                self._quitar(clave)
+                self._entradas[clave] = _Entrada(valores, estado.key, time.monotonic() + ttl, tamano)
+                self._bytes += tamano
+                while self._bytes > self.max_bytes:
+                    self._quitar(next(iter(self._entradas)))
+                    self.desalojos += 1
+        return entidad
+
+    def invalidar(self, db: Session, modelo: Any, entidad_ids: Iterable[Any] = (_TODAS,)) -> None:
+        """
+        Invalida entidades modificadas en la transacción de ``db``.
+
+        Args:
+            db (Session): Sesión que modifica las entidades
+            modelo: Clase del modelo
+            entidad_ids (Iterable[Any]): IDs modificados; por defecto todas
+                las entidades del modelo (p. ej. eliminaciones en cascada)
+        """
+        if not self.activa:
+            return
+        claves = [(modelo.__tablename__, entidad_id) for entidad_id in entidad_ids]
+        db.info.setdefault(_INVALIDADAS, set()).update(claves)
+        self._invalidar(claves)
+
+    def confirmar(self, db: Session) -> None:
+        """Vuelve a invalidar las entidades de ``db`` (la transacción se confirmó)"""
+        claves = db.info.pop(_INVALIDADAS, None)
+        if claves:
+            self._invalidar(claves)
+
+    def revertir(self, db: Session) -> None:
+        """Olvida las invalidaciones de ``db`` (la transacción se revirtió)"""
+        db.info.pop(_INVALIDADAS, None)
+
+    def limpiar(self) -> None:
+        """Elimina todas las entradas y reinicia los contadores"""
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+            self.aciertos = self.fallos = self.desalojos = self.expiraciones = 0
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """Contadores y ocupación de la caché"""
+        with self._lock:
+            lecturas = self.aciertos + self.fallos
+            return {
+                "activa": self.activa,
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "desalojos": self.desalojos,
+                "expiraciones": self.expiraciones,
+                "tasa_aciertos": self.aciertos / lecturas if lecturas else 0.0,
+            }
+
+    @staticmethod
+    def _invalidada_en_sesion(db: Session, tabla: str, entidad_id: Any) -> bool:
+        invalidadas = db.info.get(_INVALIDADAS)
+        return bool(invalidadas) and ((tabla, entidad_id) in invalidadas or (tabla, _TODAS) in invalidadas)
+
+    @staticmethod
+    def _incorporar(db: Session, modelo: Any, entrada: _Entrada) -> Any:
+        """Incorpora una copia de la entrada a la sesión, sin consultar la base"""
+        copia = inspect(modelo).class_manager.new_instance()
+        for clave, valor in entrada.valores.items():
+            set_committed_value(copia, clave, valor)
+        make_transient_to_detached(copia)
+        # Conserva el shard de origen (identity_token) en las sesiones particionadas
+        inspect(copia).key = entrada.identidad
+        return db.merge(copia, load=False)
+
+    def _invalidar(self, claves: Iterable[Tuple[str, Any]]) -> None:
+        with self._lock:
+            for tabla, entidad_id in claves:
+                if entidad_id is _TODAS:
+                    afectadas = [clave for clave in self._entradas if clave[0] == tabla]
+                    cargas = [marcas for clave, marcas in self._cargas.items() if clave[0] == tabla]
+                else:
+                    afectadas = [(tabla, entidad_id)]
+                    cargas = [self._cargas.get((tabla, entidad_id), [])]
+                for clave in afectadas:
+                    self._quitar(clave)
+                for marcas in cargas:
+                    for marca in marcas:
+                        marca[0] = True
+
+    def _quitar(self, clave: Tuple[str, Any]) -> None:
+        entrada = self._entradas.pop(clave, None)
+        if entrada is not None:
+            self._bytes -= entrada.tamano
+
+
+# Caché global del proceso
+cache_entidades = CacheEntidades(
+    activa=settings.cache_enabled,
+    max_bytes=settings.cache_max_bytes,
+    ttls={
+        "franquicias": settings.cache_ttl_franquicia,
+        "sucursales": settings.cache_ttl_sucursal,
+        "productos": settings.cache_ttl_producto,
+    },
+)
+
+# Las invalidaciones se repiten al confirmar; también para las sesiones
+# particionadas y las síncronas de las AsyncSession
+event.listen(Session, "after_commit", cache_entidades.confirmar)
+event.listen(Session, "after_rollback", cache_entidades.revertir)
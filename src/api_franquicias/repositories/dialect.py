@@ -0,0 +1,108 @@
+"""
+Construcciones SQL que dependen del dialecto de la base de datos.
+
+Autor: Darwin Hurtado
+Fecha: 2024
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Optional
+from sqlalchemy import String, inspect, literal
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+# INSERT con soporte de ON CONFLICT por dialecto
+INSERTS_ON_CONFLICT = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def nombre_dialecto(db: Session, modelo: Any) -> str:
+    """Nombre del dialecto del motor donde vive ``modelo`` (``sqlite``, ``postgresql``...)"""
+    # El mapper permite resolver el motor también en sesiones particionadas
+    return db.get_bind(inspect(modelo)).dialect.name
+
+
+def insert_on_conflict(db: Session, tabla: Any):
+    """
+    Crea un INSERT que admite ``on_conflict_do_update``/``on_conflict_do_nothing``.
+
+    Args:
+        db (Session): Sesión cuyo motor determina el dialecto
+        tabla: Modelo destino
+
+    Returns:
+        Insert: Sentencia INSERT específica del dialecto
+
+    Raises:
+        NotImplementedError: Si el dialecto no soporta ON CONFLICT
+    """
+    dialecto = nombre_dialecto(db, tabla)
+    if dialecto not in INSERTS_ON_CONFLICT:
+        raise NotImplementedError(f"ON CONFLICT no está soportado para el dialecto '{dialecto}'")
+    return INSERTS_ON_CONFLICT[dialecto](tabla)
+
+
+# Formato de CURRENT_TIMESTAMP en SQLite, con el que se guardan las fechas
+# que asigna la base de datos (``func.now()``)
+FORMATO_FECHA_SQLITE = "%Y-%m-%d %H:%M:%S"
+
+
+def valor_fecha(db: Session, modelo: Any, fecha: datetime) -> Any:
+    """
+    Convierte una fecha en un parámetro comparable con las columnas de fecha
+    que asigna la base de datos.
+
+    SQLite guarda las fechas como texto UTC sin zona ni microsegundos
+    (``CURRENT_TIMESTAMP``) y las compara como texto, por lo que la fecha se
+    pasa a UTC y se da en ese mismo formato; así la comparación usa el índice
+    de la columna y una fecha leída de la base es igual a la guardada. En
+    PostgreSQL se usa la fecha con zona. Las fechas sin zona se consideran UTC.
+
+    Args:
+        db (Session): Sesión cuyo motor determina el dialecto
+        modelo: Modelo que contiene la columna
+        fecha (datetime): Fecha a comparar
+
+    Returns:
+        Any: Valor o parámetro SQL para comparar con la columna
+    """
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    if nombre_dialecto(db, modelo) == "sqlite":
+        return literal(fecha.astimezone(timezone.utc).strftime(FORMATO_FECHA_SQLITE), String())
+    return fecha
+
+
+# Tipos de restricción que reconoce restriccion_violada
+RESTRICCION_UNICA = "unique"
+RESTRICCION_CLAVE_FORANEA = "foreign_key"
+RESTRICCION_CHECK = "check"
+
+
+def restriccion_violada(error: IntegrityError) -> Optional[str]:
+    """
+    Identifica el tipo de restricción que provocó un ``IntegrityError``.
+
+    Se basa en el mensaje del driver, que en SQLite (``FOREIGN KEY constraint
+    failed``, ``CHECK constraint failed: ...``, ``UNIQUE constraint failed:
+    ...``) y en PostgreSQL (``violates foreign key constraint ...``, ...)
+    nombra el tipo de restricción.
+
+    Args:
+        error (IntegrityError): Error lanzado por la sentencia
+
+    Returns:
+        Optional[str]: RESTRICCION_UNICA, RESTRICCION_CLAVE_FORANEA,
+        RESTRICCION_CHECK o None si no se reconoce
+    """
+    mensaje = str(error.orig).lower()
+    if "foreign key" in mensaje:
+        return RESTRICCION_CLAVE_FORANEA
+    if "check constraint" in mensaje:
+        return RESTRICCION_CHECK
+    if "unique" in mensaje or "duplicate key" in mensaje:
+        return RESTRICCION_UNICA
+    return None
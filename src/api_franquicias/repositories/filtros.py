@@ -0,0 +1,104 @@
+"""
+Filtros y orden de los listados de productos.
+
+Cada filtro es un rango sobre una columna con índice (``stock_min`` y
+``stock_max`` sobre ``cantidad_stock``, ``nombre_prefix`` sobre ``nombre`` y
+``updated_since`` sobre ``fecha_actualizacion``) y el listado se ordena por
+esa misma columna, de modo que la página se lee recorriendo el tramo del
+índice que corresponde. Por eso sólo se admite filtrar por una columna a la
+vez y ordenar por la columna filtrada: otras combinaciones obligarían a
+recorrer todas las filas del listado para filtrarlas u ordenarlas.
+
+Autor: Darwin Hurtado
+Fecha: 2024
+"""
+
+from datetime import datetime
+from typing import NamedTuple, Optional, Set
+
+
+# Columnas de orden de los listados (ver ``schemas.OrdenProductos``)
+ORDEN_STOCK = "stock"
+ORDEN_NOMBRE = "nombre"
+ORDEN_FECHA_ACTUALIZACION = "fecha_actualizacion"
+
+
+class ListadoInvalidoError(ValueError):
+    """Filtros, orden o cursor no admitidos en un listado de productos"""
+
+
+class FiltroProductos(NamedTuple):
+    """
+    Filtros y orden de un listado de productos.
+
+    Attributes:
+        stock_min (Optional[int]): Stock mínimo (inclusive)
+        stock_max (Optional[int]): Stock máximo (inclusive)
+        nombre_prefix (Optional[str]): Prefijo del nombre (distingue mayúsculas)
+        updated_since (Optional[datetime]): Fecha de actualización mínima (inclusive)
+        orden (Optional[str]): Columna de orden, precedida de ``-`` para el
+            orden descendente; None ordena por ID
+    """
+    stock_min: Optional[int] = None
+    stock_max: Optional[int] = None
+    nombre_prefix: Optional[str] = None
+    updated_since: Optional[datetime] = None
+    orden: Optional[str] = None
+
+    @property
+    def columnas_filtradas(self) -> Set[str]:
+        """Columnas de orden sobre las que hay algún filtro"""
+        columnas = set()
+        if self.stock_min is not None or self.stock_max is not None:
+            columnas.add(ORDEN_STOCK)
+        if self.nombre_prefix is not None:
+            columnas.add(ORDEN_NOMBRE)
+        if self.updated_since is not None:
+            columnas.add(ORDEN_FECHA_ACTUALIZACION)
+        return columnas
+
+    @property
+    def columna_orden(self) -> Optional[str]:
+        """Columna de orden sin el sentido"""
+        return self.orden.lstrip("-") if self.orden else None
+
+    @property
+    def descendente(self) -> bool:
+        """Si el listado se ordena de mayor a menor"""
+        return bool(self.orden) and self.orden.startswith("-")
+
+    def validado(self) -> "FiltroProductos":
+        """
+        Comprueba que los filtros y el orden se resuelven con un índice.
+
+        Sin orden explícito, un listado filtrado se ordena por la columna
+        filtrada (ascendente).
+
+        Returns:
+            FiltroProductos: El filtro con el orden resuelto
+
+        Raises:
+            ListadoInvalidoError: Si se filtra por más de una columna, se
+                ordena por una columna distinta de la filtrada o el rango de
+                stock está vacío
+        """
+        columnas = self.columnas_filtradas
+        if len(columnas) > 1:
+            raise ListadoInvalidoError(
+                "Sólo se puede filtrar por una columna a la vez: "
+                f"{', '.join(sorted(columnas))}"
+            )
+        if (self.stock_min is not None and self.stock_max is not None
+                and self.stock_min > self.stock_max):
+            raise ListadoInvalidoError("stock_min no puede ser mayor que stock_max")
+        if not columnas:
+            return self
+
+        columna, = columnas
+        if self.orden is None:
+            return self._replace(orden=columna)
+        if self.columna_orden != columna:
+            raise ListadoInvalidoError(
+                f"Un listado filtrado por {columna} sólo se puede ordenar por {columna}"
+            )
+        return self
@@ -11,9 +11,35 @@ Fecha: 2024
 """
 
 from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.orm import Session, joinedload, lazyload, noload, selectinload
+from sqlalchemy import and_, delete, exists, select, update
 from ..models.franquicia import Franquicia
+from ..models.producto import Producto
+from ..models.sucursal import Sucursal
+from ..sharding import router_de_sesion
+from .cache import cache_entidades
+from .dialect import insert_on_conflict
+from .pagination import Pagina, paginar_por_id
+from .trigramas import indices_trigramas
+
+
+# Estrategias de carga del árbol franquicia -> sucursales -> productos.
+# Listados: una consulta por nivel (selectin), sin importar cuántas franquicias haya.
+CARGA_ARBOL_LISTADO = (
+    selectinload(Franquicia.sucursales).selectinload(Sucursal.productos),
+)
+# Una sola franquicia: sus sucursales en el mismo SELECT (JOIN) y los productos
+# de todas ellas en una segunda consulta.
+CARGA_ARBOL_DETALLE = (
+    joinedload(Franquicia.sucursales).selectinload(Sucursal.productos),
+)
+# Opciones de carga por nivel de expansión (parámetro expand= del endpoint).
+# lazyload evita la carga selectin configurada en el modelo para lo no solicitado.
+CARGA_POR_EXPANSION = {
+    "none": (lazyload(Franquicia.sucursales),),
+    "sucursales": (joinedload(Franquicia.sucursales).lazyload(Sucursal.productos),),
+    "sucursales.productos": CARGA_ARBOL_DETALLE,
+}
 
 
 class FranquiciaRepository:
@@ -37,36 +63,60 @@ class FranquiciaRepository:
         """
         self.db = db
 
-    def create(self, nombre: str) -> Franquicia:
+    def create(self, nombre: str) -> Optional[Franquicia]:
         """
-        Crea una nueva franquicia en la base de datos.
+        Crea una nueva franquicia en la base de datos con una única sentencia.
+        
+        Se emite ``INSERT ... ON CONFLICT (nombre) DO NOTHING RETURNING ...``;
+        los duplicados los resuelve la restricción única.
         
         Args:
             nombre (str): Nombre único de la franquicia
             
         Returns:
-            Franquicia: Instancia de la franquicia creada con ID asignado
-            
-        Raises:
-            IntegrityError: Si ya existe una franquicia con el mismo nombre
-        """
-        franquicia = Franquicia(nombre=nombre)
-        self.db.add(franquicia)
-        self.db.commit()
-        self.db.refresh(franquicia)
+            Optional[Franquicia]: La franquicia creada con ID asignado, o None
+            si ya existe una franquicia con el mismo nombre
+        """
+        # noload: una franquicia nueva no tiene sucursales, no se consultan
+        franquicia = self.db.scalars(
+            insert_on_conflict(self.db, Franquicia)
+            .values(nombre=nombre)
+            .on_conflict_do_nothing(index_elements=[Franquicia.nombre])
+            .returning(Franquicia)
+            .options(noload(Franquicia.sucursales))
+        ).first()
+        if franquicia:
+            indices_trigramas.franquicia_creada(self.db, franquicia.id)
         return franquicia
 
-    def get_by_id(self, franquicia_id: int) -> Optional[Franquicia]:
+    def get_by_id(self, franquicia_id: int, expand: str = "sucursales.productos") -> Optional[Franquicia]:
         """
         Obtiene una franquicia por su identificador único.
         
         Args:
             franquicia_id (int): ID único de la franquicia
+            expand (str): Relaciones a cargar: "none", "sucursales" o
+                "sucursales.productos" (árbol completo, por defecto)
             
         Returns:
             Optional[Franquicia]: La franquicia encontrada o None si no existe
-        """
-        return self.db.query(Franquicia).filter(Franquicia.id == franquicia_id).first()
+            
+        Note:
+            El árbol completo se carga en dos consultas (ver CARGA_ARBOL_DETALLE);
+            "none" y "sucursales" se resuelven con una sola consulta. Con
+            "none" se usa la caché de lectura (ver ``cache_entidades``).
+        """
+        def cargar() -> Optional[Franquicia]:
+            return (
+                self.db.query(Franquicia)
+                .options(*CARGA_POR_EXPANSION[expand])
+                .filter(Franquicia.id == franquicia_id)
+                .first()
+            )
+
+        if expand != "none":
+            return cargar()
+        return cache_entidades.obtener(self.db, Franquicia, franquicia_id, cargar)
 
     def get_by_name(self, nombre: str) -> Optional[Franquicia]:
         """
@@ -93,29 +143,70 @@ class FranquiciaRepository:
         Note:
             Este método puede ser costoso en sistemas con muchas franquicias.
             Considera usar paginación para grandes volúmenes de datos.
+            El árbol completo se carga en tres consultas (ver CARGA_ARBOL_LISTADO).
         """
-        return self.db.query(Franquicia).all()
+        return self.db.query(Franquicia).options(*CARGA_ARBOL_LISTADO).all()
+
+    def get_page(self, limit: int, after: Optional[int] = None) -> Pagina:
+        """
+        Obtiene una página de franquicias ordenadas por ID (paginación keyset).
+        
+        Args:
+            limit (int): Número máximo de franquicias de la página
+            after (Optional[int]): Cursor; sólo se retornan franquicias con ID mayor
+            
+        Returns:
+            Pagina: Franquicias de la página (con su árbol) y cursor de la siguiente
+        """
+        query = self.db.query(Franquicia).options(*CARGA_ARBOL_LISTADO)
+        return paginar_por_id(query, Franquicia.id, limit, after)
 
     def update(self, franquicia_id: int, nombre: str) -> Optional[Franquicia]:
         """
         Actualiza el nombre de una franquicia existente.
         
+        Se emite un único ``UPDATE ... RETURNING``, sin cargar antes la franquicia.
+        
         Args:
             franquicia_id (int): ID de la franquicia a actualizar
             nombre (str): Nuevo nombre para la franquicia
             
         Returns:
-            Optional[Franquicia]: La franquicia actualizada o None si no existe
+            Optional[Franquicia]: La franquicia actualizada (con su árbol) o
+            None si no existe
             
         Raises:
             IntegrityError: Si el nuevo nombre ya existe en otra franquicia
         """
-        franquicia = self.get_by_id(franquicia_id)
-        if franquicia:
-            franquicia.nombre = nombre
-            self.db.commit()
-            self.db.refresh(franquicia)
-        return franquicia
+        cache_entidades.invalidar(self.db, Franquicia, [franquicia_id])
+        return self.db.scalars(
+            update(Franquicia)
+            .where(Franquicia.id == franquicia_id)
+            .values(nombre=nombre)
+            .returning(Franquicia)
+        ).first()
+
+    def nombre_en_otro_shard(self, nombre: str, franquicia_id: int) -> bool:
+        """
+        Verifica si otra franquicia usa ``nombre`` en un shard distinto.
+        
+        La restricción única de cada base de datos sólo cubre su shard. Las
+        franquicias nuevas se crean en el shard que determina su nombre, pero
+        un cambio de nombre conserva el shard de la franquicia, por lo que el
+        nombre debe comprobarse en todos. Sin sharding retorna False sin
+        consultar nada.
+        
+        Args:
+            nombre (str): Nombre a verificar
+            franquicia_id (int): ID de la franquicia que se renombra
+            
+        Returns:
+            bool: True si otra franquicia, de cualquier shard, usa el nombre
+        """
+        if router_de_sesion(self.db) is None:
+            return False
+        existente = self.db.scalar(select(Franquicia.id).where(Franquicia.nombre == nombre))
+        return existente is not None and existente != franquicia_id
 
     def delete(self, franquicia_id: int) -> bool:
         """
@@ -128,15 +219,18 @@ class FranquiciaRepository:
             bool: True si la franquicia fue eliminada, False si no existe
             
         Note:
-            Esta operación también eliminará todas las sucursales y productos
-            asociados a la franquicia debido a las restricciones de clave foránea.
-        """
-        franquicia = self.get_by_id(franquicia_id)
-        if franquicia:
-            self.db.delete(franquicia)
-            self.db.commit()
-            return True
-        return False
+            Se emite un único DELETE; la base de datos elimina las sucursales
+            y productos asociados (ON DELETE CASCADE) sin cargarlos en memoria.
+            Para franquicias muy grandes ver la eliminación por lotes.
+        """
+        resultado = self.db.execute(delete(Franquicia).where(Franquicia.id == franquicia_id))
+        if resultado.rowcount:
+            indices_trigramas.franquicia_eliminada(self.db, franquicia_id)
+            cache_entidades.invalidar(self.db, Franquicia, [franquicia_id])
+            # Las sucursales y productos eliminados en cascada no se conocen
+            cache_entidades.invalidar(self.db, Sucursal)
+            cache_entidades.invalidar(self.db, Producto)
+        return resultado.rowcount > 0
 
     def exists(self, franquicia_id: int) -> bool:
         """
@@ -148,4 +242,4 @@ class FranquiciaRepository:
         Returns:
             bool: True si la franquicia existe, False en caso contrario
         """
-        return self.db.query(Franquicia).filter(Franquicia.id == franquicia_id).first() is not None
+        return self.db.scalar(select(exists().where(Franquicia.id == franquicia_id)))
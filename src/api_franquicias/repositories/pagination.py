@@ -0,0 +1,138 @@
+"""
+Paginación por cursor (keyset) para los listados de los repositorios.
+
+En lugar de OFFSET, cada página filtra por ``id > after`` y se ordena por
+``id``, de modo que el costo de obtener una página es constante sin importar
+en qué posición del listado se encuentre.
+
+Los listados ordenados por otra columna usan como cursor el par (valor de
+la columna, id) del último elemento, codificado como texto opaco, y filtran
+por ``(columna, id) > (valor, id)``.
+
+Autor: Darwin Hurtado
+Fecha: 2024
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional, Tuple, Union
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+
+class Pagina(NamedTuple):
+    """
+    Página de resultados de un listado.
+
+    Attributes:
+        items (List[Any]): Elementos de la página, ordenados por ID
+        next_cursor (Optional[Union[int, str]]): ID (o cursor codificado, en
+            los listados ordenados por otra columna) a usar como ``after``
+            para pedir la siguiente página, o None si no hay más elementos
+    """
+    items: List[Any]
+    next_cursor: Optional[Union[int, str]]
+
+
+def paginar_por_id(query: Query, columna_id: Any, limit: int, after: Optional[int] = None) -> Pagina:
+    """
+    Aplica paginación keyset sobre ``columna_id`` a una consulta.
+
+    Se solicita un elemento adicional al límite para saber si existe una
+    página siguiente sin necesidad de un COUNT.
+
+    Args:
+        query (Query): Consulta base (con sus filtros y opciones de carga)
+        columna_id (Any): Columna por la que se ordena y pagina (la clave primaria)
+        limit (int): Número máximo de elementos de la página
+        after (Optional[int]): Cursor recibido; sólo se retornan IDs mayores
+
+    Returns:
+        Pagina: Elementos de la página y cursor de la siguiente
+    """
+    if after is not None:
+        query = query.filter(columna_id > after)
+    filas = query.order_by(columna_id).limit(limit + 1).all()
+
+    if len(filas) > limit:
+        filas = filas[:limit]
+        return Pagina(items=filas, next_cursor=getattr(filas[-1], columna_id.key))
+    return Pagina(items=filas, next_cursor=None)
+
+
+def codificar_cursor(valor: Any, id_: int) -> str:
+    """
+    Codifica el par (valor de la columna de orden, id) como cursor opaco.
+
+    Las fechas se guardan en formato ISO 8601.
+    """
+    if isinstance(valor, datetime):
+        valor = valor.isoformat()
+    texto = json.dumps([valor, id_], separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Tuple[Any, int]:
+    """
+    Decodifica un cursor generado por :func:`codificar_cursor`.
+
+    Returns:
+        Tuple[Any, int]: Valor de la columna de orden (las fechas como texto
+        ISO 8601) e ID del último elemento de la página anterior
+
+    Raises:
+        ValueError: Si el cursor no tiene el formato esperado
+    """
+    try:
+        texto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        valor, id_ = json.loads(texto)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError) as e:
+        raise ValueError("Cursor no válido") from e
+    if not isinstance(id_, int) or isinstance(id_, bool):
+        raise ValueError("Cursor no válido")
+    return valor, id_
+
+
+def paginar_por_columna(query: Query, columna: Any, columna_id: Any, limit: int,
+                        after: Optional[Tuple[Any, int]] = None, descendente: bool = False,
+                        combinar: bool = False) -> Pagina:
+    """
+    Aplica paginación keyset sobre ``(columna, columna_id)`` a una consulta.
+
+    Con un índice que empiece por ``columna`` (tras las columnas de igualdad
+    de la consulta), la base de datos lee sólo las filas de la página.
+
+    Args:
+        query (Query): Consulta base (con sus filtros)
+        columna (Any): Columna de orden; no debe contener NULL
+        columna_id (Any): Clave primaria, para desempatar
+        limit (int): Número máximo de elementos de la página
+        after (Optional[Tuple[Any, int]]): Valor de la columna e ID del último
+            elemento de la página anterior
+        descendente (bool): Ordena de mayor a menor
+        combinar (bool): La consulta se ejecuta en varios shards, que
+            retornan sus resultados uno tras otro; se ordenan juntos
+
+    Returns:
+        Pagina: Elementos de la página y cursor codificado de la siguiente
+    """
+    clave = tuple_(columna, columna_id)
+    if after is not None:
+        query = query.filter(clave < tuple_(*after) if descendente else clave > tuple_(*after))
+    if descendente:
+        query = query.order_by(columna.desc(), columna_id.desc())
+    else:
+        query = query.order_by(columna, columna_id)
+    filas = query.limit(limit + 1).all()
+
+    def valores(fila: Any) -> Tuple[Any, int]:
+        return getattr(fila, columna.key), getattr(fila, columna_id.key)
+
+    if combinar:
+        filas = sorted(filas, key=valores, reverse=descendente)[:limit + 1]
+    if len(filas) > limit:
+        filas = filas[:limit]
+        return Pagina(items=filas, next_cursor=codificar_cursor(*valores(filas[-1])))
+    return Pagina(items=filas, next_cursor=None)
@@ -10,11 +10,28 @@ Autor: Darwin Hurtado
 Fecha: 2024
 """
 
-from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, desc
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Sequence, Set, Tuple, Union
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import (
+    and_, bindparam, case, func, desc, delete, exists, literal, literal_column, select, union_all, update
+)
+from sqlalchemy.sql import Select
+from ..models.busqueda import CONFIGURACION_TSVECTOR, productos_fts
+from ..models.franquicia import Franquicia
 from ..models.producto import Producto
 from ..models.sucursal import Sucursal
+from ..models.stock_maximo import StockMaximoSucursal
+from ..database import thread_session_factory
+from ..sharding import router_de_sesion
+from .cache import cache_entidades
+from .dialect import insert_on_conflict, nombre_dialecto, valor_fecha
+from .filtros import (
+    FiltroProductos, ListadoInvalidoError, ORDEN_FECHA_ACTUALIZACION, ORDEN_NOMBRE, ORDEN_STOCK
+)
+from .pagination import Pagina, decodificar_cursor, paginar_por_columna, paginar_por_id
+from .trigramas import indices_trigramas, similitud
 
 
 class ProductoRepository:
@@ -38,9 +55,13 @@ class ProductoRepository:
         """
         self.db = db
 
-    def create(self, nombre: str, cantidad_stock: int, sucursal_id: int) -> Producto:
+    def create(self, nombre: str, cantidad_stock: int, sucursal_id: int) -> Optional[Producto]:
         """
-        Crea un nuevo producto en la base de datos.
+        Crea un nuevo producto en la base de datos con una única sentencia.
+        
+        Se emite ``INSERT ... ON CONFLICT (sucursal_id, nombre) DO NOTHING
+        RETURNING ...``: la restricción única resuelve los duplicados, también
+        entre peticiones concurrentes, sin consultas previas ni posteriores.
         
         Args:
             nombre (str): Nombre único del producto dentro de la sucursal
@@ -48,23 +69,109 @@ class ProductoRepository:
             sucursal_id (int): ID de la sucursal donde se crea el producto
             
         Returns:
-            Producto: Instancia del producto creado con ID asignado
+            Optional[Producto]: El producto creado con ID asignado, o None si
+            ya existe un producto con el mismo nombre en la sucursal
             
         Raises:
-            IntegrityError: Si ya existe un producto con el mismo nombre
-                          en la misma sucursal
-            ValueError: Si cantidad_stock es negativa
-        """
-        producto = Producto(
-            nombre=nombre,
-            cantidad_stock=cantidad_stock,
-            sucursal_id=sucursal_id
-        )
-        self.db.add(producto)
-        self.db.commit()
-        self.db.refresh(producto)
+            IntegrityError: Si la sucursal no existe (clave foránea) o si
+                          cantidad_stock es negativa (CHECK)
+        """
+        producto = self.db.scalars(
+            insert_on_conflict(self.db, Producto)
+            .values(nombre=nombre, cantidad_stock=cantidad_stock, sucursal_id=sucursal_id)
+            .on_conflict_do_nothing(index_elements=[Producto.sucursal_id, Producto.nombre])
+            .returning(Producto)
+        ).first()
+        if producto:
+            self.refresh_max_stock([sucursal_id])
+            indices_trigramas.producto_guardado(self.db, producto.id, nombre, sucursal_id)
         return producto
 
+    # Filas por sentencia en la creación en lote (3 parámetros por fila; SQLite
+    # admite 32766 variables desde la versión 3.32)
+    FILAS_POR_INSERT = 1000
+
+    def create_many(self, sucursal_id: int, items: List[Tuple[str, int]]) -> Dict[str, Producto]:
+        """
+        Crea varios productos en una sucursal con INSERT multi-fila.
+        
+        Cada sentencia es ``INSERT ... VALUES (...), (...) ON CONFLICT
+        (sucursal_id, nombre) DO NOTHING RETURNING ...`` con hasta
+        ``FILAS_POR_INSERT`` filas; los nombres que ya existen en la sucursal
+        se omiten sin consultarlos antes.
+        
+        Args:
+            sucursal_id (int): ID de la sucursal donde se crean los productos
+            items (List[Tuple[str, int]]): Pares (nombre, cantidad_stock) ya
+                validados, con nombres distintos
+            
+        Returns:
+            Dict[str, Producto]: Productos creados por nombre; los nombres
+            ausentes ya existían en la sucursal
+            
+        Raises:
+            IntegrityError: Si la sucursal no existe (clave foránea)
+        """
+        creados: Dict[str, Producto] = {}
+        for inicio in range(0, len(items), self.FILAS_POR_INSERT):
+            filas = [
+                {"nombre": nombre, "cantidad_stock": cantidad_stock, "sucursal_id": sucursal_id}
+                for nombre, cantidad_stock in items[inicio:inicio + self.FILAS_POR_INSERT]
+            ]
+            sentencia = (
+                insert_on_conflict(self.db, Producto)
+                .values(filas)
+                .on_conflict_do_nothing(index_elements=[Producto.sucursal_id, Producto.nombre])
+                .returning(Producto)
+            )
+            creados.update((producto.nombre, producto) for producto in self.db.scalars(sentencia))
+        if creados:
+            self.refresh_max_stock([sucursal_id])
+        for producto in creados.values():
+            indices_trigramas.producto_guardado(self.db, producto.id, producto.nombre, sucursal_id)
+        return creados
+
+    def upsert_many(self, sucursal_id: int, items: List[Tuple[str, int]]) -> int:
+        """
+        Crea o actualiza el stock de varios productos de una sucursal.
+        
+        Cada sentencia es ``INSERT ... VALUES (...), (...) ON CONFLICT
+        (sucursal_id, nombre) DO UPDATE SET cantidad_stock = excluded.cantidad_stock``
+        con hasta ``FILAS_POR_INSERT`` filas. Los productos cuyo stock no cambia
+        no se modifican. No se cargan objetos en la sesión; ``RETURNING``
+        entrega los IDs de los productos creados al índice de trigramas.
+        
+        Args:
+            sucursal_id (int): ID de la sucursal
+            items (List[Tuple[str, int]]): Pares (nombre, cantidad_stock) ya
+                validados, con nombres distintos
+            
+        Returns:
+            int: Número de productos procesados
+            
+        Raises:
+            IntegrityError: Si la sucursal no existe (clave foránea)
+        """
+        for inicio in range(0, len(items), self.FILAS_POR_INSERT):
+            sentencia = insert_on_conflict(self.db, Producto).values([
+                {"nombre": nombre, "cantidad_stock": cantidad_stock, "sucursal_id": sucursal_id}
+                for nombre, cantidad_stock in items[inicio:inicio + self.FILAS_POR_INSERT]
+            ])
+            guardados = self.db.execute(sentencia.on_conflict_do_update(
+                index_elements=[Producto.sucursal_id, Producto.nombre],
+                set_={
+                    "cantidad_stock": sentencia.excluded.cantidad_stock,
+                    "fecha_actualizacion": func.now(),
+                },
+                where=Producto.cantidad_stock != sentencia.excluded.cantidad_stock
+            ).returning(Producto.id, Producto.nombre))
+            for producto_id, nombre in guardados:
+                indices_trigramas.producto_guardado(self.db, producto_id, nombre, sucursal_id)
+        if items:
+            cache_entidades.invalidar(self.db, Producto)
+            self.refresh_max_stock([sucursal_id])
+        return len(items)
+
     def get_by_id(self, producto_id: int) -> Optional[Producto]:
         """
         Obtiene un producto por su identificador único.
@@ -74,8 +181,14 @@ class ProductoRepository:
             
         Returns:
             Optional[Producto]: El producto encontrado o None si no existe
+            
+        Note:
+            Usa la caché de lectura (ver ``cache_entidades``).
         """
-        return self.db.query(Producto).filter(Producto.id == producto_id).first()
+        return cache_entidades.obtener(
+            self.db, Producto, producto_id,
+            lambda: self.db.query(Producto).filter(Producto.id == producto_id).first()
+        )
 
     def get_by_sucursal_id(self, sucursal_id: int) -> List[Producto]:
         """
@@ -108,6 +221,28 @@ class ProductoRepository:
             and_(Producto.nombre == nombre, Producto.sucursal_id == sucursal_id)
         ).first()
 
+    def get_existing_names(self, sucursal_id: int, nombres: Iterable[str]) -> Set[str]:
+        """
+        Obtiene cuáles de los nombres dados ya existen en una sucursal.
+        
+        Valida duplicados de un lote completo con una sola consulta.
+        
+        Args:
+            sucursal_id (int): ID de la sucursal donde buscar
+            nombres (Iterable[str]): Nombres a verificar
+            
+        Returns:
+            Set[str]: Subconjunto de ``nombres`` que ya existen en la sucursal
+        """
+        nombres = list(nombres)
+        if not nombres:
+            return set()
+        return set(self.db.scalars(
+            select(Producto.nombre).where(
+                Producto.sucursal_id == sucursal_id, Producto.nombre.in_(nombres)
+            )
+        ))
+
     def get_all(self) -> List[Producto]:
         """
         Obtiene todos los productos del sistema.
@@ -121,10 +256,293 @@ class ProductoRepository:
         """
         return self.db.query(Producto).all()
 
+    # Columnas de la exportación de productos, en orden
+    COLUMNAS_EXPORTACION = (
+        Producto.id, Producto.sucursal_id, Producto.nombre, Producto.cantidad_stock,
+        Producto.fecha_creacion, Producto.fecha_actualizacion,
+    )
+
+    # Columnas del inventario completo (producto, sucursal y franquicia), en orden
+    COLUMNAS_INVENTARIO = (
+        Producto.id.label("producto_id"), Producto.nombre.label("producto_nombre"),
+        Producto.cantidad_stock,
+        Sucursal.id.label("sucursal_id"), Sucursal.nombre.label("sucursal_nombre"),
+        Franquicia.id.label("franquicia_id"), Franquicia.nombre.label("franquicia_nombre"),
+        Producto.fecha_creacion, Producto.fecha_actualizacion,
+    )
+
+    def iter_export(self, tamano_lote: int,
+                    franquicia_id: Optional[int] = None) -> Iterator[Sequence[Row]]:
+        """
+        Recorre todos los productos por lotes, sin cargarlos en memoria.
+
+        Es una única consulta de columnas (sin objetos ORM ni identity map)
+        con ``yield_per``: SQLAlchemy pide un cursor del lado del servidor
+        (``stream_results``) y lee ``tamano_lote`` filas cada vez. Al ser una
+        sola sentencia, todas las filas corresponden al mismo snapshot de la
+        base de datos, aunque haya escrituras concurrentes.
+
+        Args:
+            tamano_lote (int): Filas leídas del cursor en cada lote
+            franquicia_id (Optional[int]): Restringe la exportación a una franquicia
+
+        Yields:
+            Sequence[Row]: Filas con las columnas de ``COLUMNAS_EXPORTACION``,
+            ordenadas por ID
+        """
+        consulta = select(*self.COLUMNAS_EXPORTACION).order_by(Producto.id)
+        if franquicia_id is not None:
+            consulta = consulta.join(Sucursal, Sucursal.id == Producto.sucursal_id).where(
+                Sucursal.franquicia_id == franquicia_id
+            )
+        return self._por_lotes(consulta, tamano_lote)
+
+    def iter_inventory(self, tamano_lote: int,
+                       franquicia_id: Optional[int] = None) -> Iterator[Sequence[Row]]:
+        """
+        Recorre por lotes el inventario completo: cada producto con su
+        sucursal y su franquicia.
+
+        Como :meth:`iter_export`, es una única consulta leída con un cursor
+        del servidor, unida a sucursales y franquicias en la base de datos.
+
+        Args:
+            tamano_lote (int): Filas leídas del cursor en cada lote
+            franquicia_id (Optional[int]): Restringe el inventario a una franquicia
+
+        Yields:
+            Sequence[Row]: Filas con las columnas de ``COLUMNAS_INVENTARIO``,
+            ordenadas por ID de producto
+        """
+        consulta = (
+            select(*self.COLUMNAS_INVENTARIO)
+            .join(Sucursal, Sucursal.id == Producto.sucursal_id)
+            .join(Franquicia, Franquicia.id == Sucursal.franquicia_id)
+            .order_by(Producto.id)
+        )
+        if franquicia_id is not None:
+            consulta = consulta.where(Franquicia.id == franquicia_id)
+        return self._por_lotes(consulta, tamano_lote)
+
+    def _por_lotes(self, consulta: Select, tamano_lote: int) -> Iterator[Sequence[Row]]:
+        """Ejecuta ``consulta`` con ``yield_per`` y entrega sus filas por lotes"""
+        resultado = self.db.execute(consulta.execution_options(yield_per=tamano_lote))
+        try:
+            yield from resultado.partitions()
+        finally:
+            resultado.close()
+
+    def search(self, terminos: List[str], limit: int, offset: int = 0,
+               franquicia_id: Optional[int] = None, sucursal_id: Optional[int] = None) -> Pagina:
+        """
+        Busca productos cuyo nombre tiene, para cada término, una palabra que
+        empieza por él, ordenados por relevancia.
+
+        Usa el índice de texto completo del dialecto (ver ``models.busqueda``):
+        ``MATCH`` sobre la tabla FTS5 ordenado por ``bm25`` en SQLite y
+        ``@@`` sobre el índice GIN ordenado por ``ts_rank`` en PostgreSQL.
+        Cada palabra se busca como prefijo (``"pal"*`` / ``pal:*``), de modo
+        que la consulta sirve para autocompletar mientras se escribe.
+
+        El orden por relevancia no es el del ID, por lo que la paginación
+        usa la posición del resultado (``offset``). Con sharding cada shard
+        retorna sus primeros ``offset + limit`` resultados y se ordenan juntos.
+
+        Args:
+            terminos (List[str]): Palabras a buscar, ya normalizadas (sólo
+                caracteres alfanuméricos)
+            limit (int): Número máximo de productos de la página
+            offset (int): Posición del primer resultado de la página
+            franquicia_id (Optional[int]): Restringe la búsqueda a una franquicia
+            sucursal_id (Optional[int]): Restringe la búsqueda a una sucursal
+
+        Returns:
+            Pagina: Productos de la página, del más al menos relevante, y la
+            posición de la siguiente página como cursor
+        """
+        if nombre_dialecto(self.db, Producto) == "postgresql":
+            documento = func.to_tsvector(literal_column(CONFIGURACION_TSVECTOR), Producto.nombre)
+            consulta_ts = func.to_tsquery(
+                literal_column(CONFIGURACION_TSVECTOR), " & ".join(f"{termino}:*" for termino in terminos)
+            )
+            # ts_rank crece con la relevancia; se niega para ordenar como bm25
+            relevancia = -func.ts_rank(documento, consulta_ts)
+            consulta = select(Producto, relevancia.label("relevancia")).where(documento.op("@@")(consulta_ts))
+        else:
+            expresion = " ".join(f'"{termino}"*' for termino in terminos)
+            consulta = (
+                select(Producto, productos_fts.c.rank.label("relevancia"))
+                .join(productos_fts, productos_fts.c.rowid == Producto.id)
+                .where(productos_fts.c.nombre.op("MATCH")(expresion))
+            )
+
+        if sucursal_id is not None:
+            consulta = consulta.where(Producto.sucursal_id == sucursal_id)
+        if franquicia_id is not None:
+            consulta = consulta.join(Sucursal, Sucursal.id == Producto.sucursal_id).where(
+                Sucursal.franquicia_id == franquicia_id
+            )
+        consulta = consulta.order_by("relevancia", Producto.id)
+
+        if router_de_sesion(self.db) is not None:
+            # Cada shard ordena sus resultados; se combinan antes de paginar
+            filas = self.db.execute(consulta.limit(offset + limit + 1)).all()
+            filas = sorted(filas, key=lambda fila: (fila.relevancia, fila.Producto.id))[offset:]
+        else:
+            filas = self.db.execute(consulta.offset(offset).limit(limit + 1)).all()
+
+        productos = [fila.Producto for fila in filas[:limit]]
+        return Pagina(items=productos, next_cursor=offset + limit if len(filas) > limit else None)
+
+    def find_similar(self, franquicia_id: int, nombre: str, umbral: float, limit: int,
+                     sucursal_id: Optional[int] = None) -> List[Tuple[Producto, float]]:
+        """
+        Busca productos de una franquicia con nombre parecido a ``nombre``,
+        tolerando errores de escritura.
+
+        La similitud es la proporción de trigramas compartidos (ver
+        ``repositories.trigramas``). En PostgreSQL la calcula ``pg_trgm``
+        con el operador ``%`` sobre el índice GIN ``gin_trgm_ops`` (migración
+        0008); en los demás dialectos se usa el índice de trigramas en
+        memoria de la franquicia, que se construye en segundo plano (ver
+        ``repositories.trigramas``).
+        Los candidatos del índice en memoria se leen de la base de datos y
+        su similitud se recalcula, de modo que los productos eliminados o
+        renombrados por otros procesos no se retornan con datos antiguos.
+
+        Args:
+            franquicia_id (int): Franquicia donde buscar
+            nombre (str): Nombre buscado
+            umbral (float): Similitud mínima (0 a 1)
+            limit (int): Número máximo de productos
+            sucursal_id (Optional[int]): Restringe la búsqueda a una sucursal
+
+        Returns:
+            List[Tuple[Producto, float]]: Productos y su similitud, del más
+            al menos similar y, a igual similitud, por ID
+        """
+        if nombre_dialecto(self.db, Producto) == "postgresql":
+            # Umbral del operador % sólo para esta transacción
+            self.db.execute(select(func.set_config("pg_trgm.similarity_threshold", str(umbral), True)))
+            valor = func.similarity(Producto.nombre, nombre)
+            consulta = (
+                select(Producto, valor.label("similitud"))
+                .join(Sucursal, Sucursal.id == Producto.sucursal_id)
+                .where(Sucursal.franquicia_id == franquicia_id, Producto.nombre.op("%")(nombre))
+                .order_by(valor.desc(), Producto.id)
+                .limit(limit)
+            )
+            if sucursal_id is not None:
+                consulta = consulta.where(Producto.sucursal_id == sucursal_id)
+            return [(fila.Producto, fila.similitud) for fila in self.db.execute(consulta)]
+
+        indice = indices_trigramas.obtener(franquicia_id, thread_session_factory(self.db))
+        candidatos = [producto_id for producto_id, _ in indice.buscar(nombre, umbral, limit, sucursal_id)]
+        if not candidatos:
+            return []
+        similares = [
+            (producto, similitud(nombre, producto.nombre))
+            for producto in self.db.scalars(select(Producto).where(Producto.id.in_(candidatos)))
+        ]
+        similares = [(producto, valor) for producto, valor in similares if valor >= umbral]
+        return sorted(similares, key=lambda similar: (-similar[1], similar[0].id))
+
+    # Columna de cada criterio de orden de los listados
+    COLUMNAS_ORDEN = {
+        ORDEN_STOCK: Producto.cantidad_stock,
+        ORDEN_NOMBRE: Producto.nombre,
+        ORDEN_FECHA_ACTUALIZACION: Producto.fecha_actualizacion,
+    }
+
+    def get_page(self, limit: int, after: Optional[Union[int, str]] = None,
+                 sucursal_id: Optional[int] = None,
+                 filtro: Optional[FiltroProductos] = None) -> Pagina:
+        """
+        Obtiene una página de productos (paginación keyset).
+        
+        Sin orden los productos se ordenan por ID y el cursor es el último ID.
+        Con orden (``filtro`` ya validado, ver ``FiltroProductos.validado``)
+        se ordenan por la columna y el ID, y los filtros se aplican como
+        rangos sobre esa columna: con los índices ``(cantidad_stock)``,
+        ``(nombre)`` y ``(fecha_actualizacion)``, o sus equivalentes
+        precedidos de ``sucursal_id``, cada página recorre sólo sus filas.
+        
+        Args:
+            limit (int): Número máximo de productos de la página
+            after (Optional[Union[int, str]]): Cursor; ID del último producto
+                o, con orden, cursor codificado de la página anterior
+            sucursal_id (Optional[int]): Restringe el listado a una sucursal
+            filtro (Optional[FiltroProductos]): Filtros y orden del listado
+            
+        Returns:
+            Pagina: Productos de la página y cursor de la siguiente
+            
+        Raises:
+            ListadoInvalidoError: Si el cursor no corresponde al orden
+        """
+        query = self.db.query(Producto)
+        if sucursal_id is not None:
+            query = query.filter(Producto.sucursal_id == sucursal_id)
+        if filtro is None or filtro.orden is None:
+            return paginar_por_id(query, Producto.id, limit, after)
+
+        if filtro.stock_min is not None:
+            query = query.filter(Producto.cantidad_stock >= filtro.stock_min)
+        if filtro.stock_max is not None:
+            query = query.filter(Producto.cantidad_stock <= filtro.stock_max)
+        if filtro.nombre_prefix is not None:
+            query = query.filter(*self._rango_prefijo(filtro.nombre_prefix))
+        if filtro.updated_since is not None:
+            query = query.filter(
+                Producto.fecha_actualizacion >= valor_fecha(self.db, Producto, filtro.updated_since)
+            )
+
+        columna = self.COLUMNAS_ORDEN[filtro.columna_orden]
+        cursor = None if after is None else self._cursor_orden(filtro.columna_orden, after)
+        return paginar_por_columna(
+            query, columna, Producto.id, limit, cursor, filtro.descendente,
+            combinar=router_de_sesion(self.db) is not None
+        )
+
+    @staticmethod
+    def _rango_prefijo(prefijo: str) -> List[Any]:
+        """
+        Predicados de los nombres que empiezan por ``prefijo``.
+
+        El rango ``[prefijo, siguiente)`` usa el índice del nombre; LIKE
+        descarta, con las intercalaciones que no ordenan por código de
+        carácter, los nombres del rango que no empiezan por el prefijo.
+        """
+        predicados = [Producto.nombre >= prefijo, Producto.nombre.startswith(prefijo, autoescape=True)]
+        if ord(prefijo[-1]) < 0x10FFFF:
+            predicados.append(Producto.nombre < prefijo[:-1] + chr(ord(prefijo[-1]) + 1))
+        return predicados
+
+    def _cursor_orden(self, columna: str, cursor: Union[int, str]) -> Tuple[Any, int]:
+        """
+        Decodifica el cursor de un listado ordenado y convierte su valor al
+        tipo de la columna.
+
+        Raises:
+            ListadoInvalidoError: Si el cursor no corresponde a la columna
+        """
+        try:
+            valor, id_ = decodificar_cursor(str(cursor))
+            if columna == ORDEN_FECHA_ACTUALIZACION:
+                return valor_fecha(self.db, Producto, datetime.fromisoformat(valor)), id_
+            tipo = int if columna == ORDEN_STOCK else str
+            if type(valor) is not tipo:
+                raise ValueError("Cursor no válido")
+            return valor, id_
+        except (ValueError, TypeError) as e:
+            raise ListadoInvalidoError("Cursor no válido para el orden del listado") from e
+
     def update(self, producto_id: int, nombre: str) -> Optional[Producto]:
         """
         Actualiza el nombre de un producto existente.
         
+        Se emite un único ``UPDATE ... RETURNING``, sin cargar antes el producto.
+        
         Args:
             producto_id (int): ID del producto a actualizar
             nombre (str): Nuevo nombre para el producto
@@ -135,16 +553,20 @@ class ProductoRepository:
         Raises:
             IntegrityError: Si el nuevo nombre ya existe en la misma sucursal
         """
-        producto = self.get_by_id(producto_id)
+        cache_entidades.invalidar(self.db, Producto, [producto_id])
+        producto = self.db.scalars(
+            update(Producto)
+            .where(Producto.id == producto_id)
+            .values(nombre=nombre)
+            .returning(Producto)
+        ).first()
         if producto:
-            producto.nombre = nombre
-            self.db.commit()
-            self.db.refresh(producto)
+            indices_trigramas.producto_guardado(self.db, producto_id, nombre, producto.sucursal_id)
         return producto
 
     def update_stock(self, producto_id: int, cantidad_stock: int) -> Optional[Producto]:
         """
-        Actualiza el stock de un producto existente.
+        Actualiza el stock de un producto existente con un ``UPDATE ... RETURNING``.
         
         Args:
             producto_id (int): ID del producto a actualizar
@@ -154,31 +576,174 @@ class ProductoRepository:
             Optional[Producto]: El producto actualizado o None si no existe
             
         Raises:
-            ValueError: Si cantidad_stock es negativa
+            IntegrityError: Si cantidad_stock es negativa (CHECK)
+        """
+        cache_entidades.invalidar(self.db, Producto, [producto_id])
+        producto = self.db.scalars(
+            update(Producto)
+            .where(Producto.id == producto_id)
+            .values(cantidad_stock=cantidad_stock)
+            .returning(Producto)
+        ).first()
+        if producto:
+            self.refresh_max_stock([producto.sucursal_id])
+        return producto
+
+    def update_stock_minimo(self, producto_id: int, stock_minimo: Optional[int]) -> Optional[Producto]:
+        """
+        Fija el umbral de reposición de un producto con un ``UPDATE ... RETURNING``.
+        
+        Args:
+            producto_id (int): ID del producto a actualizar
+            stock_minimo (Optional[int]): Umbral (>= 0), o None para usar el
+                umbral de cada consulta de bajo stock
+            
+        Returns:
+            Optional[Producto]: El producto actualizado o None si no existe
+            
+        Raises:
+            IntegrityError: Si stock_minimo es negativo (CHECK)
+        """
+        cache_entidades.invalidar(self.db, Producto, [producto_id])
+        return self.db.scalars(
+            update(Producto)
+            .where(Producto.id == producto_id)
+            .values(stock_minimo=stock_minimo)
+            .returning(Producto)
+        ).first()
+
+    def adjust_stock(self, producto_id: int, delta: int) -> Optional[Producto]:
+        """
+        Suma ``delta`` al stock de un producto de forma atómica.
+        
+        Se ejecuta como una única sentencia::
+        
+            UPDATE productos SET cantidad_stock = cantidad_stock + :delta
+            WHERE id = :id AND cantidad_stock + :delta >= 0 RETURNING ...
+        
+        La base de datos resuelve los ajustes concurrentes sobre el mismo
+        producto sin perder actualizaciones y sin lecturas previas.
+        
+        Args:
+            producto_id (int): ID del producto a ajustar
+            delta (int): Cantidad a sumar (negativa para descontar)
+            
+        Returns:
+            Optional[Producto]: El producto ajustado, o None si no existe o si
+            el ajuste dejaría el stock en negativo
         """
-        producto = self.get_by_id(producto_id)
+        cache_entidades.invalidar(self.db, Producto, [producto_id])
+        nuevo_stock = Producto.cantidad_stock + delta
+        producto = self.db.scalars(
+            update(Producto)
+            .where(Producto.id == producto_id, nuevo_stock >= 0)
+            .values(cantidad_stock=nuevo_stock)
+            .returning(Producto)
+        ).first()
         if producto:
-            producto.cantidad_stock = cantidad_stock
-            self.db.commit()
-            self.db.refresh(producto)
+            self.refresh_max_stock([producto.sucursal_id])
         return producto
 
+    def update_stock_many(self, stocks: Dict[int, int]) -> int:
+        """
+        Actualiza el stock de varios productos con un UPDATE por lotes.
+        
+        Se envía una única sentencia ``UPDATE productos SET cantidad_stock=?
+        WHERE id=?`` ejecutada con todos los parámetros (executemany), sin
+        cargar los productos en la sesión.
+        
+        Args:
+            stocks (Dict[int, int]): Nueva cantidad en stock por ID de producto;
+                los IDs deben existir
+            
+        Returns:
+            int: Número de productos actualizados
+        """
+        if not stocks:
+            return 0
+        # Sentencia Core: el UPDATE ORM por clave primaria no está disponible
+        # en sesiones particionadas (el parámetro producto_id elige el shard)
+        productos = Producto.__table__
+        cache_entidades.invalidar(self.db, Producto, stocks.keys())
+        self.db.execute(
+            update(productos)
+            .where(productos.c.id == bindparam("producto_id"))
+            .values(cantidad_stock=bindparam("stock")),
+            [{"producto_id": producto_id, "stock": stock} for producto_id, stock in stocks.items()]
+        )
+        self.refresh_max_stock(
+            select(Producto.sucursal_id).where(Producto.id.in_(list(stocks))).distinct()
+        )
+        return len(stocks)
+
     def delete(self, producto_id: int) -> bool:
         """
         Elimina un producto de la base de datos.
         
+        Se emite un único ``DELETE ... RETURNING sucursal_id``, sin cargar
+        antes el producto.
+        
         Args:
             producto_id (int): ID del producto a eliminar
             
         Returns:
             bool: True si el producto fue eliminado, False si no existe
         """
-        producto = self.get_by_id(producto_id)
-        if producto:
-            self.db.delete(producto)
-            self.db.commit()
-            return True
-        return False
+        cache_entidades.invalidar(self.db, Producto, [producto_id])
+        sucursal_id = self.db.scalar(
+            delete(Producto).where(Producto.id == producto_id).returning(Producto.sucursal_id)
+        )
+        if sucursal_id is None:
+            return False
+        self.refresh_max_stock([sucursal_id])
+        indices_trigramas.producto_eliminado(self.db, producto_id, sucursal_id)
+        return True
+
+    def delete_batch_by_franquicia(self, franquicia_id: int, limit: int) -> int:
+        """
+        Elimina hasta ``limit`` productos de las sucursales de una franquicia.
+        
+        Permite vaciar una franquicia muy grande en transacciones cortas, sin
+        mantener bloqueada la base de datos durante toda la eliminación.
+        
+        Args:
+            franquicia_id (int): ID de la franquicia
+            limit (int): Número máximo de productos a eliminar
+            
+        Returns:
+            int: Número de productos eliminados (0 cuando no quedan)
+        """
+        lote = (
+            select(Producto.id)
+            .join(Sucursal)
+            .where(Sucursal.franquicia_id == franquicia_id)
+            .limit(limit)
+            .scalar_subquery()
+        )
+        eliminados = self.db.execute(
+            delete(Producto).where(Producto.id.in_(lote)).returning(Producto.id, Producto.sucursal_id),
+            execution_options={"synchronize_session": False}
+        ).all()
+        for producto_id, sucursal_id in eliminados:
+            indices_trigramas.producto_eliminado(self.db, producto_id, sucursal_id)
+        if eliminados:
+            cache_entidades.invalidar(self.db, Producto)
+            self.refresh_max_stock(select(Sucursal.id).where(Sucursal.franquicia_id == franquicia_id))
+        return len(eliminados)
+
+    def count_by_franquicia(self, franquicia_id: int) -> int:
+        """
+        Cuenta los productos de todas las sucursales de una franquicia.
+        
+        Args:
+            franquicia_id (int): ID de la franquicia
+            
+        Returns:
+            int: Número de productos
+        """
+        return self.db.scalar(
+            select(func.count(Producto.id)).join(Sucursal).where(Sucursal.franquicia_id == franquicia_id)
+        )
 
     def exists(self, producto_id: int) -> bool:
         """
@@ -190,7 +755,22 @@ class ProductoRepository:
         Returns:
             bool: True si el producto existe, False en caso contrario
         """
-        return self.db.query(Producto).filter(Producto.id == producto_id).first() is not None
+        return self.db.scalar(select(exists().where(Producto.id == producto_id)))
+
+    def get_existing_ids(self, producto_ids: Iterable[int]) -> Set[int]:
+        """
+        Obtiene cuáles de los IDs dados corresponden a productos existentes.
+        
+        Args:
+            producto_ids (Iterable[int]): IDs a verificar
+            
+        Returns:
+            Set[int]: Subconjunto de ``producto_ids`` que existen
+        """
+        producto_ids = list(producto_ids)
+        if not producto_ids:
+            return set()
+        return set(self.db.scalars(select(Producto.id).where(Producto.id.in_(producto_ids))))
 
     def belongs_to_sucursal(self, producto_id: int, sucursal_id: int) -> bool:
         """
@@ -211,12 +791,62 @@ class ProductoRepository:
         ).first()
         return producto is not None
 
+    def refresh_max_stock(self, sucursal_ids: Union[Iterable[int], Select]) -> None:
+        """
+        Recalcula el stock máximo materializado de las sucursales indicadas.
+        
+        Emite una única sentencia::
+        
+            INSERT INTO stock_maximo_sucursal (sucursal_id, cantidad_stock)
+            SELECT s.id, (SELECT max(cantidad_stock) FROM productos WHERE sucursal_id = s.id)
+            FROM sucursales s WHERE s.id IN (...)
+            ON CONFLICT (sucursal_id) DO UPDATE SET cantidad_stock = excluded.cantidad_stock
+        
+        El máximo de cada sucursal se resuelve con una búsqueda en el índice
+        ``(sucursal_id, cantidad_stock)``, sin recorrer sus productos.
+        
+        Antes se bloquean las filas de las sucursales (``SELECT ... FOR NO KEY
+        UPDATE`` en PostgreSQL, que no bloquea las claves foráneas de los
+        productos nuevos): en READ COMMITTED dos escrituras concurrentes en la
+        misma sucursal calcularían cada una el máximo sin ver la otra, y la
+        última en confirmar podría guardar un valor que ya no tiene ningún
+        producto. Con el bloqueo la segunda espera y su ``INSERT ... SELECT``
+        ve los productos ya confirmados. SQLite serializa las escrituras de
+        toda la base y no necesita el bloqueo.
+        
+        Args:
+            sucursal_ids: IDs de las sucursales afectadas o una consulta que los selecciona
+        """
+        if not isinstance(sucursal_ids, Select):
+            sucursal_ids = list(sucursal_ids)
+        if nombre_dialecto(self.db, Sucursal) != "sqlite":
+            # Siempre en el mismo orden para no provocar interbloqueos
+            self.db.execute(
+                select(Sucursal.id)
+                .where(Sucursal.id.in_(sucursal_ids))
+                .order_by(Sucursal.id)
+                .with_for_update(key_share=True)
+            )
+        maximo = (
+            select(func.max(Producto.cantidad_stock))
+            .where(Producto.sucursal_id == Sucursal.id)
+            .scalar_subquery()
+        )
+        sentencia = insert_on_conflict(self.db, StockMaximoSucursal).from_select(
+            ["sucursal_id", "cantidad_stock"],
+            select(Sucursal.id, maximo).where(Sucursal.id.in_(sucursal_ids))
+        )
+        self.db.execute(sentencia.on_conflict_do_update(
+            index_elements=[StockMaximoSucursal.sucursal_id],
+            set_={"cantidad_stock": sentencia.excluded.cantidad_stock}
+        ))
+
     def get_max_stock_by_sucursal(self, franquicia_id: int) -> List[Dict[str, Any]]:
         """
         Obtiene el producto con más stock de cada sucursal de una franquicia.
         
-        Este método implementa una consulta compleja que:
-        1. Encuentra el máximo stock por sucursal
+        Este método implementa una consulta que:
+        1. Lee el máximo stock materializado de cada sucursal
         2. Identifica los productos que tienen ese stock máximo
         3. Retorna información detallada del producto y sucursal
         
@@ -234,39 +864,251 @@ class ProductoRepository:
         Note:
             Si múltiples productos tienen el mismo stock máximo en una sucursal,
             se retornarán todos los productos con ese stock.
+            
+            El costo es proporcional al número de sucursales: cada una aporta
+            una fila de ``stock_maximo_sucursal`` y una búsqueda en el índice
+            ``(sucursal_id, cantidad_stock)``, sin agrupar los productos.
+            
+            Si el máximo guardado no coincide con ningún producto (o falta la
+            fila), la sucursal usa el ``max()`` actual de sus productos, otra
+            búsqueda en el mismo índice, en lugar de desaparecer del reporte.
         """
-        # Subconsulta para obtener el máximo stock por sucursal
-        max_stock_subquery = self.db.query(
-            Producto.sucursal_id,
-            func.max(Producto.cantidad_stock).label('max_stock')
-        ).join(Sucursal).filter(
-            Sucursal.franquicia_id == franquicia_id
-        ).group_by(Producto.sucursal_id).subquery()
-
-        # Consulta principal para obtener los productos con máximo stock
-        result = self.db.query(
-            Producto.id,
-            Producto.nombre,
-            Producto.cantidad_stock,
-            Sucursal.id.label('sucursal_id'),
-            Sucursal.nombre.label('sucursal_nombre')
-        ).join(Sucursal).join(
-            max_stock_subquery,
-            and_(
-                Producto.sucursal_id == max_stock_subquery.c.sucursal_id,
-                Producto.cantidad_stock == max_stock_subquery.c.max_stock
+        con_maximo = aliased(Producto)
+        maximo_vigente = exists().where(
+            con_maximo.sucursal_id == Sucursal.id,
+            con_maximo.cantidad_stock == StockMaximoSucursal.cantidad_stock
+        )
+        maximo_actual = (
+            select(func.max(con_maximo.cantidad_stock))
+            .where(con_maximo.sucursal_id == Sucursal.id)
+            .scalar_subquery()
+        )
+        maximo = case((maximo_vigente, StockMaximoSucursal.cantidad_stock), else_=maximo_actual)
+        result = self.db.execute(
+            select(
+                Producto.id,
+                Producto.nombre,
+                Producto.cantidad_stock,
+                Sucursal.id.label('sucursal_id'),
+                Sucursal.nombre.label('sucursal_nombre')
             )
-        ).filter(
-            Sucursal.franquicia_id == franquicia_id
+            .outerjoin(StockMaximoSucursal, StockMaximoSucursal.sucursal_id == Sucursal.id)
+            .join(
+                Producto,
+                and_(Producto.sucursal_id == Sucursal.id, Producto.cantidad_stock == maximo)
+            )
+            .where(Sucursal.franquicia_id == franquicia_id)
         ).all()
 
-        return [
-            {
-                "producto_id": row.id,
-                "producto_nombre": row.nombre,
-                "cantidad_stock": row.cantidad_stock,
-                "sucursal_id": row.sucursal_id,
-                "sucursal_nombre": row.sucursal_nombre
-            }
-            for row in result
+        return [self._fila_reporte(row, 1) for row in result]
+
+    def get_top_stock(self, franquicia_id: int, top: int, por_sucursal: bool = True,
+                      con_empates: bool = True) -> List[Dict[str, Any]]:
+        """
+        Obtiene los ``top`` productos con más stock de una franquicia.
+        
+        La posición se calcula en la base de datos con funciones de ventana
+        (SQLite >= 3.25 y PostgreSQL)::
+        
+            RANK() OVER (PARTITION BY sucursal_id ORDER BY cantidad_stock DESC)
+        
+        y sólo se transfieren las filas con posición <= ``top``.
+        
+        Args:
+            franquicia_id (int): ID de la franquicia para el reporte
+            top (int): Número de productos por grupo
+            por_sucursal (bool): True para un top por sucursal, False para un
+                único top de toda la franquicia
+            con_empates (bool): True incluye todos los productos empatados en
+                el límite (``RANK``); False corta en ``top`` filas exactas
+                desempatando por ID (``ROW_NUMBER``)
+                
+        Returns:
+            List[Dict[str, Any]]: Filas del reporte (ver get_max_stock_by_sucursal)
+            con su ``posicion``, ordenadas por sucursal (si aplica) y posición
+        """
+        if con_empates:
+            posicion = func.rank().over(
+                partition_by=Producto.sucursal_id if por_sucursal else None,
+                order_by=desc(Producto.cantidad_stock)
+            )
+        else:
+            posicion = func.row_number().over(
+                partition_by=Producto.sucursal_id if por_sucursal else None,
+                order_by=(desc(Producto.cantidad_stock), Producto.id)
+            )
+
+        ranking = (
+            select(
+                Producto.id,
+                Producto.nombre,
+                Producto.cantidad_stock,
+                Sucursal.id.label('sucursal_id'),
+                Sucursal.nombre.label('sucursal_nombre'),
+                posicion.label('posicion')
+            )
+            .join(Sucursal)
+            .where(Sucursal.franquicia_id == franquicia_id)
+            .subquery()
+        )
+        orden = [ranking.c.posicion, ranking.c.id]
+        if por_sucursal:
+            orden.insert(0, ranking.c.sucursal_id)
+        result = self.db.execute(
+            select(ranking).where(ranking.c.posicion <= top).order_by(*orden)
+        ).all()
+
+        return [self._fila_reporte(row, row.posicion) for row in result]
+
+    def get_low_stock(self, franquicia_id: int, umbral: Optional[int] = None) -> List[Tuple[Producto, int]]:
+        """
+        Obtiene los productos de una franquicia que necesitan reposición.
+        
+        Un producto la necesita si su stock es menor o igual que su
+        ``stock_minimo`` o, si no tiene uno propio, que ``umbral``. La consulta
+        es la unión de dos lecturas por sucursal:
+        
+        - ``cantidad_stock <= stock_minimo``, del índice parcial
+          ``ix_productos_bajo_stock``, que sólo contiene esos productos. El
+          ``stock_minimo IS NOT NULL`` redundante es un rango sobre la segunda
+          columna del índice: sin estadísticas, SQLite elegiría si no
+          cualquiera de los índices que empiezan por ``sucursal_id``.
+        - ``stock_minimo IS NULL AND cantidad_stock <= umbral``, del rango
+          inicial de ``(sucursal_id, cantidad_stock)``.
+        
+        Así el costo depende del número de sucursales y de productos con bajo
+        stock, no del tamaño del catálogo.
+        
+        Args:
+            franquicia_id (int): ID de la franquicia
+            umbral (Optional[int]): Umbral de los productos sin ``stock_minimo``;
+                None sólo considera los productos con umbral propio
+            
+        Returns:
+            List[Tuple[Producto, int]]: Productos y umbral aplicado, ordenados
+            por sucursal, stock e ID
+        """
+        bajo_umbral_propio = (
+            select(Producto, Producto.stock_minimo.label("umbral"))
+            .join(Sucursal, Sucursal.id == Producto.sucursal_id)
+            .where(
+                Sucursal.franquicia_id == franquicia_id,
+                Producto.stock_minimo.is_not(None),
+                Producto.cantidad_stock <= Producto.stock_minimo
+            )
+        )
+        partes = [bajo_umbral_propio]
+        if umbral is not None:
+            partes.append(
+                select(Producto, literal(umbral).label("umbral"))
+                .join(Sucursal, Sucursal.id == Producto.sucursal_id)
+                .where(
+                    Sucursal.franquicia_id == franquicia_id,
+                    Producto.stock_minimo.is_(None),
+                    Producto.cantidad_stock <= umbral
+                )
+            )
+        union = union_all(*partes).subquery()
+        producto = aliased(Producto, union)
+        consulta = select(producto, union.c.umbral).order_by(
+            union.c.sucursal_id, union.c.cantidad_stock, union.c.id
+        )
+        return [(fila[0], fila.umbral) for fila in self.db.execute(consulta)]
+
+    def get_stock_statistics(self, franquicia_id: int, por_sucursal: bool = False) -> List[Dict[str, Any]]:
+        """
+        Calcula estadísticas de stock de una franquicia con agregados en la BD.
+        
+        Args:
+            franquicia_id (int): ID de la franquicia
+            por_sucursal (bool): True para una fila por sucursal (GROUP BY),
+                False para una única fila con toda la franquicia
+                
+        Returns:
+            List[Dict[str, Any]]: Filas con total_sucursales, total_productos,
+            total_unidades, stock_promedio, stock_minimo, stock_maximo y
+            productos_sin_stock (más sucursal_id y sucursal_nombre por sucursal).
+            Las sucursales sin productos tienen promedio, mínimo y máximo None.
+        """
+        columnas = [
+            func.count(func.distinct(Sucursal.id)).label('total_sucursales'),
+            func.count(Producto.id).label('total_productos'),
+            func.coalesce(func.sum(Producto.cantidad_stock), 0).label('total_unidades'),
+            func.avg(Producto.cantidad_stock).label('stock_promedio'),
+            func.min(Producto.cantidad_stock).label('stock_minimo'),
+            func.max(Producto.cantidad_stock).label('stock_maximo'),
+            func.count(case((Producto.cantidad_stock == 0, Producto.id))).label('productos_sin_stock'),
         ]
+        if por_sucursal:
+            columnas[:1] = [Sucursal.id.label('sucursal_id'), Sucursal.nombre.label('sucursal_nombre')]
+
+        consulta = (
+            select(*columnas)
+            .select_from(Sucursal)
+            .outerjoin(Producto, Producto.sucursal_id == Sucursal.id)
+            .where(Sucursal.franquicia_id == franquicia_id)
+        )
+        if por_sucursal:
+            consulta = consulta.group_by(Sucursal.id, Sucursal.nombre).order_by(Sucursal.id)
+
+        estadisticas = []
+        for row in self.db.execute(consulta).mappings():
+            fila = dict(row)
+            if fila['stock_promedio'] is not None:
+                fila['stock_promedio'] = round(float(fila['stock_promedio']), 2)
+            estadisticas.append(fila)
+        return estadisticas
+
+    def get_stock_percentiles(self, franquicia_id: int, percentiles: Iterable[int]) -> Dict[int, Optional[int]]:
+        """
+        Calcula percentiles del stock de los productos de una franquicia.
+        
+        Usa el método del rango más cercano (equivalente a ``percentile_disc``):
+        el percentil p es el valor en la posición ``ceil(p * n / 100)`` del stock
+        ordenado. Se numeran las filas con ``ROW_NUMBER()`` y sólo se transfieren
+        las filas de las posiciones pedidas.
+        
+        Args:
+            franquicia_id (int): ID de la franquicia
+            percentiles (Iterable[int]): Percentiles entre 1 y 100
+            
+        Returns:
+            Dict[int, Optional[int]]: Stock de cada percentil (None si no hay productos)
+        """
+        percentiles = sorted(set(percentiles))
+        ordenados = (
+            select(
+                Producto.cantidad_stock,
+                func.row_number().over(order_by=Producto.cantidad_stock).label('posicion'),
+                func.count().over().label('total')
+            )
+            .join(Sucursal)
+            .where(Sucursal.franquicia_id == franquicia_id)
+            .subquery()
+        )
+        # ceil(p * n / 100) con aritmética entera, disponible en ambos dialectos
+        posiciones = [(p * ordenados.c.total + 99) // 100 for p in percentiles]
+        filas = self.db.execute(
+            select(ordenados.c.cantidad_stock, ordenados.c.posicion, ordenados.c.total)
+            .where(ordenados.c.posicion.in_(posiciones))
+        ).all()
+
+        resultado: Dict[int, Optional[int]] = {p: None for p in percentiles}
+        if filas:
+            total = filas[0].total
+            stock_por_posicion = {row.posicion: row.cantidad_stock for row in filas}
+            for p in percentiles:
+                resultado[p] = stock_por_posicion[(p * total + 99) // 100]
+        return resultado
+
+    @staticmethod
+    def _fila_reporte(row: Any, posicion: int) -> Dict[str, Any]:
+        """Convierte una fila de los reportes de stock en diccionario"""
+        return {
+            "producto_id": row.id,
+            "producto_nombre": row.nombre,
+            "cantidad_stock": row.cantidad_stock,
+            "sucursal_id": row.sucursal_id,
+            "sucursal_nombre": row.sucursal_nombre,
+            "posicion": posicion
+        }
@@ -9,10 +9,26 @@ Autor: Darwin Hurtado
 Fecha: 2024
 """
 
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from typing import Iterable, List, Optional, Set
+from sqlalchemy.orm import Session, joinedload, lazyload, noload, selectinload
+from sqlalchemy import and_, delete, exists, select, update
+from ..models.producto import Producto
 from ..models.sucursal import Sucursal
+from .cache import cache_entidades
+from .dialect import insert_on_conflict
+from .pagination import Pagina, paginar_por_id
+from .trigramas import indices_trigramas
+
+# Estrategias de carga de los productos de una sucursal.
+# Listados: todos los productos en una única consulta adicional (selectin).
+CARGA_PRODUCTOS_LISTADO = (selectinload(Sucursal.productos),)
+# Una sola sucursal: sus productos en el mismo SELECT (JOIN).
+CARGA_PRODUCTOS_DETALLE = (joinedload(Sucursal.productos),)
+# Opciones de carga por nivel de expansión (parámetro expand= del endpoint)
+CARGA_POR_EXPANSION = {
+    "none": (lazyload(Sucursal.productos),),
+    "productos": CARGA_PRODUCTOS_DETALLE,
+}
 
 
 class SucursalRepository:
@@ -36,38 +52,61 @@ class SucursalRepository:
         """
         self.db = db
 
-    def create(self, nombre: str, franquicia_id: int) -> Sucursal:
+    def create(self, nombre: str, franquicia_id: int) -> Optional[Sucursal]:
         """
-        Crea una nueva sucursal en la base de datos.
+        Crea una nueva sucursal en la base de datos con una única sentencia.
+        
+        Se emite ``INSERT ... ON CONFLICT (franquicia_id, nombre) DO NOTHING
+        RETURNING ...``; los duplicados los resuelve la restricción única.
         
         Args:
             nombre (str): Nombre único de la sucursal
             franquicia_id (int): ID de la franquicia a la que pertenece
             
         Returns:
-            Sucursal: Instancia de la sucursal creada con ID asignado
+            Optional[Sucursal]: La sucursal creada con ID asignado, o None si
+            ya existe una sucursal con el mismo nombre en la franquicia
             
         Raises:
-            IntegrityError: Si ya existe una sucursal con el mismo nombre
-                          en la misma franquicia
+            IntegrityError: Si la franquicia no existe (clave foránea)
         """
-        sucursal = Sucursal(nombre=nombre, franquicia_id=franquicia_id)
-        self.db.add(sucursal)
-        self.db.commit()
-        self.db.refresh(sucursal)
+        # noload: una sucursal nueva no tiene productos, no se consultan
+        sucursal = self.db.scalars(
+            insert_on_conflict(self.db, Sucursal)
+            .values(nombre=nombre, franquicia_id=franquicia_id)
+            .on_conflict_do_nothing(index_elements=[Sucursal.franquicia_id, Sucursal.nombre])
+            .returning(Sucursal)
+            .options(noload(Sucursal.productos))
+        ).first()
+        if sucursal:
+            indices_trigramas.sucursal_creada(self.db, sucursal.id, franquicia_id)
         return sucursal
 
-    def get_by_id(self, sucursal_id: int) -> Optional[Sucursal]:
+    def get_by_id(self, sucursal_id: int, expand: str = "productos") -> Optional[Sucursal]:
         """
         Obtiene una sucursal por su identificador único.
         
         Args:
             sucursal_id (int): ID único de la sucursal
+            expand (str): Relaciones a cargar: "none" o "productos" (por defecto)
             
         Returns:
             Optional[Sucursal]: La sucursal encontrada o None si no existe
+        
+        Note:
+            Con "none" se usa la caché de lectura (ver ``cache_entidades``).
         """
-        return self.db.query(Sucursal).filter(Sucursal.id == sucursal_id).first()
+        def cargar() -> Optional[Sucursal]:
+            return (
+                self.db.query(Sucursal)
+                .options(*CARGA_POR_EXPANSION[expand])
+                .filter(Sucursal.id == sucursal_id)
+                .first()
+            )
+
+        if expand != "none":
+            return cargar()
+        return cache_entidades.obtener(self.db, Sucursal, sucursal_id, cargar)
 
     def get_by_franquicia_id(self, franquicia_id: int) -> List[Sucursal]:
         """
@@ -79,7 +118,12 @@ class SucursalRepository:
         Returns:
             List[Sucursal]: Lista de sucursales de la franquicia (puede estar vacía)
         """
-        return self.db.query(Sucursal).filter(Sucursal.franquicia_id == franquicia_id).all()
+        return (
+            self.db.query(Sucursal)
+            .options(*CARGA_PRODUCTOS_LISTADO)
+            .filter(Sucursal.franquicia_id == franquicia_id)
+            .all()
+        )
 
     def get_by_name_and_franquicia(self, nombre: str, franquicia_id: int) -> Optional[Sucursal]:
         """
@@ -111,28 +155,50 @@ class SucursalRepository:
             Este método puede ser costoso en sistemas con muchas sucursales.
             Considera usar paginación para grandes volúmenes de datos.
         """
-        return self.db.query(Sucursal).all()
+        return self.db.query(Sucursal).options(*CARGA_PRODUCTOS_LISTADO).all()
+
+    def get_page(self, limit: int, after: Optional[int] = None,
+                 franquicia_id: Optional[int] = None) -> Pagina:
+        """
+        Obtiene una página de sucursales ordenadas por ID (paginación keyset).
+        
+        Args:
+            limit (int): Número máximo de sucursales de la página
+            after (Optional[int]): Cursor; sólo se retornan sucursales con ID mayor
+            franquicia_id (Optional[int]): Restringe el listado a una franquicia
+            
+        Returns:
+            Pagina: Sucursales de la página (con sus productos) y cursor de la siguiente
+        """
+        query = self.db.query(Sucursal).options(*CARGA_PRODUCTOS_LISTADO)
+        if franquicia_id is not None:
+            query = query.filter(Sucursal.franquicia_id == franquicia_id)
+        return paginar_por_id(query, Sucursal.id, limit, after)
 
     def update(self, sucursal_id: int, nombre: str) -> Optional[Sucursal]:
         """
         Actualiza el nombre de una sucursal existente.
         
+        Se emite un único ``UPDATE ... RETURNING``, sin cargar antes la sucursal.
+        
         Args:
             sucursal_id (int): ID de la sucursal a actualizar
             nombre (str): Nuevo nombre para la sucursal
             
         Returns:
-            Optional[Sucursal]: La sucursal actualizada o None si no existe
+            Optional[Sucursal]: La sucursal actualizada (con sus productos) o
+            None si no existe
             
         Raises:
             IntegrityError: Si el nuevo nombre ya existe en la misma franquicia
         """
-        sucursal = self.get_by_id(sucursal_id)
-        if sucursal:
-            sucursal.nombre = nombre
-            self.db.commit()
-            self.db.refresh(sucursal)
-        return sucursal
+        cache_entidades.invalidar(self.db, Sucursal, [sucursal_id])
+        return self.db.scalars(
+            update(Sucursal)
+            .where(Sucursal.id == sucursal_id)
+            .values(nombre=nombre)
+            .returning(Sucursal)
+        ).first()
 
     def delete(self, sucursal_id: int) -> bool:
         """
@@ -145,15 +211,44 @@ class SucursalRepository:
             bool: True si la sucursal fue eliminada, False si no existe
             
         Note:
-            Esta operación también eliminará todos los productos asociados
-            a la sucursal debido a las restricciones de clave foránea.
+            Se emite un único DELETE; la base de datos elimina los productos
+            asociados (ON DELETE CASCADE) sin cargarlos en memoria.
         """
-        sucursal = self.get_by_id(sucursal_id)
-        if sucursal:
-            self.db.delete(sucursal)
-            self.db.commit()
-            return True
-        return False
+        resultado = self.db.execute(delete(Sucursal).where(Sucursal.id == sucursal_id))
+        if resultado.rowcount:
+            indices_trigramas.sucursal_eliminada(self.db, sucursal_id)
+            cache_entidades.invalidar(self.db, Sucursal, [sucursal_id])
+            # Los productos eliminados en cascada no se conocen
+            cache_entidades.invalidar(self.db, Producto)
+        return resultado.rowcount > 0
+
+    def delete_batch_by_franquicia(self, franquicia_id: int, limit: int) -> int:
+        """
+        Elimina hasta ``limit`` sucursales de una franquicia.
+        
+        Args:
+            franquicia_id (int): ID de la franquicia
+            limit (int): Número máximo de sucursales a eliminar
+            
+        Returns:
+            int: Número de sucursales eliminadas (0 cuando no quedan)
+        """
+        lote = (
+            select(Sucursal.id)
+            .where(Sucursal.franquicia_id == franquicia_id)
+            .limit(limit)
+            .scalar_subquery()
+        )
+        eliminadas = self.db.scalars(
+            delete(Sucursal).where(Sucursal.id.in_(lote)).returning(Sucursal.id),
+            execution_options={"synchronize_session": False}
+        ).all()
+        for sucursal_id in eliminadas:
+            indices_trigramas.sucursal_eliminada(self.db, sucursal_id)
+        if eliminadas:
+            cache_entidades.invalidar(self.db, Sucursal)
+            cache_entidades.invalidar(self.db, Producto)
+        return len(eliminadas)
 
     def exists(self, sucursal_id: int) -> bool:
         """
@@ -165,7 +260,34 @@ class SucursalRepository:
         Returns:
             bool: True si la sucursal existe, False en caso contrario
         """
-        return self.db.query(Sucursal).filter(Sucursal.id == sucursal_id).first() is not None
+        return self.db.scalar(select(exists().where(Sucursal.id == sucursal_id)))
+
+    def get_franquicia_id(self, sucursal_id: int) -> Optional[int]:
+        """
+        Obtiene el ID de la franquicia de una sucursal.
+        
+        Args:
+            sucursal_id (int): ID de la sucursal
+            
+        Returns:
+            Optional[int]: ID de la franquicia o None si la sucursal no existe
+        """
+        return self.db.scalar(select(Sucursal.franquicia_id).where(Sucursal.id == sucursal_id))
+
+    def get_existing_ids(self, sucursal_ids: Iterable[int]) -> Set[int]:
+        """
+        Obtiene cuáles de los IDs dados corresponden a sucursales existentes.
+        
+        Args:
+            sucursal_ids (Iterable[int]): IDs a verificar
+            
+        Returns:
+            Set[int]: Subconjunto de ``sucursal_ids`` que existen
+        """
+        sucursal_ids = list(sucursal_ids)
+        if not sucursal_ids:
+            return set()
+        return set(self.db.scalars(select(Sucursal.id).where(Sucursal.id.in_(sucursal_ids))))
 
     def belongs_to_franquicia(self, sucursal_id: int, franquicia_id: int) -> bool:
         """
@@ -181,7 +303,7 @@ class SucursalRepository:
         Returns:
             bool: True si la sucursal pertenece a la franquicia, False en caso contrario
         """
-        sucursal = self.db.query(Sucursal).filter(
+        sucursal = self.db.query(Sucursal.id).filter(
             and_(Sucursal.id == sucursal_id, Sucursal.franquicia_id == franquicia_id)
         ).first()
         return sucursal is not None
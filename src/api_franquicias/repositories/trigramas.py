@@ -0,0 +1,465 @@
+"""
+Índice de trigramas en memoria para buscar productos por nombre aproximado.
+
+Encuentra nombres parecidos aunque tengan errores de escritura
+("hamburgesa clasica" encuentra "Hamburguesa Clásica"), con la misma medida
+que ``pg_trgm`` en PostgreSQL: cada palabra (en minúsculas, sin acentos) se
+rodea de espacios (``"  ham "``) y se descompone en grupos de tres
+caracteres; la similitud de dos nombres es la proporción de trigramas que
+comparten (``|A ∩ B| / |A ∪ B|``, entre 0 y 1).
+
+Hay un índice por franquicia. Los índices se construyen en hilos de fondo,
+con su propia sesión: al arrancar la aplicación (``precargar``) y, para
+recoger los cambios hechos por otros procesos, cuando un índice supera los
+``similar_index_ttl`` segundos; mientras tanto las consultas siguen usando
+el índice anterior, que se reemplaza al terminar. Las franquicias creadas
+empiezan con un índice vacío. Sólo si una consulta llega antes de que exista
+el índice de su franquicia (la precarga no ha terminado o está desactivada)
+espera a que se construya.
+
+Los repositorios registran en la sesión los productos creados, renombrados
+y eliminados, y los cambios se aplican a los índices cargados cuando la
+transacción se confirma (los de una transacción revertida se descartan).
+
+La consulta cuenta, con las listas de productos de cada trigrama buscado,
+cuántos trigramas comparte cada producto con el nombre buscado (el conteo
+lo hace ``Counter`` en C); sólo se calcula la similitud de los que
+comparten al menos ``ceil(umbral * n)`` de los ``n`` trigramas, el mínimo
+para alcanzar el umbral. El tiempo crece con la longitud de esas listas:
+con nombres de dos o tres palabras de un vocabulario común, unos 60 ms con
+100.000 productos en una franquicia y entre 0,4 y 0,8 s con 1.000.000, cuya
+construcción tarda unos 45 s. Para catálogos de ese tamaño con latencias de
+pocos milisegundos hace falta PostgreSQL, donde se usa ``pg_trgm`` en su
+lugar (ver ``ProductoRepository.find_similar``).
+
+Autor: Darwin Hurtado
+Fecha: 2024
+"""
+
+import heapq
+import logging
+import math
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..models.franquicia import Franquicia
+from ..models.producto import Producto
+from ..models.sucursal import Sucursal
+from .dialect import nombre_dialecto
+
+logger = logging.getLogger(__name__)
+
+# Clave en ``Session.info`` con los cambios pendientes de confirmar
+_CAMBIOS = "trigramas_cambios"
+
+# Productos eliminados que se acumulan antes de compactar las listas
+MIN_ELIMINADOS_COMPACTAR = 1024
+
+# Filas leídas por lote del cursor al construir un índice
+FILAS_POR_LOTE = 10000
+
+# Construcciones simultáneas: la construcción usa la CPU y retiene el GIL,
+# más hilos no la aceleran; dos evitan que una franquicia muy grande retrase
+# a las demás
+HILOS_CONSTRUCCION = 2
+
+
+def trigramas(texto: str) -> Set[str]:
+    """
+    Trigramas de un texto, como ``show_trgm`` de ``pg_trgm``.
+
+    Además de pasar a minúsculas se eliminan los acentos, de modo que
+    "Clásica" y "clasica" son iguales.
+    """
+    sin_acentos = "".join(
+        c for c in unicodedata.normalize("NFKD", texto.lower()) if not unicodedata.combining(c)
+    )
+    resultado = set()
+    for palabra in re.findall(r"[^\W_]+", sin_acentos):
+        palabra = f"  {palabra} "
+        resultado.update(palabra[i:i + 3] for i in range(len(palabra) - 2))
+    return resultado
+
+
+def similitud(a: str, b: str) -> float:
+    """Proporción de trigramas compartidos por dos textos (0 a 1)"""
+    trigramas_a, trigramas_b = trigramas(a), trigramas(b)
+    if not trigramas_a or not trigramas_b:
+        return 0.0
+    comunes = len(trigramas_a & trigramas_b)
+    return comunes / (len(trigramas_a) + len(trigramas_b) - comunes)
+
+
+class IndiceTrigramas:
+    """
+    Índice invertido de trigramas de los nombres de productos de una franquicia.
+
+    Cada producto ocupa una posición y cada trigrama tiene la lista de
+    posiciones que lo contienen (``array`` de enteros, 4 bytes por entrada).
+    Renombrar o eliminar un producto libera su posición sin recorrer las
+    listas, que se compactan cuando las posiciones libres superan a las
+    ocupadas.
+
+    Attributes:
+        creado (float): Momento de la construcción (``time.monotonic``)
+    """
+
+    def __init__(self):
+        self.creado = time.monotonic()
+        self._lock = threading.Lock()
+        self._vaciar()
+
+    def _vaciar(self) -> None:
+        self._ids_trigrama: Dict[str, int] = {}
+        self._listas: List[array] = []
+        # Por posición: producto, sucursal, nombre (None si está libre) y
+        # número de trigramas del nombre
+        self._productos = array("q")
+        self._sucursales = array("q")
+        self._nombres: List[Optional[str]] = []
+        self._tamanos = array("i")
+        self._posiciones: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._posiciones)
+
+    def agregar(self, producto_id: int, nombre: str, sucursal_id: int) -> None:
+        """Agrega un producto, o reemplaza su nombre si ya estaba en el índice"""
+        with self._lock:
+            self._liberar(producto_id)
+            self._agregar(producto_id, nombre, sucursal_id)
+            self._compactar_si_conviene()
+
+    def eliminar(self, producto_id: int) -> None:
+        """Elimina un producto del índice (si estaba)"""
+        with self._lock:
+            self._liberar(producto_id)
+            self._compactar_si_conviene()
+
+    def eliminar_sucursal(self, sucursal_id: int) -> None:
+        """Elimina los productos de una sucursal"""
+        with self._lock:
+            for posicion, sucursal in enumerate(self._sucursales):
+                if sucursal == sucursal_id and self._nombres[posicion] is not None:
+                    self._liberar(self._productos[posicion])
+            self._compactar_si_conviene()
+
+    def buscar(self, texto: str, umbral: float, limite: int,
+               sucursal_id: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Productos con nombre similar a ``texto``, del más al menos similar.
+
+        Args:
+            texto (str): Nombre buscado
+            umbral (float): Similitud mínima (0 a 1)
+            limite (int): Número máximo de resultados
+            sucursal_id (Optional[int]): Restringe la búsqueda a una sucursal
+
+        Returns:
+            List[Tuple[int, float]]: Pares (producto_id, similitud), ordenados
+            por similitud descendente y por ID
+        """
+        buscados = trigramas(texto)
+        n = len(buscados)
+        if not n or limite < 1:
+            return []
+
+        with self._lock:
+            conteo: Counter = Counter()
+            for trigrama in buscados:
+                indice = self._ids_trigrama.get(trigrama)
+                if indice is not None:
+                    conteo.update(self._listas[indice])
+
+            minimo = math.ceil(umbral * n - 1e-9)
+            similares = []
+            for posicion, comunes in conteo.items():
+                if comunes < minimo or self._nombres[posicion] is None:
+                    continue
+                if sucursal_id is not None and self._sucursales[posicion] != sucursal_id:
+                    continue
+                valor = comunes / (n + self._tamanos[posicion] - comunes)
+                if valor >= umbral:
+                    similares.append((valor, -self._productos[posicion]))
+
+        # Los más similares y, a igual similitud, los de menor ID
+        return [(-producto_id, valor) for valor, producto_id in heapq.nlargest(limite, similares)]
+
+    def _agregar(self, producto_id: int, nombre: str, sucursal_id: int) -> None:
+        posicion = len(self._nombres)
+        self._productos.append(producto_id)
+        self._sucursales.append(sucursal_id)
+        self._nombres.append(nombre)
+        propios = trigramas(nombre)
+        for trigrama in propios:
+            indice = self._ids_trigrama.get(trigrama)
+            if indice is None:
+                indice = self._ids_trigrama[trigrama] = len(self._listas)
+                self._listas.append(array("i"))
+            self._listas[indice].append(posicion)
+        self._tamanos.append(len(propios))
+        self._posiciones[producto_id] = posicion
+
+    def _liberar(self, producto_id: int) -> None:
+        posicion = self._posiciones.pop(producto_id, None)
+        if posicion is not None:
+            self._nombres[posicion] = None
+
+    def _compactar_si_conviene(self) -> None:
+        libres = len(self._nombres) - len(self._posiciones)
+        if libres < MIN_ELIMINADOS_COMPACTAR or libres < len(self._posiciones):
+            return
+        vivos = [
+            (self._productos[p], self._nombres[p], self._sucursales[p])
+            for p in sorted(self._posiciones.values())
+        ]
+        self._vaciar()
+        for producto_id, nombre, sucursal_id in vivos:
+            self._agregar(producto_id, nombre, sucursal_id)
+
+
+def _filas_franquicia(db: Session, franquicia_id: int) -> Iterator[Tuple[int, Optional[int], Optional[str]]]:
+    """Sucursales de una franquicia con sus productos (None si no tienen), por lotes del cursor"""
+    consulta = (
+        select(Sucursal.id, Producto.id, Producto.nombre)
+        .outerjoin(Producto, Producto.sucursal_id == Sucursal.id)
+        .where(Sucursal.franquicia_id == franquicia_id)
+        .execution_options(yield_per=FILAS_POR_LOTE)
+    )
+    resultado = db.execute(consulta)
+    try:
+        for lote in resultado.partitions():
+            yield from lote
+    finally:
+        resultado.close()
+
+
+class RegistroIndicesTrigramas:
+    """
+    Índices de trigramas por franquicia, compartidos por las sesiones del proceso.
+
+    Los repositorios registran cada cambio en la sesión
+    (``producto_guardado``, ``producto_eliminado``...) y el registro los
+    aplica al confirmarse la transacción. Los cambios confirmados mientras
+    se construye un índice se aplican también sobre él al terminar.
+
+    Las construcciones se ejecutan en hilos de fondo con sesiones de
+    ``abrir_sesion`` (síncronas, ver ``database.thread_session_factory``);
+    el índice anterior se sigue usando hasta que el nuevo está listo.
+
+    Attributes:
+        ttl (float): Segundos tras los que un índice se reconstruye (0: nunca)
+    """
+
+    def __init__(self, ttl: float = 0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._indices: Dict[int, IndiceTrigramas] = {}
+        self._franquicia_de_sucursal: Dict[int, int] = {}
+        # Cambios confirmados durante cada construcción en curso
+        self._construcciones: List[List[Tuple[str, tuple]]] = []
+        # Construcción pendiente o en curso de cada franquicia
+        self._pendientes: Dict[int, Future] = {}
+        self._ejecutor = ThreadPoolExecutor(HILOS_CONSTRUCCION, thread_name_prefix="indices-trigramas")
+        # Señal de parada de las construcciones programadas hasta el próximo ``detener``
+        self._detenido = threading.Event()
+
+    def obtener(self, franquicia_id: int, abrir_sesion: Callable[[], Session]) -> IndiceTrigramas:
+        """
+        Retorna el índice de una franquicia.
+
+        Si el índice expiró se programa su reconstrucción en segundo plano y
+        se retorna el actual. Sólo si la franquicia aún no tiene índice se
+        espera a su construcción (la de la precarga, si está en curso).
+
+        Args:
+            franquicia_id (int): ID de la franquicia
+            abrir_sesion: Crea las sesiones de las construcciones
+
+        Returns:
+            IndiceTrigramas: Índice con los productos de la franquicia
+        """
+        with self._lock:
+            indice = self._indices.get(franquicia_id)
+            if indice is not None:
+                if self.ttl and time.monotonic() - indice.creado >= self.ttl:
+                    self._programar(franquicia_id, abrir_sesion)
+                return indice
+            pendiente = self._programar(franquicia_id, abrir_sesion)
+        return pendiente.result()
+
+    def precargar(self, abrir_sesion: Callable[[], Session]) -> None:
+        """
+        Programa en segundo plano la construcción de los índices de todas las franquicias.
+
+        No hace nada en PostgreSQL, donde las búsquedas usan ``pg_trgm``.
+        """
+        db = abrir_sesion()
+        try:
+            if nombre_dialecto(db, Producto) == "postgresql":
+                return
+            franquicia_ids = db.scalars(select(Franquicia.id)).all()
+        finally:
+            db.close()
+        with self._lock:
+            for franquicia_id in franquicia_ids:
+                if franquicia_id not in self._indices:
+                    self._programar(franquicia_id, abrir_sesion)
+
+    def detener(self) -> None:
+        """Interrumpe las construcciones en curso (al cerrar la aplicación); las siguientes se ejecutan"""
+        with self._lock:
+            self._detenido.set()
+            self._detenido = threading.Event()
+
+    def esperar(self) -> None:
+        """Espera a que terminen las construcciones programadas"""
+        with self._lock:
+            pendientes = list(self._pendientes.values())
+        for pendiente in pendientes:
+            pendiente.exception()
+
+    def _programar(self, franquicia_id: int, abrir_sesion: Callable[[], Session]) -> Future:
+        """Programa la construcción de un índice, si no hay una pendiente (con el lock tomado)"""
+        pendiente = self._pendientes.get(franquicia_id)
+        if pendiente is None:
+            pendiente = self._ejecutor.submit(self._construir, franquicia_id, abrir_sesion, self._detenido)
+            self._pendientes[franquicia_id] = pendiente
+        return pendiente
+
+    def _construir(self, franquicia_id: int, abrir_sesion: Callable[[], Session],
+                   detenido: threading.Event) -> IndiceTrigramas:
+        cambios: List[Tuple[str, tuple]] = []
+        with self._lock:
+            self._construcciones.append(cambios)
+        try:
+            indice = IndiceTrigramas()
+            sucursales = set()
+            db = abrir_sesion()
+            try:
+                for sucursal_id, producto_id, nombre in _filas_franquicia(db, franquicia_id):
+                    if detenido.is_set():
+                        raise RuntimeError("Construcción del índice de trigramas interrumpida")
+                    sucursales.add(sucursal_id)
+                    if producto_id is not None:
+                        indice._agregar(producto_id, nombre, sucursal_id)
+            finally:
+                db.close()
+        except Exception:
+            logger.exception("Error construyendo el índice de trigramas de la franquicia %s", franquicia_id)
+            with self._lock:
+                self._construcciones.remove(cambios)
+                self._pendientes.pop(franquicia_id, None)
+            raise
+
+        # Reemplazo del índice anterior y de los cambios confirmados durante la
+        # construcción en un mismo bloque: ningún cambio queda fuera de ambos
+        with self._lock:
+            self._construcciones.remove(cambios)
+            self._pendientes.pop(franquicia_id, None)
+            for sucursal_id in sucursales:
+                self._franquicia_de_sucursal[sucursal_id] = franquicia_id
+            self._indices[franquicia_id] = indice
+            for tipo, argumentos in cambios:
+                self._aplicar(tipo, argumentos)
+        return indice
+
+    def descartar(self, franquicia_id: Optional[int] = None) -> None:
+        """Descarta el índice de una franquicia (o todos); la siguiente consulta lo construye"""
+        with self._lock:
+            if franquicia_id is None:
+                self._indices.clear()
+                self._franquicia_de_sucursal.clear()
+            else:
+                self._descartar(franquicia_id)
+
+    def producto_guardado(self, db: Session, producto_id: int, nombre: str, sucursal_id: int) -> None:
+        """Registra un producto creado o renombrado en la transacción de ``db``"""
+        self._registrar(db, "guardado", (producto_id, nombre, sucursal_id))
+
+    def producto_eliminado(self, db: Session, producto_id: int, sucursal_id: int) -> None:
+        """Registra un producto eliminado en la transacción de ``db``"""
+        self._registrar(db, "eliminado", (producto_id, sucursal_id))
+
+    def sucursal_creada(self, db: Session, sucursal_id: int, franquicia_id: int) -> None:
+        """Registra una sucursal creada en la transacción de ``db``"""
+        self._registrar(db, "sucursal_creada", (sucursal_id, franquicia_id))
+
+    def sucursal_eliminada(self, db: Session, sucursal_id: int) -> None:
+        """Registra una sucursal eliminada (con sus productos) en la transacción de ``db``"""
+        self._registrar(db, "sucursal_eliminada", (sucursal_id,))
+
+    def franquicia_creada(self, db: Session, franquicia_id: int) -> None:
+        """Registra una franquicia creada en la transacción de ``db``: su índice empieza vacío"""
+        self._registrar(db, "franquicia_creada", (franquicia_id,))
+
+    def franquicia_eliminada(self, db: Session, franquicia_id: int) -> None:
+        """Registra una franquicia eliminada en la transacción de ``db``: se descarta su índice"""
+        self._registrar(db, "franquicia_eliminada", (franquicia_id,))
+
+    def _registrar(self, db: Session, tipo: str, argumentos: tuple) -> None:
+        db.info.setdefault(_CAMBIOS, []).append((tipo, argumentos))
+
+    def confirmar(self, db: Session) -> None:
+        """Aplica los cambios registrados en ``db`` (la transacción se confirmó)"""
+        cambios = db.info.pop(_CAMBIOS, None)
+        if not cambios:
+            return
+        with self._lock:
+            for construccion in self._construcciones:
+                construccion.extend(cambios)
+            for tipo, argumentos in cambios:
+                self._aplicar(tipo, argumentos)
+
+    def revertir(self, db: Session) -> None:
+        """Descarta los cambios registrados en ``db`` (la transacción se revirtió)"""
+        db.info.pop(_CAMBIOS, None)
+
+    def _aplicar(self, tipo: str, argumentos: tuple) -> None:
+        if tipo == "franquicia_creada":
+            self._indices.setdefault(argumentos[0], IndiceTrigramas())
+            return
+        if tipo == "franquicia_eliminada":
+            self._descartar(argumentos[0])
+            return
+        if tipo == "sucursal_creada":
+            sucursal_id, franquicia_id = argumentos
+            if franquicia_id in self._indices:
+                self._franquicia_de_sucursal[sucursal_id] = franquicia_id
+            return
+
+        sucursal_id = argumentos[-1] if tipo in ("guardado", "eliminado") else argumentos[0]
+        franquicia_id = self._franquicia_de_sucursal.get(sucursal_id)
+        indice = self._indices.get(franquicia_id)
+        if indice is None:
+            return
+        if tipo == "guardado":
+            indice.agregar(*argumentos)
+        elif tipo == "eliminado":
+            indice.eliminar(argumentos[0])
+        elif tipo == "sucursal_eliminada":
+            indice.eliminar_sucursal(sucursal_id)
+            del self._franquicia_de_sucursal[sucursal_id]
+
+    def _descartar(self, franquicia_id: int) -> None:
+        if self._indices.pop(franquicia_id, None) is None:
+            return
+        for sucursal_id in [s for s, f in self._franquicia_de_sucursal.items() if f == franquicia_id]:
+            del self._franquicia_de_sucursal[sucursal_id]
+
+
+# Registro global del proceso
+indices_trigramas = RegistroIndicesTrigramas(settings.similar_index_ttl)
+
+# Los cambios se aplican sólo si la transacción se confirma; también para las
+# sesiones particionadas y las síncronas de las AsyncSession
+event.listen(Session, "after_commit", indices_trigramas.confirmar)
+event.listen(Session, "after_rollback", indices_trigramas.revertir)
@@ -3,8 +3,63 @@ Esquemas Pydantic para validación de datos de entrada y salida
 """
 
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Generic, TypeVar, Union
 from datetime import datetime
+from enum import Enum
+from .config import settings
+
+T = TypeVar("T")
+
+
+# Niveles de expansión para las lecturas de detalle
+class FranquiciaExpand(str, Enum):
+    """Relaciones a incluir al obtener una franquicia"""
+    NONE = "none"
+    SUCURSALES = "sucursales"
+    SUCURSALES_PRODUCTOS = "sucursales.productos"
+
+
+class SucursalExpand(str, Enum):
+    """Relaciones a incluir al obtener una sucursal"""
+    NONE = "none"
+    PRODUCTOS = "productos"
+
+
+# Opciones del reporte de stock
+class ReporteAlcance(str, Enum):
+    """Grupo sobre el que se calcula el top del reporte de stock"""
+    SUCURSAL = "sucursal"
+    FRANQUICIA = "franquicia"
+
+
+class ReporteEmpates(str, Enum):
+    """Tratamiento de los productos empatados en el límite del top"""
+    ALL = "all"
+    FIRST = "first"
+
+
+# Formatos de archivo de inventario (importación y exportación)
+class FormatoInventario(str, Enum):
+    """Formato de un archivo de inventario"""
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+class FormatoColumnar(str, Enum):
+    """Formato columnar de la exportación del inventario"""
+    ARROW = "arrow"
+    PARQUET = "parquet"
+
+
+# Orden de los listados de productos (``-`` indica orden descendente)
+class OrdenProductos(str, Enum):
+    """Columna y sentido por el que se ordena un listado de productos"""
+    STOCK = "stock"
+    STOCK_DESC = "-stock"
+    NOMBRE = "nombre"
+    NOMBRE_DESC = "-nombre"
+    FECHA_ACTUALIZACION = "fecha_actualizacion"
+    FECHA_ACTUALIZACION_DESC = "-fecha_actualizacion"
 
 
 # Esquemas de entrada (request)
@@ -34,6 +89,29 @@ class ProductoCreate(BaseModel):
     cantidad_stock: int = Field(..., ge=0, description="Cantidad en stock")
 
 
+class ProductoImportacion(ProductoCreate):
+    """Esquema de una fila de un archivo de inventario"""
+    sucursal_id: int = Field(..., ge=1, description="ID de la sucursal del producto")
+
+
+class ProductoLoteItem(BaseModel):
+    """
+    Esquema de un elemento de un lote de productos.
+    
+    Sin ``min_length`` ni ``ge``: los nombres vacíos y el stock negativo se
+    reportan en el resultado del elemento en lugar de rechazar todo el lote.
+    """
+    nombre: str = Field(..., max_length=255, description="Nombre del producto")
+    cantidad_stock: int = Field(..., description="Cantidad en stock")
+
+
+class ProductoBulkCreate(BaseModel):
+    """Esquema para crear productos en lote en una sucursal"""
+    productos: List[ProductoLoteItem] = Field(
+        ..., min_length=1, max_length=settings.bulk_max_items, description="Productos a crear"
+    )
+
+
 class ProductoUpdate(BaseModel):
     """Esquema para actualizar un producto"""
     nombre: str = Field(..., min_length=1, max_length=255, description="Nuevo nombre del producto")
@@ -44,12 +122,38 @@ class StockUpdate(BaseModel):
     stock: int = Field(..., ge=0, description="Nueva cantidad en stock")
 
 
+class StockMinimoUpdate(BaseModel):
+    """Esquema para fijar el umbral de reposición de un producto"""
+    stock_minimo: Optional[int] = Field(
+        ..., ge=0, description="Stock con el que el producto necesita reposición; null usa el umbral de cada consulta"
+    )
+
+
+class StockAjuste(BaseModel):
+    """Esquema para ajustar el stock de un producto de forma relativa"""
+    delta: int = Field(..., description="Unidades a sumar (positivo) o descontar (negativo)")
+
+
+class StockLoteItem(BaseModel):
+    """Esquema para un elemento de una actualización de stock en lote"""
+    producto_id: int = Field(..., description="ID del producto")
+    stock: int = Field(..., ge=0, description="Nueva cantidad en stock")
+
+
+class StockBulkUpdate(BaseModel):
+    """Esquema para actualizar el stock de varios productos"""
+    productos: List[StockLoteItem] = Field(
+        ..., min_length=1, max_length=settings.bulk_max_items, description="Stock por producto"
+    )
+
+
 # Esquemas de salida (response)
 class ProductoResponse(BaseModel):
     """Esquema de respuesta para un producto"""
     id: int
     nombre: str
     cantidad_stock: int
+    stock_minimo: Optional[int] = None
     sucursal_id: int
     fecha_creacion: Optional[datetime] = None
     fecha_actualizacion: Optional[datetime] = None
@@ -57,6 +161,27 @@ class ProductoResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ProductoSimilarResponse(ProductoResponse):
+    """Esquema de respuesta para un producto con nombre parecido al buscado"""
+    similitud: float = Field(..., description="Proporción de trigramas compartidos (0 a 1)")
+
+
+class ProductoBajoStockResponse(ProductoResponse):
+    """Esquema de respuesta para un producto que necesita reposición"""
+    umbral: int = Field(..., description="Umbral aplicado: el stock_minimo del producto o el de la consulta")
+
+
+class SucursalResumenResponse(BaseModel):
+    """Esquema de respuesta para una sucursal sin sus productos"""
+    id: int
+    nombre: str
+    franquicia_id: int
+    fecha_creacion: Optional[datetime] = None
+    fecha_actualizacion: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class SucursalResponse(BaseModel):
     """Esquema de respuesta para una sucursal"""
     id: int
@@ -69,6 +194,27 @@ class SucursalResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class FranquiciaResumenResponse(BaseModel):
+    """Esquema de respuesta para una franquicia sin sus sucursales"""
+    id: int
+    nombre: str
+    fecha_creacion: Optional[datetime] = None
+    fecha_actualizacion: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class FranquiciaSucursalesResponse(BaseModel):
+    """Esquema de respuesta para una franquicia con sus sucursales (sin productos)"""
+    id: int
+    nombre: str
+    fecha_creacion: Optional[datetime] = None
+    fecha_actualizacion: Optional[datetime] = None
+    sucursales: List[SucursalResumenResponse] = []
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class FranquiciaResponse(BaseModel):
     """Esquema de respuesta para una franquicia"""
     id: int
@@ -80,6 +226,36 @@ class FranquiciaResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class PaginaResponse(BaseModel, Generic[T]):
+    """Esquema de respuesta para un listado paginado por cursor"""
+    items: List[T]
+    next_cursor: Optional[Union[int, str]] = Field(
+        None, description="Valor para el parámetro after de la siguiente página; null si no hay más"
+    )
+
+
+class ResultadoCreacionResponse(BaseModel):
+    """Esquema de respuesta para un elemento de un lote de productos"""
+    indice: int = Field(..., description="Posición del elemento en el lote")
+    nombre: str
+    creado: bool
+    producto: Optional[ProductoResponse] = None
+    error: Optional[str] = None
+
+
+class ProductoBulkResponse(BaseModel):
+    """Esquema de respuesta para la creación de productos en lote"""
+    creados: int
+    errores: int
+    resultados: List[ResultadoCreacionResponse]
+
+
+class StockBulkResponse(BaseModel):
+    """Esquema de respuesta para la actualización de stock en lote"""
+    actualizados: int
+    no_encontrados: List[int] = Field(..., description="IDs de productos que no existen")
+
+
 class ReporteStockResponse(BaseModel):
     """Esquema de respuesta para el reporte de stock"""
     producto_id: int
@@ -87,6 +263,74 @@ class ReporteStockResponse(BaseModel):
     cantidad_stock: int
     sucursal_id: int
     sucursal_nombre: str
+    posicion: int = Field(1, description="Posición del producto en su sucursal o en la franquicia")
+
+
+class EstadisticasStock(BaseModel):
+    """Indicadores de stock comunes a la franquicia y a cada sucursal"""
+    total_productos: int
+    total_unidades: int
+    stock_promedio: Optional[float] = Field(None, description="Stock medio por producto")
+    stock_minimo: Optional[int] = None
+    stock_maximo: Optional[int] = None
+    productos_sin_stock: int
+
+
+class EstadisticasSucursalResponse(EstadisticasStock):
+    """Esquema de respuesta para las estadísticas de una sucursal"""
+    sucursal_id: int
+    sucursal_nombre: str
+
+
+class EstadisticasFranquiciaResponse(EstadisticasStock):
+    """Esquema de respuesta para las estadísticas de inventario de una franquicia"""
+    franquicia_id: int
+    total_sucursales: int
+    percentiles: Dict[str, Optional[int]] = Field(
+        ..., description="Stock por producto en los percentiles p25, p50, p75 y p90"
+    )
+    sucursales: Optional[List[EstadisticasSucursalResponse]] = None
+
+
+class EliminacionResponse(BaseModel):
+    """Esquema de respuesta para el avance de una eliminación por lotes"""
+    id: str
+    franquicia_id: int
+    tamano_lote: int
+    estado: str = Field(..., description="pendiente, en_progreso, completada o error")
+    total_productos: int
+    productos_eliminados: int
+    sucursales_eliminadas: int
+    progreso: float = Field(..., description="Porcentaje de productos eliminados")
+    error: Optional[str] = None
+    fecha_creacion: datetime
+    fecha_fin: Optional[datetime] = None
+
+
+class ErrorImportacionResponse(BaseModel):
+    """Esquema de respuesta para una fila rechazada de una importación"""
+    linea: int = Field(..., description="Línea del archivo")
+    error: str
+
+
+class ImportacionResponse(BaseModel):
+    """Esquema de respuesta para el avance de una importación de inventario"""
+    id: str
+    formato: FormatoInventario
+    tamano_lote: int
+    estado: str = Field(..., description="pendiente, en_progreso, completada o error")
+    bytes_total: int
+    bytes_procesados: int
+    progreso: float = Field(..., description="Porcentaje del archivo procesado")
+    filas_procesadas: int
+    importados: int
+    errores: int
+    detalle_errores: List[ErrorImportacionResponse] = Field(
+        ..., description="Filas rechazadas (hasta import_max_errors)"
+    )
+    error: Optional[str] = None
+    fecha_creacion: datetime
+    fecha_fin: Optional[datetime] = None
 
 
 class ErrorResponse(BaseModel):
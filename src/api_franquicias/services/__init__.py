@@ -5,5 +5,15 @@ Servicios de lógica de negocio
 from .franquicia_service import FranquiciaService
 from .sucursal_service import SucursalService
 from .producto_service import ProductoService
+from .async_franquicia_service import AsyncFranquiciaService
+from .async_sucursal_service import AsyncSucursalService
+from .async_producto_service import AsyncProductoService
 
-__all__ = ["FranquiciaService", "SucursalService", "ProductoService"]
+__all__ = [
+    "FranquiciaService",
+    "SucursalService",
+    "ProductoService",
+    "AsyncFranquiciaService",
+    "AsyncSucursalService",
+    "AsyncProductoService",
+]
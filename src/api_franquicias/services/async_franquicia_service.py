@@ -0,0 +1,88 @@
+"""
+Servicio asíncrono de lógica de negocio para Franquicia.
+
+Este módulo expone FranquiciaService a los controladores async. Cada
+operación de negocio (validaciones y escrituras) se ejecuta completa en
+una sola llamada ``run_sync`` sobre la AsyncSession, por lo que el event
+loop queda libre mientras la base de datos responde. Con una Session
+síncrona las operaciones se ejecutan directamente.
+
+Autor: Darwin Hurtado
+Fecha: 2024
+"""
+
+from typing import List, Optional, Dict, Any
+from ..database import DbSession, get_sync_session, run_in_session
+from ..models.franquicia import Franquicia
+from ..repositories.pagination import Pagina
+from .franquicia_service import FranquiciaService
+
+
+class AsyncFranquiciaService:
+    """
+    Servicio asíncrono para lógica de negocio de Franquicia.
+
+    Attributes:
+        db (DbSession): Sesión de base de datos (AsyncSession o Session)
+    """
+
+    def __init__(self, db: DbSession):
+        """
+        Inicializa el servicio con una sesión de base de datos.
+
+        Args:
+            db (DbSession): Sesión asíncrona o síncrona activa
+        """
+        self.db = db
+        self._service = FranquiciaService(get_sync_session(db))
+
+    async def crear_franquicia(self, nombre: str) -> Franquicia:
+        """Crea una nueva franquicia con validaciones de negocio"""
+        return await run_in_session(self.db, self._service.crear_franquicia, nombre)
+
+    async def obtener_franquicia(self, franquicia_id: int, expand: str = "sucursales.productos") -> Optional[Franquicia]:
+        """Obtiene una franquicia por su identificador único"""
+        return await run_in_session(self.db, self._service.obtener_franquicia, franquicia_id, expand)
+
+    async def obtener_todas_franquicias(self) -> List[Franquicia]:
+        """Obtiene todas las franquicias del sistema"""
+        return await run_in_session(self.db, self._service.obtener_todas_franquicias)
+
+    async def listar_franquicias(self, limit: int, after: Optional[int] = None) -> Pagina:
+        """Obtiene una página de franquicias ordenadas por ID"""
+        return await run_in_session(self.db, self._service.listar_franquicias, limit, after)
+
+    async def actualizar_franquicia(self, franquicia_id: int, nombre: str) -> Optional[Franquicia]:
+        """Actualiza el nombre de una franquicia existente con validaciones"""
+        return await run_in_session(self.db, self._service.actualizar_franquicia, franquicia_id, nombre)
+
+    async def eliminar_franquicia(self, franquicia_id: int) -> bool:
+        """Elimina una franquicia del sistema"""
+        return await run_in_session(self.db, self._service.eliminar_franquicia, franquicia_id)
+
+    async def contar_productos(self, franquicia_id: int) -> int:
+        """Cuenta los productos de todas las sucursales de una franquicia"""
+        return await run_in_session(self.db, self._service.contar_productos, franquicia_id)
+
+    async def eliminar_lote_productos(self, franquicia_id: int, tamano_lote: int) -> int:
+        """Elimina un lote de productos de una franquicia en su propia transacción"""
+        return await run_in_session(self.db, self._service.eliminar_lote_productos, franquicia_id, tamano_lote)
+
+    async def eliminar_lote_sucursales(self, franquicia_id: int, tamano_lote: int) -> int:
+        """Elimina un lote de sucursales de una franquicia en su propia transacción"""
+        return await run_in_session(self.db, self._service.eliminar_lote_sucursales, franquicia_id, tamano_lote)
+
+    async def obtener_reporte_stock(self, franquicia_id: int, top: int = 1, alcance: str = "sucursal",
+                                    empates: str = "all") -> List[Dict[str, Any]]:
+        """Obtiene los productos con más stock de cada sucursal o de la franquicia"""
+        return await run_in_session(
+            self.db, self._service.obtener_reporte_stock, franquicia_id, top, alcance, empates
+        )
+
+    async def obtener_estadisticas(self, franquicia_id: int, por_sucursal: bool = False) -> Dict[str, Any]:
+        """Obtiene indicadores de inventario de una franquicia calculados en la BD"""
+        return await run_in_session(self.db, self._service.obtener_estadisticas, franquicia_id, por_sucursal)
+
+    async def franquicia_existe(self, franquicia_id: int) -> bool:
+        """Verifica si una franquicia existe en el sistema"""
+        return await run_in_session(self.db, self._service.franquicia_existe, franquicia_id)
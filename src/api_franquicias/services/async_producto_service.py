@@ -0,0 +1,125 @@
+"""
+Servicio asíncrono de lógica de negocio para Producto
+"""
+
+from typing import AsyncIterator, List, Optional, Sequence, Tuple, Union
+from sqlalchemy.engine import Row
+from ..database import DbSession, get_sync_session, iterate_in_session, run_in_session
+from ..models.producto import Producto
+from ..repositories.filtros import FiltroProductos
+from ..repositories.pagination import Pagina
+from .producto_service import ProductoService, ResultadoActualizacionStock, ResultadoCreacion
+
+
+class AsyncProductoService:
+    """Servicio asíncrono para lógica de negocio de Producto"""
+
+    def __init__(self, db: DbSession):
+        self.db = db
+        self._service = ProductoService(get_sync_session(db))
+
+    async def crear_producto(self, nombre: str, cantidad_stock: int, sucursal_id: int,
+                             verificar_similares: bool = False) -> Producto:
+        """Crea un nuevo producto en una sucursal"""
+        return await run_in_session(
+            self.db, self._service.crear_producto, nombre, cantidad_stock, sucursal_id, verificar_similares
+        )
+
+    async def crear_productos(self, sucursal_id: int,
+                              items: List[Tuple[str, int]]) -> List[ResultadoCreacion]:
+        """Crea un lote de productos en una sucursal"""
+        return await run_in_session(self.db, self._service.crear_productos, sucursal_id, items)
+
+    async def importar_productos(self, filas: List[Tuple[int, str, int]]) -> List[Optional[str]]:
+        """Crea o actualiza el stock de un lote de productos de varias sucursales"""
+        return await run_in_session(self.db, self._service.importar_productos, filas)
+
+    async def obtener_producto(self, producto_id: int) -> Optional[Producto]:
+        """Obtiene un producto por ID"""
+        return await run_in_session(self.db, self._service.obtener_producto, producto_id)
+
+    async def obtener_productos_por_sucursal(self, sucursal_id: int) -> List[Producto]:
+        """Obtiene todos los productos de una sucursal"""
+        return await run_in_session(self.db, self._service.obtener_productos_por_sucursal, sucursal_id)
+
+    async def listar_productos_por_sucursal(self, sucursal_id: int, limit: int,
+                                            after: Optional[Union[int, str]] = None,
+                                            filtro: Optional[FiltroProductos] = None) -> Pagina:
+        """Obtiene una página de los productos de una sucursal"""
+        return await run_in_session(
+            self.db, self._service.listar_productos_por_sucursal, sucursal_id, limit, after, filtro
+        )
+
+    async def obtener_todos_productos(self) -> List[Producto]:
+        """Obtiene todos los productos"""
+        return await run_in_session(self.db, self._service.obtener_todos_productos)
+
+    async def listar_productos(self, limit: int, after: Optional[Union[int, str]] = None,
+                               filtro: Optional[FiltroProductos] = None) -> Pagina:
+        """Obtiene una página de productos, ordenados por ID o por la columna del filtro"""
+        return await run_in_session(self.db, self._service.listar_productos, limit, after, filtro)
+
+    async def buscar_productos(self, texto: str, limit: int, after: Optional[int] = None,
+                               franquicia_id: Optional[int] = None,
+                               sucursal_id: Optional[int] = None) -> Pagina:
+        """Busca productos por nombre, ordenados por relevancia"""
+        return await run_in_session(
+            self.db, self._service.buscar_productos, texto, limit, after, franquicia_id, sucursal_id
+        )
+
+    async def buscar_similares(self, franquicia_id: int, nombre: str, limit: int,
+                               umbral: Optional[float] = None,
+                               sucursal_id: Optional[int] = None) -> List[Tuple[Producto, float]]:
+        """Busca productos de una franquicia con nombre parecido, del más al menos similar"""
+        return await run_in_session(
+            self.db, self._service.buscar_similares, franquicia_id, nombre, limit, umbral, sucursal_id
+        )
+
+    def exportar_productos(self, tamano_lote: int,
+                           franquicia_id: Optional[int] = None) -> AsyncIterator[Sequence[Row]]:
+        """Recorre por lotes todos los productos ordenados por ID"""
+        return iterate_in_session(self.db, self._service.exportar_productos(tamano_lote, franquicia_id))
+
+    def exportar_inventario(self, tamano_lote: int,
+                            franquicia_id: Optional[int] = None) -> AsyncIterator[Sequence[Row]]:
+        """Recorre por lotes los productos con su sucursal y franquicia"""
+        return iterate_in_session(self.db, self._service.exportar_inventario(tamano_lote, franquicia_id))
+
+    async def actualizar_producto(self, producto_id: int, nombre: str) -> Optional[Producto]:
+        """Actualiza el nombre de un producto"""
+        return await run_in_session(self.db, self._service.actualizar_producto, producto_id, nombre)
+
+    async def actualizar_stock(self, producto_id: int, cantidad_stock: int) -> Optional[Producto]:
+        """Actualiza el stock de un producto"""
+        return await run_in_session(self.db, self._service.actualizar_stock, producto_id, cantidad_stock)
+
+    async def actualizar_stock_minimo(self, producto_id: int, stock_minimo: Optional[int]) -> Optional[Producto]:
+        """Fija (o quita, con None) el umbral de reposición de un producto"""
+        return await run_in_session(self.db, self._service.actualizar_stock_minimo, producto_id, stock_minimo)
+
+    async def listar_bajo_stock(self, franquicia_id: int,
+                                umbral: Optional[int] = None) -> List[Tuple[Producto, int]]:
+        """Obtiene los productos de una franquicia que necesitan reposición y su umbral"""
+        return await run_in_session(self.db, self._service.listar_bajo_stock, franquicia_id, umbral)
+
+    async def ajustar_stock(self, producto_id: int, delta: int) -> Optional[Producto]:
+        """Incrementa o descuenta el stock de un producto de forma atómica"""
+        return await run_in_session(self.db, self._service.ajustar_stock, producto_id, delta)
+
+    async def actualizar_stocks(self, stocks: List[Tuple[int, int]]) -> ResultadoActualizacionStock:
+        """Actualiza el stock de un lote de productos"""
+        return await run_in_session(self.db, self._service.actualizar_stocks, stocks)
+
+    async def eliminar_producto(self, producto_id: int) -> bool:
+        """Elimina un producto"""
+        return await run_in_session(self.db, self._service.eliminar_producto, producto_id)
+
+    async def producto_existe(self, producto_id: int) -> bool:
+        """Verifica si un producto existe"""
+        return await run_in_session(self.db, self._service.producto_existe, producto_id)
+
+    async def producto_pertenece_a_sucursal(self, producto_id: int, sucursal_id: int) -> bool:
+        """Verifica si un producto pertenece a una sucursal específica"""
+        return await run_in_session(
+            self.db, self._service.producto_pertenece_a_sucursal, producto_id, sucursal_id
+        )
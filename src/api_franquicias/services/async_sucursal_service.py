@@ -0,0 +1,62 @@
+"""
+Servicio asíncrono de lógica de negocio para Sucursal
+"""
+
+from typing import List, Optional
+from ..database import DbSession, get_sync_session, run_in_session
+from ..models.sucursal import Sucursal
+from ..repositories.pagination import Pagina
+from .sucursal_service import SucursalService
+
+
+class AsyncSucursalService:
+    """Servicio asíncrono para lógica de negocio de Sucursal"""
+
+    def __init__(self, db: DbSession):
+        self.db = db
+        self._service = SucursalService(get_sync_session(db))
+
+    async def crear_sucursal(self, nombre: str, franquicia_id: int) -> Sucursal:
+        """Crea una nueva sucursal en una franquicia"""
+        return await run_in_session(self.db, self._service.crear_sucursal, nombre, franquicia_id)
+
+    async def obtener_sucursal(self, sucursal_id: int, expand: str = "productos") -> Optional[Sucursal]:
+        """Obtiene una sucursal por ID"""
+        return await run_in_session(self.db, self._service.obtener_sucursal, sucursal_id, expand)
+
+    async def obtener_sucursales_por_franquicia(self, franquicia_id: int) -> List[Sucursal]:
+        """Obtiene todas las sucursales de una franquicia"""
+        return await run_in_session(self.db, self._service.obtener_sucursales_por_franquicia, franquicia_id)
+
+    async def listar_sucursales_por_franquicia(self, franquicia_id: int, limit: int,
+                                               after: Optional[int] = None) -> Pagina:
+        """Obtiene una página de las sucursales de una franquicia"""
+        return await run_in_session(
+            self.db, self._service.listar_sucursales_por_franquicia, franquicia_id, limit, after
+        )
+
+    async def obtener_todas_sucursales(self) -> List[Sucursal]:
+        """Obtiene todas las sucursales"""
+        return await run_in_session(self.db, self._service.obtener_todas_sucursales)
+
+    async def listar_sucursales(self, limit: int, after: Optional[int] = None) -> Pagina:
+        """Obtiene una página de sucursales ordenadas por ID"""
+        return await run_in_session(self.db, self._service.listar_sucursales, limit, after)
+
+    async def actualizar_sucursal(self, sucursal_id: int, nombre: str) -> Optional[Sucursal]:
+        """Actualiza el nombre de una sucursal"""
+        return await run_in_session(self.db, self._service.actualizar_sucursal, sucursal_id, nombre)
+
+    async def eliminar_sucursal(self, sucursal_id: int) -> bool:
+        """Elimina una sucursal"""
+        return await run_in_session(self.db, self._service.eliminar_sucursal, sucursal_id)
+
+    async def sucursal_existe(self, sucursal_id: int) -> bool:
+        """Verifica si una sucursal existe"""
+        return await run_in_session(self.db, self._service.sucursal_existe, sucursal_id)
+
+    async def sucursal_pertenece_a_franquicia(self, sucursal_id: int, franquicia_id: int) -> bool:
+        """Verifica si una sucursal pertenece a una franquicia específica"""
+        return await run_in_session(
+            self.db, self._service.sucursal_pertenece_a_franquicia, sucursal_id, franquicia_id
+        )
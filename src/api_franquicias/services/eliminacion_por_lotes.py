@@ -0,0 +1,160 @@
+"""
+Eliminación por lotes de franquicias grandes.
+
+Eliminar una franquicia con cientos de miles de productos en un único DELETE
+mantiene una transacción larga que bloquea las escrituras del resto de la
+aplicación. Este módulo la elimina en segundo plano: primero los productos y
+después las sucursales en lotes de tamaño fijo, cada uno confirmado en su
+propia transacción, y por último la franquicia. El avance de cada tarea se
+consulta en un registro en memoria del proceso.
+
+Autor: Darwin Hurtado
+Fecha: 2024
+"""
+
+import asyncio
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, TypeVar
+from ..database import DbSession, close_session
+from .async_franquicia_service import AsyncFranquiciaService
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class TareaEliminacion:
+    """
+    Estado de la eliminación por lotes de una franquicia.
+
+    Attributes:
+        id (str): Identificador de la tarea
+        franquicia_id (int): ID de la franquicia a eliminar
+        tamano_lote (int): Número máximo de filas eliminadas por transacción
+        estado (str): pendiente, en_progreso, completada o error
+        total_productos (int): Productos de la franquicia al crear la tarea
+        productos_eliminados (int): Productos eliminados hasta el momento
+        sucursales_eliminadas (int): Sucursales eliminadas hasta el momento
+        error (Optional[str]): Mensaje de error si la tarea falló
+    """
+
+    PENDIENTE = "pendiente"
+    EN_PROGRESO = "en_progreso"
+    COMPLETADA = "completada"
+    ERROR = "error"
+
+    def __init__(self, franquicia_id: int, tamano_lote: int, total_productos: int):
+        self.id = uuid.uuid4().hex
+        self.franquicia_id = franquicia_id
+        self.tamano_lote = tamano_lote
+        self.estado = self.PENDIENTE
+        self.total_productos = total_productos
+        self.productos_eliminados = 0
+        self.sucursales_eliminadas = 0
+        self.error: Optional[str] = None
+        self.fecha_creacion = datetime.now()
+        self.fecha_fin: Optional[datetime] = None
+
+    @property
+    def progreso(self) -> float:
+        """Porcentaje de productos eliminados"""
+        if self.estado == self.COMPLETADA:
+            return 100.0
+        if self.total_productos == 0:
+            return 0.0
+        return round(min(self.productos_eliminados / self.total_productos, 1.0) * 100, 2)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Representación serializable de la tarea"""
+        return {
+            "id": self.id,
+            "franquicia_id": self.franquicia_id,
+            "tamano_lote": self.tamano_lote,
+            "estado": self.estado,
+            "total_productos": self.total_productos,
+            "productos_eliminados": self.productos_eliminados,
+            "sucursales_eliminadas": self.sucursales_eliminadas,
+            "progreso": self.progreso,
+            "error": self.error,
+            "fecha_creacion": self.fecha_creacion,
+            "fecha_fin": self.fecha_fin,
+        }
+
+
+class RegistroTareas:
+    """
+    Registro en memoria de las tareas en segundo plano.
+
+    Conserva las ``max_tareas`` más recientes; las más antiguas se descartan
+    para que el registro no crezca sin límite. Además de las eliminaciones,
+    registra cualquier tarea con un atributo ``id`` (ver ``registrar``).
+    """
+
+    def __init__(self, max_tareas: int = 100):
+        self._lock = threading.Lock()
+        self._tareas: "OrderedDict[str, Any]" = OrderedDict()
+        self.max_tareas = max_tareas
+
+    def registrar(self, tarea: T) -> T:
+        """Registra una tarea ya creada"""
+        with self._lock:
+            self._tareas[tarea.id] = tarea
+            while len(self._tareas) > self.max_tareas:
+                self._tareas.popitem(last=False)
+        return tarea
+
+    def crear(self, franquicia_id: int, tamano_lote: int, total_productos: int) -> TareaEliminacion:
+        """Registra una nueva tarea de eliminación pendiente"""
+        return self.registrar(TareaEliminacion(franquicia_id, tamano_lote, total_productos))
+
+    def obtener(self, tarea_id: str) -> Optional[Any]:
+        """Obtiene una tarea por su identificador"""
+        with self._lock:
+            return self._tareas.get(tarea_id)
+
+
+registro_tareas = RegistroTareas()
+
+
+async def ejecutar_eliminacion(tarea: TareaEliminacion, db: DbSession) -> None:
+    """
+    Elimina una franquicia por lotes actualizando el estado de ``tarea``.
+
+    Cada lote se confirma por separado y entre lotes se cede el event loop,
+    de modo que otras peticiones avanzan mientras dura la eliminación. La
+    sesión es propia de la tarea y se cierra al terminar.
+
+    Args:
+        tarea (TareaEliminacion): Tarea a ejecutar
+        db (DbSession): Sesión exclusiva de la tarea
+    """
+    service = AsyncFranquiciaService(db)
+    tarea.estado = TareaEliminacion.EN_PROGRESO
+    try:
+        while True:
+            eliminados = await service.eliminar_lote_productos(tarea.franquicia_id, tarea.tamano_lote)
+            if not eliminados:
+                break
+            tarea.productos_eliminados += eliminados
+            await asyncio.sleep(0)
+
+        while True:
+            eliminadas = await service.eliminar_lote_sucursales(tarea.franquicia_id, tarea.tamano_lote)
+            if not eliminadas:
+                break
+            tarea.sucursales_eliminadas += eliminadas
+            await asyncio.sleep(0)
+
+        await service.eliminar_franquicia(tarea.franquicia_id)
+        tarea.estado = TareaEliminacion.COMPLETADA
+    except Exception as e:
+        logger.exception("Error eliminando la franquicia %s por lotes", tarea.franquicia_id)
+        tarea.estado = TareaEliminacion.ERROR
+        tarea.error = str(e)
+    finally:
+        tarea.fecha_fin = datetime.now()
+        await close_session(db)
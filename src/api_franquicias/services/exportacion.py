@@ -0,0 +1,98 @@
+"""
+Exportación de inventario a CSV o NDJSON en flujo.
+
+Los productos se leen con un cursor del lado del servidor (``yield_per``) y
+cada lote se serializa y se envía antes de leer el siguiente, de modo que la
+memoria usada no depende del tamaño de la tabla. La exportación es una única
+consulta, por lo que refleja un snapshot consistente de la base de datos.
+
+El CSV usa las mismas columnas que la importación (``sucursal_id``,
+``nombre``, ``cantidad_stock``), más el ID y las fechas, y puede volver a
+importarse.
+
+Autor: Darwin Hurtado
+Fecha: 2024
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Optional, Sequence
+from sqlalchemy.engine import Row
+from ..database import DbSession, close_session
+from ..repositories.producto_repository import ProductoRepository
+from ..schemas import FormatoInventario
+from .async_producto_service import AsyncProductoService
+
+# Nombres de las columnas exportadas, en orden
+COLUMNAS_EXPORTACION = tuple(columna.key for columna in ProductoRepository.COLUMNAS_EXPORTACION)
+
+# Tipo de contenido de la respuesta según el formato
+TIPOS_CONTENIDO = {
+    FormatoInventario.CSV: "text/csv",
+    FormatoInventario.NDJSON: "application/x-ndjson",
+}
+
+
+def _valor(valor: Any) -> Any:
+    """Valor serializable de una columna (fechas en ISO 8601)"""
+    return valor.isoformat() if isinstance(valor, datetime) else valor
+
+
+def serializar_lote(filas: Sequence[Row], formato: FormatoInventario) -> bytes:
+    """
+    Serializa un lote de filas exportadas.
+
+    Args:
+        filas (Sequence[Row]): Filas con las columnas de ``COLUMNAS_EXPORTACION``
+        formato (FormatoInventario): csv o ndjson
+
+    Returns:
+        bytes: Las filas en UTF-8, una por línea
+    """
+    if formato == FormatoInventario.NDJSON:
+        return "".join(
+            json.dumps(dict(zip(COLUMNAS_EXPORTACION, map(_valor, fila))), ensure_ascii=False) + "\n"
+            for fila in filas
+        ).encode("utf-8")
+    salida = io.StringIO()
+    csv.writer(salida).writerows([_valor(valor) for valor in fila] for fila in filas)
+    return salida.getvalue().encode("utf-8")
+
+
+def encabezado(formato: FormatoInventario) -> bytes:
+    """Encabezado del archivo exportado (vacío en NDJSON)"""
+    if formato == FormatoInventario.NDJSON:
+        return b""
+    salida = io.StringIO()
+    csv.writer(salida).writerow(COLUMNAS_EXPORTACION)
+    return salida.getvalue().encode("utf-8")
+
+
+async def exportar_productos(db: DbSession, formato: FormatoInventario, tamano_lote: int,
+                             franquicia_id: Optional[int] = None) -> AsyncIterator[bytes]:
+    """
+    Genera el archivo de exportación por partes.
+
+    Recibe una sesión propia (no la de la petición, que puede cerrarse antes
+    de terminar la respuesta) y la cierra al terminar o si el cliente
+    abandona la descarga.
+
+    Args:
+        db: Sesión de base de datos de la exportación
+        formato (FormatoInventario): csv o ndjson
+        tamano_lote (int): Filas leídas del cursor y enviadas en cada parte
+        franquicia_id (Optional[int]): Restringe la exportación a una franquicia
+
+    Yields:
+        bytes: El encabezado y luego un lote de filas serializadas por parte
+    """
+    try:
+        parte = encabezado(formato)
+        if parte:
+            yield parte
+        async for filas in AsyncProductoService(db).exportar_productos(tamano_lote, franquicia_id):
+            yield serializar_lote(filas, formato)
+    finally:
+        await close_session(db)
@@ -0,0 +1,138 @@
+"""
+Exportación del inventario en formatos columnares (Arrow IPC y Parquet).
+
+Exporta cada producto unido a su sucursal y su franquicia. Las filas se leen
+con un cursor del lado del servidor, como en la exportación CSV/NDJSON, y
+cada lote se convierte en un ``RecordBatch`` de Arrow que se escribe y se
+envía antes de leer el siguiente:
+
+- ``arrow``: formato de flujo de Arrow IPC, un mensaje por lote
+- ``parquet``: un grupo de filas (row group) por lote y el pie al final
+
+Requiere ``pyarrow`` (dependencia opcional: ``pip install api-franquicias[arrow]``).
+
+Autor: Darwin Hurtado
+Fecha: 2024
+"""
+
+from typing import Any, AsyncIterator, List, Optional, Sequence
+from sqlalchemy.engine import Row
+from ..database import DbSession, close_session
+from ..schemas import FormatoColumnar
+from .async_producto_service import AsyncProductoService
+
+# Tipo de contenido y extensión de archivo según el formato
+TIPOS_CONTENIDO = {
+    FormatoColumnar.ARROW: "application/vnd.apache.arrow.stream",
+    FormatoColumnar.PARQUET: "application/vnd.apache.parquet",
+}
+EXTENSIONES = {
+    FormatoColumnar.ARROW: "arrow",
+    FormatoColumnar.PARQUET: "parquet",
+}
+
+
+def requerir_pyarrow() -> Any:
+    """
+    Importa pyarrow, para comprobarlo antes de empezar a responder.
+
+    Raises:
+        RuntimeError: Si pyarrow no está instalado
+    """
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError(
+            "La exportación Arrow/Parquet requiere pyarrow (pip install pyarrow)"
+        ) from e
+    return pyarrow
+
+
+def esquema_inventario() -> Any:
+    """Esquema Arrow del inventario exportado (columnas de ``COLUMNAS_INVENTARIO``)"""
+    pa = requerir_pyarrow()
+    return pa.schema([
+        pa.field("producto_id", pa.int64(), nullable=False),
+        pa.field("producto_nombre", pa.string(), nullable=False),
+        pa.field("cantidad_stock", pa.int64(), nullable=False),
+        pa.field("sucursal_id", pa.int64(), nullable=False),
+        pa.field("sucursal_nombre", pa.string(), nullable=False),
+        pa.field("franquicia_id", pa.int64(), nullable=False),
+        pa.field("franquicia_nombre", pa.string(), nullable=False),
+        pa.field("fecha_creacion", pa.timestamp("us", tz="UTC")),
+        pa.field("fecha_actualizacion", pa.timestamp("us", tz="UTC")),
+    ])
+
+
+def lote_arrow(filas: Sequence[Row], esquema: Any) -> Any:
+    """Convierte un lote de filas del cursor en un ``RecordBatch`` columnar"""
+    pa = requerir_pyarrow()
+    return pa.RecordBatch.from_arrays(
+        [pa.array(valores, type=campo.type) for valores, campo in zip(zip(*filas), esquema)],
+        schema=esquema,
+    )
+
+
+class _Salida:
+    """Destino de escritura de pyarrow cuyo contenido se vacía en cada parte"""
+
+    def __init__(self):
+        self._partes: List[bytes] = []
+        self.closed = False
+
+    def write(self, datos: Any) -> int:
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def vaciar(self) -> bytes:
+        """Bytes escritos desde la última llamada"""
+        datos, self._partes = b"".join(self._partes), []
+        return datos
+
+
+async def exportar_inventario(db: DbSession, formato: FormatoColumnar, tamano_lote: int,
+                              franquicia_id: Optional[int] = None) -> AsyncIterator[bytes]:
+    """
+    Genera el archivo Arrow IPC o Parquet del inventario por partes.
+
+    Como ``exportar_productos``, recibe una sesión propia y la cierra al
+    terminar o si el cliente abandona la descarga. La memoria usada es la de
+    un lote.
+
+    Args:
+        db: Sesión de base de datos de la exportación
+        formato (FormatoColumnar): arrow o parquet
+        tamano_lote (int): Filas por lote (mensaje Arrow o row group Parquet)
+        franquicia_id (Optional[int]): Restringe el inventario a una franquicia
+
+    Yields:
+        bytes: Las partes del archivo, una por lote más el pie
+
+    Raises:
+        RuntimeError: Si pyarrow no está instalado
+    """
+    try:
+        pa = requerir_pyarrow()
+        esquema = esquema_inventario()
+        salida = _Salida()
+        destino = pa.PythonFile(salida, mode="w")
+        if formato == FormatoColumnar.PARQUET:
+            escritor = pa.parquet.ParquetWriter(destino, esquema)
+        else:
+            escritor = pa.ipc.new_stream(destino, esquema)
+
+        async for filas in AsyncProductoService(db).exportar_inventario(tamano_lote, franquicia_id):
+            escritor.write_batch(lote_arrow(filas, esquema))
+            yield salida.vaciar()
+        escritor.close()
+        yield salida.vaciar()
+    finally:
+        await close_session(db)
@@ -14,7 +14,11 @@ from sqlalchemy.orm import Session
 from ..repositories.franquicia_repository import FranquiciaRepository
 from ..repositories.sucursal_repository import SucursalRepository
 from ..repositories.producto_repository import ProductoRepository
+from ..repositories.pagination import Pagina
+from ..repositories.dialect import RESTRICCION_UNICA
+from ..unit_of_work import transaccional
 from ..models.franquicia import Franquicia
+from .restricciones import restricciones_como_errores
 
 
 class FranquiciaService:
@@ -44,6 +48,7 @@ class FranquiciaService:
         self.sucursal_repo = SucursalRepository(db)
         self.producto_repo = ProductoRepository(db)
 
+    @transaccional
     def crear_franquicia(self, nombre: str) -> Franquicia:
         """
         Crea una nueva franquicia con validaciones de negocio.
@@ -66,24 +71,25 @@ class FranquiciaService:
         if not nombre or not nombre.strip():
             raise ValueError("El nombre de la franquicia no puede estar vacío")
         
-        # Validar que no exista una franquicia con el mismo nombre
-        franquicia_existente = self.franquicia_repo.get_by_name(nombre.strip())
-        if franquicia_existente:
+        # Un único INSERT: ON CONFLICT resuelve los nombres duplicados
+        franquicia = self.franquicia_repo.create(nombre.strip())
+        if franquicia is None:
             raise ValueError(f"Ya existe una franquicia con el nombre '{nombre}'")
-        
-        return self.franquicia_repo.create(nombre.strip())
+        return franquicia
 
-    def obtener_franquicia(self, franquicia_id: int) -> Optional[Franquicia]:
+    def obtener_franquicia(self, franquicia_id: int, expand: str = "sucursales.productos") -> Optional[Franquicia]:
         """
         Obtiene una franquicia por su identificador único.
         
         Args:
             franquicia_id (int): ID único de la franquicia
+            expand (str): Relaciones a cargar: "none", "sucursales" o
+                "sucursales.productos" (árbol completo, por defecto)
             
         Returns:
             Optional[Franquicia]: La franquicia encontrada o None si no existe
         """
-        return self.franquicia_repo.get_by_id(franquicia_id)
+        return self.franquicia_repo.get_by_id(franquicia_id, expand)
 
     def obtener_todas_franquicias(self) -> List[Franquicia]:
         """
@@ -94,6 +100,20 @@ class FranquiciaService:
         """
         return self.franquicia_repo.get_all()
 
+    def listar_franquicias(self, limit: int, after: Optional[int] = None) -> Pagina:
+        """
+        Obtiene una página de franquicias ordenadas por ID.
+        
+        Args:
+            limit (int): Número máximo de franquicias de la página
+            after (Optional[int]): Cursor recibido en ``next_cursor`` de la página anterior
+            
+        Returns:
+            Pagina: Franquicias de la página y cursor de la siguiente
+        """
+        return self.franquicia_repo.get_page(limit, after)
+
+    @transaccional
     def actualizar_franquicia(self, franquicia_id: int, nombre: str) -> Optional[Franquicia]:
         """
         Actualiza el nombre de una franquicia existente con validaciones.
@@ -113,22 +133,21 @@ class FranquiciaService:
         Raises:
             ValueError: Si el nombre está vacío o ya existe otra franquicia con ese nombre
         """
-        # Validar que la franquicia exista
-        franquicia = self.franquicia_repo.get_by_id(franquicia_id)
-        if not franquicia:
-            return None
-        
         # Validar que el nombre no esté vacío
         if not nombre or not nombre.strip():
+            if not self.franquicia_repo.exists(franquicia_id):
+                return None
             raise ValueError("El nombre de la franquicia no puede estar vacío")
         
-        # Validar que no exista otra franquicia con el mismo nombre
-        franquicia_existente = self.franquicia_repo.get_by_name(nombre.strip())
-        if franquicia_existente and franquicia_existente.id != franquicia_id:
-            raise ValueError(f"Ya existe una franquicia con el nombre '{nombre}'")
-        
-        return self.franquicia_repo.update(franquicia_id, nombre.strip())
+        # La restricción única valida que no exista otra franquicia con el
+        # mismo nombre (con sharding, también en los demás shards)
+        duplicado = f"Ya existe una franquicia con el nombre '{nombre}'"
+        if self.franquicia_repo.nombre_en_otro_shard(nombre.strip(), franquicia_id):
+            raise ValueError(duplicado)
+        with restricciones_como_errores({RESTRICCION_UNICA: duplicado}):
+            return self.franquicia_repo.update(franquicia_id, nombre.strip())
 
+    @transaccional
     def eliminar_franquicia(self, franquicia_id: int) -> bool:
         """
         Elimina una franquicia del sistema.
@@ -142,21 +161,65 @@ class FranquiciaService:
         Returns:
             bool: True si la franquicia fue eliminada, False si no existe
         """
-        # Validar que la franquicia exista
-        if not self.franquicia_repo.exists(franquicia_id):
-            return False
-        
         return self.franquicia_repo.delete(franquicia_id)
 
-    def obtener_reporte_stock(self, franquicia_id: int) -> List[Dict[str, Any]]:
+    def contar_productos(self, franquicia_id: int) -> int:
+        """
+        Cuenta los productos de todas las sucursales de una franquicia.
+        
+        Args:
+            franquicia_id (int): ID de la franquicia
+            
+        Returns:
+            int: Número de productos de la franquicia
+        """
+        return self.producto_repo.count_by_franquicia(franquicia_id)
+
+    @transaccional
+    def eliminar_lote_productos(self, franquicia_id: int, tamano_lote: int) -> int:
+        """
+        Elimina un lote de productos de una franquicia en su propia transacción.
+        
+        Args:
+            franquicia_id (int): ID de la franquicia
+            tamano_lote (int): Número máximo de productos a eliminar
+            
+        Returns:
+            int: Número de productos eliminados (0 cuando no quedan)
+        """
+        return self.producto_repo.delete_batch_by_franquicia(franquicia_id, tamano_lote)
+
+    @transaccional
+    def eliminar_lote_sucursales(self, franquicia_id: int, tamano_lote: int) -> int:
         """
-        Obtiene el producto con más stock de cada sucursal de una franquicia.
+        Elimina un lote de sucursales de una franquicia en su propia transacción.
+        
+        Args:
+            franquicia_id (int): ID de la franquicia
+            tamano_lote (int): Número máximo de sucursales a eliminar
+            
+        Returns:
+            int: Número de sucursales eliminadas (0 cuando no quedan)
+        """
+        return self.sucursal_repo.delete_batch_by_franquicia(franquicia_id, tamano_lote)
+
+    def obtener_reporte_stock(self, franquicia_id: int, top: int = 1, alcance: str = "sucursal",
+                              empates: str = "all") -> List[Dict[str, Any]]:
+        """
+        Obtiene los productos con más stock de una franquicia.
         
         Este método genera un reporte de análisis de inventario que muestra
-        el producto con mayor stock en cada sucursal de la franquicia especificada.
+        los ``top`` productos con mayor stock de cada sucursal o de toda la
+        franquicia especificada. Por defecto, el producto con mayor stock de
+        cada sucursal (incluidos los empates), que se lee del stock máximo
+        materializado; el resto de combinaciones usa funciones de ventana.
         
         Args:
             franquicia_id (int): ID de la franquicia para el reporte
+            top (int): Número de productos por sucursal o de la franquicia
+            alcance (str): ``sucursal`` (un top por sucursal) o ``franquicia``
+            empates (str): ``all`` incluye los empatados en el límite,
+                ``first`` retorna exactamente ``top`` productos por grupo
             
         Returns:
             List[Dict[str, Any]]: Lista de diccionarios con información detallada:
@@ -165,16 +228,60 @@ class FranquiciaService:
                 - cantidad_stock: Cantidad en stock
                 - sucursal_id: ID de la sucursal
                 - sucursal_nombre: Nombre de la sucursal
+                - posicion: Posición en la sucursal o en la franquicia
                 
         Raises:
             ValueError: Si la franquicia no existe
         """
         # Validar que la franquicia exista
-        franquicia = self.franquicia_repo.get_by_id(franquicia_id)
-        if not franquicia:
+        if not self.franquicia_repo.exists(franquicia_id):
             raise ValueError(f"Franquicia con ID {franquicia_id} no encontrada")
         
-        return self.producto_repo.get_max_stock_by_sucursal(franquicia_id)
+        por_sucursal = alcance == "sucursal"
+        con_empates = empates == "all"
+        if top == 1 and por_sucursal and con_empates:
+            return self.producto_repo.get_max_stock_by_sucursal(franquicia_id)
+        return self.producto_repo.get_top_stock(franquicia_id, top, por_sucursal, con_empates)
+
+    # Percentiles del stock por producto incluidos en las estadísticas
+    PERCENTILES_STOCK = (25, 50, 75, 90)
+
+    def obtener_estadisticas(self, franquicia_id: int, por_sucursal: bool = False) -> Dict[str, Any]:
+        """
+        Obtiene indicadores de inventario de una franquicia.
+        
+        Todos los valores se calculan en la base de datos con agregados, sin
+        cargar las sucursales ni los productos.
+        
+        Args:
+            franquicia_id (int): ID de la franquicia
+            por_sucursal (bool): Si se incluye el desglose por sucursal
+            
+        Returns:
+            Dict[str, Any]: Diccionario con:
+                - franquicia_id, total_sucursales, total_productos, total_unidades
+                - stock_promedio, stock_minimo, stock_maximo (por producto)
+                - productos_sin_stock: Productos con stock 0
+                - percentiles: Stock de los percentiles p25, p50, p75 y p90
+                - sucursales: Desglose por sucursal, o None si no se pidió
+                
+        Raises:
+            ValueError: Si la franquicia no existe
+        """
+        if not self.franquicia_repo.exists(franquicia_id):
+            raise ValueError(f"Franquicia con ID {franquicia_id} no encontrada")
+
+        estadisticas = self.producto_repo.get_stock_statistics(franquicia_id)[0]
+        percentiles = self.producto_repo.get_stock_percentiles(franquicia_id, self.PERCENTILES_STOCK)
+        estadisticas.update(
+            franquicia_id=franquicia_id,
+            percentiles={f"p{p}": valor for p, valor in percentiles.items()},
+            sucursales=(
+                self.producto_repo.get_stock_statistics(franquicia_id, por_sucursal=True)
+                if por_sucursal else None
+            )
+        )
+        return estadisticas
 
     def franquicia_existe(self, franquicia_id: int) -> bool:
         """
@@ -0,0 +1,329 @@
+"""
+Importación de inventario desde archivos CSV o NDJSON.
+
+Los inventarios de sistemas anteriores llegan como archivos de cientos de
+miles de filas. El archivo se lee línea a línea, sin cargarlo en memoria:
+cada lote de filas se valida con las reglas de ``ProductoCreate`` y se
+escribe en su propia transacción con un INSERT multi-fila por sucursal
+(``ON CONFLICT DO UPDATE``), de modo que los productos existentes toman el
+stock del archivo. Las filas rechazadas se reportan con su número de línea y
+el avance se consulta en la tarea, como en la eliminación por lotes.
+
+Formatos:
+
+- CSV con encabezado y las columnas ``sucursal_id``, ``nombre`` y ``cantidad_stock``
+- NDJSON: un objeto JSON por línea con las mismas claves
+
+``sucursal_id`` puede omitirse en las filas si se indica una sucursal por defecto.
+
+Autor: Darwin Hurtado
+Fecha: 2024
+"""
+
+import asyncio
+import codecs
+import csv
+import json
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+from pydantic import ValidationError
+from ..config import settings
+from ..database import DbSession, close_session
+from ..schemas import FormatoInventario, ProductoImportacion
+from .async_producto_service import AsyncProductoService
+from .eliminacion_por_lotes import RegistroTareas
+
+logger = logging.getLogger(__name__)
+
+# Columnas obligatorias del encabezado CSV (sucursal_id, salvo sucursal por defecto)
+COLUMNAS_INVENTARIO = ("sucursal_id", "nombre", "cantidad_stock")
+
+
+class FilaInventario(NamedTuple):
+    """Fila válida de un archivo de inventario"""
+    linea: int
+    sucursal_id: int
+    nombre: str
+    cantidad_stock: int
+
+
+class LoteInventario(NamedTuple):
+    """Lote de filas leídas de un archivo de inventario"""
+    filas: List[FilaInventario]
+    errores: List[Tuple[int, str]]
+    bytes_leidos: int
+
+
+class LectorLineas:
+    """
+    Itera las líneas de un archivo binario decodificadas como UTF-8.
+
+    Lleva la cuenta de los bytes leídos para calcular el avance. Las líneas
+    conservan su salto de línea, como espera el módulo ``csv``.
+    """
+
+    def __init__(self, archivo: BinaryIO):
+        self.archivo = archivo
+        self.bytes_leidos = 0
+        # utf-8-sig descarta el BOM que agregan algunas hojas de cálculo
+        self._decodificador = codecs.getincrementaldecoder("utf-8-sig")()
+
+    def __iter__(self) -> Iterator[str]:
+        for linea in self.archivo:
+            self.bytes_leidos += len(linea)
+            yield self._decodificador.decode(linea)
+
+
+def _mensaje_validacion(error: ValidationError) -> str:
+    """Mensaje legible de los errores de validación de una fila"""
+    return "; ".join(
+        f"{'.'.join(str(parte) for parte in detalle['loc'])}: {detalle['msg']}"
+        for detalle in error.errors()
+    )
+
+
+def _registros(lector: LectorLineas, formato: FormatoInventario,
+               sucursal_id: Optional[int]) -> Iterator[Tuple[int, Union[Dict[str, Any], str]]]:
+    """
+    Registros del archivo con su número de línea.
+
+    Cada registro es un diccionario o, si la línea no se pudo interpretar,
+    el mensaje de error.
+
+    Raises:
+        ValueError: Si al encabezado CSV le faltan columnas obligatorias
+    """
+    if formato == FormatoInventario.CSV:
+        reader = csv.DictReader(lector)
+        if reader.fieldnames is None:
+            return
+        reader.fieldnames = [columna.strip() for columna in reader.fieldnames]
+        obligatorias = COLUMNAS_INVENTARIO[1:] if sucursal_id is not None else COLUMNAS_INVENTARIO
+        faltantes = [columna for columna in obligatorias if columna not in reader.fieldnames]
+        if faltantes:
+            raise ValueError(f"Faltan columnas en el encabezado CSV: {', '.join(faltantes)}")
+        for registro in reader:
+            yield reader.line_num, registro
+        return
+
+    for numero, linea in enumerate(lector, 1):
+        if not linea.strip():
+            continue
+        try:
+            registro = json.loads(linea)
+        except json.JSONDecodeError as e:
+            yield numero, f"JSON inválido: {e.msg}"
+            continue
+        if not isinstance(registro, dict):
+            yield numero, "Cada línea debe ser un objeto JSON"
+            continue
+        yield numero, registro
+
+
+def validar_fila(linea: int, registro: Dict[str, Any], sucursal_id: Optional[int] = None) -> FilaInventario:
+    """
+    Valida un registro con las reglas de ``ProductoCreate``.
+
+    Args:
+        linea (int): Línea del archivo
+        registro (Dict[str, Any]): Valores leídos del archivo
+        sucursal_id (Optional[int]): Sucursal de los registros que no la indican
+
+    Returns:
+        FilaInventario: Fila con el nombre normalizado
+
+    Raises:
+        ValueError: Si el registro no es válido
+    """
+    datos = {columna: registro.get(columna) for columna in COLUMNAS_INVENTARIO}
+    if datos["sucursal_id"] in (None, "") and sucursal_id is not None:
+        datos["sucursal_id"] = sucursal_id
+    try:
+        producto = ProductoImportacion.model_validate(datos)
+    except ValidationError as e:
+        raise ValueError(_mensaje_validacion(e)) from None
+    nombre = producto.nombre.strip()
+    if not nombre:
+        raise ValueError("El nombre del producto no puede estar vacío")
+    return FilaInventario(linea, producto.sucursal_id, nombre, producto.cantidad_stock)
+
+
+def leer_inventario(archivo: BinaryIO, formato: FormatoInventario, tamano_lote: int,
+                    sucursal_id: Optional[int] = None) -> Iterator[LoteInventario]:
+    """
+    Lee y valida un archivo de inventario en lotes de ``tamano_lote`` filas.
+
+    Args:
+        archivo (BinaryIO): Archivo abierto en modo binario
+        formato (FormatoInventario): csv o ndjson
+        tamano_lote (int): Filas (válidas o no) por lote
+        sucursal_id (Optional[int]): Sucursal de las filas que no la indican
+
+    Yields:
+        LoteInventario: Filas válidas, filas rechazadas y bytes leídos hasta el momento
+
+    Raises:
+        ValueError: Si al encabezado CSV le faltan columnas obligatorias
+        UnicodeDecodeError: Si el archivo no está codificado en UTF-8
+    """
+    lector = LectorLineas(archivo)
+    filas: List[FilaInventario] = []
+    errores: List[Tuple[int, str]] = []
+    for linea, registro in _registros(lector, formato, sucursal_id):
+        if isinstance(registro, str):
+            errores.append((linea, registro))
+        else:
+            try:
+                filas.append(validar_fila(linea, registro, sucursal_id))
+            except ValueError as e:
+                errores.append((linea, str(e)))
+        if len(filas) + len(errores) >= tamano_lote:
+            yield LoteInventario(filas, errores, lector.bytes_leidos)
+            filas, errores = [], []
+    if filas or errores:
+        yield LoteInventario(filas, errores, lector.bytes_leidos)
+
+
+class TareaImportacion:
+    """
+    Estado de la importación de un archivo de inventario.
+
+    Attributes:
+        id (str): Identificador de la tarea
+        formato (FormatoInventario): Formato del archivo
+        tamano_lote (int): Filas por transacción
+        estado (str): pendiente, en_progreso, completada o error
+        bytes_total (int): Tamaño del archivo (0 si se desconoce)
+        bytes_procesados (int): Bytes del archivo procesados hasta el momento
+        filas_procesadas (int): Filas leídas, válidas o no
+        importados (int): Productos creados o actualizados
+        errores (int): Filas rechazadas
+        detalle_errores (List[Dict[str, Any]]): Línea y motivo de las primeras
+            ``max_errores`` filas rechazadas
+        error (Optional[str]): Mensaje de error si la tarea falló
+    """
+
+    PENDIENTE = "pendiente"
+    EN_PROGRESO = "en_progreso"
+    COMPLETADA = "completada"
+    ERROR = "error"
+
+    def __init__(self, formato: FormatoInventario, tamano_lote: int, bytes_total: int = 0,
+                 max_errores: Optional[int] = None):
+        self.id = uuid.uuid4().hex
+        self.formato = FormatoInventario(formato)
+        self.tamano_lote = tamano_lote
+        self.estado = self.PENDIENTE
+        self.bytes_total = bytes_total
+        self.bytes_procesados = 0
+        self.filas_procesadas = 0
+        self.importados = 0
+        self.errores = 0
+        self.max_errores = settings.import_max_errors if max_errores is None else max_errores
+        self.detalle_errores: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+        self.fecha_creacion = datetime.now()
+        self.fecha_fin: Optional[datetime] = None
+
+    @property
+    def progreso(self) -> float:
+        """Porcentaje del archivo procesado"""
+        if self.estado == self.COMPLETADA:
+            return 100.0
+        if self.bytes_total == 0:
+            return 0.0
+        return round(min(self.bytes_procesados / self.bytes_total, 1.0) * 100, 2)
+
+    def registrar_lote(self, lote: LoteInventario, errores_filas: List[Optional[str]]) -> List[Tuple[int, str]]:
+        """
+        Acumula el resultado de un lote.
+
+        Args:
+            lote (LoteInventario): Lote procesado
+            errores_filas (List[Optional[str]]): Error de cada fila válida del
+                lote al escribirla (None si se importó)
+
+        Returns:
+            List[Tuple[int, str]]: Filas rechazadas del lote, ordenadas por línea
+        """
+        rechazadas = sorted(lote.errores + [
+            (fila.linea, error) for fila, error in zip(lote.filas, errores_filas) if error is not None
+        ])
+        self.filas_procesadas += len(lote.filas) + len(lote.errores)
+        self.importados += len(lote.filas) - (len(rechazadas) - len(lote.errores))
+        self.errores += len(rechazadas)
+        disponibles = max(self.max_errores - len(self.detalle_errores), 0)
+        self.detalle_errores.extend({"linea": linea, "error": error} for linea, error in rechazadas[:disponibles])
+        self.bytes_procesados = lote.bytes_leidos
+        return rechazadas
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Representación serializable de la tarea"""
+        return {
+            "id": self.id,
+            "formato": self.formato,
+            "tamano_lote": self.tamano_lote,
+            "estado": self.estado,
+            "bytes_total": self.bytes_total,
+            "bytes_procesados": self.bytes_procesados,
+            "progreso": self.progreso,
+            "filas_procesadas": self.filas_procesadas,
+            "importados": self.importados,
+            "errores": self.errores,
+            "detalle_errores": list(self.detalle_errores),
+            "error": self.error,
+            "fecha_creacion": self.fecha_creacion,
+            "fecha_fin": self.fecha_fin,
+        }
+
+
+registro_importaciones = RegistroTareas()
+
+
+async def ejecutar_importacion(
+    tarea: TareaImportacion,
+    archivo: BinaryIO,
+    db: DbSession,
+    sucursal_id: Optional[int] = None,
+    al_avanzar: Optional[Callable[[TareaImportacion, List[Tuple[int, str]]], None]] = None,
+) -> None:
+    """
+    Importa un archivo de inventario por lotes actualizando el estado de ``tarea``.
+
+    Cada lote se confirma por separado y entre lotes se cede el event loop.
+    Si la escritura de un lote falla (por ejemplo, porque se eliminó una
+    sucursal mientras tanto) se rechazan sus filas y se continúa con el
+    siguiente. El archivo y la sesión son propios de la tarea y se cierran al
+    terminar.
+
+    Args:
+        tarea (TareaImportacion): Tarea a ejecutar
+        archivo (BinaryIO): Archivo de inventario abierto en modo binario
+        db (DbSession): Sesión exclusiva de la tarea
+        sucursal_id (Optional[int]): Sucursal de las filas que no la indican
+        al_avanzar: Función que recibe la tarea y las filas rechazadas tras cada lote
+    """
+    service = AsyncProductoService(db)
+    tarea.estado = TareaImportacion.EN_PROGRESO
+    try:
+        for lote in leer_inventario(archivo, tarea.formato, tarea.tamano_lote, sucursal_id):
+            filas = [(fila.sucursal_id, fila.nombre, fila.cantidad_stock) for fila in lote.filas]
+            try:
+                errores_filas = await service.importar_productos(filas) if filas else []
+            except ValueError as e:
+                errores_filas = [str(e)] * len(filas)
+            rechazadas = tarea.registrar_lote(lote, errores_filas)
+            if al_avanzar is not None:
+                al_avanzar(tarea, rechazadas)
+            await asyncio.sleep(0)
+        tarea.estado = TareaImportacion.COMPLETADA
+    except Exception as e:
+        logger.exception("Error importando el inventario de la tarea %s", tarea.id)
+        tarea.estado = TareaImportacion.ERROR
+        tarea.error = str(e)
+    finally:
+        tarea.fecha_fin = datetime.now()
+        archivo.close()
+        await close_session(db)
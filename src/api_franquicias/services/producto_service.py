@@ -2,11 +2,63 @@
 Servicio de lógica de negocio para Producto
 """
 
-from typing import List, Optional
+import re
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
+from ..config import settings
 from ..repositories.sucursal_repository import SucursalRepository
 from ..repositories.producto_repository import ProductoRepository
+from ..repositories.filtros import FiltroProductos, ListadoInvalidoError
+from ..repositories.pagination import Pagina
+from ..repositories.trigramas import trigramas
+from ..repositories.dialect import RESTRICCION_CHECK, RESTRICCION_CLAVE_FORANEA, RESTRICCION_UNICA
+from ..unit_of_work import transaccional
 from ..models.producto import Producto
+from .restricciones import restricciones_como_errores
+
+
+# Palabras consideradas de un texto de búsqueda
+MAX_TERMINOS_BUSQUEDA = 8
+
+
+def terminos_de_busqueda(texto: str) -> List[str]:
+    """Palabras (en minúsculas, sin signos) de un texto de búsqueda"""
+    return re.findall(r"\w+", texto.lower())[:MAX_TERMINOS_BUSQUEDA]
+
+
+# Posibles duplicados que se informan al crear un producto
+MAX_SIMILARES_DUPLICADO = 5
+
+
+class ProductosSimilaresError(ValueError):
+    """
+    El producto a crear se parece a otros de la sucursal (posible duplicado).
+
+    Attributes:
+        similares (List[Tuple[Producto, float]]): Productos parecidos y su similitud
+    """
+
+    def __init__(self, nombre: str, similares: List[Tuple[Producto, float]]):
+        super().__init__(
+            f"El nombre '{nombre}' es similar al de otros productos de la sucursal: "
+            + ", ".join(f"'{producto.nombre}'" for producto, _ in similares)
+        )
+        self.similares = similares
+
+
+class ResultadoCreacion(NamedTuple):
+    """Resultado de crear un elemento de un lote de productos"""
+    indice: int
+    nombre: str
+    producto: Optional[Producto]
+    error: Optional[str]
+
+
+class ResultadoActualizacionStock(NamedTuple):
+    """Resultado de actualizar el stock de un lote de productos"""
+    actualizados: int
+    no_encontrados: List[int]
 
 
 class ProductoService:
@@ -17,8 +69,20 @@ class ProductoService:
         self.sucursal_repo = SucursalRepository(db)
         self.producto_repo = ProductoRepository(db)
 
-    def crear_producto(self, nombre: str, cantidad_stock: int, sucursal_id: int) -> Producto:
-        """Crea un nuevo producto en una sucursal"""
+    @transaccional
+    def crear_producto(self, nombre: str, cantidad_stock: int, sucursal_id: int,
+                       verificar_similares: bool = False) -> Producto:
+        """
+        Crea un nuevo producto en una sucursal.
+
+        Con ``verificar_similares`` el producto no se crea si en la sucursal
+        hay otros con nombre parecido (similitud >= SIMILAR_DUPLICATE_THRESHOLD),
+        posibles duplicados por errores de escritura.
+
+        Raises:
+            ProductosSimilaresError: Si se verifican los similares y los hay
+            ValueError: Si los datos no son válidos o el nombre ya existe
+        """
         # Validar que el nombre no esté vacío
         if not nombre or not nombre.strip():
             raise ValueError("El nombre del producto no puede estar vacío")
@@ -27,17 +91,107 @@ class ProductoService:
         if cantidad_stock < 0:
             raise ValueError("La cantidad de stock no puede ser negativa")
         
+        if verificar_similares:
+            franquicia_id = self.sucursal_repo.get_franquicia_id(sucursal_id)
+            if franquicia_id is None:
+                raise ValueError(f"Sucursal con ID {sucursal_id} no encontrada")
+            # El nombre idéntico lo rechaza la restricción única con su propio error
+            similares = [
+                (producto, valor) for producto, valor in self.producto_repo.find_similar(
+                    franquicia_id, nombre, settings.similar_duplicate_threshold,
+                    MAX_SIMILARES_DUPLICADO + 1, sucursal_id
+                )
+                if producto.nombre != nombre.strip()
+            ]
+            if similares:
+                raise ProductosSimilaresError(nombre.strip(), similares[:MAX_SIMILARES_DUPLICADO])
+
+        # Un único INSERT: la clave foránea valida la sucursal, el CHECK el
+        # stock y ON CONFLICT los nombres duplicados
+        with restricciones_como_errores({
+            RESTRICCION_CLAVE_FORANEA: f"Sucursal con ID {sucursal_id} no encontrada",
+            RESTRICCION_CHECK: "La cantidad de stock no puede ser negativa",
+        }):
+            producto = self.producto_repo.create(nombre.strip(), cantidad_stock, sucursal_id)
+        if producto is None:
+            raise ValueError(f"Ya existe un producto con el nombre '{nombre}' en esta sucursal")
+        return producto
+
+    @transaccional
+    def crear_productos(self, sucursal_id: int,
+                        items: List[Tuple[str, int]]) -> List[ResultadoCreacion]:
+        """
+        Crea un lote de productos en una sucursal.
+
+        Los productos válidos se insertan con INSERT multi-fila que omiten
+        (ON CONFLICT DO NOTHING) los nombres que ya existen en la sucursal. Los
+        elementos inválidos no impiden crear el resto; cada uno recibe su resultado.
+        """
         # Validar que la sucursal exista
-        sucursal = self.sucursal_repo.get_by_id(sucursal_id)
-        if not sucursal:
+        if not self.sucursal_repo.exists(sucursal_id):
             raise ValueError(f"Sucursal con ID {sucursal_id} no encontrada")
-        
-        # Validar que no exista un producto con el mismo nombre en la sucursal
-        producto_existente = self.producto_repo.get_by_name_and_sucursal(nombre.strip(), sucursal_id)
-        if producto_existente:
-            raise ValueError(f"Ya existe un producto con el nombre '{nombre}' en esta sucursal")
-        
-        return self.producto_repo.create(nombre.strip(), cantidad_stock, sucursal_id)
+
+        nombres = [nombre.strip() if nombre else "" for nombre, _ in items]
+
+        errores = {}
+        vistos = set()
+        for indice, (nombre, (_, cantidad_stock)) in enumerate(zip(nombres, items)):
+            if not nombre:
+                errores[indice] = "El nombre del producto no puede estar vacío"
+            elif cantidad_stock < 0:
+                errores[indice] = "La cantidad de stock no puede ser negativa"
+            elif nombre in vistos:
+                errores[indice] = f"El nombre '{nombre}' está repetido en el lote"
+            vistos.add(nombre)
+
+        validos = [i for i in range(len(items)) if i not in errores]
+        with restricciones_como_errores({
+            RESTRICCION_CLAVE_FORANEA: f"Sucursal con ID {sucursal_id} no encontrada",
+        }):
+            creados = self.producto_repo.create_many(
+                sucursal_id, [(nombres[i], items[i][1]) for i in validos]
+            )
+        # Los nombres no insertados ya existían en la sucursal
+        for indice in validos:
+            if nombres[indice] not in creados:
+                errores[indice] = f"Ya existe un producto con el nombre '{nombres[indice]}' en esta sucursal"
+
+        return [
+            ResultadoCreacion(indice, nombres[indice], None, errores[indice]) if indice in errores
+            else ResultadoCreacion(indice, nombres[indice], creados[nombres[indice]], None)
+            for indice in range(len(items))
+        ]
+
+    @transaccional
+    def importar_productos(self, filas: List[Tuple[int, str, int]]) -> List[Optional[str]]:
+        """
+        Crea o actualiza el stock de un lote de productos de varias sucursales.
+
+        Las filas ya validadas, ``(sucursal_id, nombre, cantidad_stock)``, se
+        agrupan por sucursal y cada grupo se escribe con INSERT multi-fila
+        ``ON CONFLICT DO UPDATE``: los productos existentes toman el nuevo
+        stock. Si un producto aparece varias veces prevalece su último valor.
+        Las sucursales se verifican con una sola consulta.
+
+        Returns:
+            List[Optional[str]]: Error de cada fila, o None si se importó
+        """
+        existentes = self.sucursal_repo.get_existing_ids({sucursal_id for sucursal_id, _, _ in filas})
+
+        errores: List[Optional[str]] = [None] * len(filas)
+        por_sucursal: Dict[int, Dict[str, int]] = {}
+        for indice, (sucursal_id, nombre, cantidad_stock) in enumerate(filas):
+            if sucursal_id not in existentes:
+                errores[indice] = f"Sucursal con ID {sucursal_id} no encontrada"
+            else:
+                por_sucursal.setdefault(sucursal_id, {})[nombre] = cantidad_stock
+
+        for sucursal_id, stocks in por_sucursal.items():
+            with restricciones_como_errores({
+                RESTRICCION_CLAVE_FORANEA: f"Sucursal con ID {sucursal_id} no encontrada",
+            }):
+                self.producto_repo.upsert_many(sucursal_id, list(stocks.items()))
+        return errores
 
     def obtener_producto(self, producto_id: int) -> Optional[Producto]:
         """Obtiene un producto por ID"""
@@ -51,47 +205,173 @@ class ProductoService:
         
         return self.producto_repo.get_by_sucursal_id(sucursal_id)
 
+    def listar_productos_por_sucursal(self, sucursal_id: int, limit: int,
+                                      after: Optional[Union[int, str]] = None,
+                                      filtro: Optional[FiltroProductos] = None) -> Pagina:
+        """
+        Obtiene una página de los productos de una sucursal.
+
+        Raises:
+            ListadoInvalidoError: Si los filtros, el orden o el cursor no se
+                admiten (ver ``FiltroProductos.validado``)
+            ValueError: Si la sucursal no existe
+        """
+        filtro, after = self._validar_listado(filtro, after)
+        # Validar que la sucursal exista
+        if not self.sucursal_repo.exists(sucursal_id):
+            raise ValueError(f"Sucursal con ID {sucursal_id} no encontrada")
+        
+        return self.producto_repo.get_page(limit, after, sucursal_id=sucursal_id, filtro=filtro)
+
     def obtener_todos_productos(self) -> List[Producto]:
         """Obtiene todos los productos"""
         return self.producto_repo.get_all()
 
+    def listar_productos(self, limit: int, after: Optional[Union[int, str]] = None,
+                         filtro: Optional[FiltroProductos] = None) -> Pagina:
+        """
+        Obtiene una página de productos, ordenados por ID o por la columna
+        del filtro.
+
+        Raises:
+            ListadoInvalidoError: Si los filtros, el orden o el cursor no se
+                admiten (ver ``FiltroProductos.validado``)
+        """
+        filtro, after = self._validar_listado(filtro, after)
+        return self.producto_repo.get_page(limit, after, filtro=filtro)
+
+    @staticmethod
+    def _validar_listado(filtro: Optional[FiltroProductos],
+                         after: Optional[Union[int, str]]) -> Tuple[FiltroProductos, Optional[Union[int, str]]]:
+        """Resuelve el orden del listado y, si es por ID, convierte el cursor en el ID"""
+        filtro = (filtro or FiltroProductos()).validado()
+        if filtro.orden is None and isinstance(after, str):
+            if not after.isdigit():
+                raise ListadoInvalidoError("El cursor de un listado ordenado por ID debe ser un ID")
+            after = int(after)
+        return filtro, after
+
+    def buscar_productos(self, texto: str, limit: int, after: Optional[int] = None,
+                         franquicia_id: Optional[int] = None,
+                         sucursal_id: Optional[int] = None) -> Pagina:
+        """
+        Busca productos por nombre (palabras completas o prefijos), por relevancia.
+
+        Raises:
+            ValueError: Si el texto no contiene ninguna palabra
+        """
+        terminos = terminos_de_busqueda(texto)
+        if not terminos:
+            raise ValueError("La búsqueda debe contener al menos una palabra")
+        return self.producto_repo.search(terminos, limit, after or 0, franquicia_id, sucursal_id)
+
+    def buscar_similares(self, franquicia_id: int, nombre: str, limit: int,
+                         umbral: Optional[float] = None,
+                         sucursal_id: Optional[int] = None) -> List[Tuple[Producto, float]]:
+        """
+        Busca productos de una franquicia con nombre parecido, tolerando errores
+        de escritura, del más al menos similar.
+
+        Raises:
+            ValueError: Si el nombre no contiene letras ni números
+        """
+        if not trigramas(nombre):
+            raise ValueError("El nombre debe contener al menos una letra o un número")
+        if umbral is None:
+            umbral = settings.similar_threshold
+        return self.producto_repo.find_similar(franquicia_id, nombre, umbral, limit, sucursal_id)
+
+    def exportar_productos(self, tamano_lote: int,
+                           franquicia_id: Optional[int] = None) -> Iterator[Sequence[Row]]:
+        """Recorre por lotes, con un cursor del servidor, todos los productos ordenados por ID"""
+        return self.producto_repo.iter_export(tamano_lote, franquicia_id)
+
+    def exportar_inventario(self, tamano_lote: int,
+                            franquicia_id: Optional[int] = None) -> Iterator[Sequence[Row]]:
+        """Recorre por lotes los productos con su sucursal y franquicia, ordenados por ID"""
+        return self.producto_repo.iter_inventory(tamano_lote, franquicia_id)
+
+    @transaccional
     def actualizar_producto(self, producto_id: int, nombre: str) -> Optional[Producto]:
         """Actualiza el nombre de un producto"""
-        # Validar que el producto exista
-        producto = self.producto_repo.get_by_id(producto_id)
-        if not producto:
-            return None
-        
         # Validar que el nombre no esté vacío
         if not nombre or not nombre.strip():
+            if not self.producto_repo.exists(producto_id):
+                return None
             raise ValueError("El nombre del producto no puede estar vacío")
         
-        # Validar que no exista otro producto con el mismo nombre en la misma sucursal
-        producto_existente = self.producto_repo.get_by_name_and_sucursal(nombre.strip(), producto.sucursal_id)
-        if producto_existente and producto_existente.id != producto_id:
-            raise ValueError(f"Ya existe un producto con el nombre '{nombre}' en esta sucursal")
-        
-        return self.producto_repo.update(producto_id, nombre.strip())
+        # La restricción única valida que no exista otro producto con el mismo
+        # nombre en la misma sucursal
+        with restricciones_como_errores({
+            RESTRICCION_UNICA: f"Ya existe un producto con el nombre '{nombre}' en esta sucursal",
+        }):
+            return self.producto_repo.update(producto_id, nombre.strip())
 
+    @transaccional
     def actualizar_stock(self, producto_id: int, cantidad_stock: int) -> Optional[Producto]:
         """Actualiza el stock de un producto"""
-        # Validar que el producto exista
-        producto = self.producto_repo.get_by_id(producto_id)
-        if not producto:
-            return None
-        
         # Validar que la cantidad de stock sea no negativa
         if cantidad_stock < 0:
+            if not self.producto_repo.exists(producto_id):
+                return None
             raise ValueError("La cantidad de stock no puede ser negativa")
         
-        return self.producto_repo.update_stock(producto_id, cantidad_stock)
+        with restricciones_como_errores({RESTRICCION_CHECK: "La cantidad de stock no puede ser negativa"}):
+            return self.producto_repo.update_stock(producto_id, cantidad_stock)
+
+    @transaccional
+    def actualizar_stock_minimo(self, producto_id: int, stock_minimo: Optional[int]) -> Optional[Producto]:
+        """Fija (o quita, con None) el umbral de reposición de un producto"""
+        with restricciones_como_errores({RESTRICCION_CHECK: "El stock mínimo no puede ser negativo"}):
+            return self.producto_repo.update_stock_minimo(producto_id, stock_minimo)
+
+    def listar_bajo_stock(self, franquicia_id: int, umbral: Optional[int] = None) -> List[Tuple[Producto, int]]:
+        """
+        Obtiene los productos de una franquicia con stock menor o igual que su
+        umbral de reposición (``stock_minimo`` o, si no tienen, ``umbral``).
+        """
+        return self.producto_repo.get_low_stock(franquicia_id, umbral)
 
+    @transaccional
+    def ajustar_stock(self, producto_id: int, delta: int) -> Optional[Producto]:
+        """
+        Incrementa o descuenta el stock de un producto de forma atómica.
+
+        Raises:
+            ValueError: Si el ajuste dejaría el stock en negativo
+        """
+        producto = self.producto_repo.adjust_stock(producto_id, delta)
+        if producto is not None:
+            return producto
+
+        # Sin fila ajustada: el producto no existe o el stock es insuficiente
+        if not self.producto_repo.exists(producto_id):
+            return None
+        raise ValueError(f"Stock insuficiente para descontar {-delta} unidades del producto con ID {producto_id}")
+
+    @transaccional
+    def actualizar_stocks(self, stocks: List[Tuple[int, int]]) -> ResultadoActualizacionStock:
+        """
+        Actualiza el stock de un lote de productos en una sola transacción.
+
+        Si un producto aparece varias veces prevalece su último valor. Los IDs
+        inexistentes no se actualizan y se reportan en ``no_encontrados``.
+        """
+        if any(cantidad_stock < 0 for _, cantidad_stock in stocks):
+            raise ValueError("La cantidad de stock no puede ser negativa")
+
+        nuevos = dict(stocks)
+        existentes = self.producto_repo.get_existing_ids(nuevos)
+        no_encontrados = sorted(set(nuevos) - existentes)
+
+        actualizados = self.producto_repo.update_stock_many(
+            {producto_id: stock for producto_id, stock in nuevos.items() if producto_id in existentes}
+        )
+        return ResultadoActualizacionStock(actualizados, no_encontrados)
+
+    @transaccional
     def eliminar_producto(self, producto_id: int) -> bool:
         """Elimina un producto"""
-        # Validar que el producto exista
-        if not self.producto_repo.exists(producto_id):
-            return False
-        
         return self.producto_repo.delete(producto_id)
 
     def producto_existe(self, producto_id: int) -> bool:
@@ -0,0 +1,44 @@
+"""
+Traducción de violaciones de restricciones a errores de negocio.
+
+Las escrituras no validan antes con consultas la existencia del padre ni
+los nombres duplicados: lo hacen las restricciones de la base de datos
+(claves foráneas, UNIQUE y CHECK), sin carreras entre peticiones
+concurrentes. Este módulo convierte el ``IntegrityError`` resultante en el
+``ValueError`` con el mensaje que esperan los controladores.
+
+Autor: Darwin Hurtado
+Fecha: 2024
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Iterator
+from sqlalchemy.exc import IntegrityError
+from ..repositories.dialect import restriccion_violada
+
+
+@contextmanager
+def restricciones_como_errores(mensajes: Dict[str, str]) -> Iterator[None]:
+    """
+    Convierte las violaciones de restricciones del bloque en ``ValueError``.
+
+    Uso::
+
+        with restricciones_como_errores({RESTRICCION_CLAVE_FORANEA: "Sucursal no encontrada"}):
+            repo.create(...)
+
+    Args:
+        mensajes (Dict[str, str]): Mensaje por tipo de restricción
+            (RESTRICCION_UNICA, RESTRICCION_CLAVE_FORANEA o RESTRICCION_CHECK)
+
+    Raises:
+        ValueError: Si el bloque viola una restricción de ``mensajes``; el
+            resto de ``IntegrityError`` se propaga sin cambios
+    """
+    try:
+        yield
+    except IntegrityError as e:
+        mensaje = mensajes.get(restriccion_violada(e))
+        if mensaje is None:
+            raise
+        raise ValueError(mensaje) from e
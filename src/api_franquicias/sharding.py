@@ -0,0 +1,278 @@
+"""
+Particionado horizontal (sharding) de los datos por franquicia.
+
+Cada franquicia vive, con sus sucursales, productos y stock máximo, en una de
+N bases de datos (shards). Los IDs se reparten por rangos: el shard ``k``
+asigna IDs a partir de ``k * SHARD_ID_SPAN``, de modo que cualquier ID de
+franquicia, sucursal o producto identifica su shard sin consultar nada. Las
+franquicias nuevas se ubican según un hash de su nombre.
+
+El enrutamiento se apoya en ``ShardedSession`` de SQLAlchemy: los
+repositorios no cambian. Las consultas filtradas por ID (o por
+``franquicia_id``/``sucursal_id``) van a un único shard; el resto, como los
+listados globales, se ejecutan en todos los shards (scatter-gather) y sus
+resultados se concatenan en orden de shard, que coincide con el orden por ID.
+
+Autor: Darwin Hurtado
+Fecha: 2024
+"""
+
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.horizontal_shard import ShardedSession
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql import operators, visitors
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter
+from sqlalchemy.sql.schema import Column
+from .models import Franquicia, Sucursal, Producto, StockMaximoSucursal
+
+# Amplitud del rango de IDs de cada shard
+SHARD_ID_SPAN = 10 ** 12
+
+# Tablas cuyos IDs se asignan dentro del rango del shard
+TABLAS_CON_ID = ("franquicias", "sucursales", "productos")
+
+# Columnas cuyo valor es un ID que identifica el shard
+COLUMNAS_ENRUTABLES = {"id", "franquicia_id", "sucursal_id"}
+
+# Parámetros de ejecución (executemany) que contienen IDs
+PARAMETROS_ENRUTABLES = COLUMNAS_ENRUTABLES | {"producto_id"}
+
+# Clave de Session.info donde cada sesión guarda su enrutador
+SHARD_ROUTER_KEY = "shard_router"
+
+
+def shard_index_for_id(identificador: int) -> int:
+    """Índice del shard al que pertenece un ID"""
+    return int(identificador) // SHARD_ID_SPAN
+
+
+def prepare_shard_ids(connection: Connection, shard_index: int) -> None:
+    """
+    Hace que las tablas del shard asignen IDs dentro de su rango.
+
+    En SQLite ajusta ``sqlite_sequence`` (las tablas usan AUTOINCREMENT) y en
+    PostgreSQL las secuencias de las columnas ``id``. Nunca retrocede una
+    secuencia, por lo que puede ejecutarse en cada arranque.
+
+    Args:
+        connection (Connection): Conexión al shard, con el esquema ya migrado
+        shard_index (int): Índice del shard
+    """
+    base = shard_index * SHARD_ID_SPAN
+    if base == 0:
+        return
+    dialecto = connection.dialect.name
+    for tabla in TABLAS_CON_ID:
+        if dialecto == "sqlite":
+            connection.execute(
+                text("UPDATE sqlite_sequence SET seq = :base WHERE name = :tabla AND seq < :base"),
+                {"base": base, "tabla": tabla},
+            )
+            connection.execute(
+                text(
+                    "INSERT INTO sqlite_sequence (name, seq) SELECT :tabla, :base "
+                    "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = :tabla)"
+                ),
+                {"base": base, "tabla": tabla},
+            )
+        elif dialecto == "postgresql":
+            connection.execute(
+                text(
+                    f"SELECT setval(pg_get_serial_sequence(:tabla, 'id'), "
+                    f"GREATEST(:base, (SELECT COALESCE(MAX(id), 0) FROM {tabla})))"
+                ),
+                {"base": base, "tabla": tabla},
+            )
+        else:
+            raise NotImplementedError(f"Sharding no soportado para el dialecto '{dialecto}'")
+    connection.commit()
+
+
+class ShardRouter:
+    """
+    Asigna franquicias, sucursales y productos a los shards configurados.
+
+    Provee las funciones ``shard_chooser``, ``identity_chooser`` y
+    ``execute_chooser`` que ``ShardedSession`` usa para elegir la base de
+    datos de cada operación.
+
+    Args:
+        engines (Sequence): Motores de cada shard, en orden de índice. Para
+            sesiones asíncronas se usan los ``AsyncEngine.sync_engine``
+        is_async (bool): Si las sesiones creadas deben ser ``AsyncSession``
+    """
+
+    def __init__(self, engines: Sequence[Engine], is_async: bool = False):
+        if not engines:
+            raise ValueError("Se requiere al menos un shard")
+        self.shard_ids: List[str] = [str(indice) for indice in range(len(engines))]
+        self.engines: Dict[str, Engine] = dict(zip(self.shard_ids, engines))
+        self.is_async = is_async
+        opciones = {
+            "shards": self.engines,
+            "shard_chooser": self.shard_chooser,
+            "identity_chooser": self.identity_chooser,
+            "execute_chooser": self.execute_chooser,
+            "autoflush": False,
+            "expire_on_commit": False,
+            "info": {SHARD_ROUTER_KEY: self},
+        }
+        if is_async:
+            self._session_factory = lambda: AsyncSession(sync_session_class=ShardedSession, **opciones)
+        else:
+            self._session_factory = sessionmaker(class_=ShardedSession, autocommit=False, **opciones)
+
+    def session(self):
+        """Crea una sesión (``ShardedSession`` o ``AsyncSession``) sobre todos los shards"""
+        return self._session_factory()
+
+    def shard_for_id(self, identificador: int) -> Optional[str]:
+        """
+        Obtiene el shard de un ID de franquicia, sucursal o producto.
+
+        Returns:
+            Optional[str]: Shard del ID o None si está fuera de los rangos configurados
+        """
+        indice = shard_index_for_id(identificador)
+        if 0 <= indice < len(self.shard_ids):
+            return self.shard_ids[indice]
+        return None
+
+    def shard_for_nombre(self, nombre: str) -> str:
+        """Shard donde se crea una franquicia nueva, según el hash de su nombre"""
+        return self.shard_ids[zlib.crc32(nombre.strip().encode("utf-8")) % len(self.shard_ids)]
+
+    def _shard_de_padre(self, padre: Any, padre_id: Optional[int]) -> Optional[str]:
+        if padre_id is not None:
+            return self.shard_for_id(padre_id)
+        if padre is not None:
+            return self.shard_chooser(None, padre)
+        return None
+
+    def shard_chooser(self, mapper, instance, clause=None, **kw) -> str:
+        """
+        Shard donde se escribe ``instance``.
+
+        Las franquicias nuevas se ubican por nombre; sucursales, productos y
+        stock máximo se escriben en el shard de su franquicia o sucursal.
+        Sin instancia (por ejemplo, para conocer el dialecto) se usa el primero.
+        """
+        if instance is None:
+            return self.shard_ids[0]
+        if getattr(instance, "id", None) is not None:
+            shard = self.shard_for_id(instance.id)
+        elif isinstance(instance, Franquicia):
+            shard = self.shard_for_nombre(instance.nombre or "")
+        elif isinstance(instance, Sucursal):
+            shard = self._shard_de_padre(instance.franquicia, instance.franquicia_id)
+        elif isinstance(instance, Producto):
+            shard = self._shard_de_padre(instance.sucursal, instance.sucursal_id)
+        elif isinstance(instance, StockMaximoSucursal):
+            shard = self._shard_de_padre(None, instance.sucursal_id)
+        else:
+            shard = None
+        if shard is None:
+            raise ValueError(f"No es posible determinar el shard de {instance!r}")
+        return shard
+
+    def identity_chooser(self, mapper, primary_key, *, lazy_loaded_from=None, **kw) -> List[str]:
+        """Shards donde buscar una fila por su clave primaria"""
+        if lazy_loaded_from is not None:
+            return [lazy_loaded_from.identity_token]
+        shard = self.shard_for_id(primary_key[0])
+        return [shard] if shard is not None else []
+
+    def execute_chooser(self, orm_context) -> List[str]:
+        """
+        Shards donde ejecutar una sentencia.
+
+        Si la sentencia compara con igualdad (o IN) alguna columna de ID
+        contra valores concretos, o inserta filas con esos IDs, se ejecuta
+        sólo en los shards de esos valores. Un INSERT de franquicias se envía
+        al shard de su nombre. En otro caso se ejecuta en todos, en orden de
+        índice.
+        """
+        if orm_context.is_select and orm_context.lazy_loaded_from is not None:
+            return [orm_context.lazy_loaded_from.identity_token]
+
+        sentencia = orm_context.statement
+        filas = self._valores_insertados(sentencia) if orm_context.is_insert else []
+        ids = self._ids_en_parametros(orm_context.parameters)
+        ids.update(self._ids_en_parametros(filas))
+        ids.update(self._ids_en_criterios(sentencia))
+        shards = {self.shard_for_id(identificador) for identificador in ids}
+        shards.discard(None)
+        if ids:
+            # IDs fuera de rango: la sentencia no encuentra filas (o falla por
+            # clave foránea) en el primer shard
+            elegidos = [shard for shard in self.shard_ids if shard in shards] or self.shard_ids[:1]
+        elif filas and sentencia.table.name == Franquicia.__tablename__:
+            # Franquicia nueva: se crea en el shard de su nombre
+            elegidos = sorted({self.shard_for_nombre(fila["nombre"]) for fila in filas}, key=int)
+        else:
+            elegidos = list(self.shard_ids)
+
+        if orm_context.is_insert and getattr(sentencia, "select", None) is None and len(elegidos) != 1:
+            # Un INSERT ... VALUES repetido en varios shards duplicaría las filas
+            raise ValueError("Un INSERT debe afectar a un único shard")
+        return elegidos
+
+    @staticmethod
+    def _valores_insertados(sentencia: Any) -> List[Dict[str, Any]]:
+        """Filas de un ``INSERT ... VALUES`` construido con ``values()``"""
+        multiples = getattr(sentencia, "_multi_values", ())
+        filas = [fila for lote in multiples for fila in lote] if multiples else []
+        valores = getattr(sentencia, "_values", None)
+        if valores:
+            filas.append(valores)
+        return [
+            {
+                getattr(columna, "key", columna): valor.value if isinstance(valor, BindParameter) else valor
+                for columna, valor in fila.items()
+            }
+            for fila in filas
+        ]
+
+    @staticmethod
+    def _ids_en_parametros(parametros: Any) -> Set[int]:
+        """IDs de los parámetros de ejecución (INSERT/UPDATE por lotes)"""
+        if not parametros:
+            return set()
+        if isinstance(parametros, dict):
+            parametros = [parametros]
+        return {
+            valor
+            for fila in parametros
+            for clave, valor in fila.items()
+            if clave in PARAMETROS_ENRUTABLES and isinstance(valor, int)
+        }
+
+    @staticmethod
+    def _ids_en_criterios(sentencia: Any) -> Set[int]:
+        """IDs comparados con ``=`` o ``IN`` contra columnas enrutables"""
+        ids: Set[int] = set()
+        for elemento in visitors.iterate(sentencia):
+            if not isinstance(elemento, BinaryExpression):
+                continue
+            if elemento.operator not in (operators.eq, operators.in_op):
+                continue
+            columna, valor = elemento.left, elemento.right
+            if not isinstance(columna, Column) or columna.key not in COLUMNAS_ENRUTABLES:
+                continue
+            if not isinstance(valor, BindParameter):
+                continue
+            valores: Iterable[Any] = valor.value if valor.expanding else [valor.value]
+            ids.update(v for v in valores or () if isinstance(v, int))
+        return ids
+
+
+def router_de_sesion(db: Any) -> Optional[ShardRouter]:
+    """Enrutador de una sesión particionada (``None`` si no lo es)"""
+    sync = db.sync_session if isinstance(db, AsyncSession) else db
+    if isinstance(sync, Session):
+        return sync.info.get(SHARD_ROUTER_KEY)
+    return None
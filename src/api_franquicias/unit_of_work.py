@@ -0,0 +1,108 @@
+"""
+Unidad de trabajo (Unit of Work) para el sistema de franquicias.
+
+Los repositorios sólo hacen ``flush``: envían las sentencias a la base de
+datos dentro de la transacción en curso, pero no la confirman. La unidad de
+trabajo delimita la transacción de una operación de negocio y hace un único
+``commit`` al final (o ``rollback`` si la operación falla), de modo que una
+operación con varios pasos paga una sola sincronización a disco.
+
+Las unidades de trabajo se pueden anidar: sólo la más externa confirma la
+transacción, por lo que un servicio que invoca a otro comparte su transacción.
+
+Autor: Darwin Hurtado
+Fecha: 2024
+"""
+
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Iterator, TypeVar
+from sqlalchemy.orm import Session
+
+# Clave en ``Session.info`` con la profundidad de anidamiento actual
+_PROFUNDIDAD = "unit_of_work_depth"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class UnitOfWork:
+    """
+    Transacción de una operación de negocio sobre una sesión.
+
+    Uso::
+
+        with UnitOfWork(db) as uow:
+            repo.create(...)
+            with uow.savepoint():
+                repo.update(...)
+
+    Attributes:
+        db (Session): Sesión de SQLAlchemy sobre la que se trabaja
+    """
+
+    def __init__(self, db: Session):
+        """
+        Inicializa la unidad de trabajo.
+
+        Args:
+            db (Session): Sesión de SQLAlchemy activa
+        """
+        self.db = db
+
+    @property
+    def es_externa(self) -> bool:
+        """True si esta unidad de trabajo es la más externa de la sesión"""
+        return self.db.info.get(_PROFUNDIDAD, 0) == 1
+
+    def __enter__(self) -> "UnitOfWork":
+        self.db.info[_PROFUNDIDAD] = self.db.info.get(_PROFUNDIDAD, 0) + 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        externa = self.es_externa
+        self.db.info[_PROFUNDIDAD] -= 1
+        if not externa:
+            # La unidad de trabajo externa decide el resultado
+            return
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    def flush(self) -> None:
+        """Envía los cambios pendientes a la base de datos sin confirmarlos"""
+        self.db.flush()
+
+    def commit(self) -> None:
+        """Confirma la transacción"""
+        self.db.commit()
+
+    def rollback(self) -> None:
+        """Revierte la transacción"""
+        self.db.rollback()
+
+    @contextmanager
+    def savepoint(self) -> Iterator[None]:
+        """
+        Abre un punto de guardado (SAVEPOINT) dentro de la transacción.
+
+        Si el bloque lanza una excepción sólo se revierten sus cambios y la
+        excepción se propaga; el resto de la transacción sigue intacto.
+        """
+        with self.db.begin_nested():
+            yield
+
+
+def transaccional(metodo: F) -> F:
+    """
+    Decorador para métodos de servicio que modifican datos.
+
+    Ejecuta el método dentro de una :class:`UnitOfWork` sobre ``self.db``:
+    un único commit al terminar o rollback si lanza una excepción.
+    """
+    @wraps(metodo)
+    def envoltura(self, *args: Any, **kwargs: Any) -> Any:
+        with UnitOfWork(self.db):
+            return metodo(self, *args, **kwargs)
+
+    return envoltura  # type: ignore[return-value]
@@ -5,17 +5,36 @@ Configuración de pytest para tests
 import pytest
 import tempfile
 import os
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
 
+# La aplicación crea sus motores al importarse y el lifespan migra la base en
+# cada TestClient: se apuntan a una base temporal en lugar de ./franquicias.db
+_app_db_fd, _app_db_path = tempfile.mkstemp(suffix=".db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_app_db_path}"
+# Cada test construye sus índices de trigramas sobre su propia base
+os.environ["SIMILAR_INDEX_WARMUP"] = "false"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
 from src.api_franquicias.main import app
-from src.api_franquicias.database import get_db
+from src.api_franquicias.database import enable_sqlite_foreign_keys, get_db
 from src.api_franquicias.models.base import Base
+from src.api_franquicias.repositories.cache import cache_entidades
+from src.api_franquicias.repositories.trigramas import indices_trigramas
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Elimina la base temporal de la aplicación"""
+    os.close(_app_db_fd)
+    for sufijo in ("", "-wal", "-shm"):
+        if os.path.exists(_app_db_path + sufijo):
+            os.unlink(_app_db_path + sufijo)
 
 
-# Crear base de datos temporal para tests
-@pytest.fixture(scope="session")
+# Crear base de datos temporal para cada test (aislamiento entre tests)
+@pytest.fixture(scope="function")
 def test_db():
     """Crear base de datos temporal para tests"""
     # Crear archivo temporal
@@ -27,10 +46,16 @@ def test_db():
         SQLALCHEMY_DATABASE_URL,
         connect_args={"check_same_thread": False}
     )
+    # Igual que el motor de la aplicación: ON DELETE CASCADE requiere las claves foráneas
+    enable_sqlite_foreign_keys(engine)
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     
     # Crear tablas
     Base.metadata.create_all(bind=engine)
+    # Los índices de trigramas en memoria son de la base del test anterior
+    indices_trigramas.esperar()
+    indices_trigramas.descartar()
+    cache_entidades.limpiar()
     
     yield TestingSessionLocal
     
@@ -66,6 +91,45 @@ def client(db_session):
     app.dependency_overrides.clear()
 
 
+class QueryCounter:
+    """Registra las sentencias SQL ejecutadas sobre un motor"""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        """Número de sentencias ejecutadas"""
+        return len(self.statements)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@pytest.fixture
+def count_queries(db_session):
+    """
+    Context manager que cuenta las consultas SQL ejecutadas en su bloque.
+
+    Uso:
+        with count_queries() as queries:
+            client.get("/api/franquicias/")
+        assert queries.count == 3
+    """
+    engine = db_session.get_bind()
+
+    @contextmanager
+    def _count_queries():
+        counter = QueryCounter()
+        event.listen(engine, "before_cursor_execute", counter._before_cursor_execute)
+        try:
+            yield counter
+        finally:
+            event.remove(engine, "before_cursor_execute", counter._before_cursor_execute)
+
+    return _count_queries
+
+
 @pytest.fixture
 def sample_franquicia_data():
     """Datos de ejemplo para franquicia"""
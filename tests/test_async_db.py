@@ -0,0 +1,161 @@
+"""
+Tests para el camino asíncrono de base de datos (AsyncSession + aiosqlite)
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.api_franquicias.config import settings
+from src.api_franquicias.main import app
+from src.api_franquicias.database import enable_sqlite_foreign_keys, get_db, get_async_database_url
+from src.api_franquicias.models.base import Base
+from src.api_franquicias.repositories.trigramas import indices_trigramas
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture(scope="function")
+def async_client():
+    """Cliente de test cuyas peticiones usan una AsyncSession"""
+    db_fd, db_path = tempfile.mkstemp()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    enable_sqlite_foreign_keys(engine.sync_engine)
+
+    async def crear_tablas():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(crear_tablas())
+    AsyncTestingSessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+    app.dependency_overrides.clear()
+    os.close(db_fd)
+    os.unlink(db_path)
+
+
+class TestAsyncDatabase:
+    """Tests para los repositorios y servicios asíncronos"""
+
+    def test_get_async_database_url(self):
+        """Test conversión de URLs al driver asíncrono"""
+        assert get_async_database_url("sqlite:///./franquicias.db") == "sqlite+aiosqlite:///./franquicias.db"
+        assert get_async_database_url("postgresql://u:p@host/db") == "postgresql+asyncpg://u:p@host/db"
+        assert get_async_database_url("postgresql+psycopg2://u:p@host/db") == "postgresql+asyncpg://u:p@host/db"
+
+    def test_get_async_database_url_dialecto_no_soportado(self):
+        """Test dialecto sin driver asíncrono"""
+        with pytest.raises(ValueError):
+            get_async_database_url("mssql://host/db")
+
+    def test_flujo_completo_async(self, async_client):
+        """Test crear y consultar el árbol completo usando AsyncSession"""
+        franquicia_response = async_client.post("/api/franquicias/", json={"nombre": "Franquicia Async"})
+        assert franquicia_response.status_code == status.HTTP_201_CREATED
+        franquicia_id = franquicia_response.json()["id"]
+
+        sucursal_response = async_client.post(
+            f"/api/franquicias/{franquicia_id}/sucursales", json={"nombre": "Sucursal Async"}
+        )
+        assert sucursal_response.status_code == status.HTTP_201_CREATED
+        sucursal_id = sucursal_response.json()["id"]
+
+        producto_response = async_client.post(
+            f"/api/sucursales/{sucursal_id}/productos", json={"nombre": "Producto Async", "cantidad_stock": 10}
+        )
+        assert producto_response.status_code == status.HTTP_201_CREATED
+        producto_id = producto_response.json()["id"]
+
+        stock_response = async_client.patch(f"/api/productos/{producto_id}/stock", json={"stock": 25})
+        assert stock_response.status_code == status.HTTP_200_OK
+        assert stock_response.json()["cantidad_stock"] == 25
+
+        response = async_client.get(f"/api/franquicias/{franquicia_id}")
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["sucursales"][0]["nombre"] == "Sucursal Async"
+        assert data["sucursales"][0]["productos"][0]["cantidad_stock"] == 25
+
+        reporte = async_client.get(f"/api/franquicias/{franquicia_id}/reporte-stock")
+        assert reporte.status_code == status.HTTP_200_OK
+        assert reporte.json()[0]["producto_id"] == producto_id
+
+    def test_validaciones_async(self, async_client):
+        """Test que las validaciones de negocio se mantienen en el camino asíncrono"""
+        async_client.post("/api/franquicias/", json={"nombre": "Duplicada"})
+        response = async_client.post("/api/franquicias/", json={"nombre": "Duplicada"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Ya existe una franquicia" in response.json()["detail"]
+
+    def test_eliminar_franquicia_async(self, async_client):
+        """Test eliminar una franquicia con AsyncSession"""
+        franquicia_id = async_client.post("/api/franquicias/", json={"nombre": "Temporal"}).json()["id"]
+
+        response = async_client.delete(f"/api/franquicias/{franquicia_id}")
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert async_client.get(f"/api/franquicias/{franquicia_id}").status_code == status.HTTP_404_NOT_FOUND
+
+    def test_eliminar_franquicia_por_lotes_async(self, async_client):
+        """Test eliminar por lotes con una AsyncSession propia de la tarea"""
+        franquicia_id = async_client.post("/api/franquicias/", json={"nombre": "Lotes"}).json()["id"]
+        sucursal_id = async_client.post(
+            f"/api/franquicias/{franquicia_id}/sucursales", json={"nombre": "S"}
+        ).json()["id"]
+        lote = {"productos": [{"nombre": f"P{i}", "cantidad_stock": i} for i in range(25)]}
+        async_client.post(f"/api/sucursales/{sucursal_id}/productos/bulk", json=lote)
+
+        response = async_client.delete(
+            f"/api/franquicias/{franquicia_id}", params={"por_lotes": True, "tamano_lote": 10}
+        )
+        assert response.status_code == status.HTTP_202_ACCEPTED
+
+        estado = async_client.get(f"/api/franquicias/eliminaciones/{response.json()['id']}").json()
+        assert estado["estado"] == "completada"
+        assert estado["productos_eliminados"] == 25
+        assert async_client.get(f"/api/franquicias/{franquicia_id}").status_code == status.HTTP_404_NOT_FOUND
+
+    def test_exportar_async(self, async_client, monkeypatch):
+        """Test exportar en flujo leyendo el cursor con una AsyncSession"""
+        monkeypatch.setattr(settings, "export_batch_size", 10)
+        franquicia_id = async_client.post("/api/franquicias/", json={"nombre": "Export"}).json()["id"]
+        sucursal_id = async_client.post(
+            f"/api/franquicias/{franquicia_id}/sucursales", json={"nombre": "S"}
+        ).json()["id"]
+        lote = {"productos": [{"nombre": f"P{i}", "cantidad_stock": i} for i in range(25)]}
+        async_client.post(f"/api/sucursales/{sucursal_id}/productos/bulk", json=lote)
+
+        response = async_client.get("/api/productos/export", params={"franquicia_id": franquicia_id})
+
+        filas = [json.loads(linea) for linea in response.text.splitlines()]
+        assert [f["nombre"] for f in filas] == [f"P{i}" for i in range(25)]
+
+    def test_similares_async(self, async_client):
+        """Test que el índice de trigramas recibe los cambios confirmados por una AsyncSession"""
+        indices_trigramas.descartar()
+        franquicia_id = async_client.post("/api/franquicias/", json={"nombre": "Similares"}).json()["id"]
+        sucursal_id = async_client.post(
+            f"/api/franquicias/{franquicia_id}/sucursales", json={"nombre": "S"}
+        ).json()["id"]
+        url = f"/api/franquicias/{franquicia_id}/productos/similares"
+        assert async_client.get(url, params={"nombre": "empanada"}).json() == []
+
+        async_client.post(f"/api/sucursales/{sucursal_id}/productos", json={"nombre": "Empanada", "cantidad_stock": 1})
+
+        assert [p["nombre"] for p in async_client.get(url, params={"nombre": "empanda"}).json()] == ["Empanada"]
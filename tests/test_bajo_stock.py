@@ -0,0 +1,110 @@
+"""
+Tests para los productos con bajo stock (umbral de reposición)
+"""
+
+import pytest
+from fastapi import status
+from sqlalchemy import event
+
+from src.api_franquicias.models import Franquicia, Sucursal, Producto
+
+
+@pytest.fixture
+def catalogo(db_session):
+    """Dos franquicias; la primera con dos sucursales y productos con y sin stock_minimo"""
+    franquicia = Franquicia(nombre="Franquicia Reposición")
+    norte = Sucursal(nombre="Norte")
+    norte.productos = [
+        Producto(nombre="Pan", cantidad_stock=2),
+        Producto(nombre="Leche", cantidad_stock=8, stock_minimo=10),
+        Producto(nombre="Sal", cantidad_stock=1, stock_minimo=0),
+        Producto(nombre="Arroz", cantidad_stock=50),
+    ]
+    sur = Sucursal(nombre="Sur")
+    sur.productos = [Producto(nombre="Pan", cantidad_stock=5), Producto(nombre="Café", cantidad_stock=3, stock_minimo=3)]
+    franquicia.sucursales = [norte, sur]
+
+    otra = Franquicia(nombre="Otra")
+    otra_sucursal = Sucursal(nombre="Centro")
+    otra_sucursal.productos = [Producto(nombre="Pan", cantidad_stock=0, stock_minimo=5)]
+    otra.sucursales = [otra_sucursal]
+
+    db_session.add_all([franquicia, otra])
+    db_session.commit()
+    return franquicia.id
+
+
+def bajo_stock(client, franquicia_id, **params):
+    response = client.get(f"/api/franquicias/{franquicia_id}/productos/bajo-stock", params=params)
+    assert response.status_code == status.HTTP_200_OK
+    return [(p["nombre"], p["cantidad_stock"], p["umbral"]) for p in response.json()]
+
+
+class TestBajoStock:
+    """Tests para GET /api/franquicias/{id}/productos/bajo-stock"""
+
+    def test_umbral_de_la_consulta_y_propio(self, client, catalogo):
+        """Test que stock_minimo reemplaza al umbral de la consulta"""
+        assert bajo_stock(client, catalogo, umbral=5) == [
+            ("Pan", 2, 5), ("Leche", 8, 10), ("Café", 3, 3), ("Pan", 5, 5),
+        ]
+
+    def test_sin_umbral_solo_umbrales_propios(self, client, catalogo):
+        """Test que sin umbral sólo aparecen los productos con stock_minimo"""
+        assert bajo_stock(client, catalogo) == [("Leche", 8, 10), ("Café", 3, 3)]
+
+    def test_cambios_de_stock_y_umbral(self, client, catalogo):
+        """Test que el índice parcial refleja los cambios de stock y de umbral"""
+        productos = client.get("/api/productos/", params={"nombre_prefix": "Leche"}).json()["items"]
+        leche_id = productos[0]["id"]
+
+        client.patch(f"/api/productos/{leche_id}/stock", json={"stock": 20})
+        assert bajo_stock(client, catalogo) == [("Café", 3, 3)]
+
+        response = client.patch(f"/api/productos/{leche_id}/stock-minimo", json={"stock_minimo": 25})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["stock_minimo"] == 25
+        assert bajo_stock(client, catalogo) == [("Leche", 20, 25), ("Café", 3, 3)]
+
+        client.patch(f"/api/productos/{leche_id}/stock-minimo", json={"stock_minimo": None})
+        assert bajo_stock(client, catalogo, umbral=20) == [
+            ("Pan", 2, 20), ("Leche", 20, 20), ("Café", 3, 3), ("Pan", 5, 20),
+        ]
+
+    def test_franquicia_no_existe(self, client):
+        """Test bajo stock de una franquicia inexistente"""
+        response = client.get("/api/franquicias/999/productos/bajo-stock", params={"umbral": 1})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_stock_minimo_invalido(self, client, catalogo):
+        """Test umbral negativo y producto inexistente"""
+        response = client.patch("/api/productos/1/stock-minimo", json={"stock_minimo": -1})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+        response = client.patch("/api/productos/999/stock-minimo", json={"stock_minimo": 1})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_consulta_usa_indices(self, client, db_session, catalogo):
+        """Test que la consulta lee los índices de bajo stock y no recorre los productos"""
+        engine = db_session.get_bind()
+        sentencias = []
+
+        def capturar(conn, cursor, statement, parameters, context, executemany):
+            if "UNION ALL" in statement:
+                sentencias.append((statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", capturar)
+        try:
+            bajo_stock(client, catalogo, umbral=5)
+        finally:
+            event.remove(engine, "before_cursor_execute", capturar)
+
+        (statement, parameters), = sentencias
+        with engine.connect() as conn:
+            plan = [fila[-1] for fila in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+        busquedas = [paso for paso in plan if "productos" in paso]
+        assert any("ix_productos_bajo_stock (sucursal_id=? AND stock_minimo>?)" in paso for paso in busquedas), plan
+        assert any("ix_productos_sucursal_stock (sucursal_id=? AND cantidad_stock<?)" in paso for paso in busquedas), plan
+        assert not any(paso.startswith("SCAN productos") for paso in busquedas), plan
@@ -0,0 +1,88 @@
+"""
+Tests para la búsqueda de productos por nombre (FTS5)
+"""
+
+import pytest
+from fastapi import status
+
+
+@pytest.fixture
+def catalogo(client):
+    """Dos franquicias con productos; retorna los IDs de sus sucursales"""
+    sucursales = []
+    for franquicia, productos in (
+        ("A", ["Hamburguesa Clásica", "Hamburguesa Doble", "Papas Fritas", "Clásica de la casa"]),
+        ("B", ["Hamburguesa Vegana", "Café Americano"]),
+    ):
+        franquicia_id = client.post("/api/franquicias/", json={"nombre": franquicia}).json()["id"]
+        sucursal_id = client.post(
+            f"/api/franquicias/{franquicia_id}/sucursales", json={"nombre": "Centro"}
+        ).json()["id"]
+        lote = {"productos": [{"nombre": nombre, "cantidad_stock": 1} for nombre in productos]}
+        client.post(f"/api/sucursales/{sucursal_id}/productos/bulk", json=lote)
+        sucursales.append((franquicia_id, sucursal_id))
+    return sucursales
+
+
+def buscar(client, q, **params):
+    response = client.get("/api/productos/buscar", params={"q": q, **params})
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()
+
+
+def nombres(pagina):
+    return [p["nombre"] for p in pagina["items"]]
+
+
+class TestBusqueda:
+    """Tests para GET /api/productos/buscar"""
+
+    def test_prefijos_de_varias_palabras(self, client, catalogo):
+        """Test que cada palabra coincide como prefijo, sin mayúsculas ni acentos"""
+        assert nombres(buscar(client, "HAMB clasi")) == ["Hamburguesa Clásica"]
+        assert sorted(nombres(buscar(client, "hamburguesa"))) == [
+            "Hamburguesa Clásica", "Hamburguesa Doble", "Hamburguesa Vegana"
+        ]
+        assert nombres(buscar(client, "cafe")) == ["Café Americano"]
+        assert buscar(client, "pizza")["items"] == []
+
+    def test_orden_por_relevancia(self, client, catalogo):
+        """Test que los nombres más cortos con la palabra buscada aparecen primero"""
+        assert nombres(buscar(client, "clasica")) == ["Hamburguesa Clásica", "Clásica de la casa"]
+
+    def test_filtros(self, client, catalogo):
+        """Test restringir la búsqueda a una franquicia o sucursal"""
+        (franquicia_a, _), (_, sucursal_b) = catalogo
+
+        assert len(buscar(client, "hamb", franquicia_id=franquicia_a)["items"]) == 2
+        assert nombres(buscar(client, "hamb", sucursal_id=sucursal_b)) == ["Hamburguesa Vegana"]
+
+    def test_paginacion(self, client, catalogo):
+        """Test recorrer los resultados por páginas con el cursor"""
+        primera = buscar(client, "hamb", limit=2)
+        segunda = buscar(client, "hamb", limit=2, after=primera["next_cursor"])
+
+        assert primera["next_cursor"] == 2
+        assert segunda["next_cursor"] is None
+        assert len(set(nombres(primera) + nombres(segunda))) == 3
+
+    def test_indice_sincronizado(self, client, catalogo):
+        """Test que renombrar y eliminar productos actualiza el índice"""
+        producto_id = buscar(client, "papas")["items"][0]["id"]
+
+        client.post(f"/api/productos/{producto_id}", json={"nombre": "Yuca Frita"})
+        assert buscar(client, "papas")["items"] == []
+        assert nombres(buscar(client, "yuca")) == ["Yuca Frita"]
+
+        client.delete(f"/api/productos/{producto_id}")
+        assert buscar(client, "yuca")["items"] == []
+
+        # ON DELETE CASCADE también dispara el trigger del índice
+        client.delete(f"/api/franquicias/{catalogo[1][0]}")
+        assert buscar(client, "cafe")["items"] == []
+
+    def test_sin_palabras(self, client):
+        """Test que un texto sin palabras es un error de validación"""
+        response = client.get("/api/productos/buscar", params={"q": "*\"-"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,170 @@
+"""
+Tests para la caché de lectura de entidades por ID
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi import status
+
+from src.api_franquicias.models import Franquicia, Sucursal, Producto
+from src.api_franquicias.repositories import ProductoRepository, SucursalRepository
+from src.api_franquicias.repositories import cache as cache_modulo
+from src.api_franquicias.repositories.cache import cache_entidades
+
+
+@pytest.fixture
+def cache_activa(monkeypatch):
+    """Activa la caché global con 1 MiB y los TTL por defecto"""
+    monkeypatch.setattr(cache_entidades, "activa", True)
+    monkeypatch.setattr(cache_entidades, "max_bytes", 1024 * 1024)
+    return cache_entidades
+
+
+@pytest.fixture
+def productos(db_session):
+    """Una franquicia con una sucursal y tres productos; retorna sus IDs"""
+    franquicia = Franquicia(nombre="Franquicia Caché")
+    sucursal = Sucursal(nombre="Centro")
+    sucursal.productos = [Producto(nombre=f"P{i}", cantidad_stock=10 * i) for i in range(3)]
+    franquicia.sucursales = [sucursal]
+    db_session.add(franquicia)
+    db_session.commit()
+    return [producto.id for producto in sucursal.productos]
+
+
+class TestCacheEntidades:
+    """Tests para CacheEntidades y su uso en get_by_id"""
+
+    def test_lecturas_repetidas_sin_consultas(self, client, productos, cache_activa, count_queries):
+        """Test que la segunda lectura de un producto no consulta la base de datos"""
+        url = f"/api/productos/{productos[1]}"
+        assert client.get(url).json()["cantidad_stock"] == 10
+
+        with count_queries() as queries:
+            response = client.get(url)
+
+        assert response.json()["cantidad_stock"] == 10
+        assert queries.count == 0
+        assert cache_activa.estadisticas()["aciertos"] == 1
+
+    def test_mutaciones_invalidan(self, client, productos, cache_activa):
+        """Test que update, update_stock y delete invalidan la entrada"""
+        url = f"/api/productos/{productos[0]}"
+        client.get(url)
+
+        client.patch(f"{url}/stock", json={"stock": 99})
+        assert client.get(url).json()["cantidad_stock"] == 99
+
+        client.post(url, json={"nombre": "Renombrado"})
+        assert client.get(url).json()["nombre"] == "Renombrado"
+
+        assert client.delete(url).status_code == status.HTTP_204_NO_CONTENT
+        assert client.get(url).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_eliminacion_en_cascada(self, client, productos, cache_activa):
+        """Test que eliminar la sucursal invalida sus productos"""
+        url = f"/api/productos/{productos[2]}"
+        sucursal_id = client.get(url).json()["sucursal_id"]
+
+        assert client.delete(f"/api/sucursales/{sucursal_id}").status_code == status.HTTP_204_NO_CONTENT
+
+        assert client.get(url).status_code == status.HTTP_404_NOT_FOUND
+        assert client.get(f"/api/sucursales/{sucursal_id}").status_code == status.HTTP_404_NOT_FOUND
+
+    def test_desalojo_lru_por_memoria(self, db_session, productos, cache_activa, monkeypatch):
+        """Test que al superar el presupuesto se desaloja la entrada menos usada"""
+        repo = ProductoRepository(db_session)
+        repo.get_by_id(productos[0])
+        tamano = cache_activa.estadisticas()["bytes"]
+        monkeypatch.setattr(cache_activa, "max_bytes", 2 * tamano + tamano // 2)
+
+        repo.get_by_id(productos[1])
+        repo.get_by_id(productos[0])
+        repo.get_by_id(productos[2])
+
+        estadisticas = cache_activa.estadisticas()
+        assert estadisticas["entradas"] == 2
+        assert estadisticas["desalojos"] == 1
+        assert estadisticas["bytes"] <= estadisticas["max_bytes"]
+        repo.get_by_id(productos[0])
+        repo.get_by_id(productos[1])
+        assert cache_activa.estadisticas()["aciertos"] == 2
+
+    def test_ttl_por_entidad(self, db_session, productos, cache_activa, monkeypatch):
+        """Test que las entradas expiran según el TTL de su tabla"""
+        reloj = [1000.0]
+        monkeypatch.setattr(cache_modulo, "time", SimpleNamespace(monotonic=lambda: reloj[0]))
+        monkeypatch.setattr(cache_activa, "ttls", {"productos": 30.0, "sucursales": 0})
+        repo = ProductoRepository(db_session)
+        sucursal_repo = SucursalRepository(db_session)
+        sucursal_id = repo.get_by_id(productos[0]).sucursal_id
+
+        reloj[0] += 29
+        repo.get_by_id(productos[0])
+        reloj[0] += 2
+        repo.get_by_id(productos[0])
+        sucursal_repo.get_by_id(sucursal_id)
+        sucursal_repo.get_by_id(sucursal_id)
+
+        estadisticas = cache_activa.estadisticas()
+        assert (estadisticas["aciertos"], estadisticas["expiraciones"], estadisticas["entradas"]) == (1, 1, 1)
+
+    def test_escritura_revertida_y_otra_sesion(self, test_db, productos, cache_activa):
+        """Test que otra sesión no ve los cambios hasta confirmarlos"""
+        escritura, lectura = test_db(), test_db()
+        try:
+            ProductoRepository(lectura).get_by_id(productos[0])
+            repo = ProductoRepository(escritura)
+
+            assert repo.update_stock(productos[0], 5).cantidad_stock == 5
+            escritura.rollback()
+            assert ProductoRepository(lectura).get_by_id(productos[0]).cantidad_stock == 0
+            lectura.commit()
+
+            repo.update_stock(productos[0], 7)
+            assert ProductoRepository(lectura).get_by_id(productos[0]).cantidad_stock == 0
+            lectura.commit()
+            escritura.commit()
+            assert ProductoRepository(lectura).get_by_id(productos[0]).cantidad_stock == 7
+            assert repo.get_by_id(productos[0]).cantidad_stock == 7
+        finally:
+            escritura.close()
+            lectura.close()
+
+    def test_expand_no_usa_la_cache(self, client, productos, cache_activa, count_queries):
+        """Test que las lecturas con relaciones consultan siempre la base de datos"""
+        sucursal_id = client.get(f"/api/productos/{productos[0]}").json()["sucursal_id"]
+        url = f"/api/sucursales/{sucursal_id}"
+        client.get(url, params={"expand": "productos"})
+
+        with count_queries() as queries:
+            response = client.get(url, params={"expand": "productos"})
+
+        assert len(response.json()["productos"]) == 3
+        assert queries.count > 0
+
+    def test_contadores_en_health(self, client, productos, cache_activa):
+        """Test que /health/cache expone los contadores de una clave muy leída"""
+        for _ in range(20):
+            client.get(f"/api/productos/{productos[0]}")
+
+        response = client.get("/health/cache")
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["activa"] is True
+        assert (data["aciertos"], data["fallos"], data["entradas"]) == (19, 1, 1)
+        assert data["tasa_aciertos"] >= 0.9
+
+    def test_desactivada(self, client, productos, count_queries, monkeypatch):
+        """Test que sin cache_enabled cada lectura consulta la base de datos"""
+        monkeypatch.setattr(cache_entidades, "activa", False)
+        url = f"/api/productos/{productos[0]}"
+        client.get(url)
+
+        with count_queries() as queries:
+            client.get(url)
+
+        assert queries.count == 1
+        assert client.get("/health/cache").json()["activa"] is False
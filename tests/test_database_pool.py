@@ -0,0 +1,111 @@
+"""
+Tests para la configuración y estadísticas del pool de conexiones
+"""
+
+import pytest
+from fastapi import status
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import NullPool, QueuePool, SingletonThreadPool, StaticPool
+
+from src.api_franquicias.config import Settings
+from src.api_franquicias.database import (
+    PoolStatistics,
+    build_engine_options,
+    instrumented_pool_class,
+)
+
+
+class TestPoolConfiguration:
+    """Tests para la construcción de las opciones del pool"""
+
+    def test_auto_sqlite_archivo_usa_queue_pool(self):
+        """Test SQLite en archivo usa QueuePool con los tamaños configurados"""
+        config = Settings(db_pool_size=3, db_max_overflow=2, db_pool_timeout=5)
+        opciones = build_engine_options("sqlite:///./archivo.db", config)
+
+        assert opciones["poolclass"] is QueuePool
+        assert opciones["pool_size"] == 3
+        assert opciones["max_overflow"] == 2
+        assert opciones["pool_timeout"] == 5
+        assert opciones["connect_args"]["check_same_thread"] is False
+
+    def test_auto_sqlite_memoria_usa_static_pool(self):
+        """Test SQLite en memoria comparte una única conexión"""
+        opciones = build_engine_options("sqlite://", Settings())
+
+        assert opciones["poolclass"] is StaticPool
+        assert "pool_size" not in opciones
+
+    def test_pool_por_hilo_y_null(self):
+        """Test selección explícita de SingletonThreadPool y NullPool"""
+        singleton = build_engine_options("sqlite:///./archivo.db", Settings(db_pool_class="singleton"))
+        null = build_engine_options("sqlite:///./archivo.db", Settings(db_pool_class="null"))
+
+        assert singleton["poolclass"] is SingletonThreadPool
+        assert null["poolclass"] is NullPool
+
+    def test_postgresql_sin_connect_args_sqlite(self):
+        """Test PostgreSQL recibe pre-ping y recycle pero no argumentos de SQLite"""
+        config = Settings(db_pool_recycle=600, db_pool_pre_ping=False)
+        opciones = build_engine_options("postgresql://u:p@host/db", config)
+
+        assert opciones["poolclass"] is QueuePool
+        assert opciones["pool_recycle"] == 600
+        assert opciones["pool_pre_ping"] is False
+        assert "connect_args" not in opciones
+
+    def test_pool_no_soportado(self):
+        """Test valor inválido de db_pool_class"""
+        with pytest.raises(ValueError):
+            build_engine_options("sqlite:///./archivo.db", Settings(db_pool_class="inexistente"))
+
+
+class TestPoolStatistics:
+    """Tests para las estadísticas del pool"""
+
+    def test_registra_checkouts_y_checkins(self, tmp_path):
+        """Test que cada conexión entregada y devuelta queda registrada"""
+        estadisticas = PoolStatistics()
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=instrumented_pool_class(QueuePool, estadisticas),
+            pool_size=2,
+        )
+        for _ in range(3):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+        datos = estadisticas.snapshot(engine.pool)
+        assert datos["checkouts"] == 3
+        assert datos["checkins"] == 3
+        assert datos["checked_out"] == 0
+        assert datos["size"] == 2
+        engine.dispose()
+
+    def test_registra_timeouts(self, tmp_path):
+        """Test que un pool agotado registra el timeout"""
+        estadisticas = PoolStatistics()
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=instrumented_pool_class(QueuePool, estadisticas),
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.05,
+        )
+        conexion = engine.connect()
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        conexion.close()
+
+        assert estadisticas.timeouts == 1
+        assert estadisticas.checkouts == 1
+        engine.dispose()
+
+    def test_endpoint_estadisticas_pool(self, client):
+        """Test endpoint de estadísticas del pool"""
+        response = client.get("/health/pool")
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert "checkouts" in data["sync"]
+        assert "wait_avg_ms" in data["sync"]
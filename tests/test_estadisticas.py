@@ -0,0 +1,91 @@
+"""
+Tests para las estadísticas de inventario de una franquicia
+"""
+
+import pytest
+from fastapi import status
+
+
+@pytest.fixture
+def franquicia_id(client, sample_franquicia_data):
+    """Franquicia con dos sucursales con productos y una sucursal vacía"""
+    franquicia_id = client.post("/api/franquicias/", json=sample_franquicia_data).json()["id"]
+    stocks = {
+        "Norte": [0, 10, 20, 30],
+        "Sur": [0, 0, 40, 50, 60, 70],
+        "Vacía": [],
+    }
+    for nombre, cantidades in stocks.items():
+        sucursal_id = client.post(f"/api/franquicias/{franquicia_id}/sucursales", json={"nombre": nombre}).json()["id"]
+        if cantidades:
+            lote = {"productos": [{"nombre": f"P{i}", "cantidad_stock": c} for i, c in enumerate(cantidades)]}
+            client.post(f"/api/sucursales/{sucursal_id}/productos/bulk", json=lote)
+    return franquicia_id
+
+
+class TestEstadisticasFranquicia:
+    """Tests para GET /api/franquicias/{id}/estadisticas"""
+
+    def test_estadisticas_de_la_franquicia(self, client, franquicia_id):
+        """Test indicadores agregados de toda la franquicia"""
+        response = client.get(f"/api/franquicias/{franquicia_id}/estadisticas")
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["total_sucursales"] == 3
+        assert data["total_productos"] == 10
+        assert data["total_unidades"] == 280
+        assert data["stock_promedio"] == 28.0
+        assert data["stock_minimo"] == 0
+        assert data["stock_maximo"] == 70
+        assert data["productos_sin_stock"] == 3
+        # Stock ordenado: 0 0 0 10 20 30 40 50 60 70 (rango más cercano)
+        assert data["percentiles"] == {"p25": 0, "p50": 20, "p75": 50, "p90": 60}
+        assert data["sucursales"] is None
+
+    def test_desglose_por_sucursal(self, client, franquicia_id):
+        """Test estadísticas de cada sucursal, incluidas las vacías"""
+        response = client.get(f"/api/franquicias/{franquicia_id}/estadisticas", params={"por_sucursal": True})
+
+        sucursales = {s["sucursal_nombre"]: s for s in response.json()["sucursales"]}
+        assert sucursales["Norte"]["total_productos"] == 4
+        assert sucursales["Norte"]["stock_promedio"] == 15.0
+        assert sucursales["Sur"]["productos_sin_stock"] == 2
+        assert sucursales["Sur"]["stock_maximo"] == 70
+        assert sucursales["Vacía"] == {
+            "sucursal_id": sucursales["Vacía"]["sucursal_id"],
+            "sucursal_nombre": "Vacía",
+            "total_productos": 0,
+            "total_unidades": 0,
+            "stock_promedio": None,
+            "stock_minimo": None,
+            "stock_maximo": None,
+            "productos_sin_stock": 0,
+        }
+
+    def test_franquicia_sin_productos(self, client, sample_franquicia_data):
+        """Test estadísticas de una franquicia sin sucursales"""
+        franquicia_id = client.post("/api/franquicias/", json=sample_franquicia_data).json()["id"]
+
+        data = client.get(f"/api/franquicias/{franquicia_id}/estadisticas").json()
+
+        assert data["total_sucursales"] == 0
+        assert data["total_productos"] == 0
+        assert data["total_unidades"] == 0
+        assert data["stock_promedio"] is None
+        assert data["percentiles"] == {"p25": None, "p50": None, "p75": None, "p90": None}
+
+    def test_consultas_agregadas(self, client, franquicia_id, count_queries):
+        """Test que las estadísticas no cargan las sucursales ni los productos"""
+        with count_queries() as queries:
+            client.get(f"/api/franquicias/{franquicia_id}/estadisticas", params={"por_sucursal": True})
+
+        # Existencia, agregado total, percentiles y agregado por sucursal
+        assert queries.count == 4
+        assert "GROUP BY" in queries.statements[3]
+
+    def test_franquicia_no_existe(self, client):
+        """Test estadísticas de una franquicia que no existe"""
+        response = client.get("/api/franquicias/999/estadisticas")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,153 @@
+"""
+Tests para la exportación de inventario en flujo
+"""
+
+import csv
+import io
+import json
+
+import pytest
+from fastapi import status
+
+from src.api_franquicias import database
+from src.api_franquicias.cli import main
+from src.api_franquicias.config import settings
+from src.api_franquicias.repositories.producto_repository import ProductoRepository
+from src.api_franquicias.services import exportacion_columnar
+
+
+@pytest.fixture
+def franquicias(client):
+    """Dos franquicias con una sucursal y productos; retorna sus IDs"""
+    ids = []
+    for nombre, productos in (("A", ["Café", "Pan, integral"]), ("B", ["Leche"])):
+        franquicia_id = client.post("/api/franquicias/", json={"nombre": nombre}).json()["id"]
+        sucursal_id = client.post(
+            f"/api/franquicias/{franquicia_id}/sucursales", json={"nombre": "Centro"}
+        ).json()["id"]
+        for i, producto in enumerate(productos):
+            client.post(
+                f"/api/sucursales/{sucursal_id}/productos", json={"nombre": producto, "cantidad_stock": i + 1}
+            )
+        ids.append(franquicia_id)
+    return ids
+
+
+class TestExportacion:
+    """Tests para GET /api/productos/export"""
+
+    def test_exportar_ndjson(self, client, franquicias):
+        """Test exportar todos los productos como NDJSON ordenados por ID"""
+        response = client.get("/api/productos/export")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/x-ndjson"
+        filas = [json.loads(linea) for linea in response.text.splitlines()]
+        assert [f["nombre"] for f in filas] == ["Café", "Pan, integral", "Leche"]
+        assert list(filas[0]) == [
+            "id", "sucursal_id", "nombre", "cantidad_stock", "fecha_creacion", "fecha_actualizacion"
+        ]
+        assert [f["id"] for f in filas] == sorted(f["id"] for f in filas)
+
+    def test_exportar_csv_por_franquicia(self, client, franquicias):
+        """Test exportar como CSV sólo los productos de una franquicia"""
+        response = client.get("/api/productos/export", params={"format": "csv", "franquicia_id": franquicias[0]})
+
+        assert response.headers["content-type"] == "text/csv; charset=utf-8"
+        assert response.headers["content-disposition"] == 'attachment; filename="productos.csv"'
+        filas = list(csv.DictReader(io.StringIO(response.text)))
+        assert [(f["nombre"], f["cantidad_stock"]) for f in filas] == [("Café", "1"), ("Pan, integral", "2")]
+
+    def test_csv_se_puede_importar(self, client, franquicias):
+        """Test que el CSV exportado vuelve a importarse sin errores"""
+        exportado = client.get("/api/productos/export", params={"format": "csv"}).content
+
+        tarea = client.post("/api/productos/import", params={"format": "csv"}, content=exportado).json()
+        tarea = client.get(f"/api/productos/importaciones/{tarea['id']}").json()
+
+        assert tarea["importados"] == 3
+        assert tarea["errores"] == 0
+
+    def test_exportar_vacio(self, client):
+        """Test que sin productos el CSV sólo tiene el encabezado"""
+        response = client.get("/api/productos/export", params={"format": "csv"})
+
+        assert response.text.strip() == "id,sucursal_id,nombre,cantidad_stock,fecha_creacion,fecha_actualizacion"
+
+    def test_franquicia_no_existe(self, client):
+        """Test exportar una franquicia que no existe"""
+        response = client.get("/api/productos/export", params={"franquicia_id": 999})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_lectura_por_lotes(self, client, franquicias, db_session):
+        """Test que el repositorio entrega las filas en lotes del cursor"""
+        lotes = list(ProductoRepository(db_session).iter_export(2))
+
+        assert [len(lote) for lote in lotes] == [2, 1]
+
+
+@pytest.fixture
+def pa():
+    """pyarrow (dependencia opcional de la exportación columnar)"""
+    pytest.importorskip("pyarrow.parquet")
+    return exportacion_columnar.requerir_pyarrow()
+
+
+class TestExportacionColumnar:
+    """Tests para GET /api/productos/export/inventario"""
+
+    def test_exportar_parquet(self, client, franquicias, pa, monkeypatch):
+        """Test exportar el inventario unido a sucursales y franquicias como Parquet"""
+        monkeypatch.setattr(settings, "export_batch_size", 2)
+
+        response = client.get("/api/productos/export/inventario")
+
+        assert response.headers["content-type"] == "application/vnd.apache.parquet"
+        archivo = pa.parquet.ParquetFile(pa.BufferReader(response.content))
+        assert archivo.num_row_groups == 2
+        tabla = archivo.read()
+        assert tabla.schema == exportacion_columnar.esquema_inventario()
+        assert tabla.column("producto_nombre").to_pylist() == ["Café", "Pan, integral", "Leche"]
+        assert tabla.column("franquicia_nombre").to_pylist() == ["A", "A", "B"]
+        assert tabla.column("sucursal_nombre").to_pylist() == ["Centro"] * 3
+
+    def test_exportar_arrow_por_franquicia(self, client, franquicias, pa):
+        """Test exportar una franquicia en el formato de flujo de Arrow IPC"""
+        response = client.get(
+            "/api/productos/export/inventario", params={"format": "arrow", "franquicia_id": franquicias[1]}
+        )
+
+        assert response.headers["content-disposition"] == 'attachment; filename="inventario.arrow"'
+        tabla = pa.ipc.open_stream(response.content).read_all()
+        assert tabla.to_pylist()[0]["producto_nombre"] == "Leche"
+        assert tabla.num_rows == 1
+
+    def test_exportar_vacio(self, client, pa):
+        """Test que sin productos el archivo sólo tiene el esquema"""
+        response = client.get("/api/productos/export/inventario")
+
+        tabla = pa.parquet.read_table(pa.BufferReader(response.content))
+        assert tabla.num_rows == 0
+        assert tabla.schema == exportacion_columnar.esquema_inventario()
+
+    def test_sin_pyarrow(self, client, monkeypatch):
+        """Test que sin pyarrow la exportación columnar responde 501"""
+        def sin_pyarrow():
+            raise RuntimeError("La exportación Arrow/Parquet requiere pyarrow")
+        monkeypatch.setattr(exportacion_columnar, "requerir_pyarrow", sin_pyarrow)
+
+        response = client.get("/api/productos/export/inventario")
+
+        assert response.status_code == status.HTTP_501_NOT_IMPLEMENTED
+
+    def test_exportar_cli(self, client, franquicias, pa, test_db, monkeypatch, tmp_path):
+        """Test exportar el inventario a un archivo desde la línea de comandos"""
+        monkeypatch.setattr(database, "SessionLocal", test_db)
+        monkeypatch.setattr(database, "migrate", lambda: None)
+        ruta = tmp_path / "inventario.parquet"
+
+        assert main(["export", str(ruta), "--franquicia-id", str(franquicias[0])]) == 0
+
+        tabla = pa.parquet.read_table(str(ruta))
+        assert tabla.column("producto_nombre").to_pylist() == ["Café", "Pan, integral"]
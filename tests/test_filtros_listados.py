@@ -0,0 +1,162 @@
+"""
+Tests para los filtros y el orden de los listados de productos
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import status
+from sqlalchemy import event, text
+
+from src.api_franquicias.models import Franquicia, Sucursal, Producto
+
+
+@pytest.fixture
+def sucursal_con_productos(db_session):
+    """Una sucursal con 25 productos (stock = posición, en desorden) y otra con uno"""
+    franquicia = Franquicia(nombre="Franquicia Filtrada")
+    sucursal = Sucursal(nombre="Sucursal Grande")
+    sucursal.productos = [
+        Producto(nombre=f"Producto {i:02d}", cantidad_stock=(i * 7) % 25) for i in range(25)
+    ]
+    otra = Sucursal(nombre="Sucursal Pequeña")
+    otra.productos = [Producto(nombre="Aislado", cantidad_stock=3)]
+    franquicia.sucursales = [sucursal, otra]
+    db_session.add(franquicia)
+    db_session.commit()
+    return sucursal.id
+
+
+def recorrer(client, url, limit, **params):
+    """Recorre todas las páginas de un listado y retorna sus productos"""
+    productos, after = [], None
+    while True:
+        pagina_params = {"limit": limit, **params}
+        if after is not None:
+            pagina_params["after"] = after
+        response = client.get(url, params=pagina_params)
+        assert response.status_code == status.HTTP_200_OK, response.text
+        data = response.json()
+        productos.extend(data["items"])
+        after = data["next_cursor"]
+        if after is None:
+            return productos
+
+
+class TestFiltrosListados:
+    """Tests para stock_min, stock_max, nombre_prefix, updated_since y sort"""
+
+    @pytest.mark.parametrize("sort", ["stock", "-stock"])
+    def test_orden_por_stock_paginado(self, client, sucursal_con_productos, sort):
+        """Test recorrer por stock, con empates desempatados por ID"""
+        productos = recorrer(client, "/api/productos/", limit=4, sort=sort)
+
+        claves = [(p["cantidad_stock"], p["id"]) for p in productos]
+        assert len(claves) == 26
+        assert claves == sorted(claves, reverse=sort.startswith("-"))
+
+    def test_rango_de_stock(self, client, sucursal_con_productos):
+        """Test que el rango de stock es inclusivo y ordena por stock"""
+        productos = recorrer(
+            client, f"/api/sucursales/{sucursal_con_productos}/productos", limit=2,
+            stock_min=5, stock_max=9
+        )
+
+        assert [p["cantidad_stock"] for p in productos] == [5, 6, 7, 8, 9]
+
+    def test_prefijo_del_nombre(self, client, sucursal_con_productos):
+        """Test que el prefijo distingue mayúsculas y trata los comodines como texto"""
+        productos = recorrer(client, "/api/productos/", limit=3, sort="-nombre", nombre_prefix="Producto 1")
+
+        assert [p["nombre"] for p in productos] == [f"Producto {i}" for i in range(19, 9, -1)]
+        assert recorrer(client, "/api/productos/", limit=3, nombre_prefix="producto") == []
+        assert recorrer(client, "/api/productos/", limit=3, nombre_prefix="Producto_") == []
+
+    def test_orden_por_fecha_con_empates(self, client, sucursal_con_productos):
+        """Test que las fechas iguales (misma resolución de segundos) se paginan por ID"""
+        productos = recorrer(
+            client, f"/api/sucursales/{sucursal_con_productos}/productos", limit=4,
+            sort="-fecha_actualizacion"
+        )
+
+        assert [p["id"] for p in productos] == sorted((p["id"] for p in productos), reverse=True)
+        assert len(productos) == 25
+        assert all(p["fecha_actualizacion"] is not None for p in productos)
+
+    def test_actualizados_desde(self, client, db_session, sucursal_con_productos):
+        """Test que updated_since retorna los productos modificados desde la fecha"""
+        producto_id = recorrer(client, "/api/productos/", limit=1, nombre_prefix="Aislado")[0]["id"]
+        db_session.execute(text(
+            "UPDATE productos SET fecha_actualizacion = '2030-01-01 10:00:00' WHERE id = :id"
+        ), {"id": producto_id})
+        db_session.commit()
+
+        desde = datetime(2030, 1, 1, 5, 0, tzinfo=timezone(timedelta(hours=-5)))
+        productos = recorrer(client, "/api/productos/", limit=5, updated_since=desde.isoformat())
+
+        assert [p["id"] for p in productos] == [producto_id]
+        assert len(recorrer(client, "/api/productos/", limit=50, updated_since="2000-01-01T00:00:00")) == 26
+
+    @pytest.mark.parametrize("params", [
+        {"stock_min": 1, "nombre_prefix": "P"},
+        {"updated_since": "2000-01-01T00:00:00", "stock_max": 3},
+        {"stock_min": 1, "sort": "nombre"},
+        {"nombre_prefix": "P", "sort": "-fecha_actualizacion"},
+        {"stock_min": 5, "stock_max": 4},
+        {"sort": "stock", "after": "no-es-un-cursor"},
+        {"after": "abc"},
+    ])
+    def test_combinaciones_rechazadas(self, client, sucursal_con_productos, params):
+        """Test que los filtros que no se resuelven con un índice se rechazan"""
+        for url in ("/api/productos/", f"/api/sucursales/{sucursal_con_productos}/productos"):
+            response = client.get(url, params=params)
+
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_cursor_de_otro_orden(self, client, sucursal_con_productos):
+        """Test que el cursor de un orden no se acepta en otro"""
+        cursor = client.get("/api/productos/", params={"sort": "nombre", "limit": 1}).json()["next_cursor"]
+
+        response = client.get("/api/productos/", params={"sort": "stock", "after": cursor})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_orden_invalido(self, client):
+        """Test que sort sólo admite las columnas indexadas"""
+        response = client.get("/api/productos/", params={"sort": "sucursal_id"})
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    @pytest.mark.parametrize("params", [
+        {"sort": "-stock"},
+        {"stock_min": 3, "stock_max": 10},
+        {"nombre_prefix": "Producto"},
+        {"sort": "fecha_actualizacion"},
+        {"updated_since": "2000-01-01T00:00:00", "sort": "-fecha_actualizacion"},
+    ])
+    def test_consultas_usan_indices(self, client, db_session, sucursal_con_productos, params):
+        """Test que cada página se lee de un índice, sin recorrer ni ordenar la tabla"""
+        engine = db_session.get_bind()
+        sentencias = []
+
+        def capturar(conn, cursor, statement, parameters, context, executemany):
+            if "FROM productos" in statement:
+                sentencias.append((statement, parameters))
+
+        cursor = client.get("/api/productos/", params={**params, "limit": 2}).json()["next_cursor"]
+        event.listen(engine, "before_cursor_execute", capturar)
+        try:
+            for url in ("/api/productos/", f"/api/sucursales/{sucursal_con_productos}/productos"):
+                response = client.get(url, params={**params, "limit": 2, "after": cursor})
+                assert response.status_code == status.HTTP_200_OK
+        finally:
+            event.remove(engine, "before_cursor_execute", capturar)
+
+        assert len(sentencias) == 2
+        with engine.connect() as conn:
+            for statement, parameters in sentencias:
+                plan = " | ".join(
+                    fila[-1] for fila in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                )
+                assert "USING INDEX" in plan or "USING COVERING INDEX" in plan, plan
+                assert "TEMP B-TREE" not in plan, plan
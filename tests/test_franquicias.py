@@ -56,6 +56,35 @@ class TestFranquiciaController:
         
         assert response.status_code == status.HTTP_404_NOT_FOUND
 
+    def test_obtener_franquicia_expand(self, client, sample_franquicia_data, sample_sucursal_data, sample_producto_data):
+        """Test obtener franquicia con los distintos niveles de expansión"""
+        # Crear franquicia con una sucursal y un producto
+        franquicia_id = client.post("/api/franquicias/", json=sample_franquicia_data).json()["id"]
+        sucursal_id = client.post(f"/api/franquicias/{franquicia_id}/sucursales", json=sample_sucursal_data).json()["id"]
+        client.post(f"/api/sucursales/{sucursal_id}/productos", json=sample_producto_data)
+        
+        # Sin expansión: sólo los datos de la franquicia
+        data = client.get(f"/api/franquicias/{franquicia_id}?expand=none").json()
+        assert data["nombre"] == sample_franquicia_data["nombre"]
+        assert "sucursales" not in data
+        
+        # Sucursales sin productos
+        data = client.get(f"/api/franquicias/{franquicia_id}?expand=sucursales").json()
+        assert data["sucursales"][0]["id"] == sucursal_id
+        assert "productos" not in data["sucursales"][0]
+        
+        # Árbol completo (valor por defecto)
+        data = client.get(f"/api/franquicias/{franquicia_id}").json()
+        assert data["sucursales"][0]["productos"][0]["nombre"] == sample_producto_data["nombre"]
+
+    def test_obtener_franquicia_expand_invalido(self, client, sample_franquicia_data):
+        """Test obtener franquicia con un valor de expand no soportado"""
+        franquicia_id = client.post("/api/franquicias/", json=sample_franquicia_data).json()["id"]
+        
+        response = client.get(f"/api/franquicias/{franquicia_id}?expand=productos")
+        
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
     def test_obtener_todas_franquicias(self, client, sample_franquicia_data):
         """Test obtener todas las franquicias"""
         # Crear algunas franquicias
@@ -67,7 +96,8 @@ class TestFranquiciaController:
         
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
-        assert len(data) == 2
+        assert len(data["items"]) == 2
+        assert data["next_cursor"] is None
 
     def test_actualizar_franquicia(self, client, sample_franquicia_data):
         """Test actualizar franquicia"""
@@ -129,3 +159,67 @@ class TestFranquiciaController:
         response = client.get("/api/franquicias/999/reporte-stock")
         
         assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.fixture
+def franquicia_grande(client):
+    """Crea una franquicia con tres sucursales de 50 productos cada una"""
+    franquicia_id = client.post("/api/franquicias/", json={"nombre": "Grande"}).json()["id"]
+    for s in range(3):
+        sucursal_id = client.post(
+            f"/api/franquicias/{franquicia_id}/sucursales", json={"nombre": f"S{s}"}
+        ).json()["id"]
+        lote = {"productos": [{"nombre": f"P{i}", "cantidad_stock": i} for i in range(50)]}
+        client.post(f"/api/sucursales/{sucursal_id}/productos/bulk", json=lote)
+    return franquicia_id
+
+
+class TestEliminacionFranquicia:
+    """Tests para la eliminación en cascada y por lotes de franquicias"""
+
+    def test_eliminar_en_cascada_sin_cargar_filas(self, client, franquicia_grande, count_queries):
+        """Test que la eliminación directa es un único DELETE y borra las filas dependientes"""
+        otra_id = client.post("/api/franquicias/", json={"nombre": "Otra"}).json()["id"]
+        sucursal_id = client.post(f"/api/franquicias/{otra_id}/sucursales", json={"nombre": "S"}).json()["id"]
+        client.post(f"/api/sucursales/{sucursal_id}/productos", json={"nombre": "P", "cantidad_stock": 1})
+
+        with count_queries() as queries:
+            response = client.delete(f"/api/franquicias/{franquicia_grande}")
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        deletes = [s for s in queries.statements if s.startswith("DELETE")]
+        assert len(deletes) == 1
+        assert client.get(f"/api/franquicias/{otra_id}").json()["sucursales"][0]["productos"][0]["nombre"] == "P"
+        productos = client.get("/api/productos/", params={"limit": 1000}).json()["items"]
+        assert len(productos) == 1
+
+    def test_eliminar_por_lotes(self, client, franquicia_grande):
+        """Test eliminar por lotes en segundo plano y consultar el avance"""
+        response = client.delete(
+            f"/api/franquicias/{franquicia_grande}", params={"por_lotes": True, "tamano_lote": 40}
+        )
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        tarea = response.json()
+        assert tarea["total_productos"] == 150
+        assert response.headers["location"] == f"/api/franquicias/eliminaciones/{tarea['id']}"
+
+        # TestClient ejecuta las tareas en segundo plano antes de retornar
+        estado = client.get(f"/api/franquicias/eliminaciones/{tarea['id']}").json()
+        assert estado["estado"] == "completada"
+        assert estado["productos_eliminados"] == 150
+        assert estado["sucursales_eliminadas"] == 3
+        assert estado["progreso"] == 100.0
+        assert client.get(f"/api/franquicias/{franquicia_grande}").status_code == status.HTTP_404_NOT_FOUND
+
+    def test_eliminar_por_lotes_no_existe(self, client):
+        """Test eliminar por lotes una franquicia que no existe"""
+        response = client.delete("/api/franquicias/999", params={"por_lotes": True})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_eliminacion_no_existe(self, client):
+        """Test consultar una tarea de eliminación inexistente"""
+        response = client.get("/api/franquicias/eliminaciones/desconocida")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
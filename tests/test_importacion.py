@@ -0,0 +1,139 @@
+"""
+Tests para la importación de inventario desde CSV y NDJSON
+"""
+
+import json
+
+import pytest
+from fastapi import status
+
+from src.api_franquicias import database
+from src.api_franquicias.cli import main
+
+
+@pytest.fixture
+def sucursales(client):
+    """Dos sucursales de una franquicia; retorna sus IDs"""
+    franquicia_id = client.post("/api/franquicias/", json={"nombre": "F"}).json()["id"]
+    return [
+        client.post(f"/api/franquicias/{franquicia_id}/sucursales", json={"nombre": nombre}).json()["id"]
+        for nombre in ("Centro", "Norte")
+    ]
+
+
+def importar(client, contenido, **params):
+    """Importa un archivo y retorna el estado final de la tarea"""
+    response = client.post("/api/productos/import", params=params, content=contenido.encode("utf-8"))
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    tarea = response.json()
+    assert response.headers["location"] == f"/api/productos/importaciones/{tarea['id']}"
+
+    # TestClient ejecuta las tareas en segundo plano antes de retornar
+    return client.get(f"/api/productos/importaciones/{tarea['id']}").json()
+
+
+def productos_de(client, sucursal_id):
+    productos = client.get(f"/api/sucursales/{sucursal_id}/productos").json()["items"]
+    return {p["nombre"]: p["cantidad_stock"] for p in productos}
+
+
+class TestImportacion:
+    """Tests para POST /api/productos/import"""
+
+    def test_importar_csv(self, client, sucursales):
+        """Test importar un CSV con filas válidas e inválidas"""
+        centro, norte = sucursales
+        contenido = (
+            "﻿sucursal_id,nombre,cantidad_stock\n"
+            f"{centro},Café,10\n"
+            f"{norte},\"Pan, integral\",5\n"
+            f"{centro},,3\n"
+            f"{norte},Leche,-1\n"
+            f"999,Azúcar,2\n"
+        )
+
+        tarea = importar(client, contenido, format="csv", tamano_lote=2)
+
+        assert tarea["estado"] == "completada"
+        assert tarea["progreso"] == 100.0
+        assert tarea["filas_procesadas"] == 5
+        assert tarea["importados"] == 2
+        assert tarea["errores"] == 3
+        assert [e["linea"] for e in tarea["detalle_errores"]] == [4, 5, 6]
+        assert "Sucursal con ID 999 no encontrada" in tarea["detalle_errores"][2]["error"]
+        assert productos_de(client, centro) == {"Café": 10}
+        assert productos_de(client, norte) == {"Pan, integral": 5}
+
+    def test_importar_ndjson(self, client, sucursales):
+        """Test importar NDJSON con la sucursal por defecto"""
+        centro, norte = sucursales
+        lineas = [
+            json.dumps({"nombre": "A", "cantidad_stock": 1}),
+            "",
+            json.dumps({"nombre": "B", "cantidad_stock": 2, "sucursal_id": norte}),
+            "{no es json",
+            json.dumps([1, 2]),
+        ]
+
+        tarea = importar(client, "\n".join(lineas), format="ndjson", sucursal_id=centro)
+
+        assert tarea["importados"] == 2
+        assert [e["linea"] for e in tarea["detalle_errores"]] == [4, 5]
+        assert productos_de(client, centro) == {"A": 1}
+        assert productos_de(client, norte) == {"B": 2}
+
+    def test_importar_actualiza_stock(self, client, sucursales):
+        """Test que los productos existentes se actualizan y el último valor gana"""
+        centro, _ = sucursales
+        client.post(f"/api/sucursales/{centro}/productos", json={"nombre": "Café", "cantidad_stock": 1})
+        contenido = f"sucursal_id,nombre,cantidad_stock\n{centro},Café,7\n{centro},Té,4\n{centro},Café,9\n"
+
+        tarea = importar(client, contenido)
+
+        assert tarea["importados"] == 3
+        assert productos_de(client, centro) == {"Café": 9, "Té": 4}
+        franquicia = client.get("/api/franquicias/").json()["items"][0]["id"]
+        reporte = client.get(f"/api/franquicias/{franquicia}/reporte-stock").json()
+        assert [fila["producto_nombre"] for fila in reporte] == ["Café"]
+
+    def test_columnas_faltantes(self, client):
+        """Test que un CSV sin las columnas requeridas termina con error"""
+        tarea = importar(client, "nombre,stock\nCafé,1\n")
+
+        assert tarea["estado"] == "error"
+        assert "cantidad_stock" in tarea["error"]
+        assert tarea["importados"] == 0
+
+    def test_importacion_no_existe(self, client):
+        """Test consultar una importación inexistente"""
+        response = client.get("/api/productos/importaciones/desconocida")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestImportacionCli:
+    """Tests para ``python -m api_franquicias import``"""
+
+    @pytest.fixture
+    def base_de_datos(self, test_db, monkeypatch):
+        monkeypatch.setattr(database, "SessionLocal", test_db)
+        monkeypatch.setattr(database, "migrate", lambda: None)
+        return test_db
+
+    def test_importar_archivo(self, client, sucursales, base_de_datos, tmp_path, capsys):
+        """Test importar un archivo NDJSON desde la línea de comandos"""
+        centro, _ = sucursales
+        ruta = tmp_path / "inventario.ndjson"
+        ruta.write_text(
+            json.dumps({"nombre": "A", "cantidad_stock": 3}) + "\n"
+            + json.dumps({"nombre": "B", "cantidad_stock": -3}) + "\n",
+            encoding="utf-8"
+        )
+
+        codigo = main(["import", str(ruta), "--sucursal-id", str(centro)])
+
+        assert codigo == 1
+        salida = capsys.readouterr().err
+        assert "línea 2:" in salida
+        assert "1 importadas, 1 rechazadas" in salida
+        assert productos_de(client, centro) == {"A": 3}
@@ -0,0 +1,166 @@
+"""
+Tests para la separación de sesiones de lectura y escritura
+"""
+
+import os
+import tempfile
+import time
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.orm import sessionmaker
+
+from src.api_franquicias import database
+from src.api_franquicias.config import Settings
+from src.api_franquicias.database import (
+    READ_YOUR_WRITES_HEADER,
+    ReadRouter,
+    enable_sqlite_foreign_keys,
+    enable_sqlite_savepoints,
+    enable_sqlite_wal,
+    get_db,
+    get_read_database_urls,
+)
+from src.api_franquicias.main import app
+from src.api_franquicias.models.base import Base
+
+
+@pytest.fixture
+def motores():
+    """Base principal SQLite en modo WAL y un lector de sólo lectura sobre el mismo archivo"""
+    db_fd, db_path = tempfile.mkstemp()
+    principal = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    enable_sqlite_wal(principal)
+    enable_sqlite_foreign_keys(principal)
+    enable_sqlite_savepoints(principal)
+    Base.metadata.create_all(bind=principal)
+    lector = create_engine(
+        f"sqlite:///file:{db_path}?mode=ro&uri=true", connect_args={"check_same_thread": False}
+    )
+    enable_sqlite_savepoints(lector)
+    yield principal, lector
+    lector.dispose()
+    principal.dispose()
+    os.close(db_fd)
+    for sufijo in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + sufijo):
+            os.unlink(db_path + sufijo)
+
+
+@pytest.fixture
+def lecturas_en_lector(motores):
+    """Lista donde se registran las sentencias ejecutadas por el lector"""
+    _, lector = motores
+    sentencias = []
+    event.listen(lector, "before_cursor_execute", lambda conn, cursor, sql, *args: sentencias.append(sql))
+    return sentencias
+
+
+@pytest.fixture
+def client(motores, monkeypatch):
+    """Cliente cuyas lecturas se enrutan al lector"""
+    principal, lector = motores
+    SesionPrincipal = sessionmaker(autoflush=False, expire_on_commit=False, bind=principal)
+    SesionLector = sessionmaker(autoflush=False, expire_on_commit=False, bind=lector)
+
+    def override_get_db():
+        db = SesionPrincipal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    monkeypatch.setattr(database, "read_router", ReadRouter([SesionLector]))
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+
+
+class TestSesionesLectura:
+    """Tests para el enrutamiento de lecturas a réplicas"""
+
+    def test_urls_de_lectura(self):
+        """Test que las réplicas explícitas tienen prioridad sobre el lector SQLite"""
+        replicas = ["postgresql://u:p@replica/db"]
+        assert get_read_database_urls("postgresql://u:p@h/db", Settings(database_read_urls=replicas)) == replicas
+        assert get_read_database_urls("sqlite:///./f.db", Settings(database_sqlite_readers=True)) == [
+            "sqlite:///file:./f.db?mode=ro&uri=true"
+        ]
+        assert get_read_database_urls("sqlite://", Settings(database_sqlite_readers=True)) == []
+        assert get_read_database_urls("sqlite:///./f.db", Settings()) == []
+
+    def test_lectura_en_replica(self, client, lecturas_en_lector):
+        """Test que las escrituras van a la principal y las lecturas al lector"""
+        response = client.post("/api/franquicias/", json={"nombre": "F"})
+        assert response.status_code == status.HTTP_201_CREATED
+        assert READ_YOUR_WRITES_HEADER in response.headers
+        assert lecturas_en_lector == []
+
+        franquicia_id = response.json()["id"]
+        lectura = client.get(f"/api/franquicias/{franquicia_id}")
+
+        assert lectura.status_code == status.HTTP_200_OK
+        assert lectura.json()["nombre"] == "F"
+        assert lecturas_en_lector
+
+    def test_token_reciente_lee_de_la_principal(self, client, lecturas_en_lector):
+        """Test que el token de una escritura reciente fuerza la base principal"""
+        response = client.post("/api/franquicias/", json={"nombre": "F"})
+        token = response.headers[READ_YOUR_WRITES_HEADER]
+
+        lectura = client.get(f"/api/franquicias/{response.json()['id']}", headers={READ_YOUR_WRITES_HEADER: token})
+
+        assert lectura.status_code == status.HTTP_200_OK
+        assert lecturas_en_lector == []
+
+    def test_token_vencido_o_invalido(self, client, lecturas_en_lector):
+        """Test que un token vencido o inválido no fuerza la principal"""
+        vencido = str(time.time() - 60)
+
+        client.get("/api/franquicias/", headers={READ_YOUR_WRITES_HEADER: vencido})
+        client.get("/api/productos/", headers={READ_YOUR_WRITES_HEADER: "no-es-un-token"})
+
+        assert len([s for s in lecturas_en_lector if s.startswith("SELECT")]) == 2
+
+    def test_lector_de_solo_lectura(self, motores):
+        """Test que el lector SQLite rechaza escrituras"""
+        _, lector = motores
+        with lector.connect() as conn:
+            with pytest.raises(exc.OperationalError):
+                conn.execute(text("INSERT INTO franquicias (nombre) VALUES ('X')"))
+
+    def test_reparto_rotativo(self):
+        """Test que las sesiones se reparten entre las réplicas en turno rotativo"""
+        router = ReadRouter([lambda: "replica-1", lambda: "replica-2"])
+
+        assert [router.session() for _ in range(4)] == ["replica-1", "replica-2", "replica-1", "replica-2"]
+
+    def test_sin_replicas(self, monkeypatch):
+        """Test que sin réplicas las escrituras no devuelven token"""
+        monkeypatch.setattr(database, "read_router", ReadRouter())
+        db_fd, db_path = tempfile.mkstemp()
+        engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+
+        def override_get_db():
+            db = sessionmaker(bind=engine, expire_on_commit=False)()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        try:
+            with TestClient(app) as test_client:
+                response = test_client.post("/api/franquicias/", json={"nombre": "F"})
+        finally:
+            app.dependency_overrides.clear()
+            engine.dispose()
+            os.close(db_fd)
+            os.unlink(db_path)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert READ_YOUR_WRITES_HEADER not in response.headers
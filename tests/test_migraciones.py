@@ -0,0 +1,195 @@
+"""
+Tests para las migraciones de Alembic
+"""
+
+import os
+import tempfile
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError
+
+from src.api_franquicias.migrations import get_alembic_config, incluir_nombre, run_migrations
+from src.api_franquicias.models.base import Base
+
+REVISION_HEAD = ScriptDirectory.from_config(get_alembic_config()).get_current_head()
+
+
+@pytest.fixture
+def engine():
+    """Motor sobre una base de datos SQLite temporal vacía"""
+    db_fd, db_path = tempfile.mkstemp()
+    engine = create_engine(f"sqlite:///{db_path}")
+    yield engine
+    engine.dispose()
+    os.close(db_fd)
+    os.unlink(db_path)
+
+
+def revision_actual(engine):
+    with engine.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision()
+
+
+class TestMigraciones:
+    """Tests para el pipeline de migraciones"""
+
+    def test_upgrade_crea_indices_y_restricciones(self, engine):
+        """Test que head crea los índices compuestos y las restricciones UNIQUE"""
+        with engine.connect() as conn:
+            run_migrations(conn)
+
+        inspector = inspect(engine)
+        indices = {i["name"]: i["column_names"] for i in inspector.get_indexes("productos")}
+        assert indices["ix_productos_sucursal_stock"] == ["sucursal_id", "cantidad_stock"]
+
+        unicas = {
+            tabla: {u["name"]: u["column_names"] for u in inspector.get_unique_constraints(tabla)}
+            for tabla in ("franquicias", "sucursales", "productos")
+        }
+        assert unicas["franquicias"] == {"uq_franquicias_nombre": ["nombre"]}
+        assert unicas["sucursales"] == {"uq_sucursales_franquicia_nombre": ["franquicia_id", "nombre"]}
+        assert unicas["productos"] == {"uq_productos_sucursal_nombre": ["sucursal_id", "nombre"]}
+        assert revision_actual(engine) == REVISION_HEAD
+
+    def test_claves_foraneas_en_cascada(self, engine):
+        """Test que eliminar una franquicia borra sus sucursales y productos en la BD"""
+        with engine.connect() as conn:
+            run_migrations(conn)
+            conn.exec_driver_sql("PRAGMA foreign_keys=ON")
+            conn.execute(text("INSERT INTO franquicias (id, nombre) VALUES (1, 'F')"))
+            conn.execute(text("INSERT INTO sucursales (id, nombre, franquicia_id) VALUES (1, 'S', 1)"))
+            conn.execute(text(
+                "INSERT INTO productos (nombre, cantidad_stock, sucursal_id) VALUES ('P', 1, 1)"
+            ))
+            conn.execute(text("DELETE FROM franquicias WHERE id = 1"))
+
+            assert conn.execute(text("SELECT COUNT(*) FROM sucursales")).scalar() == 0
+            assert conn.execute(text("SELECT COUNT(*) FROM productos")).scalar() == 0
+
+        claves = inspect(engine).get_foreign_keys("productos")
+        assert claves[0]["options"] == {"ondelete": "CASCADE"}
+
+    def test_stock_maximo_se_llena_con_los_productos_existentes(self, engine):
+        """Test que la migración calcula el stock máximo de las sucursales existentes"""
+        with engine.connect() as conn:
+            run_migrations(conn, "0003")
+            conn.execute(text("INSERT INTO franquicias (id, nombre) VALUES (1, 'F')"))
+            conn.execute(text("INSERT INTO sucursales (id, nombre, franquicia_id) VALUES (1, 'S', 1)"))
+            conn.execute(text(
+                "INSERT INTO productos (nombre, cantidad_stock, sucursal_id) VALUES ('A', 7, 1), ('B', 3, 1)"
+            ))
+            conn.commit()
+
+            run_migrations(conn)
+            filas = conn.execute(text("SELECT sucursal_id, cantidad_stock FROM stock_maximo_sucursal")).all()
+
+        assert filas == [(1, 7)]
+
+    def test_fecha_actualizacion_de_productos_existentes(self, engine):
+        """Test que los productos nunca modificados toman su fecha de creación"""
+        with engine.connect() as conn:
+            run_migrations(conn, "0008")
+            conn.execute(text("INSERT INTO franquicias (id, nombre) VALUES (1, 'F')"))
+            conn.execute(text("INSERT INTO sucursales (id, nombre, franquicia_id) VALUES (1, 'S', 1)"))
+            conn.execute(text(
+                "INSERT INTO productos (nombre, cantidad_stock, sucursal_id, fecha_creacion) "
+                "VALUES ('A', 1, 1, '2024-01-01 10:00:00')"
+            ))
+            conn.commit()
+
+            run_migrations(conn)
+            fecha = conn.execute(text("SELECT fecha_actualizacion FROM productos")).scalar()
+
+        assert fecha == "2024-01-01 10:00:00"
+
+    def test_ids_no_se_reutilizan(self, engine):
+        """Test que en SQLite los IDs usan AUTOINCREMENT y no se reutilizan"""
+        with engine.connect() as conn:
+            run_migrations(conn)
+            conn.execute(text("INSERT INTO franquicias (nombre) VALUES ('A')"))
+            conn.execute(text("DELETE FROM franquicias"))
+            conn.execute(text("INSERT INTO franquicias (nombre) VALUES ('B')"))
+
+            assert conn.execute(text("SELECT id FROM franquicias")).scalar() == 2
+
+    def test_migraciones_coinciden_con_modelos(self, engine):
+        """Test que el esquema migrado no difiere de los modelos"""
+        with engine.connect() as conn:
+            run_migrations(conn)
+            contexto = MigrationContext.configure(conn, opts={"include_name": incluir_nombre})
+            diferencias = compare_metadata(contexto, Base.metadata)
+
+        assert diferencias == []
+
+    def test_restriccion_unica_aplicada(self, engine):
+        """Test que la base de datos rechaza sucursales duplicadas"""
+        with engine.connect() as conn:
+            run_migrations(conn)
+            conn.execute(text("INSERT INTO franquicias (id, nombre) VALUES (1, 'F')"))
+            conn.execute(text("INSERT INTO sucursales (nombre, franquicia_id) VALUES ('S', 1)"))
+            with pytest.raises(IntegrityError):
+                conn.execute(text("INSERT INTO sucursales (nombre, franquicia_id) VALUES ('S', 1)"))
+
+    def test_stock_negativo_rechazado(self, engine):
+        """Test que la base de datos rechaza productos con stock negativo"""
+        with engine.connect() as conn:
+            run_migrations(conn)
+            conn.execute(text("INSERT INTO franquicias (id, nombre) VALUES (1, 'F')"))
+            conn.execute(text("INSERT INTO sucursales (id, nombre, franquicia_id) VALUES (1, 'S', 1)"))
+            with pytest.raises(IntegrityError, match="CHECK constraint failed"):
+                conn.execute(text(
+                    "INSERT INTO productos (nombre, cantidad_stock, sucursal_id) VALUES ('P', -1, 1)"
+                ))
+
+    def test_busqueda_indexa_productos_existentes(self, engine):
+        """Test que la migración del índice FTS5 indexa los productos existentes"""
+        with engine.connect() as conn:
+            run_migrations(conn, "0006")
+            conn.execute(text("INSERT INTO franquicias (id, nombre) VALUES (1, 'F')"))
+            conn.execute(text("INSERT INTO sucursales (id, nombre, franquicia_id) VALUES (1, 'S', 1)"))
+            conn.execute(text(
+                "INSERT INTO productos (nombre, cantidad_stock, sucursal_id) VALUES ('Café Molido', 1, 1)"
+            ))
+            conn.commit()
+
+            run_migrations(conn)
+            conn.execute(text(
+                "INSERT INTO productos (nombre, cantidad_stock, sucursal_id) VALUES ('Café en Grano', 1, 1)"
+            ))
+            encontrados = conn.execute(text(
+                "SELECT rowid FROM productos_fts WHERE productos_fts MATCH 'cafe' ORDER BY rowid"
+            )).scalars().all()
+
+        assert encontrados == [1, 2]
+
+    def test_base_existente_sin_version(self, engine):
+        """Test que una base creada antes de las migraciones se marca y actualiza"""
+        with engine.connect() as conn:
+            run_migrations(conn, "0001")
+            conn.execute(text("DROP TABLE alembic_version"))
+            conn.execute(text("INSERT INTO franquicias (nombre) VALUES ('Existente')"))
+            conn.commit()
+
+            run_migrations(conn)
+            assert conn.execute(text("SELECT nombre FROM franquicias")).scalar() == "Existente"
+
+        assert revision_actual(engine) == REVISION_HEAD
+
+    def test_downgrade(self, engine):
+        """Test que las migraciones se pueden revertir"""
+        with engine.connect() as conn:
+            run_migrations(conn)
+            config = get_alembic_config(conn)
+            command.downgrade(config, "0001")
+            conn.commit()
+
+            assert inspect(conn).get_unique_constraints("sucursales") == []
+            command.downgrade(config, "base")
+            conn.commit()
+
+        assert not inspect(engine).has_table("franquicias")
@@ -0,0 +1,109 @@
+"""
+Tests para la paginación por cursor de los listados
+"""
+
+import pytest
+from fastapi import status
+
+from src.api_franquicias.models import Franquicia, Sucursal, Producto
+
+
+@pytest.fixture
+def sucursal_con_productos(db_session):
+    """Crea una franquicia con dos sucursales: la primera con 25 productos"""
+    franquicia = Franquicia(nombre="Franquicia Paginada")
+    sucursal = Sucursal(nombre="Sucursal Grande")
+    sucursal.productos = [Producto(nombre=f"Producto {i:02d}", cantidad_stock=i) for i in range(25)]
+    otra = Sucursal(nombre="Sucursal Pequeña")
+    otra.productos = [Producto(nombre="Producto Aislado", cantidad_stock=1)]
+    franquicia.sucursales = [sucursal, otra]
+    db_session.add(franquicia)
+    db_session.commit()
+    return franquicia.id, sucursal.id
+
+
+def recorrer(client, url, limit):
+    """Recorre todas las páginas de un listado y retorna (ids, número de páginas)"""
+    ids, paginas, after = [], 0, None
+    while True:
+        params = {"limit": limit}
+        if after is not None:
+            params["after"] = after
+        response = client.get(url, params=params)
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        ids.extend(item["id"] for item in data["items"])
+        paginas += 1
+        after = data["next_cursor"]
+        if after is None:
+            return ids, paginas
+
+
+class TestPaginacion:
+    """Tests para la paginación keyset"""
+
+    def test_recorrer_productos_por_sucursal(self, client, sucursal_con_productos):
+        """Test recorrer todas las páginas sin duplicados ni omisiones"""
+        _, sucursal_id = sucursal_con_productos
+
+        ids, paginas = recorrer(client, f"/api/sucursales/{sucursal_id}/productos", limit=10)
+
+        assert len(ids) == 25
+        assert ids == sorted(set(ids))
+        assert paginas == 3
+
+    def test_recorrer_todos_productos(self, client, sucursal_con_productos):
+        """Test listado global incluye productos de todas las sucursales"""
+        ids, _ = recorrer(client, "/api/productos/", limit=7)
+
+        assert len(ids) == 26
+
+    def test_recorrer_sucursales_y_franquicias(self, client, sucursal_con_productos):
+        """Test paginación de sucursales y franquicias"""
+        franquicia_id, _ = sucursal_con_productos
+
+        ids_sucursales, paginas = recorrer(client, f"/api/franquicias/{franquicia_id}/sucursales", limit=1)
+        assert len(ids_sucursales) == 2
+        assert paginas == 2
+
+        ids_globales, _ = recorrer(client, "/api/sucursales/", limit=1)
+        assert ids_globales == ids_sucursales
+
+        ids_franquicias, _ = recorrer(client, "/api/franquicias/", limit=5)
+        assert ids_franquicias == [franquicia_id]
+
+    def test_pagina_exacta_sin_cursor(self, client, sucursal_con_productos):
+        """Test que una página que completa el listado no retorna cursor"""
+        _, sucursal_id = sucursal_con_productos
+
+        data = client.get(f"/api/sucursales/{sucursal_id}/productos", params={"limit": 25}).json()
+
+        assert len(data["items"]) == 25
+        assert data["next_cursor"] is None
+
+    def test_cursor_al_final(self, client, sucursal_con_productos):
+        """Test cursor posterior al último elemento retorna una página vacía"""
+        data = client.get("/api/productos/", params={"after": 10_000}).json()
+
+        assert data == {"items": [], "next_cursor": None}
+
+    @pytest.mark.parametrize("limit", [0, 1001])
+    def test_limit_fuera_de_rango(self, client, limit):
+        """Test límites inválidos"""
+        response = client.get("/api/productos/", params={"limit": limit})
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_paginacion_padre_no_existe(self, client):
+        """Test paginación sobre una sucursal inexistente"""
+        response = client.get("/api/sucursales/999/productos", params={"limit": 10})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_costo_constante_por_pagina(self, client, sucursal_con_productos, count_queries):
+        """Test que cada página de productos es una única consulta"""
+        with count_queries() as queries:
+            client.get("/api/productos/", params={"limit": 5, "after": 15})
+
+        assert queries.count == 1
+        assert "LIMIT" in queries.statements[0]
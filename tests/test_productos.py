@@ -3,7 +3,13 @@ Tests para el controlador de Productos
 """
 
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import status
+from sqlalchemy.exc import IntegrityError
+
+from src.api_franquicias.models import Franquicia, Sucursal, Producto
+from src.api_franquicias.repositories import ProductoRepository
+from src.api_franquicias.services import ProductoService
 
 
 class TestProductoController:
@@ -87,7 +93,7 @@ class TestProductoController:
         
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
-        assert len(data) == 2
+        assert len(data["items"]) == 2
 
     def test_obtener_productos_sucursal_no_existe(self, client):
         """Test obtener productos de sucursal que no existe"""
@@ -180,3 +186,149 @@ class TestProductoController:
         response = client.delete("/api/productos/999")
         
         assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestAjusteStock:
+    """Tests para el ajuste relativo de stock"""
+
+    @pytest.fixture
+    def producto_id(self, client, sample_franquicia_data, sample_sucursal_data, sample_producto_data):
+        """Crea un producto con stock 10 y retorna su ID"""
+        franquicia_id = client.post("/api/franquicias/", json=sample_franquicia_data).json()["id"]
+        sucursal_id = client.post(
+            f"/api/franquicias/{franquicia_id}/sucursales", json=sample_sucursal_data
+        ).json()["id"]
+        producto = dict(sample_producto_data, cantidad_stock=10)
+        return client.post(f"/api/sucursales/{sucursal_id}/productos", json=producto).json()["id"]
+
+    def test_incrementar_y_descontar(self, client, producto_id):
+        """Test sumar y descontar unidades"""
+        response = client.post(f"/api/productos/{producto_id}/stock/ajuste", json={"delta": 5})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["cantidad_stock"] == 15
+
+        response = client.post(f"/api/productos/{producto_id}/stock/ajuste", json={"delta": -15})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["cantidad_stock"] == 0
+        assert response.json()["fecha_actualizacion"] is not None
+
+    def test_stock_insuficiente(self, client, producto_id):
+        """Test descontar más unidades de las disponibles"""
+        response = client.post(f"/api/productos/{producto_id}/stock/ajuste", json={"delta": -11})
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert "Stock insuficiente" in response.json()["detail"]
+        assert client.get(f"/api/productos/{producto_id}").json()["cantidad_stock"] == 10
+
+    def test_ajuste_producto_no_existe(self, client):
+        """Test ajustar el stock de un producto que no existe"""
+        response = client.post("/api/productos/999/stock/ajuste", json={"delta": 1})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_ajuste_una_sentencia(self, client, db_session, producto_id, count_queries):
+        """Test que el ajuste es un único UPDATE ... RETURNING, sin lectura previa"""
+        # Igual que SessionLocal: el producto retornado se serializa sin recargarlo
+        db_session.expire_on_commit = False
+        with count_queries() as queries:
+            client.post(f"/api/productos/{producto_id}/stock/ajuste", json={"delta": -1})
+
+        # UPDATE ... RETURNING y actualización del stock máximo de la sucursal
+        assert queries.count == 2
+        assert queries.statements[0].startswith("UPDATE productos SET cantidad_stock")
+        assert "RETURNING" in queries.statements[0]
+        assert queries.statements[1].startswith("INSERT INTO stock_maximo_sucursal")
+
+    def test_ajustes_concurrentes_sin_perdidas(self, test_db):
+        """Test que los descuentos concurrentes no pierden actualizaciones"""
+        db = test_db()
+        producto = Producto(nombre="Concurrente", cantidad_stock=100)
+        db.add(Franquicia(nombre="F", sucursales=[Sucursal(nombre="S", productos=[producto])]))
+        db.commit()
+        producto_id = producto.id
+        db.close()
+
+        def vender(_):
+            session = test_db()
+            try:
+                ProductoService(session).ajustar_stock(producto_id, -1)
+                return True
+            except ValueError:
+                return False
+            finally:
+                session.close()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            ventas = list(executor.map(vender, range(120)))
+
+        db = test_db()
+        assert sum(ventas) == 100
+        assert db.get(Producto, producto_id).cantidad_stock == 0
+        db.close()
+
+
+class TestEscrituraConRestricciones:
+    """Tests para las escrituras validadas por las restricciones de la base de datos"""
+
+    @pytest.fixture
+    def sucursal_id(self, test_db):
+        """Crea una franquicia con una sucursal y retorna el ID de la sucursal"""
+        db = test_db()
+        sucursal = Sucursal(nombre="S")
+        db.add(Franquicia(nombre="F", sucursales=[sucursal]))
+        db.commit()
+        sucursal_id = sucursal.id
+        db.close()
+        return sucursal_id
+
+    def test_crear_una_sentencia(self, client, db_session, sucursal_id, count_queries):
+        """Test que crear un producto es un único INSERT ... ON CONFLICT ... RETURNING"""
+        db_session.expire_on_commit = False
+        with count_queries() as queries:
+            response = client.post(
+                f"/api/sucursales/{sucursal_id}/productos", json={"nombre": "P", "cantidad_stock": 3}
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json()["cantidad_stock"] == 3
+        # INSERT del producto y actualización del stock máximo de la sucursal
+        assert queries.count == 2
+        assert "ON CONFLICT" in queries.statements[0] and "RETURNING" in queries.statements[0]
+
+    def test_nombres_duplicados_concurrentes(self, test_db, sucursal_id):
+        """Test que las creaciones concurrentes con el mismo nombre crean un único producto"""
+        def crear(_):
+            session = test_db()
+            try:
+                ProductoService(session).crear_producto("Concurrente", 1, sucursal_id)
+                return None
+            except ValueError as e:
+                return str(e)
+            finally:
+                session.close()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            errores = list(executor.map(crear, range(24)))
+
+        assert errores.count(None) == 1
+        assert all("Ya existe un producto" in e for e in errores if e is not None)
+        db = test_db()
+        assert db.query(Producto).filter(Producto.nombre == "Concurrente").count() == 1
+        db.close()
+
+    def test_check_stock_no_negativo(self, db_session, sucursal_id):
+        """Test que la base de datos rechaza un stock negativo aunque no pase por el servicio"""
+        producto = ProductoRepository(db_session).create("P", 1, sucursal_id)
+
+        with pytest.raises(IntegrityError):
+            ProductoRepository(db_session).update_stock(producto.id, -1)
+
+    def test_renombrar_a_nombre_existente(self, db_session, sucursal_id):
+        """Test que la restricción única se traduce al mensaje de nombre duplicado"""
+        service = ProductoService(db_session)
+        service.crear_producto("A", 1, sucursal_id)
+        producto_b = service.crear_producto("B", 1, sucursal_id)
+
+        with pytest.raises(ValueError, match="Ya existe un producto con el nombre 'A'"):
+            service.actualizar_producto(producto_b.id, "A")
+        assert service.obtener_producto(producto_b.id).nombre == "B"
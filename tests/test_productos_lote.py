@@ -0,0 +1,158 @@
+"""
+Tests para las operaciones en lote sobre Productos
+"""
+
+import pytest
+from fastapi import status
+
+
+@pytest.fixture
+def sucursal_id(client, sample_franquicia_data, sample_sucursal_data):
+    """Crea una franquicia con una sucursal y retorna el ID de la sucursal"""
+    franquicia_id = client.post("/api/franquicias/", json=sample_franquicia_data).json()["id"]
+    response = client.post(f"/api/franquicias/{franquicia_id}/sucursales", json=sample_sucursal_data)
+    return response.json()["id"]
+
+
+class TestProductoBulkCreate:
+    """Tests para la creación de productos en lote"""
+
+    def test_crear_lote(self, client, sucursal_id):
+        """Test crear un lote grande de productos"""
+        lote = {"productos": [{"nombre": f"Producto {i}", "cantidad_stock": i} for i in range(500)]}
+
+        response = client.post(f"/api/sucursales/{sucursal_id}/productos/bulk", json=lote)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["creados"] == 500
+        assert data["errores"] == 0
+        assert [r["indice"] for r in data["resultados"]] == list(range(500))
+        assert data["resultados"][10]["producto"]["nombre"] == "Producto 10"
+        assert data["resultados"][10]["producto"]["cantidad_stock"] == 10
+
+        listado = client.get(f"/api/sucursales/{sucursal_id}/productos", params={"limit": 1000}).json()
+        assert len(listado["items"]) == 500
+
+    def test_resultados_por_elemento(self, client, sucursal_id):
+        """Test que los elementos inválidos se reportan sin impedir crear el resto"""
+        client.post(f"/api/sucursales/{sucursal_id}/productos", json={"nombre": "Existente", "cantidad_stock": 1})
+        lote = {"productos": [
+            {"nombre": "Nuevo", "cantidad_stock": 5},
+            {"nombre": "Existente", "cantidad_stock": 2},
+            {"nombre": "  Nuevo  ", "cantidad_stock": 3},
+            {"nombre": "   ", "cantidad_stock": 3},
+            {"nombre": "Otro", "cantidad_stock": 0},
+        ]}
+
+        data = client.post(f"/api/sucursales/{sucursal_id}/productos/bulk", json=lote).json()
+
+        assert data["creados"] == 2
+        assert data["errores"] == 3
+        creados = [r["creado"] for r in data["resultados"]]
+        assert creados == [True, False, False, False, True]
+        assert "Ya existe un producto" in data["resultados"][1]["error"]
+        assert "repetido en el lote" in data["resultados"][2]["error"]
+        assert "vacío" in data["resultados"][3]["error"]
+
+    def test_elementos_invalidos_no_rechazan_el_lote(self, client, sucursal_id):
+        """Test que un nombre vacío o un stock negativo sólo fallan en su elemento"""
+        lote = {"productos": [
+            {"nombre": "A", "cantidad_stock": 1},
+            {"nombre": "", "cantidad_stock": 1},
+            {"nombre": "B", "cantidad_stock": -1},
+            {"nombre": "C", "cantidad_stock": 2},
+        ]}
+
+        response = client.post(f"/api/sucursales/{sucursal_id}/productos/bulk", json=lote)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert (data["creados"], data["errores"]) == (2, 2)
+        assert [r["creado"] for r in data["resultados"]] == [True, False, False, True]
+        assert "vacío" in data["resultados"][1]["error"]
+        assert "negativa" in data["resultados"][2]["error"]
+        nombres = [p["nombre"] for p in client.get(f"/api/sucursales/{sucursal_id}/productos").json()["items"]]
+        assert sorted(nombres) == ["A", "C"]
+
+    def test_lote_consultas_constantes(self, client, db_session, sucursal_id, count_queries):
+        """Test que el lote usa un número fijo de consultas, sin importar su tamaño"""
+        # Igual que SessionLocal: los productos creados se serializan sin recargarlos
+        db_session.expire_on_commit = False
+        lote = {"productos": [{"nombre": f"P{i}", "cantidad_stock": 1} for i in range(300)]}
+
+        with count_queries() as queries:
+            client.post(f"/api/sucursales/{sucursal_id}/productos/bulk", json=lote)
+
+        inserts = [s for s in queries.statements if s.startswith("INSERT INTO productos")]
+        assert len(inserts) == 1
+        # Existencia de la sucursal, INSERT multi-fila (ON CONFLICT) y stock máximo
+        assert queries.count == 3
+
+    def test_lote_sucursal_no_existe(self, client):
+        """Test lote sobre una sucursal inexistente"""
+        lote = {"productos": [{"nombre": "P", "cantidad_stock": 1}]}
+
+        response = client.post("/api/sucursales/999/productos/bulk", json=lote)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Sucursal con ID 999 no encontrada" in response.json()["detail"]
+
+    def test_lote_vacio(self, client, sucursal_id):
+        """Test lote sin productos"""
+        response = client.post(f"/api/sucursales/{sucursal_id}/productos/bulk", json={"productos": []})
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+class TestStockBulkUpdate:
+    """Tests para la actualización de stock en lote"""
+
+    def test_actualizar_stock_en_lote(self, client, sucursal_id):
+        """Test actualizar el stock de varios productos y reportar los inexistentes"""
+        lote = {"productos": [{"nombre": f"P{i}", "cantidad_stock": 1} for i in range(20)]}
+        creados = client.post(f"/api/sucursales/{sucursal_id}/productos/bulk", json=lote).json()
+        ids = [r["producto"]["id"] for r in creados["resultados"]]
+
+        stocks = [{"producto_id": pid, "stock": 100 + i} for i, pid in enumerate(ids)]
+        stocks.append({"producto_id": 9999, "stock": 5})
+        response = client.patch("/api/productos/stock", json={"productos": stocks})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"actualizados": 20, "no_encontrados": [9999]}
+        producto = client.get(f"/api/productos/{ids[3]}").json()
+        assert producto["cantidad_stock"] == 103
+        assert producto["fecha_actualizacion"] is not None
+
+    def test_ultimo_valor_prevalece(self, client, sucursal_id):
+        """Test que un producto repetido en el lote toma su último valor"""
+        pid = client.post(
+            f"/api/sucursales/{sucursal_id}/productos", json={"nombre": "P", "cantidad_stock": 1}
+        ).json()["id"]
+
+        stocks = [{"producto_id": pid, "stock": 5}, {"producto_id": pid, "stock": 7}]
+        data = client.patch("/api/productos/stock", json={"productos": stocks}).json()
+
+        assert data["actualizados"] == 1
+        assert client.get(f"/api/productos/{pid}").json()["cantidad_stock"] == 7
+
+    def test_stock_negativo_rechaza_lote(self, client):
+        """Test que un stock negativo invalida la petición completa"""
+        stocks = [{"producto_id": 1, "stock": -1}]
+
+        response = client.patch("/api/productos/stock", json={"productos": stocks})
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_lote_consultas_constantes(self, client, sucursal_id, count_queries):
+        """Test que el lote usa una verificación de IDs, un único UPDATE por lotes y el stock máximo"""
+        lote = {"productos": [{"nombre": f"P{i}", "cantidad_stock": 1} for i in range(200)]}
+        creados = client.post(f"/api/sucursales/{sucursal_id}/productos/bulk", json=lote).json()
+        stocks = [{"producto_id": r["producto"]["id"], "stock": 2} for r in creados["resultados"]]
+
+        with count_queries() as queries:
+            client.patch("/api/productos/stock", json={"productos": stocks})
+
+        assert queries.count == 3
+        assert queries.statements[1].startswith("UPDATE productos SET cantidad_stock")
+        assert queries.statements[2].startswith("INSERT INTO stock_maximo_sucursal")
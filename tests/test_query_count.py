@@ -0,0 +1,104 @@
+"""
+Tests de número de consultas por endpoint (sin N+1 al serializar el árbol)
+"""
+
+import pytest
+from fastapi import status
+
+from src.api_franquicias.models import Franquicia, Sucursal, Producto
+
+
+def crear_arbol(db_session, franquicias, sucursales, productos):
+    """Crea franquicias con sucursales y productos directamente en la sesión"""
+    for i in range(franquicias):
+        franquicia = Franquicia(nombre=f"Franquicia {i}")
+        for j in range(sucursales):
+            sucursal = Sucursal(nombre=f"Sucursal {j}")
+            sucursal.productos = [
+                Producto(nombre=f"Producto {k}", cantidad_stock=k) for k in range(productos)
+            ]
+            franquicia.sucursales.append(sucursal)
+        db_session.add(franquicia)
+    db_session.commit()
+    db_session.expunge_all()
+
+
+class TestQueryCount:
+    """Tests que verifican un número fijo de consultas por endpoint"""
+
+    @pytest.mark.parametrize("franquicias", [1, 10])
+    def test_listar_franquicias(self, client, db_session, count_queries, franquicias):
+        """Test listado de franquicias: una consulta por nivel del árbol"""
+        crear_arbol(db_session, franquicias, sucursales=5, productos=4)
+
+        with count_queries() as queries:
+            response = client.get("/api/franquicias/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()["items"]) == franquicias
+        assert queries.count == 3
+
+    def test_obtener_franquicia(self, client, db_session, count_queries):
+        """Test detalle de franquicia: sucursales por JOIN y productos por selectin"""
+        crear_arbol(db_session, 1, sucursales=20, productos=5)
+
+        with count_queries() as queries:
+            response = client.get("/api/franquicias/1")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()["sucursales"]) == 20
+        assert queries.count == 2
+
+    @pytest.mark.parametrize("expand", ["none", "sucursales"])
+    def test_obtener_franquicia_sin_productos(self, client, db_session, count_queries, expand):
+        """Test detalle de franquicia sin productos: una única consulta"""
+        crear_arbol(db_session, 1, sucursales=20, productos=50)
+
+        with count_queries() as queries:
+            response = client.get(f"/api/franquicias/1?expand={expand}")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert queries.count == 1
+        assert all("FROM productos" not in s for s in queries.statements)
+
+    @pytest.mark.parametrize("sucursales", [1, 10])
+    def test_listar_sucursales(self, client, db_session, count_queries, sucursales):
+        """Test listado de sucursales: sucursales más sus productos"""
+        crear_arbol(db_session, 1, sucursales=sucursales, productos=3)
+
+        with count_queries() as queries:
+            response = client.get("/api/sucursales/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert queries.count == 2
+
+    def test_obtener_sucursal(self, client, db_session, count_queries):
+        """Test detalle de sucursal: una única consulta con JOIN"""
+        crear_arbol(db_session, 1, sucursales=1, productos=10)
+
+        with count_queries() as queries:
+            response = client.get("/api/sucursales/1")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()["productos"]) == 10
+        assert queries.count == 1
+
+    def test_sucursales_por_franquicia(self, client, db_session, count_queries):
+        """Test sucursales de una franquicia: validación, sucursales y productos"""
+        crear_arbol(db_session, 1, sucursales=10, productos=3)
+
+        with count_queries() as queries:
+            response = client.get("/api/franquicias/1/sucursales")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert queries.count == 3
+
+    def test_listar_productos(self, client, db_session, count_queries):
+        """Test listado de productos: una única consulta"""
+        crear_arbol(db_session, 2, sucursales=3, productos=3)
+
+        with count_queries() as queries:
+            response = client.get("/api/productos/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert queries.count == 1
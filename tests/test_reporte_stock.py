@@ -4,6 +4,7 @@ Tests para el reporte de stock
 
 import pytest
 from fastapi import status
+from sqlalchemy import text
 
 
 class TestReporteStock:
@@ -102,3 +103,170 @@ class TestReporteStock:
         response = client.get("/api/franquicias/999/reporte-stock")
         
         assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.fixture
+def sucursal(client, sample_franquicia_data, sample_sucursal_data):
+    """Crea una franquicia con una sucursal y retorna (franquicia_id, sucursal_id)"""
+    franquicia_id = client.post("/api/franquicias/", json=sample_franquicia_data).json()["id"]
+    sucursal_id = client.post(f"/api/franquicias/{franquicia_id}/sucursales", json=sample_sucursal_data).json()["id"]
+    return franquicia_id, sucursal_id
+
+
+def productos_en_reporte(client, franquicia_id):
+    """Pares (nombre, stock) del reporte de una franquicia"""
+    reporte = client.get(f"/api/franquicias/{franquicia_id}/reporte-stock").json()
+    return sorted((item["producto_nombre"], item["cantidad_stock"]) for item in reporte)
+
+
+class TestStockMaximoMaterializado:
+    """Tests para el mantenimiento del stock máximo materializado por sucursal"""
+
+    def test_baja_de_stock_del_maximo(self, client, sucursal):
+        """Test que al bajar el stock del máximo el reporte pasa al siguiente producto"""
+        franquicia_id, sucursal_id = sucursal
+        a = client.post(f"/api/sucursales/{sucursal_id}/productos", json={"nombre": "A", "cantidad_stock": 100}).json()["id"]
+        client.post(f"/api/sucursales/{sucursal_id}/productos", json={"nombre": "B", "cantidad_stock": 60})
+
+        client.patch(f"/api/productos/{a}/stock", json={"stock": 10})
+        assert productos_en_reporte(client, franquicia_id) == [("B", 60)]
+
+        client.post(f"/api/productos/{a}/stock/ajuste", json={"delta": 50})
+        assert productos_en_reporte(client, franquicia_id) == [("A", 60), ("B", 60)]
+
+    def test_eliminar_producto_maximo(self, client, sucursal):
+        """Test que eliminar el producto con más stock recalcula el máximo"""
+        franquicia_id, sucursal_id = sucursal
+        a = client.post(f"/api/sucursales/{sucursal_id}/productos", json={"nombre": "A", "cantidad_stock": 100}).json()["id"]
+        b = client.post(f"/api/sucursales/{sucursal_id}/productos", json={"nombre": "B", "cantidad_stock": 5}).json()["id"]
+
+        client.delete(f"/api/productos/{a}")
+        assert productos_en_reporte(client, franquicia_id) == [("B", 5)]
+
+        client.delete(f"/api/productos/{b}")
+        assert productos_en_reporte(client, franquicia_id) == []
+
+    def test_operaciones_en_lote(self, client, sucursal):
+        """Test que las altas y actualizaciones en lote mantienen el máximo"""
+        franquicia_id, sucursal_id = sucursal
+        lote = {"productos": [{"nombre": f"P{i}", "cantidad_stock": i} for i in range(10)]}
+        creados = client.post(f"/api/sucursales/{sucursal_id}/productos/bulk", json=lote).json()
+        assert productos_en_reporte(client, franquicia_id) == [("P9", 9)]
+
+        p3 = creados["resultados"][3]["producto"]["id"]
+        p9 = creados["resultados"][9]["producto"]["id"]
+        client.patch("/api/productos/stock", json={"productos": [
+            {"producto_id": p3, "stock": 40}, {"producto_id": p9, "stock": 0}
+        ]})
+        assert productos_en_reporte(client, franquicia_id) == [("P3", 40)]
+
+    def test_maximo_guardado_obsoleto(self, client, db_session, sucursal):
+        """Test que una sucursal con el máximo guardado obsoleto no desaparece del reporte"""
+        franquicia_id, sucursal_id = sucursal
+        client.post(f"/api/sucursales/{sucursal_id}/productos", json={"nombre": "A", "cantidad_stock": 30})
+        client.post(f"/api/sucursales/{sucursal_id}/productos", json={"nombre": "B", "cantidad_stock": 20})
+        # Como lo dejaría una escritura concurrente que leyó un máximo anterior
+        db_session.execute(
+            text("UPDATE stock_maximo_sucursal SET cantidad_stock = 99 WHERE sucursal_id = :id"),
+            {"id": sucursal_id}
+        )
+        db_session.commit()
+
+        assert productos_en_reporte(client, franquicia_id) == [("A", 30)]
+
+        db_session.execute(text("DELETE FROM stock_maximo_sucursal"))
+        db_session.commit()
+        assert productos_en_reporte(client, franquicia_id) == [("A", 30)]
+
+    def test_reporte_sin_recorrer_productos(self, client, sucursal, count_queries):
+        """Test que el reporte usa las mismas consultas sin importar el número de productos"""
+        franquicia_id, sucursal_id = sucursal
+        lote = {"productos": [{"nombre": f"P{i}", "cantidad_stock": i} for i in range(500)]}
+        client.post(f"/api/sucursales/{sucursal_id}/productos/bulk", json=lote)
+
+        with count_queries() as queries:
+            response = client.get(f"/api/franquicias/{franquicia_id}/reporte-stock")
+
+        assert response.json()[0]["producto_nombre"] == "P499"
+        # Existencia de la franquicia y lectura del stock materializado
+        assert queries.count == 2
+        assert "stock_maximo_sucursal" in queries.statements[1]
+        assert "GROUP BY" not in queries.statements[1]
+
+
+@pytest.fixture
+def franquicia_con_stock(client, sample_franquicia_data):
+    """Franquicia con dos sucursales y stocks con empates; retorna (franquicia_id, {nombre: sucursal_id})"""
+    franquicia_id = client.post("/api/franquicias/", json=sample_franquicia_data).json()["id"]
+    stocks = {
+        "Norte": [("N1", 90), ("N2", 70), ("N3", 70), ("N4", 10)],
+        "Sur": [("S1", 95), ("S2", 40), ("S3", 5)],
+    }
+    sucursales = {}
+    for nombre, productos in stocks.items():
+        sucursal_id = client.post(f"/api/franquicias/{franquicia_id}/sucursales", json={"nombre": nombre}).json()["id"]
+        sucursales[nombre] = sucursal_id
+        lote = {"productos": [{"nombre": p, "cantidad_stock": c} for p, c in productos]}
+        client.post(f"/api/sucursales/{sucursal_id}/productos/bulk", json=lote)
+    return franquicia_id, sucursales
+
+
+class TestReporteTopN:
+    """Tests para el reporte de los N productos con más stock"""
+
+    def reporte(self, client, franquicia_id, **params):
+        response = client.get(f"/api/franquicias/{franquicia_id}/reporte-stock", params=params)
+        assert response.status_code == status.HTTP_200_OK
+        return [(item["producto_nombre"], item["posicion"]) for item in response.json()]
+
+    def test_top_por_sucursal_con_empates(self, client, franquicia_con_stock):
+        """Test top 2 por sucursal incluyendo los empatados en el límite"""
+        franquicia_id, _ = franquicia_con_stock
+
+        data = self.reporte(client, franquicia_id, top=2)
+
+        assert data == [("N1", 1), ("N2", 2), ("N3", 2), ("S1", 1), ("S2", 2)]
+
+    def test_top_por_sucursal_sin_empates(self, client, franquicia_con_stock):
+        """Test top 2 por sucursal cortando exactamente en 2 filas"""
+        franquicia_id, _ = franquicia_con_stock
+
+        data = self.reporte(client, franquicia_id, top=2, ties="first")
+
+        assert data == [("N1", 1), ("N2", 2), ("S1", 1), ("S2", 2)]
+
+    def test_top_de_la_franquicia(self, client, franquicia_con_stock):
+        """Test top 3 de toda la franquicia"""
+        franquicia_id, _ = franquicia_con_stock
+
+        assert self.reporte(client, franquicia_id, top=3, scope="franquicia") == [
+            ("S1", 1), ("N1", 2), ("N2", 3), ("N3", 3)
+        ]
+        assert self.reporte(client, franquicia_id, top=3, scope="franquicia", ties="first") == [
+            ("S1", 1), ("N1", 2), ("N2", 3)
+        ]
+
+    def test_top_mayor_que_el_inventario(self, client, franquicia_con_stock):
+        """Test que un top mayor que el número de productos los retorna todos"""
+        franquicia_id, _ = franquicia_con_stock
+
+        assert len(self.reporte(client, franquicia_id, top=50, scope="franquicia")) == 7
+
+    def test_por_defecto_usa_el_stock_materializado(self, client, franquicia_con_stock, count_queries):
+        """Test que sin parámetros el reporte se mantiene igual y no usa funciones de ventana"""
+        franquicia_id, _ = franquicia_con_stock
+
+        with count_queries() as queries:
+            data = self.reporte(client, franquicia_id)
+
+        assert sorted(data) == [("N1", 1), ("S1", 1)]
+        assert all(" OVER " not in s for s in queries.statements)
+
+    def test_parametros_invalidos(self, client, franquicia_con_stock):
+        """Test valores no permitidos para top, scope y ties"""
+        franquicia_id, _ = franquicia_con_stock
+        url = f"/api/franquicias/{franquicia_id}/reporte-stock"
+
+        assert client.get(url, params={"top": 0}).status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert client.get(url, params={"scope": "region"}).status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert client.get(url, params={"ties": "some"}).status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
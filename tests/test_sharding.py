@@ -0,0 +1,391 @@
+"""
+Tests para el particionado horizontal (sharding) por franquicia
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.api_franquicias.database import (
+    enable_sqlite_foreign_keys,
+    enable_sqlite_savepoints,
+    get_db,
+    new_session_like,
+)
+from src.api_franquicias.main import app
+from src.api_franquicias.migrations import run_migrations
+from src.api_franquicias.repositories import ProductoRepository
+from src.api_franquicias.repositories.cache import cache_entidades
+from src.api_franquicias.repositories.trigramas import indices_trigramas
+from src.api_franquicias.sharding import SHARD_ID_SPAN, ShardRouter, prepare_shard_ids, shard_index_for_id
+
+NUM_SHARDS = 3
+
+
+@pytest.fixture
+def motores():
+    """Un archivo SQLite migrado por shard"""
+    archivos, motores = [], []
+    for indice in range(NUM_SHARDS):
+        db_fd, db_path = tempfile.mkstemp()
+        motor = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+        enable_sqlite_foreign_keys(motor)
+        enable_sqlite_savepoints(motor)
+        with motor.connect() as conn:
+            run_migrations(conn)
+            prepare_shard_ids(conn, indice)
+        archivos.append((db_fd, db_path))
+        motores.append(motor)
+    yield motores
+    for motor, (db_fd, db_path) in zip(motores, archivos):
+        motor.dispose()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+
+@pytest.fixture
+def router(motores):
+    return ShardRouter(motores)
+
+
+@pytest.fixture
+def client(router):
+    """Cliente cuyas sesiones se reparten entre los shards"""
+    def override_get_db():
+        db = router.session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def nombres(router):
+    """Un nombre de franquicia para cada shard"""
+    por_shard = {}
+    i = 0
+    while len(por_shard) < NUM_SHARDS:
+        nombre = f"Franquicia {i}"
+        por_shard.setdefault(int(router.shard_for_nombre(nombre)), nombre)
+        i += 1
+    return [por_shard[indice] for indice in range(NUM_SHARDS)]
+
+
+def contar(motor, tabla):
+    with motor.connect() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM {tabla}")).scalar()
+
+
+def crear_arbol(client, nombre, productos=2):
+    """Crea una franquicia con una sucursal y productos; retorna sus IDs"""
+    franquicia_id = client.post("/api/franquicias/", json={"nombre": nombre}).json()["id"]
+    sucursal_id = client.post(
+        f"/api/franquicias/{franquicia_id}/sucursales", json={"nombre": "Centro"}
+    ).json()["id"]
+    producto_ids = [
+        client.post(
+            f"/api/sucursales/{sucursal_id}/productos", json={"nombre": f"P{i}", "cantidad_stock": 10 * (i + 1)}
+        ).json()["id"]
+        for i in range(productos)
+    ]
+    return franquicia_id, sucursal_id, producto_ids
+
+
+class TestShardRouter:
+    """Tests para la asignación de IDs y nombres a shards"""
+
+    def test_ids_por_rango(self, router):
+        """Test que el rango del ID determina el shard"""
+        assert router.shard_for_id(1) == "0"
+        assert router.shard_for_id(SHARD_ID_SPAN + 5) == "1"
+        assert router.shard_for_id(NUM_SHARDS * SHARD_ID_SPAN) is None
+
+    def test_nombre_estable(self, router):
+        """Test que un nombre siempre se asigna al mismo shard"""
+        assert router.shard_for_nombre("Mi Franquicia") == router.shard_for_nombre("  Mi Franquicia ")
+
+    def test_secuencias_no_retroceden(self, motores):
+        """Test que preparar un shard otra vez no reinicia sus IDs"""
+        with motores[1].connect() as conn:
+            conn.execute(text("INSERT INTO franquicias (nombre) VALUES ('A')"))
+            conn.commit()
+            prepare_shard_ids(conn, 1)
+            conn.execute(text("INSERT INTO franquicias (nombre) VALUES ('B')"))
+            ids = conn.execute(text("SELECT id FROM franquicias ORDER BY id")).scalars().all()
+
+        assert ids == [SHARD_ID_SPAN + 1, SHARD_ID_SPAN + 2]
+
+
+class TestSharding:
+    """Tests de la API sobre varios shards"""
+
+    def test_franquicias_en_su_shard(self, client, motores, nombres):
+        """Test que cada franquicia y sus filas se guardan sólo en su shard"""
+        for indice, nombre in enumerate(nombres):
+            franquicia_id, sucursal_id, producto_ids = crear_arbol(client, nombre)
+            assert {shard_index_for_id(i) for i in [franquicia_id, sucursal_id, *producto_ids]} == {indice}
+
+        for motor in motores:
+            assert contar(motor, "franquicias") == 1
+            assert contar(motor, "sucursales") == 1
+            assert contar(motor, "productos") == 2
+            assert contar(motor, "stock_maximo_sucursal") == 1
+
+    def test_lecturas_por_id(self, client, nombres):
+        """Test que las consultas por ID encuentran la fila en su shard"""
+        franquicia_id, sucursal_id, producto_ids = crear_arbol(client, nombres[2])
+
+        franquicia = client.get(f"/api/franquicias/{franquicia_id}").json()
+        assert franquicia["sucursales"][0]["id"] == sucursal_id
+        assert len(franquicia["sucursales"][0]["productos"]) == 2
+        assert client.get(f"/api/productos/{producto_ids[0]}").json()["sucursal_id"] == sucursal_id
+
+        response = client.get(f"/api/franquicias/{NUM_SHARDS * SHARD_ID_SPAN}")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_listado_scatter_gather_paginado(self, client, nombres):
+        """Test que el listado global recorre todos los shards en orden de ID"""
+        creadas = sorted(crear_arbol(client, nombre, productos=0)[0] for nombre in nombres)
+
+        ids, after = [], None
+        while True:
+            params = {"limit": 2}
+            if after is not None:
+                params["after"] = after
+            pagina = client.get("/api/franquicias/", params=params).json()
+            ids.extend(f["id"] for f in pagina["items"])
+            after = pagina["next_cursor"]
+            if after is None:
+                break
+
+        assert ids == creadas
+
+    def test_listado_ordenado_entre_shards(self, client, nombres):
+        """Test que el listado ordenado por stock combina el orden de todos los shards"""
+        for nombre in nombres:
+            crear_arbol(client, nombre, productos=3)
+
+        stocks, after = [], None
+        while True:
+            params = {"limit": 2, "sort": "-stock", "stock_max": 20}
+            if after is not None:
+                params["after"] = after
+            pagina = client.get("/api/productos/", params=params).json()
+            stocks.extend(p["cantidad_stock"] for p in pagina["items"])
+            after = pagina["next_cursor"]
+            if after is None:
+                break
+
+        assert stocks == [20] * NUM_SHARDS + [10] * NUM_SHARDS
+
+    def test_nombre_unico_entre_shards(self, client, nombres):
+        """Test que el nombre de una franquicia es único en todos los shards"""
+        client.post("/api/franquicias/", json={"nombre": nombres[0]})
+        otra_id = client.post("/api/franquicias/", json={"nombre": nombres[1]}).json()["id"]
+
+        response = client.patch(f"/api/franquicias/{otra_id}", json={"nombre": nombres[0]})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_crear_en_padre_inexistente(self, client):
+        """Test que la clave foránea del shard rechaza productos de sucursales inexistentes"""
+        for sucursal_id in (SHARD_ID_SPAN + 1, NUM_SHARDS * SHARD_ID_SPAN):
+            response = client.post(
+                f"/api/sucursales/{sucursal_id}/productos", json={"nombre": "P", "cantidad_stock": 1}
+            )
+
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+            assert f"Sucursal con ID {sucursal_id} no encontrada" in response.json()["detail"]
+
+    def test_stock_en_lote_entre_shards(self, client, nombres):
+        """Test que un lote de stock con productos de varios shards los actualiza todos"""
+        _, _, productos_a = crear_arbol(client, nombres[0], productos=1)
+        _, _, productos_b = crear_arbol(client, nombres[1], productos=1)
+        stocks = [{"producto_id": productos_a[0], "stock": 7}, {"producto_id": productos_b[0], "stock": 8}]
+
+        response = client.patch("/api/productos/stock", json={"productos": stocks})
+
+        assert response.json() == {"actualizados": 2, "no_encontrados": []}
+        assert client.get(f"/api/productos/{productos_a[0]}").json()["cantidad_stock"] == 7
+        assert client.get(f"/api/productos/{productos_b[0]}").json()["cantidad_stock"] == 8
+
+    def test_lote_de_productos_en_shard(self, client, motores, nombres):
+        """Test que la creación en lote inserta los productos en el shard de la sucursal"""
+        _, sucursal_id, _ = crear_arbol(client, nombres[2], productos=0)
+        lote = {"productos": [{"nombre": f"P{i}", "cantidad_stock": i} for i in range(50)]}
+
+        data = client.post(f"/api/sucursales/{sucursal_id}/productos/bulk", json=lote).json()
+
+        assert data["creados"] == 50
+        assert [r["producto"]["nombre"] for r in data["resultados"]] == [f"P{i}" for i in range(50)]
+        assert [contar(motor, "productos") for motor in motores] == [0, 0, 50]
+
+    def test_exportar_entre_shards(self, client, nombres):
+        """Test que la exportación recorre todos los shards en orden de ID"""
+        franquicia_ids = [crear_arbol(client, nombre)[0] for nombre in nombres]
+
+        todas = client.get("/api/productos/export").text.splitlines()
+        una = client.get("/api/productos/export", params={"franquicia_id": franquicia_ids[1]}).text.splitlines()
+
+        ids = [json.loads(linea)["id"] for linea in todas]
+        assert [shard_index_for_id(i) for i in ids] == [0, 0, 1, 1, 2, 2]
+        assert ids == sorted(ids)
+        assert [json.loads(linea)["id"] for linea in una] == ids[2:4]
+
+    def test_busqueda_entre_shards(self, client, nombres):
+        """Test que la búsqueda combina por relevancia los resultados de todos los shards"""
+        for nombre in nombres:
+            franquicia_id = client.post("/api/franquicias/", json={"nombre": nombre}).json()["id"]
+            sucursal_id = client.post(
+                f"/api/franquicias/{franquicia_id}/sucursales", json={"nombre": "Centro"}
+            ).json()["id"]
+            client.post(
+                f"/api/sucursales/{sucursal_id}/productos", json={"nombre": f"Café {nombre}", "cantidad_stock": 1}
+            )
+
+        ids = []
+        params = {"q": "cafe", "limit": 2}
+        while True:
+            pagina = client.get("/api/productos/buscar", params=params).json()
+            ids.extend(p["id"] for p in pagina["items"])
+            if pagina["next_cursor"] is None:
+                break
+            params["after"] = pagina["next_cursor"]
+
+        assert sorted(shard_index_for_id(i) for i in ids) == list(range(NUM_SHARDS))
+
+    def test_similares_en_shard(self, client, nombres):
+        """Test que el índice de trigramas de cada franquicia se carga de su shard"""
+        indices_trigramas.descartar()
+        franquicia_ids = []
+        for nombre in nombres:
+            franquicia_id = client.post("/api/franquicias/", json={"nombre": nombre}).json()["id"]
+            sucursal_id = client.post(
+                f"/api/franquicias/{franquicia_id}/sucursales", json={"nombre": "Centro"}
+            ).json()["id"]
+            client.post(
+                f"/api/sucursales/{sucursal_id}/productos", json={"nombre": f"Café {nombre}", "cantidad_stock": 1}
+            )
+            franquicia_ids.append(franquicia_id)
+
+        for franquicia_id, nombre in zip(franquicia_ids, nombres):
+            similares = client.get(
+                f"/api/franquicias/{franquicia_id}/productos/similares", params={"nombre": f"cafe {nombre}"}
+            ).json()
+            assert [p["nombre"] for p in similares] == [f"Café {nombre}"]
+
+    def test_bajo_stock_en_shard(self, client, nombres):
+        """Test que los productos con bajo stock se leen del shard de la franquicia"""
+        franquicia_id, _, producto_ids = crear_arbol(client, nombres[2], productos=3)
+        client.patch(f"/api/productos/{producto_ids[2]}/stock-minimo", json={"stock_minimo": 40})
+
+        productos = client.get(
+            f"/api/franquicias/{franquicia_id}/productos/bajo-stock", params={"umbral": 10}
+        ).json()
+
+        assert [(p["id"], p["umbral"]) for p in productos] == [(producto_ids[0], 10), (producto_ids[2], 40)]
+
+    def test_cache_en_shard(self, client, router, motores, nombres, monkeypatch):
+        """Test que las entidades de la caché conservan su shard al incorporarse"""
+        monkeypatch.setattr(cache_entidades, "activa", True)
+        monkeypatch.setattr(cache_entidades, "max_bytes", 1024 * 1024)
+        cache_entidades.limpiar()
+        _, sucursal_id, producto_ids = crear_arbol(client, nombres[1])
+        url = f"/api/productos/{producto_ids[0]}"
+        client.get(url)
+
+        assert client.get(url).json()["sucursal_id"] == sucursal_id
+        assert cache_entidades.estadisticas()["aciertos"] == 1
+        client.patch(f"{url}/stock", json={"stock": 3})
+        assert client.get(url).json()["cantidad_stock"] == 3
+
+        client.get(url)
+        db = router.session()
+        try:
+            # El objeto incorporado desde la caché se escribe en su shard
+            ProductoRepository(db).get_by_id(producto_ids[0]).cantidad_stock = 4
+            db.commit()
+        finally:
+            db.close()
+        assert cache_entidades.estadisticas()["aciertos"] == 3
+        with motores[1].connect() as conn:
+            stock = conn.execute(
+                text("SELECT cantidad_stock FROM productos WHERE id = :id"), {"id": producto_ids[0]}
+            ).scalar()
+        assert stock == 4
+        cache_entidades.limpiar()
+
+    def test_reporte_en_shard(self, client, nombres):
+        """Test que el reporte de stock se resuelve en el shard de la franquicia"""
+        franquicia_id, _, producto_ids = crear_arbol(client, nombres[1])
+
+        reporte = client.get(f"/api/franquicias/{franquicia_id}/reporte-stock").json()
+
+        assert [fila["producto_id"] for fila in reporte] == [producto_ids[1]]
+
+    def test_eliminar_franquicia_en_shard(self, client, motores, nombres):
+        """Test que eliminar una franquicia borra sus filas sólo en su shard"""
+        franquicia_id, _, _ = crear_arbol(client, nombres[1])
+        crear_arbol(client, nombres[2])
+
+        response = client.delete(f"/api/franquicias/{franquicia_id}")
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert [contar(motor, "productos") for motor in motores] == [0, 0, 2]
+
+    def test_sesion_independiente(self, router):
+        """Test que las tareas en segundo plano reciben otra sesión particionada"""
+        db = router.session()
+        otra = new_session_like(db)
+
+        assert otra is not db
+        assert otra.info["shard_router"] is router
+        otra.close()
+        db.close()
+
+
+class TestShardingAsync:
+    """Tests de los shards con AsyncSession (aiosqlite)"""
+
+    def test_flujo_async(self, motores, nombres):
+        """Test crear y consultar franquicias en varios shards con sesiones asíncronas"""
+        pytest.importorskip("aiosqlite")
+        motores_async = [
+            create_async_engine(f"sqlite+aiosqlite:///{motor.url.database}", poolclass=NullPool)
+            for motor in motores
+        ]
+        for motor in motores_async:
+            enable_sqlite_foreign_keys(motor.sync_engine)
+            enable_sqlite_savepoints(motor.sync_engine)
+        router = ShardRouter([motor.sync_engine for motor in motores_async], is_async=True)
+
+        async def override_get_db():
+            async with router.session() as db:
+                yield db
+
+        app.dependency_overrides[get_db] = override_get_db
+        try:
+            with TestClient(app) as client:
+                ids = [crear_arbol(client, nombre)[0] for nombre in nombres]
+                listado = client.get("/api/franquicias/").json()
+        finally:
+            app.dependency_overrides.clear()
+            for motor in motores_async:
+                asyncio.run(motor.dispose())
+
+        assert [shard_index_for_id(i) for i in ids] == list(range(NUM_SHARDS))
+        assert [f["id"] for f in listado["items"]] == ids
+        assert [contar(motor, "productos") for motor in motores] == [2] * NUM_SHARDS
@@ -0,0 +1,267 @@
+"""
+Tests para la búsqueda de productos por nombre aproximado (trigramas)
+"""
+
+import threading
+
+import pytest
+from fastapi import status
+from sqlalchemy import insert
+
+from src.api_franquicias.models import Producto
+from src.api_franquicias.repositories import trigramas as trigramas_modulo
+from src.api_franquicias.repositories.producto_repository import ProductoRepository
+from src.api_franquicias.repositories.trigramas import IndiceTrigramas, indices_trigramas, similitud, trigramas
+
+
+@pytest.fixture
+def catalogo(client):
+    """Una franquicia con dos sucursales y otra franquicia; retorna sus IDs"""
+    franquicia_id = client.post("/api/franquicias/", json={"nombre": "A"}).json()["id"]
+    sucursales = []
+    for sucursal, productos in (
+        ("Centro", ["Hamburguesa Clásica", "Hamburguesa Doble", "Papas Fritas"]),
+        ("Norte", ["Hamburguesa Clasica Grande", "Café Americano"]),
+    ):
+        sucursal_id = client.post(
+            f"/api/franquicias/{franquicia_id}/sucursales", json={"nombre": sucursal}
+        ).json()["id"]
+        lote = {"productos": [{"nombre": nombre, "cantidad_stock": 1} for nombre in productos]}
+        client.post(f"/api/sucursales/{sucursal_id}/productos/bulk", json=lote)
+        sucursales.append(sucursal_id)
+
+    otra_id = client.post("/api/franquicias/", json={"nombre": "B"}).json()["id"]
+    otra_sucursal = client.post(f"/api/franquicias/{otra_id}/sucursales", json={"nombre": "Centro"}).json()["id"]
+    client.post(f"/api/sucursales/{otra_sucursal}/productos", json={"nombre": "Hamburguesa Clásica", "cantidad_stock": 1})
+    return franquicia_id, sucursales
+
+
+def similares(client, franquicia_id, nombre, **params):
+    response = client.get(f"/api/franquicias/{franquicia_id}/productos/similares", params={"nombre": nombre, **params})
+    assert response.status_code == status.HTTP_200_OK
+    return [(p["nombre"], p["similitud"]) for p in response.json()]
+
+
+def nombres(resultado):
+    return [nombre for nombre, _ in resultado]
+
+
+class TestTrigramas:
+    """Tests para la medida de similitud"""
+
+    def test_trigramas_como_pg_trgm(self):
+        """Test los trigramas de pg_trgm, sin mayúsculas ni acentos"""
+        assert trigramas("Café") == {"  c", " ca", "caf", "afe", "fe "}
+        assert trigramas("--") == set()
+        # Ejemplo de la documentación de pg_trgm: similarity('word', 'two words')
+        assert similitud("word", "two words") == pytest.approx(0.363636, abs=1e-6)
+
+    def test_indice_ordena_por_similitud(self):
+        """Test el índice en memoria con productos agregados, renombrados y eliminados"""
+        indice = IndiceTrigramas()
+        indice.agregar(1, "Hamburguesa Clásica", 10)
+        indice.agregar(2, "Hamburguesa Doble", 10)
+        indice.agregar(3, "Papas Fritas", 20)
+
+        assert [p for p, _ in indice.buscar("hamburgesa clasica", 0.3, 10)] == [1, 2]
+        assert indice.buscar("hamburguesa clásica", 0.3, 1) == [(1, 1.0)]
+        assert [p for p, _ in indice.buscar("hamburgesa", 0.3, 10, sucursal_id=20)] == []
+
+        indice.agregar(1, "Yuca Frita", 10)
+        indice.eliminar(2)
+        assert indice.buscar("hamburgesa clasica", 0.3, 10) == []
+        assert [p for p, _ in indice.buscar("yuca fritas", 0.3, 10)] == [1, 3]
+        assert len(indice) == 2
+
+
+class TestSimilares:
+    """Tests para GET /api/franquicias/{franquicia_id}/productos/similares"""
+
+    def test_tolera_errores_de_escritura(self, client, catalogo):
+        """Test encontrar los productos aunque el nombre esté mal escrito"""
+        franquicia_id, _ = catalogo
+
+        resultado = similares(client, franquicia_id, "hamburgesa clasica")
+
+        assert nombres(resultado) == ["Hamburguesa Clásica", "Hamburguesa Clasica Grande", "Hamburguesa Doble"]
+        assert [valor for _, valor in resultado] == sorted((valor for _, valor in resultado), reverse=True)
+        assert nombres(similares(client, franquicia_id, "cafe americana")) == ["Café Americano"]
+
+    def test_umbral_limite_y_sucursal(self, client, catalogo):
+        """Test restringir por similitud mínima, número de resultados y sucursal"""
+        franquicia_id, (centro, norte) = catalogo
+
+        assert nombres(similares(client, franquicia_id, "hamburgesa clasica", umbral=0.7)) == ["Hamburguesa Clásica"]
+        assert nombres(similares(client, franquicia_id, "hamburgesa clasica", limit=1)) == ["Hamburguesa Clásica"]
+        assert nombres(similares(client, franquicia_id, "hamburgesa clasica", sucursal_id=norte)) == [
+            "Hamburguesa Clasica Grande"
+        ]
+
+    def test_indice_se_mantiene_con_las_escrituras(self, client, catalogo):
+        """Test que crear, renombrar y eliminar productos actualiza el índice sin reconstruirlo"""
+        franquicia_id, (centro, _) = catalogo
+        assert nombres(similares(client, franquicia_id, "pizza margarita")) == []
+        indice = indices_trigramas._indices[franquicia_id]
+
+        producto_id = client.post(
+            f"/api/sucursales/{centro}/productos", json={"nombre": "Pizza Margarita", "cantidad_stock": 1}
+        ).json()["id"]
+        assert nombres(similares(client, franquicia_id, "piza margarita")) == ["Pizza Margarita"]
+
+        client.post(f"/api/productos/{producto_id}", json={"nombre": "Pizza Hawaiana"})
+        assert nombres(similares(client, franquicia_id, "piza margarita")) == []
+        assert nombres(similares(client, franquicia_id, "piza hawaiana")) == ["Pizza Hawaiana"]
+
+        client.delete(f"/api/productos/{producto_id}")
+        assert nombres(similares(client, franquicia_id, "piza hawaiana")) == []
+        assert indices_trigramas._indices[franquicia_id] is indice
+
+    def test_sucursal_nueva_y_eliminada(self, client, catalogo):
+        """Test los productos de sucursales creadas y eliminadas tras construir el índice"""
+        franquicia_id, (_, norte) = catalogo
+        similares(client, franquicia_id, "cafe")
+
+        sur = client.post(f"/api/franquicias/{franquicia_id}/sucursales", json={"nombre": "Sur"}).json()["id"]
+        client.post(f"/api/sucursales/{sur}/productos", json={"nombre": "Pan de Yuca", "cantidad_stock": 1})
+        assert nombres(similares(client, franquicia_id, "pan de yuka")) == ["Pan de Yuca"]
+
+        client.delete(f"/api/sucursales/{norte}")
+        assert nombres(similares(client, franquicia_id, "cafe americano")) == []
+
+    def test_transaccion_revertida_no_modifica_el_indice(self, db_session, catalogo):
+        """Test que los cambios de una transacción revertida no llegan al índice"""
+        franquicia_id, (centro, _) = catalogo
+        repo = ProductoRepository(db_session)
+        repo.find_similar(franquicia_id, "pizza", 0.3, 10)
+
+        repo.create("Pizza Margarita", 1, centro)
+        db_session.rollback()
+
+        assert indices_trigramas._indices[franquicia_id].buscar("pizza margarita", 0.3, 10) == []
+
+    def test_importacion_actualiza_el_indice(self, client, catalogo):
+        """Test que los productos importados aparecen en la siguiente búsqueda sin reconstruir el índice"""
+        franquicia_id, (centro, _) = catalogo
+        similares(client, franquicia_id, "cafe")
+        indice = indices_trigramas._indices[franquicia_id]
+
+        client.post(
+            "/api/productos/import", params={"format": "csv", "sucursal_id": centro},
+            content="nombre,cantidad_stock\nEmpanada de Pollo,3\n"
+        )
+
+        assert nombres(similares(client, franquicia_id, "empanada de poyo")) == ["Empanada de Pollo"]
+        assert indices_trigramas._indices[franquicia_id] is indice
+
+    def test_franquicia_nueva_no_construye_el_indice(self, client, catalogo, count_queries):
+        """Test que una franquicia creada por la API empieza con su índice, sin construirlo al consultar"""
+        franquicia_id, _ = catalogo
+
+        with count_queries() as queries:
+            assert nombres(similares(client, franquicia_id, "cafe americana")) == ["Café Americano"]
+
+        assert not any("JOIN productos" in sql for sql in queries.statements)
+
+    def test_precarga_en_segundo_plano(self, client, test_db, catalogo, count_queries):
+        """Test que precargar construye los índices de las franquicias existentes antes de las consultas"""
+        franquicia_id, _ = catalogo
+        indices_trigramas.descartar()
+
+        indices_trigramas.precargar(test_db)
+        indices_trigramas.esperar()
+
+        assert len(indices_trigramas._indices) == 2
+        with count_queries() as queries:
+            assert nombres(similares(client, franquicia_id, "cafe americana")) == ["Café Americano"]
+        assert not any("JOIN productos" in sql for sql in queries.statements)
+
+    def test_indice_expirado_se_reconstruye_en_segundo_plano(self, client, db_session, catalogo, monkeypatch):
+        """Test que un índice expirado se sigue usando mientras el nuevo se construye"""
+        franquicia_id, (centro, _) = catalogo
+        similares(client, franquicia_id, "cafe")
+        indice = indices_trigramas._indices[franquicia_id]
+        # Un producto guardado por otro proceso: sólo la reconstrucción lo encuentra
+        db_session.execute(insert(Producto).values(nombre="Pizza Margarita", cantidad_stock=1, sucursal_id=centro))
+        db_session.commit()
+
+        liberar = threading.Event()
+        filas_franquicia = trigramas_modulo._filas_franquicia
+
+        def filas_lentas(db, franquicia_id):
+            liberar.wait(5)
+            yield from filas_franquicia(db, franquicia_id)
+
+        monkeypatch.setattr(trigramas_modulo, "_filas_franquicia", filas_lentas)
+        monkeypatch.setattr(indices_trigramas, "ttl", 1e-9)
+
+        # La consulta responde con el índice anterior mientras la construcción está bloqueada
+        assert nombres(similares(client, franquicia_id, "piza margarita")) == []
+        assert indices_trigramas._indices[franquicia_id] is indice
+
+        liberar.set()
+        indices_trigramas.esperar()
+        monkeypatch.setattr(indices_trigramas, "ttl", 0)
+        assert indices_trigramas._indices[franquicia_id] is not indice
+        assert nombres(similares(client, franquicia_id, "piza margarita")) == ["Pizza Margarita"]
+
+    def test_errores(self, client, catalogo):
+        """Test una franquicia que no existe y un nombre sin letras ni números"""
+        franquicia_id, _ = catalogo
+
+        response = client.get("/api/franquicias/999/productos/similares", params={"nombre": "cafe"})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        response = client.get(f"/api/franquicias/{franquicia_id}/productos/similares", params={"nombre": "-*"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestCrearConSimilares:
+    """Tests para POST /api/sucursales/{sucursal_id}/productos?check_similar=true"""
+
+    def test_rechaza_posible_duplicado(self, client, catalogo):
+        """Test que un nombre parecido a otro de la sucursal responde 409 con los similares"""
+        _, (centro, _) = catalogo
+
+        response = client.post(
+            f"/api/sucursales/{centro}/productos", params={"check_similar": True},
+            json={"nombre": "Hamburgesa Clasica", "cantidad_stock": 1}
+        )
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        detalle = response.json()["detail"]
+        assert [p["nombre"] for p in detalle["similares"]] == ["Hamburguesa Clásica"]
+        productos = client.get(f"/api/sucursales/{centro}/productos").json()["items"]
+        assert "Hamburgesa Clasica" not in [p["nombre"] for p in productos]
+
+    def test_sin_similares_o_sin_verificar(self, client, catalogo):
+        """Test que sin similares, o sin pedir la verificación, el producto se crea"""
+        _, (centro, norte) = catalogo
+
+        response = client.post(
+            f"/api/sucursales/{centro}/productos", params={"check_similar": True},
+            json={"nombre": "Limonada", "cantidad_stock": 1}
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+        # Los productos parecidos de otras sucursales no cuentan
+        response = client.post(
+            f"/api/sucursales/{norte}/productos", params={"check_similar": True},
+            json={"nombre": "Papas Fritas", "cantidad_stock": 1}
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+        response = client.post(
+            f"/api/sucursales/{centro}/productos", json={"nombre": "Hamburgesa Clasica", "cantidad_stock": 1}
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_nombre_identico(self, client, catalogo):
+        """Test que el nombre idéntico conserva el error de nombre duplicado"""
+        _, (centro, _) = catalogo
+
+        response = client.post(
+            f"/api/sucursales/{centro}/productos", params={"check_similar": True},
+            json={"nombre": "Papas Fritas", "cantidad_stock": 1}
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Ya existe" in response.json()["detail"]
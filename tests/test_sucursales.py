@@ -46,6 +46,22 @@ class TestSucursalController:
         assert response.status_code == status.HTTP_400_BAD_REQUEST
         assert "Ya existe una sucursal" in response.json()["detail"]
 
+    def test_obtener_sucursal_expand(self, client, sample_franquicia_data, sample_sucursal_data, sample_producto_data):
+        """Test obtener sucursal con y sin sus productos"""
+        # Crear franquicia, sucursal y producto
+        franquicia_id = client.post("/api/franquicias/", json=sample_franquicia_data).json()["id"]
+        sucursal_id = client.post(f"/api/franquicias/{franquicia_id}/sucursales", json=sample_sucursal_data).json()["id"]
+        client.post(f"/api/sucursales/{sucursal_id}/productos", json=sample_producto_data)
+        
+        # Sin expansión
+        data = client.get(f"/api/sucursales/{sucursal_id}?expand=none").json()
+        assert data["nombre"] == sample_sucursal_data["nombre"]
+        assert "productos" not in data
+        
+        # Con productos (valor por defecto)
+        data = client.get(f"/api/sucursales/{sucursal_id}").json()
+        assert len(data["productos"]) == 1
+
     def test_obtener_sucursales_por_franquicia(self, client, sample_franquicia_data, sample_sucursal_data):
         """Test obtener sucursales de una franquicia"""
         # Crear franquicia
@@ -61,7 +77,7 @@ class TestSucursalController:
         
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
-        assert len(data) == 2
+        assert len(data["items"]) == 2
 
     def test_obtener_sucursales_franquicia_no_existe(self, client):
         """Test obtener sucursales de franquicia que no existe"""
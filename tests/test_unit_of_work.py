@@ -0,0 +1,131 @@
+"""
+Tests para la unidad de trabajo (una transacción por operación de servicio)
+"""
+
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.api_franquicias.database import enable_sqlite_foreign_keys, enable_sqlite_savepoints
+from src.api_franquicias.models import Franquicia, Producto
+from src.api_franquicias.models.base import Base
+from src.api_franquicias.services import FranquiciaService, ProductoService, SucursalService
+from src.api_franquicias.unit_of_work import UnitOfWork
+
+
+@pytest.fixture
+def engine():
+    """Motor SQLite configurado como el de la aplicación"""
+    db_fd, db_path = tempfile.mkstemp()
+    engine = create_engine(f"sqlite:///{db_path}")
+    enable_sqlite_foreign_keys(engine)
+    enable_sqlite_savepoints(engine)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+    os.close(db_fd)
+    os.unlink(db_path)
+
+
+@pytest.fixture
+def session(engine):
+    """Sesión con la misma configuración que SessionLocal"""
+    db = sessionmaker(autoflush=False, expire_on_commit=False, bind=engine)()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def sentencias(engine):
+    """Registra las sentencias SQL y los COMMIT ejecutados sobre el motor"""
+    registradas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        registradas.append(statement.split()[0].upper())
+
+    def registrar_commit(conn):
+        registradas.append("COMMIT")
+
+    event.listen(engine, "before_cursor_execute", registrar)
+    event.listen(engine, "commit", registrar_commit)
+    yield registradas
+    event.remove(engine, "before_cursor_execute", registrar)
+    event.remove(engine, "commit", registrar_commit)
+
+
+class TestUnitOfWork:
+    """Tests para UnitOfWork y los servicios transaccionales"""
+
+    def test_crear_producto_un_commit_sin_refresh(self, session, sentencias):
+        """Test crear un producto: un INSERT validado por las restricciones y un único COMMIT"""
+        franquicia = FranquiciaService(session).crear_franquicia("F")
+        sucursal = SucursalService(session).crear_sucursal("S", franquicia.id)
+        sentencias.clear()
+
+        producto = ProductoService(session).crear_producto("P", 5, sucursal.id)
+
+        assert producto.id is not None
+        assert producto.fecha_creacion is not None
+        assert sentencias.count("COMMIT") == 1
+        # El producto y el stock máximo de su sucursal
+        assert sentencias.count("INSERT") == 2
+        # Sin validaciones previas ni SELECT tras el INSERT (RETURNING)
+        assert sentencias.count("SELECT") == 0
+
+    def test_unidades_anidadas_confirman_una_vez(self, session, sentencias):
+        """Test que los servicios comparten la transacción de la unidad externa"""
+        with UnitOfWork(session):
+            franquicia = FranquiciaService(session).crear_franquicia("F")
+            SucursalService(session).crear_sucursal("S1", franquicia.id)
+            SucursalService(session).crear_sucursal("S2", franquicia.id)
+
+        assert sentencias.count("COMMIT") == 1
+        assert session.query(Franquicia).count() == 1
+
+    def test_rollback_de_la_unidad_externa(self, session):
+        """Test que un error en la unidad externa revierte todos los pasos"""
+        with pytest.raises(ValueError):
+            with UnitOfWork(session):
+                franquicia = FranquiciaService(session).crear_franquicia("F")
+                SucursalService(session).crear_sucursal("S", franquicia.id)
+                SucursalService(session).crear_sucursal("", franquicia.id)
+
+        assert session.query(Franquicia).count() == 0
+
+    def test_error_de_validacion_no_persiste(self, session):
+        """Test que un servicio que falla no deja cambios pendientes"""
+        franquicia = FranquiciaService(session).crear_franquicia("F")
+
+        with pytest.raises(ValueError):
+            FranquiciaService(session).crear_franquicia("F")
+
+        assert session.query(Franquicia).count() == 1
+        assert franquicia.nombre == "F"
+
+    def test_savepoint_revierte_solo_su_bloque(self, session):
+        """Test que un SAVEPOINT fallido no afecta al resto de la transacción"""
+        franquicia = FranquiciaService(session).crear_franquicia("F")
+        sucursal = SucursalService(session).crear_sucursal("S", franquicia.id)
+        productos = ProductoService(session)
+
+        with UnitOfWork(session) as uow:
+            productos.crear_producto("Conservado", 1, sucursal.id)
+            with pytest.raises(ValueError):
+                with uow.savepoint():
+                    productos.crear_producto("Revertido", 1, sucursal.id)
+                    raise ValueError("fallo en el bloque")
+
+        nombres = [p.nombre for p in session.query(Producto).all()]
+        assert nombres == ["Conservado"]
+
+    def test_savepoint_al_inicio_de_la_transaccion(self, session):
+        """Test SAVEPOINT antes de cualquier escritura (requiere BEGIN explícito en SQLite)"""
+        with UnitOfWork(session) as uow:
+            with uow.savepoint():
+                FranquiciaService(session).crear_franquicia("Dentro")
+            FranquiciaService(session).crear_franquicia("Fuera")
+
+        assert session.query(Franquicia).count() == 2